@@ -0,0 +1,121 @@
+// Question bank retrieval for concept chat
+// Queries the BM25 index built offline by scripts/build_chat_index.py so chat
+// answers can be grounded in our own worked solutions and hints.
+
+import { readFileSync } from 'fs';
+import { join } from 'path';
+import { RetrievedContent } from './types';
+
+interface IndexedDoc {
+  id: string;
+  topic: string;
+  subject: string;
+  len: number;
+  stem: string;
+  solution: string;
+  hint: string;
+}
+
+interface ContentIndex {
+  version: number;
+  k1: number;
+  b: number;
+  avgdl: number;
+  docs: IndexedDoc[];
+  postings: Record<string, number[]>;
+}
+
+const INDEX_PATH = join(__dirname, '..', '..', 'data', 'chat-index.json');
+
+// Must match tokenize() in scripts/build_chat_index.py
+const TOKEN = /[a-z0-9]+/g;
+const STOPWORDS = new Set(`
+  a an and are as at be been but by can did do does for from had has have how i if in into is it its
+  of on or so than that the their them then there these they this to was were what when where which
+  who why will with would you your
+`.split(/\s+/).filter(Boolean));
+
+let index: ContentIndex | null = null;
+let scores: Float64Array | null = null;
+
+/**
+ * Loads the index once per instance; without one, retrieval returns nothing
+ */
+function loadIndex(): ContentIndex {
+  if (!index) {
+    try {
+      index = JSON.parse(readFileSync(INDEX_PATH, 'utf8')) as ContentIndex;
+      console.log('🔎 Question bank index loaded:', {
+        docs: index.docs.length,
+        terms: Object.keys(index.postings).length,
+      });
+    } catch (error) {
+      console.warn('⚠️ Question bank index unavailable, chat will not cite worked examples:', error);
+      index = { version: 0, k1: 1.2, b: 0.75, avgdl: 1, docs: [], postings: {} };
+    }
+    scores = new Float64Array(index.docs.length);
+  }
+  return index;
+}
+
+/**
+ * Tokenises text the same way the index builder did
+ */
+export function tokenize(text: string): string[] {
+  const tokens: string[] = [];
+  for (let token of (text || '').normalize('NFKC').toLowerCase().match(TOKEN) || []) {
+    if (STOPWORDS.has(token)) continue;
+    if (token.length > 4 && token.endsWith('s') && !token.endsWith('ss')) {
+      token = token.slice(0, -1);
+    }
+    tokens.push(token);
+  }
+  return tokens;
+}
+
+/**
+ * BM25 search over stems, solutions and hints
+ * Only documents sharing a query term are touched, so a query costs well under a millisecond
+ */
+export function searchQuestionBank(
+  query: string,
+  options: { subject?: string; limit?: number; minScore?: number } = {}
+): RetrievedContent[] {
+  const { docs, postings, k1, b, avgdl } = loadIndex();
+  const limit = options.limit ?? 3;
+  const subject = options.subject?.toLowerCase();
+  const acc = scores!;
+  const touched: number[] = [];
+
+  for (const term of new Set(tokenize(query))) {
+    const posting = postings[term];
+    if (!posting) continue;
+    const df = posting.length / 2;
+    const idf = Math.log(1 + (docs.length - df + 0.5) / (df + 0.5));
+    for (let i = 0; i < posting.length; i += 2) {
+      const doc = posting[i];
+      const tf = posting[i + 1];
+      if (acc[doc] === 0) touched.push(doc);
+      acc[doc] += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * docs[doc].len / avgdl));
+    }
+  }
+
+  // Prefer the concept card's subject, but fall back to everything rather than nothing
+  const sameSubject = subject ? touched.filter(doc => docs[doc].subject === subject) : touched;
+  const candidates = sameSubject.length > 0 ? sameSubject : touched;
+  const ranked = candidates
+    .filter(doc => acc[doc] >= (options.minScore ?? 0))
+    .sort((x, y) => acc[y] - acc[x] || x - y)
+    .slice(0, limit)
+    .map(doc => ({
+      questionId: docs[doc].id,
+      topic: docs[doc].topic,
+      score: acc[doc],
+      stem: docs[doc].stem,
+      solution: docs[doc].solution,
+      hint: docs[doc].hint,
+    }));
+
+  for (const doc of touched) acc[doc] = 0;
+  return ranked;
+}
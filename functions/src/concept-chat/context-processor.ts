@@ -1,7 +1,8 @@
 // Context processor for extracting educational context from any concept card
 // Dynamically processes concept cards from any subject or topic
 
-import { ConceptContext, ProcessedContext } from './types';
+import { ConceptContext, ProcessedContext, RetrievedContent } from './types';
+import { searchQuestionBank } from './content-index';
 
 /**
  * Processes concept card context for AI understanding
@@ -12,7 +13,7 @@ export class ConceptContextProcessor {
   /**
    * Process concept context into AI-ready format
    */
-  async process(context: ConceptContext): Promise<ProcessedContext> {
+  async process(context: ConceptContext, question?: string): Promise<ProcessedContext> {
     console.log('📋 Processing concept context:', {
       subject: context.subject,
       competencyLevel: context.competencyLevel,
@@ -39,6 +40,9 @@ export class ConceptContextProcessor {
     
     // Define topic scope for validation
     const topicScope = this.defineTopicScope(context);
+    
+    // Retrieve matching worked solutions and hints from the question bank
+    const relatedContent = this.retrieveRelatedContent(context, keyConcepts, question);
 
     const processed: ProcessedContext = {
       originalContext: context,
@@ -50,6 +54,7 @@ export class ConceptContextProcessor {
       complexityLevel,
       educationalKeywords,
       topicScope,
+      relatedContent,
     };
 
     console.log('✅ Context processing completed:', {
@@ -60,6 +65,7 @@ export class ConceptContextProcessor {
       complexity: complexityLevel,
       educationalKeywords: educationalKeywords.length,
       topicScope: topicScope.length,
+      relatedContent: relatedContent.map(item => item.questionId),
     });
 
     return processed;
@@ -387,6 +393,22 @@ export class ConceptContextProcessor {
     return categories;
   }
 
+  /**
+   * Find question bank content matching the student's question and the card's key ideas
+   */
+  private retrieveRelatedContent(
+    context: ConceptContext,
+    keyConcepts: string[],
+    question?: string
+  ): RetrievedContent[] {
+    // The student's question leads; the card's key question and concepts keep results on topic
+    const query = [question, question, context.keyQuestion, ...keyConcepts.slice(0, 5)]
+      .filter(Boolean)
+      .join(' ');
+    
+    return searchQuestionBank(query, { subject: context.subject, limit: 3, minScore: 5 });
+  }
+
   /**
    * Get age range based on competency level
    */
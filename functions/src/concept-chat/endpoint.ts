@@ -90,7 +90,7 @@ async function processConceptChatRequest(request: ConceptChatRequest, startTime:
 
   // 3. Process concept context for AI understanding
   const contextProcessor = new ConceptContextProcessor();
-  const processedContext = await contextProcessor.process(request.conceptContext);
+  const processedContext = await contextProcessor.process(request.conceptContext, request.question);
   
   console.log('📋 Context processed:', {
     vocabularyTerms: Object.keys(processedContext.vocabularyMap).length,
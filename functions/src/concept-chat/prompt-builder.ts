@@ -235,6 +235,20 @@ ${this.context.keyConcepts.map(concept => `- ${concept}`).join('\n')}`;
 ${truncatedExplanation}`;
     }
 
+    // Add worked examples from our question bank
+    if (this.context.relatedContent.length > 0) {
+      userPrompt += `\n\nWorked Examples From Our Question Bank (use these to ground your explanation; do not quote them as homework answers):`;
+      this.context.relatedContent.forEach((item, index) => {
+        userPrompt += `\n${index + 1}. Question: ${item.stem}`;
+        if (item.solution) {
+          userPrompt += `\n   Solution: ${item.solution}`;
+        }
+        if (item.hint) {
+          userPrompt += `\n   Hint: ${item.hint}`;
+        }
+      });
+    }
+
     // Add conversation history if available
     if (conversationContext && conversationContext.trim().length > 0) {
       userPrompt += `\n\n${conversationContext}`;
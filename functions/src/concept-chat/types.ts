@@ -72,6 +72,17 @@ export interface ProcessedContext {
   complexityLevel: 'basic' | 'intermediate' | 'advanced';
   educationalKeywords: string[];
   topicScope: string[];
+  relatedContent: RetrievedContent[];
+}
+
+// Question bank excerpt retrieved for grounding a chat answer
+export interface RetrievedContent {
+  questionId: string;
+  topic: string;
+  score: number;
+  stem: string;
+  solution: string;
+  hint: string;
 }
 
 // Response types
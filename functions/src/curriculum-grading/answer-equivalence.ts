@@ -0,0 +1,170 @@
+// Compiled Answer-Equivalence Tables
+// Tables are built offline by scripts/compile_answer_tables.py; a final answer
+// the table accepts is graded correct without calling Gemini.
+
+import { readFileSync } from "fs";
+import { join } from "path";
+
+/**
+ * One question's compiled answers (see compile_answer_tables.py)
+ */
+export interface AnswerTableEntry {
+  accept: string[];
+  value: string | null;
+  variable?: string;
+}
+
+interface AnswerTable {
+  version: number;
+  entries: Record<string, AnswerTableEntry>;
+}
+
+export type AnswerVerdict = "correct" | "unknown";
+
+const TABLE_PATH = join(__dirname, "..", "..", "data", "answer-tables.json");
+const MAX_DIGITS = 15;
+
+// Must match normalize_answer() in scripts/compile_answer_tables.py; both are
+// run against functions/test/fixtures/answer-normalization.json
+const VULGAR_FRACTION = /(\d)([¼-¾⅐-⅞])/g;
+const VARIABLE_PREFIX = /^([a-z])\s*=\s*/;
+const THOUSANDS = /(\d),(?=\d{3}(?!\d))/g;
+const PUNCTUATION_SPACE = /\s*([^\w\s])\s*/g;
+const NUMBER = /^([+-]?)(\d+(?:\.\d+)?|\.\d+)(?: (\d+)\/(\d+))?$/;
+const FRACTION = /^([+-]?)(\d+)\/(\d+)$/;
+
+let loaded: { table: AnswerTable; accepted: Map<string, Set<string>> } | null = null;
+
+/**
+ * Loads the compiled table once per instance; a missing table disables the lookup
+ */
+function loadTable(): { table: AnswerTable; accepted: Map<string, Set<string>> } {
+  if (!loaded) {
+    let table: AnswerTable;
+    try {
+      table = JSON.parse(readFileSync(TABLE_PATH, "utf8")) as AnswerTable;
+    } catch (error) {
+      console.warn("Answer tables unavailable, grading every answer with the LLM:", error);
+      table = { version: 0, entries: {} };
+    }
+    const accepted = new Map<string, Set<string>>();
+    for (const [questionId, entry] of Object.entries(table.entries)) {
+      accepted.set(questionId, new Set(entry.accept));
+    }
+    loaded = { table, accepted };
+  }
+  return loaded;
+}
+
+/**
+ * Normalises a typed answer the same way the compiler normalised expectedAnswers
+ */
+export function normalizeAnswer(text: string): { key: string; variable?: string } {
+  let normalized = text
+    .replace(VULGAR_FRACTION, "$1 $2")
+    .normalize("NFKC")
+    .replace(/⁄/g, "/")
+    .replace(/−/g, "-")
+    .trim()
+    .toLowerCase();
+
+  let variable: string | undefined;
+  const prefix = VARIABLE_PREFIX.exec(normalized);
+  if (prefix) {
+    variable = prefix[1];
+    normalized = normalized.slice(prefix[0].length);
+  }
+
+  normalized = normalized
+    .replace(/\$/g, "")
+    .replace(THOUSANDS, "$1")
+    .replace(/\s+/g, " ")
+    .replace(PUNCTUATION_SPACE, "$1")
+    .trim();
+
+  return { key: normalized, variable };
+}
+
+function gcd(a: number, b: number): number {
+  while (b) {
+    [a, b] = [b, a % b];
+  }
+  return a;
+}
+
+/**
+ * Exact value of a normalised numeric answer as [numerator, denominator]
+ */
+function exactValue(key: string): [number, number] | null {
+  if (key.replace(/\D/g, "").length > MAX_DIGITS) {
+    return null;
+  }
+
+  let num: number;
+  let den: number;
+  let sign: string;
+  const fraction = FRACTION.exec(key);
+  const number = fraction ? null : NUMBER.exec(key);
+  if (fraction) {
+    sign = fraction[1];
+    num = parseInt(fraction[2], 10);
+    den = parseInt(fraction[3], 10);
+  } else if (number) {
+    sign = number[1];
+    const [whole, decimals = ""] = number[2].split(".");
+    den = Math.pow(10, decimals.length);
+    num = parseInt((whole || "0") + decimals, 10);
+    if (number[3] !== undefined) {
+      const mixedDen = parseInt(number[4], 10);
+      if (decimals || mixedDen === 0) {
+        return null;
+      }
+      num = num * mixedDen + parseInt(number[3], 10);
+      den = mixedDen;
+    }
+  } else {
+    return null;
+  }
+
+  if (den === 0) {
+    return null;
+  }
+  const divisor = gcd(num, den) || 1;
+  return [(sign === "-" ? -num : num) / divisor, den / divisor];
+}
+
+function canonical([num, den]: [number, number]): string {
+  return den === 1 ? `${num}` : `${num}/${den}`;
+}
+
+/**
+ * Checks a final answer against the compiled table in constant time.
+ * "unknown" means the table does not accept it and the LLM should grade.
+ */
+export function checkCompiledAnswer(
+  questionId: string,
+  studentAnswer: string
+): { verdict: AnswerVerdict; entry?: AnswerTableEntry } {
+  const { table, accepted } = loadTable();
+  const entry = table.entries[questionId];
+  if (!entry) {
+    return { verdict: "unknown" };
+  }
+
+  const { key, variable } = normalizeAnswer(studentAnswer);
+  if (variable && entry.variable && variable !== entry.variable) {
+    return { verdict: "unknown", entry };
+  }
+  if (accepted.get(questionId)!.has(key)) {
+    return { verdict: "correct", entry };
+  }
+
+  const value = exactValue(key);
+  if (!value || entry.value === null) {
+    return { verdict: "unknown", entry };
+  }
+  if (canonical(value) === entry.value) {
+    return { verdict: "correct", entry };
+  }
+  return { verdict: "unknown", entry };
+}
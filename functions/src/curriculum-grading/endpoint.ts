@@ -8,6 +8,7 @@ import { onCall, HttpsError } from "firebase-functions/v2/https";
 import { onRequest } from "firebase-functions/v2/https";
 import * as admin from "firebase-admin";
 import { GoogleGenerativeAI } from "@google/generative-ai";
+import { checkCompiledAnswer } from "./answer-equivalence";
 
 // Initialize Firestore
 const db = admin.firestore();
@@ -51,7 +52,7 @@ interface GradingResult {
 
 interface GradingRequest {
   questionId: string;
-  questionType: "MCQ" | "SHORT_ANSWER" | "EXTENDED_RESPONSE";
+  questionType: "MCQ" | "SHORT_ANSWER" | "EXTENDED_RESPONSE" | "WORKED_SOLUTION";
   questionStem: string;
   modelSolution: string;
   studentAnswer: string;
@@ -70,7 +71,7 @@ interface GradingRequest {
 // -----------------------------------------------------------------------------
 
 function calculateMaxPoints(
-  questionType: "MCQ" | "SHORT_ANSWER" | "EXTENDED_RESPONSE",
+  questionType: GradingRequest["questionType"],
   difficulty: number | undefined
 ): number {
   const pointsMatrix: Record<string, number[]> = {
@@ -95,6 +96,64 @@ function getCorrectnessFromPercentage(percentage: number): Correctness {
   return "incorrect";
 }
 
+// -----------------------------------------------------------------------------
+// Compiled Answer Tables - WORKED_SOLUTION final answers
+// -----------------------------------------------------------------------------
+
+/**
+ * Final answers in a WORKED_SOLUTION submission. The client sends
+ * JSON.stringify({workLines, finalAnswer, finalAnswerPlainText}), or the
+ * plain text answer when it could not build that.
+ */
+function workedSolutionAnswers(studentAnswer: string): string[] {
+  let work: { finalAnswer?: unknown; finalAnswerPlainText?: unknown };
+  try {
+    work = JSON.parse(studentAnswer);
+  } catch {
+    return [studentAnswer];
+  }
+  if (!work || typeof work !== "object") {
+    return [studentAnswer];
+  }
+  return [work.finalAnswerPlainText, work.finalAnswer]
+    .filter((answer): answer is string => typeof answer === "string" && answer.trim().length > 0);
+}
+
+/**
+ * Full marks for a WORKED_SOLUTION whose final answer the compiled table
+ * accepts. Anything else returns null and is graded by Gemini, which gives
+ * partial credit for the working (a correct method with an arithmetic slip
+ * is still worth 70-85%).
+ */
+function gradeFromAnswerTable(request: GradingRequest): GradingResult | null {
+  if (request.questionType !== "WORKED_SOLUTION" || !request.questionId) {
+    return null;
+  }
+  const accepted = workedSolutionAnswers(request.studentAnswer)
+    .find((answer) => checkCompiledAnswer(request.questionId, answer).verdict === "correct");
+  if (accepted === undefined) {
+    return null;
+  }
+
+  const maxScore = calculateMaxPoints(request.questionType, request.difficulty);
+  return {
+    score: maxScore,
+    maxScore,
+    percentage: 100,
+    correctness: "correct",
+    feedback: {
+      summary: "Correct! Your final answer matches the expected answer.",
+      whatWasRight: [`Final answer: ${accepted.trim()}`],
+      whatWasMissing: [],
+      misconceptions: [],
+      suggestions: [],
+    },
+    gradedAt: new Date().toISOString(),
+    gradedBy: "auto",
+    confidence: 1,
+  };
+}
+
 // -----------------------------------------------------------------------------
 // Build Grading Prompt - The heart of pedagogical feedback
 // -----------------------------------------------------------------------------
@@ -259,6 +318,37 @@ function parseGradingResponse(response: string): AIGradingResponse {
   }
 }
 
+// -----------------------------------------------------------------------------
+// Grading History
+// -----------------------------------------------------------------------------
+
+async function saveGradingHistory(
+  userId: string | undefined,
+  request: GradingRequest,
+  gradingResult: GradingResult
+): Promise<void> {
+  if (!userId) {
+    return;
+  }
+  try {
+    await db
+      .collection("users")
+      .doc(userId)
+      .collection("gradingHistory")
+      .add({
+        questionId: request.questionId,
+        questionType: request.questionType,
+        studentAnswer: request.studentAnswer,
+        result: gradingResult,
+        curriculum: request.curriculum,
+        createdAt: admin.firestore.FieldValue.serverTimestamp(),
+      });
+  } catch (saveError) {
+    console.warn("Failed to save grading history:", saveError);
+    // Don't fail the request for this
+  }
+}
+
 // -----------------------------------------------------------------------------
 // Main Cloud Function: gradeAnswer
 // -----------------------------------------------------------------------------
@@ -276,8 +366,8 @@ export const gradeAnswer = onCall({
     hasData: !!callRequest.data,
   });
 
-  // Note: Authentication optional for now to support guest users
-  const userId = callRequest.auth?.uid || "guest";
+  // Note: Authentication optional for now to support guest users;
+  // grading history is only saved for signed-in users
   const request = callRequest.data as GradingRequest;
 
   // Validate input
@@ -306,6 +396,14 @@ export const gradeAnswer = onCall({
 
   console.log(`📝 Grading ${request.questionType} for question ${request.questionId}`);
 
+  // Final answers the compiled table accepts never reach Gemini
+  const tableResult = gradeFromAnswerTable(request);
+  if (tableResult) {
+    await saveGradingHistory(callRequest.auth?.uid, request, tableResult);
+    console.log(`✅ Graded from answer table in ${Date.now() - startTime}ms`);
+    return tableResult;
+  }
+
   try {
     // Get Gemini API key
     const apiKey = process.env.GEMINI_API_KEY;
@@ -364,25 +462,7 @@ export const gradeAnswer = onCall({
     };
 
     // Optionally save grading record for analytics (if user is authenticated)
-    if (callRequest.auth?.uid) {
-      try {
-        await db
-          .collection("users")
-          .doc(userId)
-          .collection("gradingHistory")
-          .add({
-            questionId: request.questionId,
-            questionType: request.questionType,
-            studentAnswer: request.studentAnswer,
-            result: gradingResult,
-            curriculum: request.curriculum,
-            createdAt: admin.firestore.FieldValue.serverTimestamp(),
-          });
-      } catch (saveError) {
-        console.warn("Failed to save grading history:", saveError);
-        // Don't fail the request for this
-      }
-    }
+    await saveGradingHistory(callRequest.auth?.uid, request, gradingResult);
 
     const totalDuration = Date.now() - startTime;
     console.log(`✅ Grading completed in ${totalDuration}ms: ${correctness} (${aiResult.percentage}%)`);
@@ -7,7 +7,9 @@ import { validateGradeJson } from "../validator";
 import { buildPrompt } from "../prompts";
 
 // DeepSeek configuration  
-const DEEPSEEK_BASE_URL = "https://api.deepseek.com";
+// DEEPSEEK_BASE_URL points the adapters at a stand-in, e.g. the stub provider
+// in scripts/loadtest_grading.py
+const DEEPSEEK_BASE_URL = process.env.DEEPSEEK_BASE_URL || "https://api.deepseek.com";
 const DEFAULT_MAX_TOKENS = 450;  // Sufficient for 4-5 line answers with full feedback
 const REASONER_MAX_TOKENS = 1200; // Increased for reasoner with CoT - needs more tokens for reasoning + output
 const TEMPERATURE = 0;
@@ -0,0 +1,79 @@
+// Precomputed Prompt Prefixes
+// Tables are built offline by scripts/compile_prompt_prefixes.py; a hit skips
+// sanitizing the stem and solution and gives the provider a byte-stable
+// prompt prefix per question, so its prompt cache can serve it.
+
+import { readFileSync } from "fs";
+import { join } from "path";
+import { createHash } from "crypto";
+import { GradeRequest } from "./types";
+import { PROMPT_VERSION } from "./prompts";
+
+/**
+ * One question's precomputed prompt (see compile_prompt_prefixes.py)
+ */
+export interface PromptPrefixEntry {
+  source: string;
+  stem: string;
+  referenceAnswer: string;
+  prefix: string;
+  tokens: number;
+}
+
+interface PromptPrefixTable {
+  version: number;
+  promptVersion: number;
+  entries: Record<string, PromptPrefixEntry>;
+}
+
+const TABLE_PATH = join(__dirname, "..", "..", "data", "grading-prefixes.json");
+
+let loaded: PromptPrefixTable | null = null;
+
+/**
+ * Loads the table once per instance; a missing table, or one built for
+ * another prompt version, disables the lookup
+ */
+function loadTable(): PromptPrefixTable {
+  if (!loaded) {
+    let table: PromptPrefixTable;
+    try {
+      table = JSON.parse(readFileSync(TABLE_PATH, "utf8")) as PromptPrefixTable;
+    } catch (error) {
+      console.warn("Prompt prefixes unavailable, building every prompt at request time:", error);
+      table = { version: 0, promptVersion: PROMPT_VERSION, entries: {} };
+    }
+    if (table.promptVersion !== PROMPT_VERSION) {
+      console.warn(`Prompt prefixes are for prompt version ${table.promptVersion}, expected ${PROMPT_VERSION}; ignoring them`);
+      table = { ...table, entries: {} };
+    }
+    loaded = table;
+  }
+  return loaded;
+}
+
+/**
+ * Hash of the question fields a prefix is built from.
+ * Must match source_hash() in scripts/compile_prompt_prefixes.py
+ */
+export function sourceHash(stem: string, solution: string, meta: GradeRequest["meta"]): string {
+  const fields = [stem, solution, meta.subject ?? null, meta.topic ?? null, meta.year ?? null];
+  return createHash("sha256").update(JSON.stringify(fields), "utf8").digest("hex");
+}
+
+/**
+ * The precomputed entry for a question, or null when there is none or the
+ * question has been edited since the table was built
+ */
+export function precomputedPrompt(
+  questionId: string,
+  stem: string,
+  solution: string,
+  meta: GradeRequest["meta"]
+): PromptPrefixEntry | null {
+  const entry = loadTable().entries[questionId];
+  if (!entry || entry.source !== sourceHash(stem, solution, meta)) {
+    return null;
+  }
+  return entry;
+}
@@ -3,15 +3,34 @@
 
 import { GradeRequest } from "./types";
 
+// Bump when the prompt text changes; precomputed prefixes built for another
+// version are ignored (see scripts/compile_prompt_prefixes.py)
+export const PROMPT_VERSION = 1;
+
 /**
  * Builds the user prompt for LLM grading
  * Implements security measures and structured prompting
+ *
+ * Everything before the student answer depends only on the question, so a
+ * precomputed prefix is used when the request carries one. The repair note
+ * goes after the student answer to keep that prefix byte-stable.
  */
 export function buildPrompt(req: GradeRequest, isRepair: boolean = false): string {
   const repairInstructions = isRepair ? `
-IMPORTANT: The previous response was invalid JSON. Please fix the JSON structure and ensure it exactly matches the schema.
-` : "";
 
+IMPORTANT: The previous response was invalid JSON. Please fix the JSON structure and ensure it exactly matches the schema.` : "";
+
+  const prefix = req.promptPrefix ?? buildPromptPrefix(req.stem, req.referenceAnswer, req.meta);
+  return `${prefix}${escapeBackticks(req.studentAnswer)}\`\`\`${repairInstructions}`;
+}
+
+/**
+ * Builds the static part of the prompt, up to and including the opening fence
+ * of the student answer. Must match prompt_prefix() in
+ * scripts/compile_prompt_prefixes.py; change both together and bump
+ * PROMPT_VERSION.
+ */
+export function buildPromptPrefix(stem: string, referenceAnswer: string, meta: GradeRequest["meta"]): string {
   return `TASK:
 1) From REFERENCE_ANSWER, infer 3–6 key facts (short phrases) that determine correctness.
 2) Compare STUDENT_ANSWER to REFERENCE_ANSWER:
@@ -23,38 +42,38 @@ IMPORTANT: The previous response was invalid JSON. Please fix the JSON structure
 4) Produce a percent score in [0..1] for overall correctness.
 5) Output student_friendly and parent_friendly feedback.
 6) Return valid JSON output ONLY matching the schema exactly. Your response must be a well-formed JSON object.
-${repairInstructions}
+
 CONTEXT:
-SUBJECT: ${req.meta.subject}   TOPIC: ${req.meta.topic || "General"}   YEAR: ${req.meta.year || "Unknown"}
+SUBJECT: ${meta.subject}   TOPIC: ${meta.topic || "General"}   YEAR: ${meta.year || "Unknown"}
 
 SCHEMA (follow exactly):
 {
   "overall": {"pct": 0.0, "label": "correct|mostly-correct|partial|incorrect", "confidence": 0.0},
   "inferred_key_facts": [{"id":"f1","text":"key fact description"}],
   "concepts": {
-    "hit": ["f1", "f3"], 
-    "partial": [{"id":"f2","reason":"why partial"}], 
+    "hit": ["f1", "f3"],
+    "partial": [{"id":"f2","reason":"why partial"}],
     "missing": ["f4"]
   },
-  "misconceptions": ["misconception text"], 
+  "misconceptions": ["misconception text"],
   "contradictions": ["contradiction text"],
   "explanations": {"student_friendly": "feedback for student", "parent_friendly": "feedback for parent"}
 }
 
 LABEL RULES (use exact lowercase):
 - "correct": pct >= 0.85
-- "mostly-correct": pct >= 0.70 and < 0.85  
+- "mostly-correct": pct >= 0.70 and < 0.85
 - "partial": pct >= 0.40 and < 0.70
 - "incorrect": pct < 0.40
 
 STEM (read-only):
-\`\`\`${escapeBackticks(req.stem)}\`\`\`
+\`\`\`${escapeBackticks(stem)}\`\`\`
 
 REFERENCE_ANSWER (authoritative, concise; read-only):
-\`\`\`${escapeBackticks(req.referenceAnswer)}\`\`\`
+\`\`\`${escapeBackticks(referenceAnswer)}\`\`\`
 
 STUDENT_ANSWER (grade this only):
-\`\`\`${escapeBackticks(req.studentAnswer)}\`\`\``;
+\`\`\``;
 }
 
 /**
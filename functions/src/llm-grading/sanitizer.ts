@@ -124,6 +124,53 @@ export function detectPromptInjection(input: string): boolean {
   return injectionPatterns.some(pattern => pattern.test(input));
 }
 
+/**
+ * Validates and sanitizes the student answer on its own
+ */
+export function validateStudentAnswer(studentAnswer: string): string {
+  // Check for prompt injection attempts
+  if (detectPromptInjection(studentAnswer)) {
+    throw new Error("Input contains potential prompt injection patterns");
+  }
+
+  const sanitized = sanitizeInput(studentAnswer);
+  if (sanitized.length < 3) {
+    throw new Error("Student answer too short (minimum 3 characters)");
+  }
+  return sanitized;
+}
+
+/**
+ * Input validation for questions with a precomputed prompt prefix: the stem
+ * and reference answer were sanitized when the prefix was built, but the
+ * stem is still checked for injection and the reference for length
+ */
+export function validatePrecomputedInputs(
+  studentAnswer: string,
+  stem: string,
+  precomputed: { stem: string; referenceAnswer: string }
+): {
+  studentAnswer: string;
+  stem: string;
+  referenceAnswer: string;
+} {
+  const sanitizedStudent = validateStudentAnswer(studentAnswer);
+
+  if (detectPromptInjection(stem)) {
+    throw new Error("Question stem contains invalid content");
+  }
+
+  if (precomputed.referenceAnswer.length < 5) {
+    throw new Error("Reference answer too short after processing");
+  }
+
+  return {
+    studentAnswer: sanitizedStudent,
+    stem: precomputed.stem,
+    referenceAnswer: precomputed.referenceAnswer,
+  };
+}
+
 /**
  * Comprehensive input validation for grading requests
  */
@@ -132,25 +179,16 @@ export function validateGradingInputs(studentAnswer: string, stem: string, solut
   stem: string;
   referenceAnswer: string;
 } {
-  // Check for prompt injection attempts
-  if (detectPromptInjection(studentAnswer)) {
-    throw new Error("Input contains potential prompt injection patterns");
-  }
+  const sanitizedStudent = validateStudentAnswer(studentAnswer);
 
   if (detectPromptInjection(stem)) {
     throw new Error("Question stem contains invalid content");
   }
 
-  // Sanitize all inputs
-  const sanitizedStudent = sanitizeInput(studentAnswer);
+  // Sanitize question inputs
   const sanitizedStem = sanitizeMarkdown(stem);
   const sanitizedReference = extractConciseAnswer(solution);
 
-  // Additional validations
-  if (sanitizedStudent.length < 3) {
-    throw new Error("Student answer too short (minimum 3 characters)");
-  }
-
   if (sanitizedReference.length < 5) {
     throw new Error("Reference answer too short after processing");
   }
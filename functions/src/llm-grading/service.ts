@@ -10,7 +10,7 @@ import {
   GradingError,
   WeakRubricDoc 
 } from "./types";
-import { validateGradingInputs } from "./sanitizer";
+import { validateGradingInputs, validatePrecomputedInputs } from "./sanitizer";
 import { validateGradeJson } from "./validator";
 import { 
   calculateScore, 
@@ -19,6 +19,7 @@ import {
   buildGradingBlock 
 } from "./scoring";
 import { heuristicGrade } from "./heuristic";
+import { precomputedPrompt } from "./prompt-prefixes";
 import { createDeepSeekAdapters } from "./adapters/deepseek";
 import { createGeminiAdapters } from "./adapters/gemini";
 import { createHash } from "crypto";
@@ -108,24 +109,26 @@ export class GradingService {
       const question = await this.fetchQuestion(questionId);
       console.log(`✅ Step 1: Question fetched successfully`);
       
-      // Step 2: Validate inputs and sanitize
-      const sanitized = validateGradingInputs(
-        studentAnswer,
-        question.stem_md,
-        question.solution_md
-      );
+      // Step 2: Validate inputs and sanitize; questions with a precomputed
+      // prompt prefix reuse its sanitized stem and reference answer
+      const meta: GradeRequest["meta"] = {
+        subject: question.subject,
+        topic: question.tags?.topics?.[0],
+        year: question.tags?.years?.[0],
+        qcs: question.QCS
+      };
+      const precomputed = precomputedPrompt(questionId, question.stem_md, question.solution_md, meta);
+      const sanitized = precomputed
+        ? validatePrecomputedInputs(studentAnswer, question.stem_md, precomputed)
+        : validateGradingInputs(studentAnswer, question.stem_md, question.solution_md);
       
       // Step 3: Build grading request
       const gradeRequest: GradeRequest = {
         stem: sanitized.stem,
         referenceAnswer: sanitized.referenceAnswer,
         studentAnswer: sanitized.studentAnswer,
-        meta: {
-          subject: question.subject,
-          topic: question.tags?.topics?.[0],
-          year: question.tags?.years?.[0],
-          qcs: question.QCS
-        }
+        meta,
+        ...(precomputed && { promptPrefix: precomputed.prefix })
       };
       
       // Step 4: Get attempt data for penalties
@@ -14,6 +14,8 @@ export interface GradeRequest {
     year?: number;
     qcs?: number;
   };
+  // Precomputed static prompt up to the student answer (see prompt-prefixes.ts)
+  promptPrefix?: string;
 }
 
 // LLM Provider Adapter interface
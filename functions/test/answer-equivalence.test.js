@@ -0,0 +1,17 @@
+// test/answer-equivalence.test.js
+const { test, suite } = require('node:test');
+const assert = require('node:assert');
+
+const { normalizeAnswer } = require('../lib/curriculum-grading/answer-equivalence');
+const { cases } = require('./fixtures/answer-normalization.json');
+
+suite('Answer-equivalence normalisation', () => {
+  // scripts/tests/test_compile_answer_tables.py runs normalize_answer() over the same cases
+  for (const { input, key, variable } of cases) {
+    test(`normalizes ${JSON.stringify(input)} like the compiler`, () => {
+      const normalized = normalizeAnswer(input);
+      assert.strictEqual(normalized.key, key);
+      assert.strictEqual(normalized.variable ?? null, variable);
+    });
+  }
+});
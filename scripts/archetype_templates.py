@@ -0,0 +1,1812 @@
+"""
+Parametric templates for the NSW Selective mathematical-reasoning archetypes.
+
+Each template turns one archetype (questions/nsw-selective/qaN-*) into a
+generator. `params` lists the values each parameter is drawn from; a batch
+draws every parameter as a column (rng.choices over the whole batch, or a
+callable for structured values) and derive() applies the constraints,
+returning None for rows that break them. The derived values then give:
+
+  answer         the correct value, computed from the parameters
+  check()        the answer substituted back into the question's conditions
+  distractors()  (value, distractorType, feedback), most plausible first;
+                 generate_variants.py keeps the first four that differ from
+                 the answer and from each other
+  stem(), solution(), hints(), steps(), explain()
+                 the text, in the register of the hand-written items
+
+Values are ints or Fractions; text() renders them as option text. A
+distractor is only used if it is exact to as many decimal places as the
+answer, or to `decimals` places if that is more; `decimals = None` lets
+options be fractions. So a whole answer only gets whole distractors (no
+"3 hours 57/5 minutes" or "40/3 grams").
+Templates are registered in TEMPLATES by archetypeId. qa3 (shape facts),
+qa21 (multi-concept) and qa23 (data interpretation) have no template: their
+items are recall or prose judgements rather than a computation over numbers.
+"""
+
+from fractions import Fraction
+from math import comb, gcd, perm
+from types import SimpleNamespace
+
+NAMES = ('Emma', 'Liam', 'Olivia', 'Noah', 'Ava', 'Jack', 'Mia', 'Lucas', 'Chloe', 'Ethan',
+         'Zoe', 'Oliver', 'Ruby', 'Leo', 'Isla', 'Henry', 'Grace', 'Max', 'Aria', 'Sam')
+DAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+NUMBER_WORDS = {2: 'Two', 3: 'Three', 4: 'Four', 5: 'Five', 6: 'Six'}
+ORDINALS = {4: 'fourth', 5: 'fifth', 6: 'sixth', 7: 'seventh'}
+
+
+# ============================================
+# FORMATTING
+# ============================================
+def num(value):
+    """7, 19.8 or 4/9: decimals only when they terminate within 3 places."""
+    value = Fraction(value)
+    if value.denominator == 1:
+        return str(value.numerator)
+    scaled = value * 1000
+    if scaled.denominator == 1:
+        return f"{float(value):.3f}".rstrip('0')
+    return f"{value.numerator}/{value.denominator}"
+
+
+def money(value):
+    value = Fraction(value)
+    if value.denominator == 1:
+        return f"${value.numerator}"
+    return f"${float(value):.2f}"
+
+
+def frac(value):
+    value = Fraction(value)
+    return str(value.numerator) if value.denominator == 1 else f"{value.numerator}/{value.denominator}"
+
+
+def count(n, singular, plural=None):
+    return f"{n} {singular if n == 1 else plural or singular + 's'}"
+
+
+def clock(minutes):
+    """Minutes after midnight (any day) as 8:15 AM."""
+    hour, minute = divmod(minutes % (24 * 60), 60)
+    return f"{(hour - 1) % 12 + 1}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+def duration(minutes):
+    hours, minutes = divmod(minutes, 60)
+    parts = ([count(hours, 'hour')] if hours else []) + ([count(minutes, 'minute')] if minutes else [])
+    return ' '.join(parts) or '0 minutes'
+
+
+def article(noun, capital=False):
+    word = ('an ' if noun[0] in 'aeiou' else 'a ') + noun
+    return word[0].upper() + word[1:] if capital else word
+
+
+def methodology(title, steps, answer=None):
+    """The hand-written items' solution layout: bold methodology title, numbered steps."""
+    parts = [f"**Methodology: {title}**"]
+    for i, (heading, body) in enumerate(steps, 1):
+        parts.append(f"**Step {i}: {heading}**\n{body}")
+    if answer:
+        parts.append(f"**Answer: {answer}**")
+    return '\n\n'.join(parts)
+
+
+def _rows(*values):
+    return lambda rng, k: [rng.choice(values) for _ in range(k)]
+
+
+# ============================================
+# BASE
+# ============================================
+class Template:
+    archetype = None
+    title = None
+    version = 1
+    params = {}
+    concepts = None             # conceptsRequired; default: the archetype's first item
+    decimals = 0                # decimal places any option may show; None allows fractions
+
+    def draw(self, rng, k):
+        """`k` parameter rows, drawn one column at a time."""
+        columns = [spec(rng, k) if callable(spec) else rng.choices(spec, k=k) for spec in self.params.values()]
+        return [dict(zip(self.params, row)) for row in zip(*columns)]
+
+    def bind(self, params):
+        """Parameters plus derived values, or None when a constraint fails."""
+        derived = self.derive(params)
+        return None if derived is None else SimpleNamespace(**params, **derived)
+
+    def derive(self, p):
+        raise NotImplementedError
+
+    def check(self, v):
+        raise NotImplementedError
+
+    def distractors(self, v):
+        raise NotImplementedError
+
+    def text(self, value, v):
+        return num(value)
+
+    def difficulty(self, v):
+        return 2
+
+    def stem(self, v):
+        raise NotImplementedError
+
+    def solution(self, v):
+        raise NotImplementedError
+
+    def hints(self, v):
+        raise NotImplementedError
+
+    def steps(self, v):
+        raise NotImplementedError
+
+    def explain(self, v):
+        raise NotImplementedError
+
+
+# ============================================
+# TEMPLATES
+# ============================================
+class PlaylistSequence(Template):
+    archetype = 'qa1'
+    title = 'Playlist/Sequence Duration'
+    params = {
+        'context': (('playlist', 'song', 'minute'), ('training plan', 'run', 'kilometre'),
+                    ('reading challenge', 'session', 'minute')),
+        'first': range(2, 10),
+        'step': range(1, 5),
+        'n': range(4, 9),
+    }
+
+    def derive(self, p):
+        terms = [p['first'] + i * p['step'] for i in range(p['n'])]
+        return {'terms': terms, 'last': terms[-1], 'answer': sum(terms)}
+
+    def check(self, v):
+        return 2 * v.answer == v.n * (v.first + v.last)
+
+    def text(self, value, v):
+        return count(value, v.context[2])
+
+    def _names(self, v):
+        return v.context
+
+    def distractors(self, v):
+        plan, item, unit = self._names(v)
+        terms = ', '.join(map(str, v.terms))
+        return [
+            (v.last, 'partial_solution', f"This is just the length of the last {item}. "
+                                          f"You need to add ALL {v.n} {item}s together."),
+            (v.n * v.last, 'misconception_answer', f"This is {v.last} × {v.n}. But the {item}s aren't all "
+                                                   f"{v.last} {unit}s - they start at {v.first} and increase."),
+            (v.n * v.first, 'wrong_operation', f"This is just {v.first} × {v.n}. Each {item} is {v.step} "
+                                               f"{count(v.step, unit)[2:]} longer than the previous one."),
+            (v.answer - v.step, 'computation_error', f"Check your addition. The {item}s are {terms}."),
+            (v.answer + v.step, 'computation_error', f"Check your addition. The {item}s are {terms}."),
+            (v.first + v.last, 'partial_solution', f"You added only the first and last {item}s. "
+                                                   f"Add all {v.n} of them."),
+        ]
+
+    def difficulty(self, v):
+        return 1 if v.n <= 5 and v.step == 1 else 2 if v.n <= 6 else 3
+
+    def stem(self, v):
+        plan, item, unit = self._names(v)
+        return (f"A {plan} has {v.n} {item}s. The first {item} is {count(v.first, unit)} long. "
+                f"Each {item} after that is {count(v.step, unit)} longer than the previous {item}. "
+                f"What is the total length of all {v.n} {item}s?")
+
+    def solution(self, v):
+        plan, item, unit = self._names(v)
+        listing = '\n'.join([f"{item.capitalize()} 1: {count(v.first, unit)}"]
+                            + [f"{item.capitalize()} {i + 1}: {v.terms[i - 1]} + {v.step} = {count(t, unit)}"
+                               for i, t in enumerate(v.terms[1:], 1)])
+        return methodology(self.title, [
+            ('List the values', listing),
+            ('Add them up', f"{' + '.join(map(str, v.terms))} = {count(v.answer, unit)}"),
+            ('Check', f"We have {v.n} values: {', '.join(map(str, v.terms))} ✓\n"
+                      f"Each increases by {v.step} ✓"),
+        ])
+
+    def hints(self, v):
+        plan, item, unit = self._names(v)
+        return [f"Start by listing how long each {item} is. The first is {count(v.first, unit)}. "
+                f"What about the second? The third?",
+                f"The {item}s are: {', '.join(map(str, v.terms))} {unit}s. Now add them all together.",
+                f"Total = {' + '.join(map(str, v.terms))} = {count(v.answer, unit)}"]
+
+    def steps(self, v):
+        return ['Read: Identify first value, the rule for change, and how many items',
+                'List: Write out each term using the rule',
+                'Solve: Add all terms together for total',
+                'Check: Verify the count of terms and the pattern']
+
+    def explain(self, v):
+        return (f"The values are {', '.join(map(str, v.terms))}. "
+                f"Total = {' + '.join(map(str, v.terms))} = {v.answer}.")
+
+
+class WeightEquivalence(Template):
+    archetype = 'qa2'
+    title = 'Weight/Mass Equivalence'
+    params = {
+        'objects': (('apple', 'orange'), ('pencil', 'eraser'), ('book', 'folder'),
+                    ('cup', 'plate'), ('lemon', 'mango'), ('marble', 'toy car')),
+        'a': range(2, 7),
+        'b': range(1, 6),
+        'w': range(20, 301, 10),
+    }
+
+    def derive(self, p):
+        if p['a'] == p['b'] or gcd(p['a'], p['b']) != 1 or p['b'] * p['w'] % p['a']:
+            return None
+        return {'answer': p['b'] * p['w'] // p['a'], 'total': p['b'] * p['w']}
+
+    def check(self, v):
+        return v.a * v.answer == v.b * v.w
+
+    def text(self, value, v):
+        return f"{num(value)} grams"
+
+    def distractors(self, v):
+        x, y = v.objects
+        return [
+            (Fraction(v.a * v.w, v.b), 'inverted_ratio', f"You multiplied by {v.a}/{v.b} instead of {v.b}/{v.a}. "
+                                                         f"{v.a} {x}s balance {v.b} {y}s, so each {x} is lighter."),
+            (v.w, 'misconception_answer', f"A {x} and a {y} don't weigh the same. {v.a} {x}s weigh the same as "
+                                          f"{count(v.b, y)}."),
+            (v.total, 'partial_solution', f"{v.total} grams is the weight of {count(v.b, y)}, which is also the "
+                                          f"weight of {v.a} {x}s. Divide by {v.a}."),
+            (v.answer + 10, 'computation_error', f"Check your division: {v.total} ÷ {v.a} = {v.answer}."),
+            (v.answer - 10, 'computation_error', f"Check your division: {v.total} ÷ {v.a} = {v.answer}."),
+            (v.w * v.a, 'wrong_operation', f"This is {v.w} × {v.a}. Find the total weight of the {y}s first, "
+                                           f"then share it between the {x}s."),
+        ]
+
+    def difficulty(self, v):
+        return 1 if v.b == 1 else 2 if v.a <= 4 else 3
+
+    def stem(self, v):
+        x, y = v.objects
+        return (f"{v.a} {x}s weigh the same as {count(v.b, y)}. If 1 {y} weighs {v.w} grams, "
+                f"what does 1 {x} weigh?")
+
+    def solution(self, v):
+        x, y = v.objects
+        return methodology(self.title, [
+            ('Find the total weight', f"{count(v.b, y)} weigh {v.b} × {v.w} = {v.total} grams"),
+            ('Share between the other objects', f"{v.a} {x}s weigh {v.total} grams\n"
+                                                f"1 {x} weighs {v.total} ÷ {v.a} = {v.answer} grams"),
+            ('Check', f"{v.a} × {v.answer} = {v.a * v.answer} grams = {v.b} × {v.w} ✓"),
+        ])
+
+    def hints(self, v):
+        x, y = v.objects
+        return [f"Both sides of the balance weigh the same. How much do {count(v.b, y)} weigh?",
+                f"{count(v.b, y)} weigh {v.total} grams, so {v.a} {x}s also weigh {v.total} grams.",
+                f"1 {x} = {v.total} ÷ {v.a} = {v.answer} grams"]
+
+    def steps(self, v):
+        return ['Read: Identify which objects balance and the known weight',
+                'Total: Find the total weight of the known side',
+                'Solve: Divide the total by the number of unknown objects',
+                'Check: Multiply back to confirm both sides balance']
+
+    def explain(self, v):
+        x, y = v.objects
+        return f"{count(v.b, y)} weigh {v.total} grams, so 1 {x} = {v.total} ÷ {v.a} = {v.answer} grams."
+
+
+class MultiLegJourney(Template):
+    archetype = 'qa4'
+    title = 'Multi-Leg Journey with Time Zones'
+    params = {
+        'vehicle': (('cargo ship', 'port'), ('train', 'Central Station'), ('bus', 'the depot'),
+                    ('plane', 'Sydney'), ('truck', 'the warehouse')),
+        'day': range(7),
+        'depart': range(0, 24 * 60, 15),
+        'hours': range(5, 73),
+        'minutes': (0, 0, 15, 30, 45),
+    }
+
+    def derive(self, p):
+        travel = p['hours'] * 60 + p['minutes']
+        arrive = p['day'] * 24 * 60 + p['depart'] + travel
+        return {'travel': travel, 'arrive': arrive, 'answer': arrive % (7 * 24 * 60)}
+
+    def check(self, v):
+        return (v.answer - v.day * 24 * 60 - v.depart) % (7 * 24 * 60) == v.travel
+
+    def text(self, value, v):
+        return f"{clock(value)} {DAYS[value // (24 * 60) % 7]}"
+
+    def distractors(self, v):
+        week = 7 * 24 * 60
+        days = v.travel // (24 * 60)
+        return [
+            ((v.answer + 24 * 60) % week, 'computation_error', "Count the days again: every 24 hours moves "
+                                                               "the clock to the same time on the next day."),
+            ((v.answer - 24 * 60) % week, 'computation_error', f"{v.hours} hours is {days} days and "
+                                                               f"{v.hours % 24} hours. Check the day you land on."),
+            ((v.answer + 12 * 60) % week, 'am-pm-confusion', "Check AM and PM: crossing noon or midnight "
+                                                            "switches between them."),
+            ((v.day * 24 * 60 + v.depart + days * 24 * 60) % week, 'partial_solution',
+             f"You counted the whole days but not the remaining {duration(v.travel % (24 * 60))}."),
+            ((v.answer - 12 * 60) % week, 'am-pm-confusion', "Check AM and PM: crossing noon or midnight "
+                                                            "switches between them."),
+            ((v.answer + 60) % week, 'computation_error', f"Add exactly {duration(v.travel)} to the departure time."),
+        ]
+
+    def difficulty(self, v):
+        return 2 if v.hours < 24 and not v.minutes else 3 if v.hours < 48 else 4
+
+    def stem(self, v):
+        vehicle, place = v.vehicle
+        return (f"A {vehicle} leaves {place} at {clock(v.depart)} on {DAYS[v.day]}. "
+                f"It travels for {duration(v.travel)} to reach its destination. "
+                f"What day and time does it arrive? (Same time zone)")
+
+    def solution(self, v):
+        days, rest = divmod(v.travel, 24 * 60)
+        start = v.day * 24 * 60 + v.depart
+        return methodology(self.title, [
+            ('Split the travel time', f"{duration(v.travel)} = {count(days, 'day')} and {duration(rest)}"
+                                      if days else f"{duration(v.travel)} is less than a day"),
+            ('Add the whole days', f"{clock(v.depart)} {DAYS[v.day]} + {count(days, 'day')} = "
+                                   f"{self.text((start + days * 24 * 60) % (7 * 24 * 60), v)}"),
+            ('Add the remaining time', f"+ {duration(rest)} = {self.text(v.answer, v)}"),
+        ], answer=self.text(v.answer, v))
+
+    def hints(self, v):
+        days = v.travel // (24 * 60)
+        return ["Break the journey into whole days first. How many lots of 24 hours are there?",
+                f"{duration(v.travel)} is {count(days, 'day')} and {duration(v.travel % (24 * 60))}.",
+                f"It arrives at {self.text(v.answer, v)}."]
+
+    def steps(self, v):
+        return ['Read: Identify departure day, time and travel duration',
+                'Split: Convert the duration into whole days plus hours and minutes',
+                'Solve: Add the days, then the remaining time, watching AM/PM',
+                'Check: Count forward from the departure to confirm']
+
+    def explain(self, v):
+        return f"{clock(v.depart)} {DAYS[v.day]} + {duration(v.travel)} = {self.text(v.answer, v)}."
+
+
+class SimultaneousPrices(Template):
+    archetype = 'qa5'
+    title = 'Simultaneous Price Equations'
+    decimals = 2
+    params = {
+        'items': (('burger', 'serve of chips', 'drink'), ('pen', 'ruler', 'notebook'),
+                  ('cupcake', 'cookie', 'brownie'), ('sandwich', 'juice', 'apple'),
+                  ('hat', 'scarf', 'pair of gloves')),
+        'x': range(2, 16),
+        'y': range(2, 16),
+        'z': range(2, 16),
+        'ask': range(3),
+    }
+
+    def derive(self, p):
+        prices = (p['x'], p['y'], p['z'])
+        if len(set(prices)) < 3:
+            return None
+        sums = (p['x'] + p['y'], p['y'] + p['z'], p['x'] + p['z'])
+        return {'prices': prices, 'sums': sums, 'total': sum(sums) // 2, 'answer': prices[p['ask']]}
+
+    def check(self, v):
+        s1, s2, s3 = v.sums
+        solved = ((s1 + s3 - s2) / 2, (s1 + s2 - s3) / 2, (s2 + s3 - s1) / 2)
+        return solved[v.ask] == v.answer and sum(v.sums) == 2 * sum(v.prices)
+
+    def text(self, value, v):
+        return money(value)
+
+    def distractors(self, v):
+        others = [i for i in range(3) if i != v.ask]
+        return [
+            (v.prices[others[0]], 'wrong_item', f"That is the price of {article(v.items[others[0]])}, "
+                                                f"not {article(v.items[v.ask])}."),
+            (v.prices[others[1]], 'wrong_item', f"That is the price of {article(v.items[others[1]])}, "
+                                                f"not {article(v.items[v.ask])}."),
+            (v.total, 'partial_solution', f"{money(v.total)} is the cost of one of each item. "
+                                          f"Subtract the pair that doesn't include {article(v.items[v.ask])}."),
+            (2 * v.total, 'wrong_operation', f"Adding all three totals counts every item twice. "
+                                             f"Halve it first: {money(v.total)} for one of each."),
+            (v.answer + 1, 'computation_error', f"Check: one of each costs {money(v.total)}. Subtract the "
+                                                f"other two items."),
+            (v.answer - 1, 'computation_error', f"Check: one of each costs {money(v.total)}. Subtract the "
+                                                f"other two items."),
+        ]
+
+    def difficulty(self, v):
+        return 2 if max(v.prices) <= 10 else 3
+
+    def stem(self, v):
+        a, b, c = v.items
+        return (f"{article(a, True)} and {article(b)} cost {money(v.sums[0])}. "
+                f"{article(b, True)} and {article(c)} cost {money(v.sums[1])}. "
+                f"{article(a, True)} and {article(c)} cost {money(v.sums[2])}. "
+                f"How much does {article(v.items[v.ask])} cost?")
+
+    def solution(self, v):
+        pair = {0: 1, 1: 2, 2: 0}[v.ask]
+        a, b, c = v.items
+        pairs = (f"{a} + {b}", f"{b} + {c}", f"{a} + {c}")
+        return methodology(self.title, [
+            ('Add all three totals', f"{money(v.sums[0])} + {money(v.sums[1])} + {money(v.sums[2])} = "
+                                     f"{money(2 * v.total)}\nThis counts every item twice."),
+            ('Find one of each', f"{money(2 * v.total)} ÷ 2 = {money(v.total)} for {a}, {b} and {c}"),
+            ('Remove the other pair', f"{pairs[pair]} cost {money(v.sums[pair])}\n"
+                                      f"{v.items[v.ask]} = {money(v.total)} - {money(v.sums[pair])} = "
+                                      f"{money(v.answer)}"),
+            ('Check', f"Prices {', '.join(money(x) for x in v.prices)} give totals "
+                      f"{', '.join(money(s) for s in v.sums)} ✓"),
+        ])
+
+    def hints(self, v):
+        return ["Try adding all three totals together. How many times is each item counted?",
+                f"All three totals add to {money(2 * v.total)}, so one of each item costs {money(v.total)}.",
+                f"Subtract the pair without {article(v.items[v.ask])}: the answer is {money(v.answer)}."]
+
+    def steps(self, v):
+        return ['Read: Write each total as a pair of items',
+                'Combine: Add all totals so each item appears twice',
+                'Solve: Halve for one of each, then subtract the other pair',
+                'Check: Substitute all prices back into each total']
+
+    def explain(self, v):
+        return (f"One of each item costs ({money(v.sums[0])} + {money(v.sums[1])} + {money(v.sums[2])}) ÷ 2 = "
+                f"{money(v.total)}, so {article(v.items[v.ask])} costs {money(v.answer)}.")
+
+
+class CoinPairing(Template):
+    archetype = 'qa6'
+    title = 'Coin/Object Pairing'
+    params = {
+        'money': ((1, 2, 'coin'), (5, 10, 'note'), (10, 20, 'note'), (5, 20, 'note'), (20, 50, 'note')),
+        'k': range(3, 21),
+        'ask': ('low', 'high', 'total'),
+        'name': NAMES,
+    }
+
+    def derive(self, p):
+        low, high, kind = p['money']
+        return {'low': low, 'high': high, 'kind': kind, 'value': p['k'] * (low + high),
+                'answer': 2 * p['k'] if p['ask'] == 'total' else p['k']}
+
+    def check(self, v):
+        pairs = v.answer // 2 if v.ask == 'total' else v.answer
+        return pairs * (v.low + v.high) == v.value
+
+    def distractors(self, v):
+        kind = v.kind
+        pair = f"${v.low} + ${v.high} = ${v.low + v.high}"
+        wrong = [
+            (Fraction(v.value, v.low), 'misconception_answer', f"This is how many ${v.low} {kind}s make "
+                                                               f"${v.value} on their own. There are "
+                                                               f"${v.high} {kind}s too."),
+            (Fraction(v.value, v.high), 'misconception_answer', f"This is how many ${v.high} {kind}s make "
+                                                                f"${v.value} on their own. There are "
+                                                                f"${v.low} {kind}s too."),
+        ]
+        if v.ask == 'total':
+            wrong.insert(0, (v.k, 'partial_solution', f"That is the number of each kind of {kind}. "
+                                                      f"There are two kinds, so double it."))
+        else:
+            wrong.insert(0, (2 * v.k, 'partial_solution', f"That is the total number of {kind}s. Half of "
+                                                          f"them are ${v.low if v.ask == 'high' else v.high} "
+                                                          f"{kind}s."))
+        return wrong + [
+            (v.answer + 2, 'computation_error', f"Each pair is worth {pair}. Check: ${v.value} ÷ "
+                                                f"${v.low + v.high}."),
+            (v.answer - 2, 'computation_error', f"Each pair is worth {pair}. Check: ${v.value} ÷ "
+                                                f"${v.low + v.high}."),
+            (v.answer + 1, 'computation_error', f"Each pair is worth {pair}. Check: ${v.value} ÷ "
+                                                f"${v.low + v.high}."),
+        ]
+
+    def difficulty(self, v):
+        return 1 if v.k <= 10 and v.ask != 'total' else 2
+
+    def stem(self, v):
+        question = (f"How many {v.kind}s does {v.name} have altogether?" if v.ask == 'total' else
+                    f"How many ${v.low if v.ask == 'low' else v.high} {v.kind}s does {v.name} have?")
+        return (f"{v.name} has an equal number of ${v.low} {v.kind}s and ${v.high} {v.kind}s. "
+                f"The total value of all the {v.kind}s is ${v.value}. {question}")
+
+    def solution(self, v):
+        final = (f"Total {v.kind}s = 2 × {v.k} = {v.answer}" if v.ask == 'total' else
+                 f"There are {v.k} ${v.low if v.ask == 'low' else v.high} {v.kind}s")
+        return methodology(self.title, [
+            ('Group into pairs', f"Each pair is one ${v.low} {v.kind} and one ${v.high} {v.kind}, "
+                                 f"worth ${v.low + v.high}"),
+            ('Count the pairs', f"${v.value} ÷ ${v.low + v.high} = {v.k} pairs"),
+            ('Answer the question', final),
+            ('Check', f"{v.k} × ${v.low} + {v.k} × ${v.high} = ${v.k * v.low} + ${v.k * v.high} = ${v.value} ✓"),
+        ])
+
+    def hints(self, v):
+        return [f"Put the {v.kind}s into pairs: one of each kind. What is one pair worth?",
+                f"Each pair is worth ${v.low + v.high}. How many pairs make ${v.value}?",
+                f"${v.value} ÷ ${v.low + v.high} = {v.k} pairs."]
+
+    def steps(self, v):
+        return ['Read: Equal numbers means the items come in pairs',
+                'Pair: Find the value of one pair',
+                'Solve: Divide the total by the pair value',
+                'Check: Multiply back to confirm the total']
+
+    def explain(self, v):
+        return (f"Each pair is worth ${v.low + v.high}, so there are ${v.value} ÷ ${v.low + v.high} = "
+                f"{v.k} pairs" + (f", which is {v.answer} {v.kind}s." if v.ask == 'total' else "."))
+
+
+class VennDiagram(Template):
+    archetype = 'qa7'
+    title = 'Venn Diagram (2 Sets)'
+    params = {
+        'context': (('class', 'students', 'play soccer', 'play basketball'),
+                    ('street', 'families', 'own a cat', 'own a dog'),
+                    ('club', 'members', 'speak French', 'speak Japanese'),
+                    ('year group', 'students', 'learn piano', 'learn guitar'),
+                    ('team', 'players', 'like swimming', 'like running')),
+        'total': range(20, 61),
+        'a': range(5, 45),
+        'b': range(5, 45),
+        'both': range(1, 20),
+        'ask': ('neither', 'exactly one'),
+    }
+
+    def derive(self, p):
+        a, b, both, total = p['a'], p['b'], p['both'], p['total']
+        union = a + b - both
+        if both >= min(a, b) or union >= total or a == b:
+            return None
+        answer = total - union if p['ask'] == 'neither' else union - both
+        return {'union': union, 'answer': answer}
+
+    def check(self, v):
+        regions = (v.a - v.both, v.b - v.both, v.both, v.total - v.union)
+        expected = regions[3] if v.ask == 'neither' else regions[0] + regions[1]
+        return sum(regions) == v.total and min(regions) >= 0 and expected == v.answer
+
+    def distractors(self, v):
+        group, people, first, second = v.context
+        if v.ask == 'neither':
+            return [
+                (v.total - v.a - v.b, 'wrong_operation', f"You forgot to subtract the overlap. At least one = "
+                                                         f"{v.a} + {v.b} - {v.both} = {v.union}."),
+                (v.both, 'misread_question', f"This is the number who do both, not the number who do neither."),
+                (v.union, 'partial_solution', f"{v.union} do at least one. Subtract from {v.total} for neither."),
+                (v.answer + v.both, 'computation_error', f"Subtract the overlap only once: {v.a} + {v.b} - "
+                                                         f"{v.both} = {v.union}."),
+                (v.total - v.a, 'incomplete_reasoning', f"You only removed the {people} who {first}."),
+                (v.answer + 1, 'computation_error', f"Check: {v.total} - ({v.a} + {v.b} - {v.both}) = {v.answer}."),
+            ]
+        return [
+            (v.union, 'partial_solution', f"{v.union} do at least one, which includes the {v.both} who do both."),
+            (v.a + v.b, 'overcounting', f"Adding {v.a} and {v.b} counts the {v.both} who do both twice."),
+            (v.total - v.union, 'misread_question', f"This is the number who do neither."),
+            (v.a - v.both, 'incomplete_reasoning', f"This is only the {people} who {first} but not {second}."),
+            (v.b - v.both, 'incomplete_reasoning', f"This is only the {people} who {second} but not {first}."),
+            (v.answer + v.both, 'computation_error', f"Remove the overlap from both circles: "
+                                                     f"({v.a} - {v.both}) + ({v.b} - {v.both})."),
+        ]
+
+    def difficulty(self, v):
+        return 1 if v.ask == 'neither' and v.total <= 40 else 2
+
+    def stem(self, v):
+        group, people, first, second = v.context
+        question = (f"how many {people} do neither?" if v.ask == 'neither' else
+                    f"how many {people} do exactly one of the two?")
+        return (f"In a {group} of {v.total} {people}, {v.a} {first} and {v.b} {second}. "
+                f"If {v.both} {people} do both, {question}")
+
+    def solution(self, v):
+        only_a, only_b = v.a - v.both, v.b - v.both
+        final = (('Find neither', f"Neither = Total - (At least one)\n= {v.total} - {v.union} = {v.answer}")
+                 if v.ask == 'neither' else
+                 ('Find exactly one', f"Only first = {v.a} - {v.both} = {only_a}\n"
+                                      f"Only second = {v.b} - {v.both} = {only_b}\n"
+                                      f"Exactly one = {only_a} + {only_b} = {v.answer}"))
+        return methodology(self.title, [
+            ('Identify the sets', f"- Total = {v.total}\n- First set (A) = {v.a}\n- Second set (B) = {v.b}\n"
+                                  f"- Both (A ∩ B) = {v.both}"),
+            ('Apply inclusion-exclusion', f"At least one = A + B - Both\n= {v.a} + {v.b} - {v.both} = {v.union}"),
+            final,
+            ('Verify', f"Only A = {only_a}, only B = {only_b}, both = {v.both}, neither = {v.total - v.union}\n"
+                       f"Total = {only_a} + {only_b} + {v.both} + {v.total - v.union} = {v.total} ✓"),
+        ])
+
+    def hints(self, v):
+        return ["Draw a Venn diagram with two overlapping circles. The overlap is for those who do BOTH.",
+                f"To avoid double-counting, use: At least one = {v.a} + {v.b} - {v.both}.",
+                f"At least one = {v.union}. " + (f"Neither = {v.total} - {v.union} = {v.answer}."
+                                                  if v.ask == 'neither' else
+                                                  f"Exactly one = {v.union} - {v.both} = {v.answer}.")]
+
+    def steps(self, v):
+        return ['Read: Identify total, each set size, and overlap',
+                'Setup: Draw Venn diagram with 2 overlapping circles',
+                'Solve: At least one = A + B - Both, then find the region asked for',
+                'Check: Sum all four regions to verify total']
+
+    def explain(self, v):
+        return f"At least one = {v.a} + {v.b} - {v.both} = {v.union}, so the answer is {v.answer}."
+
+
+class MissingValueMean(Template):
+    archetype = 'qa8'
+    title = 'Missing Value for Target Mean'
+    params = {
+        'form': ('numbers', 'tests'),
+        'n': range(4, 7),
+        'mean': range(6, 31),
+        'offsets': lambda rng, k: [tuple(rng.choices(range(-9, 10), k=5)) for _ in range(k)],
+        'name': NAMES,
+    }
+
+    def derive(self, p):
+        if p['form'] == 'tests':
+            mean = p['mean'] * 3
+            known = [mean + 2 * o for o in p['offsets'][:p['n'] - 1]]
+            ceiling = 100
+        else:
+            mean = p['mean']
+            known = [mean + o for o in p['offsets'][:p['n'] - 1]]
+            ceiling = 99
+        answer = mean * p['n'] - sum(known)
+        if min(known) < 1 or not 1 <= answer <= ceiling or answer == mean or max(known) > ceiling:
+            return None
+        return {'target': mean, 'known': known, 'answer': answer, 'total': mean * p['n']}
+
+    def check(self, v):
+        return Fraction(sum(v.known) + v.answer, v.n) == v.target
+
+    def distractors(self, v):
+        given = sum(v.known)
+        return [
+            (v.target, 'misconception_answer', f"The missing value is not always the mean. The {v.n} values "
+                                                f"must add to {v.n} × {v.target} = {v.total}."),
+            (v.total, 'partial_solution', f"{v.total} is the total all {v.n} values must reach. Subtract the "
+                                          f"{v.n - 1} known values."),
+            ((v.n - 1) * v.target - given, 'wrong_n_value', f"There are {v.n} values, not {v.n - 1}: the total "
+                                                            f"is {v.n} × {v.target}."),
+            (Fraction(given, v.n - 1), 'misconception_answer', "This is the mean of the known values. "
+                                                               "Use the target mean instead."),
+            (v.answer + 2, 'computation_error', f"Check: {v.total} - {given} = {v.answer}."),
+            (v.answer - 2, 'computation_error', f"Check: {v.total} - {given} = {v.answer}."),
+        ]
+
+    def difficulty(self, v):
+        return 1 if v.n == 4 and v.form == 'numbers' else 2
+
+    def stem(self, v):
+        listing = ', '.join(map(str, v.known[:-1])) + f" and {v.known[-1]}"
+        if v.form == 'tests':
+            return (f"{v.name} wants a mean score of {v.target} over {v.n} tests. The scores on the first "
+                    f"{v.n - 1} tests were {listing}. What score is needed on the last test?")
+        return (f"The mean of {v.n} numbers is {v.target}. {NUMBER_WORDS[v.n - 1]} of the numbers are "
+                f"{listing}. What is the {ORDINALS[v.n]} number?")
+
+    def solution(self, v):
+        return methodology('Mean to Total', [
+            ('Find the total needed', f"Total = mean × count = {v.target} × {v.n} = {v.total}"),
+            ('Add the known values', f"{' + '.join(map(str, v.known))} = {sum(v.known)}"),
+            ('Find the missing value', f"{v.total} - {sum(v.known)} = {v.answer}"),
+            ('Check', f"({' + '.join(map(str, v.known + [v.answer]))}) ÷ {v.n} = {v.total} ÷ {v.n} = "
+                      f"{v.target} ✓"),
+        ])
+
+    def hints(self, v):
+        return ["If you know the mean and how many values there are, you can find the total.",
+                f"The {v.n} values must add to {v.target} × {v.n} = {v.total}.",
+                f"The known values add to {sum(v.known)}, so the missing one is {v.total} - {sum(v.known)}."]
+
+    def steps(self, v):
+        return ['Read: Identify the target mean and the number of values',
+                'Total: Multiply mean by count for the required total',
+                'Solve: Subtract the known values from the total',
+                'Check: Recalculate the mean with the found value']
+
+    def explain(self, v):
+        return (f"The total must be {v.target} × {v.n} = {v.total}, and {v.total} - {sum(v.known)} = "
+                f"{v.answer}.")
+
+
+class PatternSequence(Template):
+    archetype = 'qa9'
+    title = 'Pattern Sequence Complex Rule'
+    params = {
+        'form': ('multiply-add', 'multiply-add', 'alternating'),
+        'start': range(1, 7),
+        'factor': (2, 2, 3),
+        'add': (-2, -1, 1, 2, 3, 4, 5),
+    }
+
+    def derive(self, p):
+        a, b, t = p['factor'], p['add'], p['start']
+        terms = [t]
+        if p['form'] == 'multiply-add':
+            for _ in range(5):
+                terms.append(terms[-1] * a + b)
+        else:
+            if b < 1:
+                return None
+            for i in range(6):
+                terms.append(terms[-1] * a if i % 2 == 0 else terms[-1] + b)
+        if any(y <= x for x, y in zip(terms, terms[1:])) or terms[-1] > 999:
+            return None
+        return {'shown': terms[:-1], 'answer': terms[-1]}
+
+    def check(self, v):
+        a, b = v.factor, v.add
+        if v.form == 'multiply-add':
+            return all(y == x * a + b for x, y in zip(v.shown, v.shown[1:] + [v.answer]))
+        rule = [lambda x: x * a, lambda x: x + b]
+        return all(y == rule[i % 2](x) for i, (x, y) in enumerate(zip(v.shown, v.shown[1:] + [v.answer])))
+
+    def _rule(self, v):
+        sign = '+' if v.add > 0 else '-'
+        if v.form == 'multiply-add':
+            return f"multiply by {v.factor}, then {'add' if v.add > 0 else 'subtract'} {abs(v.add)}", sign
+        return f"alternately multiply by {v.factor} and add {v.add}", sign
+
+    def distractors(self, v):
+        last, before = v.shown[-1], v.shown[-2]
+        rule, _ = self._rule(v)
+        other = last + v.add if v.form == 'alternating' else last * v.factor
+        return [
+            (last + (last - before), 'misconception_answer', f"The differences are not constant here. "
+                                                             f"The rule is: {rule}."),
+            (other, 'partial_solution', f"You only used part of the rule. The rule is: {rule}."),
+            (v.answer + 1, 'computation_error', f"Close! Apply the rule carefully to {last}."),
+            (v.answer - 1, 'computation_error', f"Close! Apply the rule carefully to {last}."),
+            (last * v.factor + 2 * v.add, 'wrong_operation', f"Apply the rule once to {last}: {rule}."),
+        ]
+
+    def difficulty(self, v):
+        if v.form == 'alternating':
+            return 3 if v.factor == 2 else 4
+        return 2 if v.factor == 2 else 3
+
+    def stem(self, v):
+        sequence = ', '.join(map(str, v.shown)) + ', __'
+        if v.form == 'alternating':
+            return (f"What is the next number in this sequence where the rule alternates between two "
+                    f"operations?\n\n{sequence}")
+        return f"What is the next number in this sequence?\n\n{sequence}"
+
+    def solution(self, v):
+        rule, sign = self._rule(v)
+        if v.form == 'multiply-add':
+            working = '\n'.join(f"{x} × {v.factor} {sign} {abs(v.add)} = {y}"
+                                for x, y in zip(v.shown, v.shown[1:]))
+            final = f"{v.shown[-1]} × {v.factor} {sign} {abs(v.add)} = {v.answer}"
+        else:
+            working = '\n'.join(f"{x} {'×' if i % 2 == 0 else '+'} {v.factor if i % 2 == 0 else v.add} = {y}"
+                                for i, (x, y) in enumerate(zip(v.shown, v.shown[1:])))
+            i = len(v.shown) - 1
+            final = f"{v.shown[-1]} {'×' if i % 2 == 0 else '+'} {v.factor if i % 2 == 0 else v.add} = {v.answer}"
+        return methodology('Sequence Rule Discovery', [
+            ('Test for a constant difference', 'Differences: ' + ', '.join(
+                str(y - x) for x, y in zip(v.shown, v.shown[1:])) + ' - not constant'),
+            ('Find the rule', f"Rule: {rule}\n{working}"),
+            ('Apply the rule', final),
+        ], answer=str(v.answer))
+
+    def hints(self, v):
+        rule, _ = self._rule(v)
+        return ["Look at the differences between terms. Are they constant, or growing?",
+                "The terms grow by multiplying. Try multiplying each term and compare with the next one.",
+                f"The rule is: {rule}."]
+
+    def steps(self, v):
+        return ['Read: Write the sequence and check the differences',
+                'Test: Try multiplication rules when differences grow',
+                'Solve: Apply the rule to the last term',
+                'Check: Confirm the rule produces every given term']
+
+    def explain(self, v):
+        rule, _ = self._rule(v)
+        return f"The rule is: {rule}. Applying it to {v.shown[-1]} gives {v.answer}."
+
+
+class ThreeWayRelationship(Template):
+    archetype = 'qa10'
+    title = 'Three-Way Relationship'
+    params = {
+        'names': lambda rng, k: [tuple(rng.sample(NAMES, 3)) for _ in range(k)],
+        'item': ('stickers', 'marbles', 'trading cards', 'stamps', 'shells'),
+        'c': range(2, 21),
+        'd1': range(1, 9),
+        'd2': range(1, 9),
+        'ask': range(3),
+    }
+
+    def derive(self, p):
+        c = p['c']
+        b = c + p['d2']
+        a = b + p['d1']
+        return {'counts': (a, b, c), 'total': a + b + c, 'answer': (a, b, c)[p['ask']]}
+
+    def check(self, v):
+        a, b, c = v.counts
+        return a + b + c == v.total and a - b == v.d1 and b - c == v.d2 and v.answer == v.counts[v.ask]
+
+    def distractors(self, v):
+        names = v.names
+        wrong = [(v.counts[i], 'wrong_person', f"That is how many {names[i]} has, not {names[v.ask]}.")
+                 for i in range(3) if i != v.ask]
+        return wrong + [
+            (Fraction(v.total, 3), 'misconception_answer', f"The {v.item} are not shared equally. "
+                                                           f"Use the differences given."),
+            (Fraction(v.total - v.d1 - v.d2, 3), 'partial_solution', f"{names[0]} is {v.d1 + v.d2} more than "
+                                                                     f"{names[2]}, not {v.d1}. Subtract "
+                                                                     f"{v.d1 + 2 * v.d2} before dividing."),
+            (v.answer + v.d1, 'computation_error', "Check: the three amounts must add to the total."),
+            (v.answer + 1, 'computation_error', "Check: the three amounts must add to the total."),
+        ]
+
+    def difficulty(self, v):
+        return 2 if v.ask == 2 else 3
+
+    def stem(self, v):
+        a, b, c = v.names
+        return (f"Three friends have a total of {v.total} {v.item}. {a} has {v.d1} more than {b}, and {b} has "
+                f"{v.d2} more than {c}. How many {v.item} does {v.names[v.ask]} have?")
+
+    def solution(self, v):
+        a, b, c = v.names
+        ca, cb, cc = v.counts
+        return methodology(self.title, [
+            ('Write everyone in terms of the smallest', f"{c} = ?\n{b} = {c} + {v.d2}\n"
+                                                        f"{a} = {c} + {v.d2} + {v.d1} = {c} + {v.d1 + v.d2}"),
+            ('Remove the extras', f"Extras = {v.d2} + {v.d1 + v.d2} = {v.d1 + 2 * v.d2}\n"
+                                  f"{v.total} - {v.d1 + 2 * v.d2} = {3 * cc}"),
+            ('Share equally', f"{c} = {3 * cc} ÷ 3 = {cc}\n{b} = {cc} + {v.d2} = {cb}\n"
+                              f"{a} = {cb} + {v.d1} = {ca}"),
+            ('Check', f"{ca} + {cb} + {cc} = {v.total} ✓"),
+        ], answer=f"{v.names[v.ask]} has {v.answer} {v.item}")
+
+    def hints(self, v):
+        a, b, c = v.names
+        return [f"Start with {c}, who has the fewest. Write the others as {c} plus some extra.",
+                f"{b} = {c} + {v.d2} and {a} = {c} + {v.d1 + v.d2}. Take the extras away from the total.",
+                f"{v.total} - {v.d1 + 2 * v.d2} = {3 * v.c}, so {c} has {v.c}."]
+
+    def steps(self, v):
+        return ['Read: Identify the relationships between the three people',
+                'Express: Write each amount in terms of the smallest',
+                'Solve: Remove the extras and divide by 3',
+                'Check: Confirm the amounts add to the total']
+
+    def explain(self, v):
+        a, b, c = v.names
+        return (f"{c} has ({v.total} - {v.d1 + 2 * v.d2}) ÷ 3 = {v.c}, {b} has {v.counts[1]} and {a} has "
+                f"{v.counts[0]}.")
+
+
+class PercentageEquivalence(Template):
+    archetype = 'qa11'
+    title = 'Percentage Equivalence'
+    decimals = 2
+    params = {
+        'form': ('direct', 'schools'),
+        'p1': range(5, 100, 5),
+        'p2': range(5, 100, 5),
+        'a': range(20, 501, 10),
+        'activity': ('play tennis', 'walk to school', 'learn an instrument', 'play chess'),
+    }
+
+    def derive(self, p):
+        if p['p1'] == p['p2'] or p['p1'] * p['a'] % p['p2']:
+            return None
+        part = Fraction(p['p1'] * p['a'], 100)
+        if p['form'] == 'schools' and part.denominator != 1:
+            return None
+        answer = p['p1'] * p['a'] // p['p2']
+        if answer > 2000:
+            return None
+        return {'part': part, 'answer': answer}
+
+    def check(self, v):
+        return Fraction(v.p2 * v.answer, 100) == Fraction(v.p1 * v.a, 100)
+
+    def distractors(self, v):
+        return [
+            (v.part, 'partial_solution', f"{num(v.part)} is {v.p1}% of {v.a}. Now find the number that "
+                                         f"{num(v.part)} is {v.p2}% of."),
+            (Fraction(v.p2 * v.a, v.p1), 'inverted_operation', f"You swapped the percentages. "
+                                                               f"{v.p2}% of the answer must equal {num(v.part)}."),
+            (v.part * v.p2 / 100, 'wrong_operation', f"You took {v.p2}% of {num(v.part)}. Instead, {num(v.part)} "
+                                                     f"is {v.p2}% of the answer, so divide."),
+            (Fraction(v.p2 * v.a, 100), 'wrong_percentage', f"This is {v.p2}% of {v.a}. Start with {v.p1}% of "
+                                                            f"{v.a}."),
+            (v.a, 'misconception_answer', f"The two percentages are different, so the numbers are too."),
+        ]
+
+    def difficulty(self, v):
+        return 2 if v.form == 'direct' and v.answer % 10 == 0 else 3
+
+    def stem(self, v):
+        if v.form == 'schools':
+            return (f"At one school, {v.p1}% of the {v.a} students {v.activity}. The same number of students "
+                    f"make up {v.p2}% of a second school. How many students are in the second school?")
+        return f"{v.p1}% of {v.a} equals {v.p2}% of what number?"
+
+    def solution(self, v):
+        return methodology(self.title, [
+            ('Calculate the known percentage', f"{v.p1}% of {v.a} = {v.p1}/100 × {v.a} = {num(v.part)}"),
+            ('Set up the equation', f"{v.p2}% of N = {num(v.part)}"),
+            ('Solve', f"N = {num(v.part)} ÷ {v.p2}/100 = {num(v.part)} × 100 ÷ {v.p2} = {v.answer}"),
+            ('Check', f"{v.p2}% of {v.answer} = {num(Fraction(v.p2 * v.answer, 100))} ✓"),
+        ])
+
+    def hints(self, v):
+        return [f"First work out {v.p1}% of {v.a}.",
+                f"{v.p1}% of {v.a} = {num(v.part)}. Now {num(v.part)} is {v.p2}% of the number you want.",
+                f"N = {num(v.part)} × 100 ÷ {v.p2} = {v.answer}"]
+
+    def steps(self, v):
+        return ['Read: Identify the known percentage and the unknown whole',
+                'Calculate: Work out the known percentage amount',
+                'Solve: Divide by the second percentage to find the whole',
+                'Check: Take the second percentage of the answer']
+
+    def explain(self, v):
+        return f"{v.p1}% of {v.a} = {num(v.part)}, and {num(v.part)} is {v.p2}% of {v.answer}."
+
+
+class RatioRecipe(Template):
+    archetype = 'qa12'
+    title = 'Multi-Ratio Recipe'
+    params = {
+        'mix': (('recipe', 'flour', 'sugar', 'g'), ('paint mix', 'blue paint', 'yellow paint', 'mL'),
+                ('drink', 'cordial', 'water', 'mL'), ('mortar mix', 'cement', 'sand', 'g'),
+                ('trail mix', 'nuts', 'raisins', 'g')),
+        'form': ('part', 'total'),
+        'r1': range(1, 8),
+        'r2': range(1, 8),
+        'share': range(10, 151, 10),
+    }
+
+    def derive(self, p):
+        r1, r2, m = p['r1'], p['r2'], p['share']
+        if r1 == r2 or gcd(r1, r2) != 1:
+            return None
+        return {'given': r1 * m if p['form'] == 'part' else (r1 + r2) * m, 'answer': r2 * m}
+
+    def check(self, v):
+        if v.form == 'part':
+            return v.answer * v.r1 == v.given * v.r2
+        return v.answer * (v.r1 + v.r2) == v.given * v.r2
+
+    def text(self, value, v):
+        return f"{num(value)}{v.mix[3]}"
+
+    def distractors(self, v):
+        thing, first, second, unit = v.mix
+        if v.form == 'part':
+            return [
+                (Fraction(v.given * v.r1, v.r2), 'inverted_ratio', f"You used the ratio the wrong way round. "
+                                                                   f"{first}:{second} = {v.r1}:{v.r2}."),
+                (v.given + v.r2 - v.r1, 'misconception_answer', "Ratios multiply, they don't add: find the "
+                                                                "size of one share first."),
+                (v.given, 'misread_question', f"That is the amount of {first}, not {second}."),
+                (v.given + v.answer, 'partial_solution', f"That is the total of {first} and {second}. "
+                                                         f"The question asks for {second} only."),
+                (v.answer + v.share, 'computation_error', f"One share is {v.given} ÷ {v.r1} = {v.share}. "
+                                                          f"{second.capitalize()} is {v.r2} shares."),
+                (v.answer - v.share, 'computation_error', f"One share is {v.given} ÷ {v.r1} = {v.share}. "
+                                                          f"{second.capitalize()} is {v.r2} shares."),
+            ]
+        return [
+            (v.r1 * v.share, 'wrong_component', f"That is the amount of {first}, not {second}."),
+            (Fraction(v.given, 2), 'misconception_answer', f"The parts are not equal: the ratio is {v.r1}:{v.r2}."),
+            (Fraction(v.given * v.r2, v.r1), 'wrong_ratio', f"Divide by the total number of parts, "
+                                                            f"{v.r1} + {v.r2} = {v.r1 + v.r2}."),
+            (Fraction(v.given, v.r2), 'wrong_operation', f"There are {v.r1 + v.r2} parts in total. One part is "
+                                                         f"{v.given} ÷ {v.r1 + v.r2} = {v.share}."),
+            (v.answer + v.share, 'computation_error', f"One part is {v.share}. {second.capitalize()} is "
+                                                      f"{v.r2} parts."),
+            (v.answer - v.share, 'computation_error', f"One part is {v.share}. {second.capitalize()} is "
+                                                      f"{v.r2} parts."),
+        ]
+
+    def difficulty(self, v):
+        return 1 if v.form == 'part' and v.r1 == 1 else 2 if v.form == 'part' else 3
+
+    def stem(self, v):
+        thing, first, second, unit = v.mix
+        if v.form == 'part':
+            return (f"A {thing} uses {first} and {second} in the ratio {v.r1}:{v.r2}. If you use "
+                    f"{v.given}{unit} of {first}, how much {second} do you need?")
+        return (f"A {thing} uses {first} and {second} in the ratio {v.r1}:{v.r2}. To make {v.given}{unit} "
+                f"of the {thing}, how much {second} is needed?")
+
+    def solution(self, v):
+        thing, first, second, unit = v.mix
+        share = (f"{first.capitalize()} is {v.r1} parts = {v.given}{unit}\nOne part = {v.given} ÷ {v.r1} = "
+                 f"{v.share}{unit}" if v.form == 'part' else
+                 f"Total parts = {v.r1} + {v.r2} = {v.r1 + v.r2}\nOne part = {v.given} ÷ {v.r1 + v.r2} = "
+                 f"{v.share}{unit}")
+        return methodology('Ratio Parts', [
+            ('Find one part', share),
+            (f"Find the {second}", f"{second.capitalize()} = {v.r2} × {v.share} = {v.answer}{unit}"),
+            ('Check', f"{v.r1 * v.share}:{v.answer} simplifies to {v.r1}:{v.r2} ✓"),
+        ])
+
+    def hints(self, v):
+        thing, first, second, unit = v.mix
+        parts = v.r1 if v.form == 'part' else v.r1 + v.r2
+        return [f"The ratio {v.r1}:{v.r2} means {v.r1} parts of {first} for every {v.r2} parts of {second}.",
+                f"{v.given}{unit} is {parts} parts. How much is one part?",
+                f"One part = {v.share}{unit}, so {second} = {v.r2} × {v.share}{unit}."]
+
+    def steps(self, v):
+        return ['Read: Identify the ratio and the known amount',
+                'Parts: Work out the value of one part',
+                'Solve: Multiply by the number of parts asked for',
+                'Check: Confirm the amounts simplify to the ratio']
+
+    def explain(self, v):
+        return f"One part is {v.share}, so {v.mix[2]} = {v.r2} × {v.share} = {v.answer}{v.mix[3]}."
+
+
+class ReversePercentage(Template):
+    archetype = 'qa13'
+    title = 'Reverse Percentage'
+    decimals = 2
+    params = {
+        'form': ('discount', 'discount', 'increase'),
+        'pct': (5, 10, 15, 20, 25, 30, 40, 50, 60, 75),
+        'original': range(8, 401),
+        'item': ('book', 'jacket', 'bike helmet', 'board game', 'pair of shoes', 'backpack'),
+        'name': NAMES,
+    }
+
+    def derive(self, p):
+        rate = 100 - p['pct'] if p['form'] == 'discount' else 100 + p['pct']
+        final = Fraction(p['original'] * rate, 100)
+        if final.denominator not in (1, 2, 4, 5, 10, 20, 25, 50, 100):
+            return None
+        return {'rate': rate, 'final': final, 'answer': p['original']}
+
+    def check(self, v):
+        return v.answer * Fraction(v.rate, 100) == v.final
+
+    def text(self, value, v):
+        return money(value)
+
+    def distractors(self, v):
+        pct = Fraction(v.pct, 100)
+        other = 1 + pct if v.form == 'discount' else 1 - pct
+        return [
+            (v.final * other, 'forward_calculation', f"{money(v.final)} is already the "
+                                                     f"{'sale' if v.form == 'discount' else 'new'} price. "
+                                                     f"Find what {money(v.final)} is {v.rate}% OF."),
+            (v.final / pct, 'misconception_answer', f"You divided by {num(pct)} instead of {num(Fraction(v.rate, 100))}. "
+                                                    f"{money(v.final)} is {v.rate}% of the original, not {v.pct}%."),
+            (v.final * (2 - other), 'wrong_operation', f"You applied {v.pct}% to {money(v.final)}. The "
+                                                       f"percentage is of the original price."),
+            (v.final + (v.pct if v.form == 'discount' else -v.pct), 'computation_error',
+             f"{v.pct}% is not ${v.pct}. {money(v.final)} = {v.rate}% of the original."),
+            (v.answer + 1, 'computation_error', f"Check: {money(v.final)} ÷ {num(Fraction(v.rate, 100))}."),
+        ]
+
+    def difficulty(self, v):
+        if v.form == 'increase':
+            return 3
+        return 1 if v.pct in (10, 20, 25, 50) and v.final.denominator == 1 else 2
+
+    def stem(self, v):
+        if v.form == 'increase':
+            return (f"The price of a {v.item} went up by {v.pct}%. It now costs {money(v.final)}. "
+                    f"What was the price before the increase?")
+        return (f"A shop has a sale with {v.pct}% off everything. {v.name} buys a {v.item} for "
+                f"{money(v.final)}. What was the original price of the {v.item}?")
+
+    def solution(self, v):
+        multiplier = num(Fraction(v.rate, 100))
+        change = 'discount' if v.form == 'discount' else 'increase'
+        return methodology(self.title, [
+            ('Identify the type', f"This is a REVERSE percentage - we're given the new price "
+                                  f"({money(v.final)}) and need the original."),
+            ('Set up the equation', f"A {v.pct}% {change} means the new price is {v.rate}% of the original.\n"
+                                    f"{money(v.final)} = Original × {multiplier}"),
+            ('Solve', f"Original = {money(v.final)} ÷ {multiplier} = {money(v.answer)}"),
+            ('Check', f"{money(v.answer)} × {multiplier} = {money(v.final)} ✓"),
+        ])
+
+    def hints(self, v):
+        return [f"{money(v.final)} is the price AFTER the change. What percentage of the original is that?",
+                f"The new price is {v.rate}% of the original, so {money(v.final)} = "
+                f"{num(Fraction(v.rate, 100))} × original.",
+                f"Original = {money(v.final)} ÷ {num(Fraction(v.rate, 100))}."]
+
+    def steps(self, v):
+        multiplier = num(Fraction(v.rate, 100))
+        return ['Read: Identify this is a REVERSE percentage (new price given, original wanted)',
+                f"Translate: {v.pct}% {'off' if v.form == 'discount' else 'increase'} means "
+                f"New Price = Original × {multiplier}",
+                f"Solve: Original = {money(v.final)} ÷ {multiplier} = {money(v.answer)}",
+                f"Check: {money(v.answer)} × {multiplier} = {money(v.final)} ✓"]
+
+    def explain(self, v):
+        return (f"{money(v.final)} is {v.rate}% of the original. Original = {money(v.final)} ÷ "
+                f"{num(Fraction(v.rate, 100))} = {money(v.answer)}.")
+
+
+class PaintedCubes(Template):
+    archetype = 'qa14'
+    title = 'Cube Structure Analysis'
+    params = {
+        'n': range(3, 11),
+        'ask': (3, 2, 2, 1, 1, 0, 0, 'total'),
+        'colour': ('blue', 'red', 'green', 'yellow'),
+    }
+
+    def derive(self, p):
+        n = p['n']
+        counts = {3: 8, 2: 12 * (n - 2), 1: 6 * (n - 2) ** 2, 0: (n - 2) ** 3, 'total': n ** 3}
+        if p['ask'] == 3 and n > 4:
+            return None
+        return {'counts': counts, 'answer': counts[p['ask']]}
+
+    def check(self, v):
+        c = v.counts
+        return c[3] + c[2] + c[1] + c[0] == c['total'] and v.answer == c[v.ask]
+
+    def distractors(self, v):
+        n, c = v.n, v.counts
+        labels = {3: 'corner cubes (3 painted faces)', 2: 'edge cubes (2 painted faces)',
+                  1: 'face-centre cubes (1 painted face)', 0: 'hidden cubes (no painted faces)',
+                  'total': 'all the small cubes'}
+        wrong = [(c[k], 'wrong_component', f"{c[k]} is the number of {labels[k]}.")
+                 for k in (2, 1, 0, 3, 'total') if k != v.ask]
+        formula = {3: (6, 'formula_confusion', "A cube has 6 faces but 8 corners. Each corner cube has "
+                                               "3 painted faces."),
+                   2: (12 * n, 'formula_confusion', f"This is 12 × {n}. Edge cubes = 12(n-2), not 12n."),
+                   1: (6 * n * n, 'formula_confusion', f"This is 6 × {n}². Face cubes = 6(n-2)², not 6n²."),
+                   0: ((n - 1) ** 3, 'off_by_one', f"The hidden cube is (n-2)³: remove a layer from BOTH sides."),
+                   'total': (6 * n * n, 'formula_confusion', f"6 × {n}² counts the small squares on the "
+                                                             f"surface, not the cubes.")}
+        near = {3: (12, 'wrong_component', "12 is the number of edges, not corners."),
+                2: (12 * (n - 1), 'off_by_one', "Each edge loses 2 corner cubes: use n-2."),
+                1: (6 * (n - 1) ** 2, 'off_by_one', "Remove the edge cubes from each face: use (n-2)²."),
+                0: (n ** 3 - 6 * n * n, 'wrong_operation', "Subtracting the surface squares removes some "
+                                                           "cubes more than once."),
+                'total': (n * n, 'partial_solution', f"{n}² is one layer. There are {n} layers.")}
+        return [formula[v.ask], near[v.ask]] + wrong
+
+    def difficulty(self, v):
+        if v.ask in (3, 'total'):
+            return 1
+        return 2 if v.ask == 2 else 3 if v.n <= 6 else 4
+
+    def stem(self, v):
+        question = {3: 'have exactly 3 painted faces', 2: 'have exactly 2 painted faces',
+                    1: 'have exactly 1 painted face', 0: 'have no painted faces'}
+        ask = ('How many small cubes are there in total?' if v.ask == 'total' else
+               f"How many small cubes {question[v.ask]}?")
+        return (f"A {v.n}x{v.n}x{v.n} cube is painted {v.colour} on all faces, then cut into unit cubes. {ask}")
+
+    def solution(self, v):
+        n = v.n
+        working = {3: ('Corner cubes', "Every cube has 8 corners, and each corner cube shows 3 faces.\n"
+                                       "Corner cubes = 8"),
+                   2: ('Edge cubes', f"Edge cubes = 12(n-2) = 12({n}-2) = 12({n - 2}) = {v.answer}"),
+                   1: ('Face cubes', f"Face cubes = 6(n-2)² = 6({n - 2})² = 6 × {(n - 2) ** 2} = {v.answer}"),
+                   0: ('Hidden cubes', f"Hidden cubes = (n-2)³ = {n - 2}³ = {v.answer}"),
+                   'total': ('All cubes', f"Total = n³ = {n}³ = {v.answer}")}[v.ask]
+        c = v.counts
+        return methodology(self.title, [
+            ("Identify what's asked", f"n = {n}. {working[0]} are asked for."),
+            ('Apply the formula', working[1]),
+            ('Verify', f"8 + {c[2]} + {c[1]} + {c[0]} = {c['total']} = {n}³ ✓"),
+        ], answer=f"{v.answer} cubes")
+
+    def hints(self, v):
+        first = {3: 'Which small cubes sit at the corners of the big cube?',
+                 2: 'Edge cubes (not corners) have exactly 2 painted faces.',
+                 1: 'Cubes in the middle of each face have exactly 1 painted face.',
+                 0: 'Hidden cubes form a smaller cube inside, with a layer removed from every side.',
+                 'total': 'The big cube has the same number of small cubes along each edge.'}[v.ask]
+        second = {3: 'A cube has 8 corners.', 2: 'Each edge has n-2 non-corner cubes.',
+                  1: 'Each face has (n-2)² middle cubes.', 0: 'The inner cube is (n-2) by (n-2) by (n-2).',
+                  'total': f"There are {v.n} layers of {v.n} × {v.n} cubes."}[v.ask]
+        return [first, second, f"The answer is {v.answer}."]
+
+    def steps(self, v):
+        return [f"Identify n = {v.n}", 'Match the painted-face count to corners, edges, faces or interior',
+                'Apply the formula and verify the four groups sum to n³']
+
+    def explain(self, v):
+        return f"For n = {v.n} the answer is {v.answer}, and 8 + {v.counts[2]} + {v.counts[1]} + {v.counts[0]} = {v.n ** 3}."
+
+
+class ScaleWeight(Template):
+    archetype = 'qa15'
+    title = 'Scale/Proportion Weight'
+    params = {
+        'thing': ('chocolate bar', 'block of cheese', 'wooden box', 'statue model', 'gold bar'),
+        'w': range(10, 201, 10),
+        'k': (2, 2, 3, 3, 4),
+    }
+
+    def derive(self, p):
+        answer = p['w'] * p['k'] ** 3
+        return None if answer >= 10000 else {'answer': answer}
+
+    def check(self, v):
+        return v.answer == v.w * v.k * v.k * v.k
+
+    def text(self, value, v):
+        return f"{num(value)} grams"
+
+    def distractors(self, v):
+        w, k = v.w, v.k
+        return [
+            (w * k, 'misconception_answer', f"Scaling every length by {k} does not just multiply the weight by {k}. "
+                                            f"Length, width AND height all grow."),
+            (w * k * k, 'partial_solution', f"{k} × {k} covers two dimensions. The third dimension multiplies by "
+                                            f"{k} again."),
+            (w * 3 * k, 'wrong_operation', f"The scale factors multiply, not add: {k} × {k} × {k} = {k ** 3}."),
+            (w * k ** 3 + w, 'computation_error', f"The large object replaces the small one: {w} × {k ** 3}."),
+            (w * 2 ** k if k != 2 else w * 6, 'formula_confusion', f"Volume scale = {k}³ = {k ** 3}."),
+        ]
+
+    def difficulty(self, v):
+        return 2 if v.k == 2 else 3
+
+    def stem(self, v):
+        times = 'twice' if v.k == 2 else f"{v.k} times"
+        return (f"A small {v.thing} weighs {v.w} grams. A large {v.thing} made of the same material is {times} "
+                f"as long, {times} as wide and {times} as thick. What does the large {v.thing} weigh?")
+
+    def solution(self, v):
+        return methodology('Volume Scaling', [
+            ('Find the volume scale factor', f"Every length × {v.k}, so volume × {v.k} × {v.k} × {v.k} = {v.k ** 3}"),
+            ('Scale the weight', f"Same material, so weight × {v.k ** 3}\n{v.w} × {v.k ** 3} = {v.answer} grams"),
+            ('Check', f"The large {v.thing} holds {v.k ** 3} small ones: {v.k} along, {v.k} across and "
+                      f"{v.k} up ✓"),
+        ])
+
+    def hints(self, v):
+        return ["Weight depends on volume, and volume depends on all three dimensions.",
+                f"Each dimension is × {v.k}, so the volume is × {v.k} × {v.k} × {v.k}.",
+                f"Weight = {v.w} × {v.k ** 3} = {v.answer} grams."]
+
+    def steps(self, v):
+        return ['Read: Identify the scale factor for each dimension',
+                'Scale: Multiply the three factors for the volume scale',
+                'Solve: Multiply the weight by the volume scale',
+                'Check: Picture how many small objects fit in the large one']
+
+    def explain(self, v):
+        return f"Volume scales by {v.k}³ = {v.k ** 3}, so the weight is {v.w} × {v.k ** 3} = {v.answer} grams."
+
+
+class Timetable(Template):
+    archetype = 'qa16'
+    title = 'Timetable Navigation'
+    params = {
+        'trip': (('bus', 'the station', 'the shopping centre'), ('train', 'Central', 'Parramatta'),
+                 ('ferry', 'Circular Quay', 'Manly'), ('tram', 'the city', 'the beach')),
+        'form': ('duration', 'arrival'),
+        'depart': range(6 * 60, 20 * 60),
+        'travel': range(12, 151),
+    }
+
+    def derive(self, p):
+        return {'arrive': p['depart'] + p['travel'],
+                'answer': p['travel'] if p['form'] == 'duration' else p['depart'] + p['travel']}
+
+    def check(self, v):
+        return v.arrive - v.depart == v.travel and v.answer == (v.travel if v.form == 'duration' else v.arrive)
+
+    def text(self, value, v):
+        return duration(value) if v.form == 'duration' else clock(value)
+
+    def distractors(self, v):
+        if v.form == 'duration':
+            naive = (v.arrive // 60 * 100 + v.arrive % 60) - (v.depart // 60 * 100 + v.depart % 60)
+            return [
+                (naive, 'wrong_calculation', "Times are not decimal numbers: an hour has 60 minutes, not 100."),
+                (v.travel + 10, 'computation_error', f"Count on from {clock(v.depart)} to {clock(v.arrive)}."),
+                (v.travel - 10, 'computation_error', f"Count on from {clock(v.depart)} to {clock(v.arrive)}."),
+                (v.travel + 60, 'misread_question', "Check the hours: count whole hours first, then minutes."),
+                (v.travel - 60, 'misread_question', "Check the hours: count whole hours first, then minutes."),
+                (v.arrive % 60 + (60 if v.arrive % 60 < 30 else 0), 'partial_solution',
+                 "That only uses the minutes of the arrival time."),
+            ]
+        return [
+            (v.arrive + 12 * 60, 'am-pm-confusion', "Check AM and PM: times after 12:00 noon are PM."),
+            (v.arrive - 10, 'computation_error', f"Add exactly {duration(v.travel)} to {clock(v.depart)}."),
+            (v.arrive + 10, 'computation_error', f"Add exactly {duration(v.travel)} to {clock(v.depart)}."),
+            (v.arrive - 60, 'computation_error', "When the minutes pass 60, carry one hour."),
+            (v.arrive + 60, 'computation_error', "Check the hours you added."),
+            (v.depart + v.travel % 60, 'partial_solution', "You added the minutes but not the hours."),
+        ]
+
+    def difficulty(self, v):
+        crosses = v.depart // 60 != v.arrive // 60
+        return 1 if not crosses else 2 if v.travel < 60 else 3
+
+    def stem(self, v):
+        vehicle, start, end = v.trip
+        if v.form == 'duration':
+            return (f"A {vehicle} leaves {start} at {clock(v.depart)} and arrives at {end} at {clock(v.arrive)}. "
+                    f"How long is the {vehicle} trip?")
+        return (f"A {vehicle} leaves {start} at {clock(v.depart)}. The trip to {end} takes {duration(v.travel)}. "
+                f"What time does it arrive at {end}?")
+
+    def solution(self, v):
+        to_hour = (60 - v.depart % 60) % 60
+        steps = [('Write the times', f"Depart: {clock(v.depart)}\nArrive: {clock(v.arrive)}"
+                                     if v.form == 'duration' else
+                                     f"Depart: {clock(v.depart)}\nTravel: {duration(v.travel)}")]
+        if v.form == 'duration' and to_hour and to_hour < v.travel:
+            steps.append(('Count on to the next hour', f"{clock(v.depart)} → {clock(v.depart + to_hour)} = "
+                                                       f"{duration(to_hour)}"))
+            steps.append(('Count on to the arrival', f"{clock(v.depart + to_hour)} → {clock(v.arrive)} = "
+                                                     f"{duration(v.travel - to_hour)}\n"
+                                                     f"Total = {duration(v.travel)}"))
+        elif v.form == 'duration':
+            steps.append(('Subtract', f"{clock(v.arrive)} - {clock(v.depart)} = {duration(v.travel)}"))
+        else:
+            steps.append(('Add the travel time', f"{clock(v.depart)} + {duration(v.travel)} = {clock(v.arrive)}"))
+        return methodology(self.title, steps, answer=self.text(v.answer, v))
+
+    def hints(self, v):
+        if v.form == 'duration':
+            return [f"Count on from {clock(v.depart)}. How long until the next o'clock?",
+                    "Add whole hours first, then the leftover minutes. An hour is 60 minutes, not 100.",
+                    f"The trip takes {duration(v.travel)}."]
+        return [f"Add the hours first, then the minutes.",
+                "If the minutes go past 60, carry one hour.",
+                f"{clock(v.depart)} + {duration(v.travel)} = {clock(v.arrive)}"]
+
+    def steps(self, v):
+        return ['Read: Identify the times and what is asked',
+                'Bridge: Count on to the next hour',
+                'Solve: Add whole hours and remaining minutes',
+                'Check: Count forward to confirm']
+
+    def explain(self, v):
+        return f"{clock(v.depart)} to {clock(v.arrive)} is {duration(v.travel)}."
+
+
+class AgeRelationship(Template):
+    archetype = 'qa17'
+    title = 'Age Relationship'
+    params = {
+        'relative': ('father', 'mother', 'aunt', 'uncle', 'grandmother'),
+        'name': NAMES,
+        'child': range(4, 16),
+        'adult': range(24, 71),
+        'k': (2, 2, 3),
+    }
+
+    def derive(self, p):
+        c, a, k = p['child'], p['adult'], p['k']
+        if p['relative'] == 'grandmother' and a < 50 or p['relative'] != 'grandmother' and a > 50:
+            return None
+        gap = a - k * c
+        if gap <= 0 or gap % (k - 1) or gap // (k - 1) > 20:
+            return None
+        return {'answer': gap // (k - 1)}
+
+    def check(self, v):
+        return v.adult + v.answer == v.k * (v.child + v.answer)
+
+    def text(self, value, v):
+        return count(value, 'year')
+
+    def distractors(self, v):
+        times = 'twice' if v.k == 2 else f"{v.k} times"
+        return [
+            (v.adult - v.child, 'misconception_answer', f"{v.adult - v.child} is the age difference. That never "
+                                                        f"changes, but the ratio does."),
+            (v.adult - v.k * v.child, 'wrong_operation', "Both ages increase each year, so the gap closes by "
+                                                         f"{v.k - 1} years of ratio every year."),
+            (v.child, 'misread_question', f"That is {v.name}'s age now."),
+            (v.answer + 2, 'computation_error', f"Check: in that many years, is the {v.relative} {times} as old?"),
+            (v.answer * 2, 'computation_error', f"Check: in that many years, is the {v.relative} {times} as old?"),
+            (v.answer + v.k, 'computation_error', f"Check: in that many years, is the {v.relative} {times} as old?"),
+        ]
+
+    def difficulty(self, v):
+        return 2 if v.k == 2 else 4
+
+    def stem(self, v):
+        times = 'twice' if v.k == 2 else f"{v.k} times"
+        return (f"{v.name} is {v.child} years old and {v.name}'s {v.relative} is {v.adult} years old. In how many "
+                f"years will the {v.relative} be {times} as old as {v.name}?")
+
+    def solution(self, v):
+        n = v.answer
+        return methodology(self.title, [
+            ('Set up the equation', f"In n years: {v.relative} = {v.adult} + n, {v.name} = {v.child} + n\n"
+                                    f"{v.adult} + n = {v.k}({v.child} + n)"),
+            ('Solve', f"{v.adult} + n = {v.k * v.child} + {v.k}n\n{v.adult - v.k * v.child} = "
+                      f"{v.k - 1 if v.k > 2 else ''}n\nn = {n}"),
+            ('Check', f"In {n} years: {v.name} is {v.child + n}, {v.relative} is {v.adult + n}\n"
+                      f"{v.adult + n} = {v.k} × {v.child + n} ✓"),
+        ], answer=self.text(n, v))
+
+    def hints(self, v):
+        return ["Both people get older by the same number of years.",
+                f"Let the number of years be n. Then {v.adult} + n = {v.k} × ({v.child} + n).",
+                f"Solve for n: n = {v.answer}."]
+
+    def steps(self, v):
+        return ['Read: Identify current ages and the target ratio',
+                'Setup: Add n to both ages and write the equation',
+                'Solve: Collect the n terms and divide',
+                'Check: Substitute n to confirm the ratio']
+
+    def explain(self, v):
+        return (f"In {v.answer} years {v.name} will be {v.child + v.answer} and the {v.relative} "
+                f"{v.adult + v.answer}, which is {v.k} × {v.child + v.answer}.")
+
+
+class SystematicCounting(Template):
+    archetype = 'qa18'
+    title = 'Systematic Counting'
+    params = {
+        'form': ('diagonals', 'handshakes', 'digits', 'digits'),
+        'n': range(4, 13),
+        'digits': lambda rng, k: [tuple(sorted(rng.sample(range(1, 10), rng.randint(3, 6)))) for _ in range(k)],
+        'length': (2, 3),
+        'repeat': (True, False),
+    }
+    POLYGONS = {5: 'pentagon', 6: 'hexagon', 7: 'heptagon', 8: 'octagon', 9: 'nonagon', 10: 'decagon',
+                12: 'dodecagon'}
+
+    def derive(self, p):
+        n, form = p['n'], p['form']
+        if form == 'diagonals':
+            if n not in self.POLYGONS:
+                return None
+            return {'answer': n * (n - 3) // 2}
+        if form == 'handshakes':
+            return {'answer': n * (n - 1) // 2}
+        d, k = len(p['digits']), p['length']
+        if k > d:
+            return None
+        return {'answer': d ** k if p['repeat'] else perm(d, k)}
+
+    def check(self, v):
+        if v.form == 'diagonals':
+            return v.answer == comb(v.n, 2) - v.n
+        if v.form == 'handshakes':
+            return v.answer == comb(v.n, 2)
+        d, k = len(v.digits), v.length
+        choices = [d - (0 if v.repeat else i) for i in range(k)]
+        total = 1
+        for c in choices:
+            total *= c
+        return v.answer == total
+
+    def distractors(self, v):
+        n = v.n
+        if v.form == 'diagonals':
+            return [
+                (n * (n - 1) // 2, 'overcounting', f"{n * (n - 1) // 2} counts every pair of corners, "
+                                                   f"including the {n} sides."),
+                (n * (n - 3), 'overcounting', f"Each diagonal joins two corners, so it was counted twice. "
+                                              f"Halve: {n * (n - 3)} ÷ 2."),
+                (n - 3, 'partial_solution', f"That is the diagonals from ONE corner. There are {n} corners."),
+                (n, 'misconception_answer', f"A {self.POLYGONS[n]} has {n} sides, but diagonals are different."),
+                (n * (n - 2) // 2, 'formula_confusion', "From each corner you can't draw to itself or its two "
+                                                        "neighbours: that is n-3."),
+            ]
+        if v.form == 'handshakes':
+            return [
+                (n * (n - 1), 'overcounting', f"Each handshake involves two people, so {n} × {n - 1} counts it "
+                                              f"twice."),
+                (n * n, 'overcounting', "People don't shake hands with themselves, and each handshake "
+                                        "is shared."),
+                (n - 1, 'partial_solution', f"That is the handshakes of ONE person. There are {n} people."),
+                (n * (n + 1) // 2, 'off_by_one', f"Each person shakes {n - 1} hands, not {n}."),
+                (n, 'misconception_answer', "Count the pairs of people, not the people."),
+            ]
+        d, k = len(v.digits), v.length
+        other = perm(d, k) if v.repeat else d ** k
+        return [
+            (other, 'concept_confusion', "Check whether digits can be repeated." if v.repeat else
+             "The digits can't be repeated, so there is one fewer choice for each place."),
+            (d * k, 'wrong_operation', f"Multiply the choices for each place: {d} choices per place, {k} places."),
+            (comb(d, k), 'concept_confusion', "Order matters for numbers: 35 and 53 are different."),
+            (d + k, 'wrong_operation', "Multiply the choices for each place, don't add."),
+            (k ** d, 'formula_confusion', f"There are {d} choices for each of {k} places, not the other way round."),
+        ]
+
+    def difficulty(self, v):
+        if v.form == 'digits':
+            return 2 if v.length == 2 else 3
+        return 2 if v.n <= 7 else 3
+
+    def stem(self, v):
+        if v.form == 'diagonals':
+            return f"How many diagonals does a {self.POLYGONS[v.n]} ({v.n}-sided polygon) have?"
+        if v.form == 'handshakes':
+            return (f"At a meeting, each of the {v.n} people shakes hands once with every other person. "
+                    f"How many handshakes are there?")
+        digits = ', '.join(map(str, v.digits[:-1])) + f" and {v.digits[-1]}"
+        return (f"How many {v.length}-digit numbers can be formed using the digits {digits} if repetition "
+                f"is {'allowed' if v.repeat else 'not allowed'}?")
+
+    def solution(self, v):
+        n = v.n
+        if v.form == 'diagonals':
+            return methodology(self.title, [
+                ('Count from one corner', f"Each corner joins to every other corner except itself and its 2 "
+                                          f"neighbours: {n} - 3 = {n - 3} diagonals"),
+                ('Multiply by the corners', f"{n} × {n - 3} = {n * (n - 3)}"),
+                ('Remove double counting', f"Each diagonal is counted from both ends: {n * (n - 3)} ÷ 2 = "
+                                           f"{v.answer}"),
+            ], answer=f"{v.answer} diagonals")
+        if v.form == 'handshakes':
+            return methodology(self.title, [
+                ('Count for one person', f"Each person shakes {n - 1} hands"),
+                ('Multiply by the people', f"{n} × {n - 1} = {n * (n - 1)}"),
+                ('Remove double counting', f"Each handshake involves 2 people: {n * (n - 1)} ÷ 2 = {v.answer}"),
+            ], answer=f"{v.answer} handshakes")
+        d, k = len(v.digits), v.length
+        choices = [d - (0 if v.repeat else i) for i in range(k)]
+        places = '\n'.join(f"Place {i + 1}: {c} choices" for i, c in enumerate(choices))
+        return methodology(self.title, [
+            ('Count the choices for each place', places),
+            ('Multiply', f"{' × '.join(map(str, choices))} = {v.answer}"),
+        ], answer=f"{v.answer} numbers")
+
+    def hints(self, v):
+        if v.form == 'diagonals':
+            return ["Start at one corner. Which corners can you draw a diagonal to?",
+                    f"From each corner there are {v.n - 3} diagonals. But each diagonal has two ends.",
+                    f"{v.n} × {v.n - 3} ÷ 2 = {v.answer}"]
+        if v.form == 'handshakes':
+            return ["How many hands does one person shake?",
+                    f"Each of the {v.n} people shakes {v.n - 1} hands, but every handshake is shared by two people.",
+                    f"{v.n} × {v.n - 1} ÷ 2 = {v.answer}"]
+        d = len(v.digits)
+        return ["Think about each place in the number separately. How many digits could go first?",
+                f"There are {d} choices for the first place." + ("" if v.repeat else
+                                                                 " One digit is then used up."),
+                f"Multiply the choices: the answer is {v.answer}."]
+
+    def steps(self, v):
+        return ['Read: Identify what is being counted and whether order matters',
+                'Count: Work out the choices at each stage',
+                'Solve: Multiply the choices, then remove double counting if pairs are unordered',
+                'Check: List a small case to confirm the method']
+
+    def explain(self, v):
+        return f"Counting systematically gives {v.answer}."
+
+
+class ShadedRegion(Template):
+    archetype = 'qa19'
+    title = 'Shaded Region Area'
+    params = {
+        'length': range(6, 21),
+        'width': range(4, 16),
+        'cut_length': range(2, 12),
+        'cut_width': range(1, 10),
+        'where': ('one corner', 'the centre'),
+    }
+
+    def derive(self, p):
+        margin = 2 if p['where'] == 'the centre' else 1
+        if (p['width'] >= p['length'] or p['cut_length'] > p['length'] - margin
+                or p['cut_width'] > p['width'] - margin):
+            return None
+        whole, cut = p['length'] * p['width'], p['cut_length'] * p['cut_width']
+        return {'whole': whole, 'cut': cut, 'answer': whole - cut}
+
+    def check(self, v):
+        return v.answer + v.cut_length * v.cut_width == v.length * v.width
+
+    def text(self, value, v):
+        return f"{num(value)} cm²"
+
+    def distractors(self, v):
+        return [
+            (v.whole, 'partial_solution', "That is the area of the whole rectangle. Subtract the piece cut out."),
+            (v.cut, 'wrong_region', "That is the area of the piece cut out, not the shaded region left."),
+            (v.whole + v.cut, 'wrong_operation', "The piece is removed, so subtract its area."),
+            ((v.length - v.cut_length) * (v.width - v.cut_width), 'misconception_answer',
+             "Subtracting the lengths and widths does not give the remaining area."),
+            (2 * (v.length + v.width), 'formula_confusion', "That is the perimeter, not the area."),
+            (v.answer - v.cut_length, 'computation_error', f"Check: {v.whole} - {v.cut} = {v.answer}."),
+        ]
+
+    def difficulty(self, v):
+        return 1 if v.where == 'one corner' else 2
+
+    def stem(self, v):
+        return (f"A rectangle has length {v.length} cm and width {v.width} cm. A smaller rectangle with length "
+                f"{v.cut_length} cm and width {v.cut_width} cm is cut from {v.where}. What is the area of the "
+                f"remaining shaded region?")
+
+    def solution(self, v):
+        return methodology('Area Subtraction', [
+            ('Area of the large rectangle', f"{v.length} × {v.width} = {v.whole} cm²"),
+            ('Area of the piece removed', f"{v.cut_length} × {v.cut_width} = {v.cut} cm²"),
+            ('Subtract', f"{v.whole} - {v.cut} = {v.answer} cm²"),
+        ], answer=f"{v.answer} cm²")
+
+    def hints(self, v):
+        return ["Shaded area = whole shape - the part removed.",
+                f"The whole rectangle is {v.length} × {v.width} = {v.whole} cm².",
+                f"Remove {v.cut_length} × {v.cut_width} = {v.cut} cm²: {v.whole} - {v.cut} = {v.answer} cm²."]
+
+    def steps(self, v):
+        return ['Read: Identify the outer shape and the removed shape',
+                'Calculate: Find both areas',
+                'Solve: Subtract the removed area',
+                'Check: Confirm the removed piece fits inside the rectangle']
+
+    def explain(self, v):
+        return f"{v.length} × {v.width} - {v.cut_length} × {v.cut_width} = {v.whole} - {v.cut} = {v.answer} cm²."
+
+
+class SpeedDistanceTime(Template):
+    archetype = 'qa20'
+    title = 'Speed-Distance-Time Multi-Part'
+    SPEEDS = {'cyclist': (10, 12, 15, 18, 20, 24, 30), 'runner': (6, 8, 9, 10, 12, 15),
+              'car': (40, 45, 50, 60, 80, 90, 100)}
+    params = {
+        'who': (('cyclist', 'rides'), ('runner', 'runs'), ('car', 'travels')),
+        'i1': range(7),
+        'i2': range(7),
+        'd1': range(2, 121),
+        'd2': range(2, 121),
+    }
+
+    def derive(self, p):
+        speeds = self.SPEEDS[p['who'][0]]
+        if p['i1'] >= len(speeds) or p['i2'] >= len(speeds) or p['i1'] == p['i2']:
+            return None
+        s1, s2 = speeds[p['i1']], speeds[p['i2']]
+        if 60 * p['d1'] % s1 or 60 * p['d2'] % s2 or p['d1'] == p['d2']:
+            return None
+        t1, t2 = 60 * p['d1'] // s1, 60 * p['d2'] // s2
+        if not 20 <= t1 + t2 <= 300 or t1 < 10 or t2 < 10:
+            return None
+        return {'s1': s1, 's2': s2, 't1': t1, 't2': t2, 'answer': t1 + t2}
+
+    def check(self, v):
+        return Fraction(v.d1, v.s1) + Fraction(v.d2, v.s2) == Fraction(v.answer, 60)
+
+    def text(self, value, v):
+        return duration(value)
+
+    def distractors(self, v):
+        averaged = Fraction(60 * (v.d1 + v.d2) * 2, v.s1 + v.s2)
+        swapped = Fraction(60 * v.d1, v.s2) + Fraction(60 * v.d2, v.s1)
+        return [
+            (averaged, 'misconception_answer', "You can't average the two speeds: each part takes a different "
+                                               "amount of time."),
+            (v.t1, 'partial_solution', f"That is only the first part of the journey. Add the {v.d2} km part."),
+            (swapped, 'wrong_operation', "You matched each distance with the wrong speed."),
+            (v.answer + 10, 'computation_error', f"Check each part: time = distance ÷ speed."),
+            (v.answer - 10, 'computation_error', f"Check each part: time = distance ÷ speed."),
+            (v.answer + 60, 'computation_error', "Check the hours when you add the two parts."),
+        ]
+
+    def difficulty(self, v):
+        return 2 if v.t1 % 30 == 0 and v.t2 % 30 == 0 else 3
+
+    def stem(self, v):
+        who, verb = v.who
+        return (f"A {who} {verb} {v.d1} km at {v.s1} km/h, then {v.d2} km at {v.s2} km/h. What is the total "
+                f"time for the journey?")
+
+    def solution(self, v):
+        return methodology('Multi-Part Journey', [
+            ('Time for part 1', f"Time = Distance ÷ Speed = {v.d1} ÷ {v.s1} = {duration(v.t1)}"),
+            ('Time for part 2', f"{v.d2} ÷ {v.s2} = {duration(v.t2)}"),
+            ('Add the parts', f"{duration(v.t1)} + {duration(v.t2)} = {duration(v.answer)}"),
+        ], answer=duration(v.answer))
+
+    def hints(self, v):
+        return ["Work out the time for each part separately: Time = Distance ÷ Speed.",
+                f"Part 1 takes {duration(v.t1)}. How long does part 2 take?",
+                f"Part 2 takes {duration(v.t2)}. Add the two times."]
+
+    def steps(self, v):
+        return ['Read: Identify each distance with its speed',
+                'Calculate: Time for each part = distance ÷ speed',
+                'Solve: Add the times, converting minutes to hours',
+                'Check: Speeds must not be averaged']
+
+    def explain(self, v):
+        return f"{duration(v.t1)} + {duration(v.t2)} = {duration(v.answer)}."
+
+
+class ProbabilityReasoning(Template):
+    archetype = 'qa22'
+    title = 'Probability Reasoning'
+    decimals = None
+    params = {
+        'red': range(2, 11),
+        'blue': range(2, 11),
+        'drawn': ('red', 'blue'),
+        'name': NAMES,
+        'thing': ('marbles', 'counters', 'beads'),
+    }
+
+    def derive(self, p):
+        left_red = p['red'] - (p['drawn'] == 'red')
+        left = p['red'] + p['blue'] - 1
+        return {'left_red': left_red, 'left': left, 'answer': Fraction(left_red, left)}
+
+    def check(self, v):
+        return v.answer + Fraction(v.blue - (v.drawn == 'blue'), v.left) == 1
+
+    def text(self, value, v):
+        return frac(value)
+
+    def distractors(self, v):
+        total = v.red + v.blue
+        other_red = v.red if v.drawn == 'red' else v.red - 1
+        return [
+            (Fraction(v.red, total), 'misconception_answer', f"The first {v.thing[:-1]} was kept out, so "
+                                                             f"there are only {v.left} left."),
+            (1 - v.answer, 'complement_error', "That is the probability of the other colour."),
+            (Fraction(other_red, v.left), 'wrong_calculation', f"The {v.thing[:-1]} removed was {v.drawn}, "
+                                                               f"so only the {v.drawn} count goes down."),
+            (Fraction(v.left_red, total + 1), 'computation_error', f"One {v.thing[:-1]} was removed, so "
+                                                                   f"there are {v.left} left."),
+            (Fraction(v.left_red, v.blue), 'concept_confusion', "Probability is favourable ÷ TOTAL, not "
+                                                               "red ÷ blue."),
+        ]
+
+    def difficulty(self, v):
+        return 3 if v.drawn == 'red' else 2
+
+    def stem(self, v):
+        return (f"A bag contains {v.red} red and {v.blue} blue {v.thing}. {v.name} draws one, sees it is "
+                f"{v.drawn}, and keeps it out of the bag. {v.name} then draws another without looking. What is "
+                f"the probability the second one is red?")
+
+    def solution(self, v):
+        return methodology('Changing Sample Space', [
+            ('Update the bag', f"One {v.drawn} {v.thing[:-1]} is out.\nRed left: {v.left_red}\n"
+                               f"Total left: {v.red + v.blue} - 1 = {v.left}"),
+            ('Find the probability', f"P(red) = {v.left_red}/{v.left}" +
+             (f" = {frac(v.answer)}" if Fraction(v.left_red, v.left).denominator != v.left else '')),
+        ], answer=frac(v.answer))
+
+    def hints(self, v):
+        return ["After the first draw, the bag has changed. What is left?",
+                f"There are now {v.left} {v.thing} in the bag. How many are red?",
+                f"P(red) = {v.left_red}/{v.left}."]
+
+    def steps(self, v):
+        return ['Read: Note what was removed and that it was not replaced',
+                'Update: Recount the favourable outcomes and the total',
+                'Solve: Probability = favourable ÷ total',
+                'Check: The two colour probabilities add to 1']
+
+    def explain(self, v):
+        return f"{v.left} {v.thing} are left and {v.left_red} are red, so P(red) = {frac(v.answer)}."
+
+
+TEMPLATES = {t.archetype: t for t in (
+    PlaylistSequence(), WeightEquivalence(), MultiLegJourney(), SimultaneousPrices(), CoinPairing(),
+    VennDiagram(), MissingValueMean(), PatternSequence(), ThreeWayRelationship(), PercentageEquivalence(),
+    RatioRecipe(), ReversePercentage(), PaintedCubes(), ScaleWeight(), Timetable(), AgeRelationship(),
+    SystematicCounting(), ShadedRegion(), SpeedDistanceTime(), ProbabilityReasoning(),
+)}
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Benchmark the content pipeline on synthetic corpora.
+
+Synthetic corpora are built by mutating real MCQ, SHORT_ANSWER and
+WORKED_SOLUTION questions from questions/ into 120-question topics (12 sets
+of 10), at whatever sizes are asked for. Each stage then runs in its own
+child process so its peak RSS is its own:
+
+  load         json.load every set file
+  parse        stream every question with QuestionStream
+  normalize    normalize_questions, report-only
+  validate     validate_questions.run (no cache)
+  merge        merge_sets.merge every topic into a complete file (cold)
+  index        corpus_index build (cold)
+  upload-diff  upload_questions dry run against a snapshot 1% out of date
+
+Results are compared with the baseline in benchmarks/pipeline-baseline.json;
+any stage slower or larger than the baseline by more than the tolerance
+fails the run. The committed baseline records the machine it was taken on;
+on different hardware, regenerate it first with --save-baseline (sizes not
+re-run keep their stored numbers).
+
+Usage:
+  python3 benchmark_pipeline.py --sizes 10k                     # compare with baseline
+  python3 benchmark_pipeline.py --sizes 10k,100k --save-baseline
+  python3 benchmark_pipeline.py --sizes 1m --stages parse,index --tolerance 0.5
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from question_files import (
+    CACHE_DIR, SCRIPTS_DIR, QuestionStream, atomic_write, discover_question_files, iter_questions,
+    question_hash, write_question_file,
+)
+
+BENCH_DIR = os.path.join(CACHE_DIR, 'bench')
+BASELINE_PATH = os.path.join(SCRIPTS_DIR, 'benchmarks', 'pipeline-baseline.json')
+STAGES = ('load', 'parse', 'normalize', 'validate', 'merge', 'index', 'upload-diff')
+TEMPLATE_TYPES = ('MCQ', 'SHORT_ANSWER', 'WORKED_SOLUTION')
+SETS_PER_TOPIC = 12
+QUESTIONS_PER_SET = 10
+STALE_FRACTION = 0.01
+DEFAULT_TOLERANCE = 0.25
+# Differences below these are noise, whatever the ratio.
+MIN_SECONDS_DELTA = 0.2
+MIN_RSS_DELTA_MB = 16
+# Bump when the generator output changes so cached corpora are rebuilt.
+GENERATOR_VERSION = 2
+
+NUMBER = re.compile(r'\b\d+\b')
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * scale)
+
+
+def size_label(size):
+    if size % 1_000_000 == 0:
+        return f"{size // 1_000_000}m"
+    if size % 1_000 == 0:
+        return f"{size // 1_000}k"
+    return str(size)
+
+
+# ============================================
+# SYNTHETIC CORPUS
+# ============================================
+def load_templates():
+    templates = {t: [] for t in TEMPLATE_TYPES}
+    for path in discover_question_files():
+        for question in iter_questions(path):
+            if question.get('questionType') in templates:
+                templates[question['questionType']].append(question)
+    empty = [t for t, found in templates.items() if not found]
+    if empty:
+        raise SystemExit(f"❌ No template questions of type {', '.join(empty)} in questions/")
+    return templates
+
+
+def _mutate_numbers(text, rng):
+    if not isinstance(text, str):
+        return text
+    return NUMBER.sub(lambda m: str(max(1, int(m.group()) + rng.randint(-3, 3))), text)
+
+
+def mutate(template, rng, topic, set_number, sequence, previous_ids):
+    question = json.loads(json.dumps(template))
+    question['questionId'] = f"{topic}-{sequence:03d}"
+    question['stem'] = _mutate_numbers(question.get('stem'), rng)
+    question['solution'] = _mutate_numbers(question.get('solution'), rng)
+    question['paperMetadata'] = dict(question.get('paperMetadata') or {},
+                                     setId=f"{topic}-set{set_number}", sequenceInPaper=sequence)
+    if isinstance(question.get('learningArc'), dict) and 'buildsOn' in question['learningArc']:
+        question['learningArc'] = dict(question['learningArc'], buildsOn=previous_ids[-2:])
+    return question
+
+
+def _generate_topic(job):
+    """Worker: write one topic's set files. Returns {questionId: hash}."""
+    directory, topic_number, count, seed, templates = job
+    rng = random.Random(f"{seed}:{topic_number}")
+    topic = f"bench-topic-{topic_number:05d}"
+    hashes = {}
+    ids = []
+    sequence = 0
+    for set_number in range(1, SETS_PER_TOPIC + 1):
+        questions = []
+        for _ in range(QUESTIONS_PER_SET):
+            if sequence >= count:
+                break
+            sequence += 1
+            question_type = rng.choice(TEMPLATE_TYPES)
+            question = mutate(rng.choice(templates[question_type]), rng, topic, set_number, sequence, ids)
+            ids.append(question['questionId'])
+            hashes[question['questionId']] = question_hash(question)
+            questions.append(question)
+        if not questions:
+            break
+        header = {'metadata': {'topic': topic, 'setNumber': set_number,
+                               'questionRange': f"Q{questions[0]['paperMetadata']['sequenceInPaper']}-Q{sequence}"}}
+        write_question_file(os.path.join(directory, 'sets', f"{topic}-set{set_number}.json"), questions, header)
+    return hashes
+
+
+def generate_corpus(size, seed=0, jobs=None):
+    """Build (or reuse) the synthetic corpus for `size`. Returns its directory."""
+    directory = os.path.join(BENCH_DIR, f"{size_label(size)}-seed{seed}")
+    stamp = os.path.join(directory, 'corpus.json')
+    if os.path.exists(stamp):
+        with open(stamp, 'r') as f:
+            if json.load(f).get('generatorVersion') == GENERATOR_VERSION:
+                return directory
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(os.path.join(directory, 'sets'))
+
+    templates = load_templates()
+    per_topic = SETS_PER_TOPIC * QUESTIONS_PER_SET
+    jobs_list = [(directory, n, min(per_topic, size - n * per_topic), seed, templates)
+                 for n in range((size + per_topic - 1) // per_topic)]
+    started = time.perf_counter()
+    hashes = {}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for topic_hashes in pool.map(_generate_topic, jobs_list, chunksize=max(1, len(jobs_list) // 64)):
+            hashes.update(topic_hashes)
+
+    # Upload snapshot that is current except for a random 1% of questions.
+    from upload_questions import Snapshot
+    rng = random.Random(seed)
+    snapshot = Snapshot(os.path.join(directory, 'snapshot.json'))
+    snapshot.replace({qid: digest for qid, digest in hashes.items() if rng.random() >= STALE_FRACTION})
+    snapshot.save()
+
+    with atomic_write(stamp) as f:
+        json.dump({'generatorVersion': GENERATOR_VERSION, 'questions': len(hashes), 'seed': seed,
+                   'seconds': round(time.perf_counter() - started, 3)}, f, indent=2)
+    return directory
+
+
+def corpus_files(directory):
+    sets_dir = os.path.join(directory, 'sets')
+    return sorted(os.path.join(sets_dir, name) for name in os.listdir(sets_dir) if name.endswith('.json'))
+
+
+# ============================================
+# STAGES (run in a child process)
+# ============================================
+def _stage_load(paths, directory, jobs):
+    count = 0
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            count += len(json.load(f)['questions'])
+    return count
+
+
+def _stage_parse(paths, directory, jobs):
+    return sum(1 for path in paths for _ in QuestionStream(path))
+
+
+def _stage_normalize(paths, directory, jobs):
+    from normalize_questions import normalise_file
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for result in pool.map(normalise_file, [(p, None) for p in paths], chunksize=max(1, len(paths) // 64)):
+            if result['error']:
+                raise RuntimeError(result['error'])
+    return None
+
+
+def _stage_validate(paths, directory, jobs):
+    from validate_questions import build_report, run
+    file_results, _ = run(paths, jobs=jobs, use_cache=False)
+    return build_report(file_results)['summary']['totalQuestions']
+
+
+def _stage_merge(paths, directory, jobs):
+    from merge_sets import MANIFEST_VERSION, merge
+    by_topic = {}
+    for path in paths:
+        by_topic.setdefault(os.path.basename(path).rsplit('-set', 1)[0], []).append(path)
+    output_dir = os.path.join(directory, 'merged')
+    total = 0
+    for topic, sources in by_topic.items():
+        sources.sort(key=lambda p: int(re.search(r'-set(\d+)\.json$', p).group(1)))
+        manifest = {'version': MANIFEST_VERSION, 'outputs': {}}
+        summary = merge(os.path.join(output_dir, f"{topic}-year8-complete.json"), sources,
+                        verbose=False, manifest=manifest)
+        total += summary['questionCount']
+    return total
+
+
+def _stage_index(paths, directory, jobs):
+    from corpus_index import CorpusIndex
+    index_path = os.path.join(directory, 'index.sqlite')
+    if os.path.exists(index_path):
+        os.remove(index_path)
+    index = CorpusIndex(index_path)
+    index.build(paths)
+    return index.db.execute('SELECT COUNT(*) FROM questions').fetchone()[0]
+
+
+def _stage_upload_diff(paths, directory, jobs):
+    from upload_questions import Snapshot, upload
+    stats = upload(paths, None, Snapshot(os.path.join(directory, 'snapshot.json')), dry_run=True, verbose=False)
+    return stats['total']
+
+
+STAGE_FUNCTIONS = {
+    'load': _stage_load,
+    'parse': _stage_parse,
+    'normalize': _stage_normalize,
+    'validate': _stage_validate,
+    'merge': _stage_merge,
+    'index': _stage_index,
+    'upload-diff': _stage_upload_diff,
+}
+
+
+def _peak_rss_mb():
+    """
+    Peak RSS of this process and its finished workers.
+
+    ru_maxrss survives execve on Linux, so a child would report its parent's
+    peak; VmHWM belongs to the post-exec address space and does not.
+    """
+    own = 0
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    own = int(line.split()[1])
+                    break
+    except OSError:
+        own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    workers = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    peak_kb = max(own, workers)
+    # ru_maxrss is in bytes on macOS.
+    if sys.platform == 'darwin':
+        peak_kb /= 1024
+    return peak_kb / 1024
+
+
+def run_stage_child(stage, directory, jobs):
+    paths = corpus_files(directory)
+    started = time.perf_counter()
+    questions = STAGE_FUNCTIONS[stage](paths, directory, jobs)
+    elapsed = time.perf_counter() - started
+    cpu = sum(getattr(resource.getrusage(who), field)
+              for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN) for field in ('ru_utime', 'ru_stime'))
+    if questions is None:
+        with open(os.path.join(directory, 'corpus.json'), 'r') as f:
+            questions = json.load(f)['questions']
+    print(json.dumps({'questions': questions, 'seconds': elapsed, 'cpuSeconds': cpu,
+                      'peakRssMb': _peak_rss_mb()}))
+
+
+def measure(stage, directory, jobs=None):
+    """Run one stage in a fresh interpreter. Returns seconds, CPU seconds and peak RSS."""
+    command = [sys.executable, os.path.abspath(__file__), '_stage', stage, directory]
+    if jobs:
+        command += ['--jobs', str(jobs)]
+    child = subprocess.run(command, capture_output=True, cwd=SCRIPTS_DIR)
+    if child.returncode != 0:
+        raise RuntimeError(f"stage {stage} failed:\n{child.stderr.decode('utf-8', 'replace')[-2000:]}")
+    result = json.loads(child.stdout.decode('utf-8').strip().splitlines()[-1])
+    return {
+        'questions': result['questions'],
+        'seconds': round(result['seconds'], 3),
+        'cpuSeconds': round(result['cpuSeconds'], 3),
+        'peakRssMb': round(result['peakRssMb'], 1),
+    }
+
+
+# ============================================
+# BASELINE
+# ============================================
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def compare(results, baseline, tolerance):
+    """Return [(size, stage, message)] for every regression beyond `tolerance`."""
+    regressions = []
+    for size, stages in results.items():
+        for stage, now in stages.items():
+            before = ((baseline or {}).get('results', {}).get(size) or {}).get(stage)
+            if not before:
+                continue
+            if now['seconds'] > before['seconds'] * (1 + tolerance) \
+                    and now['seconds'] - before['seconds'] > MIN_SECONDS_DELTA:
+                regressions.append((size, stage, f"time {before['seconds']}s -> {now['seconds']}s"))
+            if now['peakRssMb'] > before['peakRssMb'] * (1 + tolerance) \
+                    and now['peakRssMb'] - before['peakRssMb'] > MIN_RSS_DELTA_MB:
+                regressions.append((size, stage, f"peak RSS {before['peakRssMb']}MB -> {now['peakRssMb']}MB"))
+    return regressions
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv[:1] == ['_stage']:
+        parser = argparse.ArgumentParser(prog='benchmark_pipeline.py _stage')
+        parser.add_argument('stage', choices=STAGES)
+        parser.add_argument('directory')
+        parser.add_argument('--jobs', type=int, default=None)
+        args = parser.parse_args(argv[1:])
+        run_stage_child(args.stage, args.directory, args.jobs)
+        return 0
+
+    parser = argparse.ArgumentParser(description='Benchmark pipeline stages on synthetic corpora.')
+    parser.add_argument('--sizes', default='10k', help='comma-separated corpus sizes, e.g. 10k,100k,1m')
+    parser.add_argument('--stages', default=','.join(STAGES), help=f"comma-separated subset of {', '.join(STAGES)}")
+    parser.add_argument('--seed', type=int, default=0, help='generator seed (default: 0)')
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes per stage (default: CPU count)')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='baseline file to compare against / save')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='allowed slowdown/growth before failing (default: 0.25 = 25%%)')
+    parser.add_argument('--report', help='write results to this JSON file')
+    args = parser.parse_args(argv)
+
+    stages = [s.strip() for s in args.stages.split(',') if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(unknown)}")
+    sizes = [parse_size(s) for s in args.sizes.split(',')]
+    baseline = load_baseline(args.baseline)
+
+    print('\n' + '═' * 60)
+    print('  ⏱️  PIPELINE BENCHMARK')
+    print('═' * 60)
+    results = {}
+    for size in sizes:
+        label = size_label(size)
+        print(f"\n  Corpus {label}: generating/reusing...", flush=True)
+        directory = generate_corpus(size, args.seed, args.jobs)
+        results[label] = {}
+        print(f"  {'stage':12s} {'questions':>10s} {'wall s':>9s} {'cpu s':>9s} {'peak MB':>9s} {'vs base':>8s}")
+        print('  ' + '━' * 58)
+        for stage in stages:
+            result = measure(stage, directory, args.jobs)
+            results[label][stage] = result
+            before = ((baseline or {}).get('results', {}).get(label) or {}).get(stage)
+            delta = f"{(result['seconds'] / before['seconds'] - 1) * 100:+.0f}%" \
+                if before and before['seconds'] else '-'
+            print(f"  {stage:12s} {result['questions']:>10d} {result['seconds']:>9.2f} "
+                  f"{result['cpuSeconds']:>9.2f} {result['peakRssMb']:>9.1f} {delta:>8s}", flush=True)
+
+    regressions = compare(results, baseline, args.tolerance)
+    print('\n' + '━' * 60)
+    if baseline is None:
+        print('  ℹ️  No baseline yet - run with --save-baseline to store one')
+    elif regressions:
+        print(f"  ❌ {len(regressions)} REGRESSIONS (tolerance {args.tolerance:.0%}):")
+        for size, stage, message in regressions:
+            print(f"     {size} {stage}: {message}")
+    else:
+        print(f"  ✅ No regressions against baseline (tolerance {args.tolerance:.0%})")
+
+    if args.save_baseline:
+        merged = dict((baseline or {}).get('results', {}))
+        merged.update(results)
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with atomic_write(args.baseline) as f:
+            json.dump({'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                                   'cpus': os.cpu_count()},
+                       'results': merged}, f, indent=2)
+        print(f"  💾 Baseline saved to: {os.path.relpath(args.baseline)}")
+    print('═' * 60 + '\n')
+
+    if args.report:
+        with atomic_write(args.report) as f:
+            json.dump({'results': results, 'regressions': regressions}, f, indent=2)
+    return 1 if regressions and not args.save_baseline else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Build the BM25 index concept-chat uses to ground answers in the question bank.
+
+Every question's stem, solution, hints and encouragingHints are tokenised
+into an inverted index with the term statistics BM25 needs, written as one
+compact JSON file the chat function loads once per instance:
+
+  {
+    "version": 1, "k1": 1.2, "b": 0.75, "avgdl": 61.3,
+    "docs": [{"id", "topic", "subject", "len", "stem", "solution", "hint"}, ...],
+    "postings": {"term": [doc, tf, doc, tf, ...], ...}
+  }
+
+Stem terms count twice, so a question is found by what it asks before what
+its working mentions. docs carry short excerpts for the prompt, not whole
+questions.
+
+Each topic is tokenised into its own segment under .cache/chat-index/, keyed
+by the hashes of the topic's files. Editing one topic file re-tokenises only
+that topic; the other segments are reused and the index is re-merged.
+
+tokenize() is mirrored by tokenize() in functions/src/concept-chat/content-index.ts;
+change both together.
+
+Usage:
+  python3 build_chat_index.py
+  python3 build_chat_index.py --force            # ignore cached segments
+  python3 build_chat_index.py --query "why does ice float"
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import unicodedata
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from question_files import (
+    CACHE_DIR, SCRIPTS_DIR, QuestionFileError, atomic_write, copy_rank, discover_question_files,
+    file_sha256, iter_questions, relpath, topic_slug,
+)
+
+REPO_ROOT = os.path.dirname(SCRIPTS_DIR)
+DEFAULT_INDEX = os.path.join(REPO_ROOT, 'functions', 'data', 'chat-index.json')
+SEGMENT_DIR = os.path.join(CACHE_DIR, 'chat-index')
+INDEX_FORMAT_VERSION = 1
+K1 = 1.2
+B = 0.75
+STEM_WEIGHT = 2
+EXCERPT_CHARS = {'stem': 280, 'solution': 400, 'hint': 200}
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+_MARKUP = re.compile(r'\*\*|__|`|\$\$?|\\[a-z]+')
+STOPWORDS = frozenset('''
+    a an and are as at be been but by can did do does for from had has have how i if in into is it its
+    of on or so than that the their them then there these they this to was were what when where which
+    who why will with would you your
+'''.split())
+
+
+# ============================================
+# TOKENISING
+# ============================================
+def tokenize(text):
+    """Lower-cased word and number tokens, stopwords dropped, plural -s trimmed."""
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    tokens = []
+    for token in _TOKEN.findall(text):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 4 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def _hint_texts(hints):
+    for hint in hints or []:
+        if isinstance(hint, str):
+            yield hint
+        elif isinstance(hint, dict):
+            for key in ('content', 'text', 'hintText', 'questionPrompt'):
+                if isinstance(hint.get(key), str):
+                    yield hint[key]
+
+
+def _excerpt(text, limit):
+    text = ' '.join(_MARKUP.sub('', text or '').split())
+    return text if len(text) <= limit else text[:limit - 1].rsplit(' ', 1)[0] + '…'
+
+
+def document(question, topic):
+    """(term counts, length, excerpt doc) for one question."""
+    stem = question.get('stem') if isinstance(question.get('stem'), str) else ''
+    solution = question.get('solution') if isinstance(question.get('solution'), str) else ''
+    hints = list(_hint_texts(question.get('hints'))) + list(_hint_texts(question.get('encouragingHints')))
+
+    counts = Counter()
+    for token in tokenize(stem):
+        counts[token] += STEM_WEIGHT
+    for text in [solution] + hints:
+        counts.update(tokenize(text))
+
+    curriculum = question.get('curriculum') or {}
+    subject = curriculum.get('subject') if isinstance(curriculum.get('subject'), str) else ''
+    doc = {'id': question['questionId'], 'topic': topic, 'subject': subject.lower(),
+           'len': sum(counts.values()),
+           'stem': _excerpt(stem, EXCERPT_CHARS['stem']),
+           'solution': _excerpt(solution, EXCERPT_CHARS['solution']),
+           'hint': _excerpt(hints[0], EXCERPT_CHARS['hint']) if hints else ''}
+    return counts, doc
+
+
+# ============================================
+# SEGMENTS
+# ============================================
+def topic_files(paths):
+    topics = defaultdict(list)
+    for path in paths:
+        topics[topic_slug(path)].append(path)
+    return {topic: sorted(files, key=lambda p: (copy_rank(p), p)) for topic, files in topics.items()}
+
+
+def _segment_path(topic):
+    return os.path.join(SEGMENT_DIR, f"{topic}.json")
+
+
+def load_segment(topic, hashes):
+    """The cached segment for `topic` if it was built from exactly these files."""
+    try:
+        with open(_segment_path(topic), 'r') as f:
+            segment = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if segment.get('version') != INDEX_FORMAT_VERSION or segment.get('files') != hashes:
+        return None
+    return segment
+
+
+def build_segment(job):
+    """Worker: tokenise one topic. Returns (topic, segment, error)."""
+    topic, paths, hashes = job
+    docs, terms = [], []
+    seen = set()
+    try:
+        for path in paths:
+            for question in iter_questions(path):
+                qid = question.get('questionId')
+                if not qid or qid in seen:
+                    continue
+                seen.add(qid)
+                counts, doc = document(question, topic)
+                if counts:
+                    docs.append(doc)
+                    terms.append(dict(sorted(counts.items())))
+    except QuestionFileError as e:
+        return topic, None, str(e)
+    segment = {'version': INDEX_FORMAT_VERSION, 'topic': topic, 'files': hashes, 'docs': docs, 'terms': terms}
+    os.makedirs(SEGMENT_DIR, exist_ok=True)
+    with atomic_write(_segment_path(topic)) as f:
+        json.dump(segment, f, ensure_ascii=False, separators=(',', ':'))
+    return topic, segment, None
+
+
+def merge_segments(segments):
+    """One index from per-topic segments; a questionId keeps its first topic's copy."""
+    docs, postings = [], defaultdict(list)
+    seen = set()
+    for topic in sorted(segments):
+        segment = segments[topic]
+        for doc, counts in zip(segment['docs'], segment['terms']):
+            if doc['id'] in seen:
+                continue
+            seen.add(doc['id'])
+            number = len(docs)
+            docs.append(doc)
+            for term, tf in counts.items():
+                postings[term] += (number, tf)
+    avgdl = sum(d['len'] for d in docs) / len(docs) if docs else 0
+    return {'version': INDEX_FORMAT_VERSION, 'k1': K1, 'b': B, 'avgdl': round(avgdl, 3),
+            'docs': docs, 'postings': dict(sorted(postings.items()))}
+
+
+def build(paths, force=False, jobs=None):
+    """Return (index, rebuilt topics, reused topics, errors)."""
+    segments, pending = {}, []
+    for topic, files in sorted(topic_files(paths).items()):
+        hashes = {relpath(p): file_sha256(p) for p in files}
+        cached = None if force else load_segment(topic, hashes)
+        if cached:
+            segments[topic] = cached
+        else:
+            pending.append((topic, files, hashes))
+
+    reused = sorted(segments)
+    errors = []
+    if pending:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for topic, segment, error in pool.map(build_segment, pending):
+                if error:
+                    errors.append(f"{topic}: {error}")
+                else:
+                    segments[topic] = segment
+    return merge_segments(segments), [job[0] for job in pending], reused, errors
+
+
+# ============================================
+# QUERYING
+# ============================================
+def search(index, query, limit=5):
+    """BM25 top `limit` as [(score, doc)], the same scoring content-index.ts uses."""
+    docs, postings = index['docs'], index['postings']
+    k1, b, avgdl = index['k1'], index['b'], index['avgdl'] or 1
+    scores = defaultdict(float)
+    for term in set(tokenize(query)):
+        posting = postings.get(term)
+        if not posting:
+            continue
+        df = len(posting) // 2
+        idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+        for i in range(0, len(posting), 2):
+            doc, tf = posting[i], posting[i + 1]
+            norm = k1 * (1 - b + b * docs[doc]['len'] / avgdl)
+            scores[doc] += idf * tf * (k1 + 1) / (tf + norm)
+    ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]
+    return [(score, docs[doc]) for doc, score in ranked]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the concept-chat BM25 index over the question bank.')
+    parser.add_argument('files', nargs='*', help='question files (default: whole corpus)')
+    parser.add_argument('--out', default=DEFAULT_INDEX, help='index to write (default: functions/data/chat-index.json)')
+    parser.add_argument('--force', action='store_true', help='re-tokenise every topic')
+    parser.add_argument('--query', help='print the top matches for a query after building')
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: CPU count)')
+    args = parser.parse_args(argv)
+
+    paths = [os.path.abspath(f) for f in args.files] or discover_question_files()
+    index, rebuilt, reused, errors = build(paths, force=args.force, jobs=args.jobs)
+    body = json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    print('\n' + '═' * 60)
+    print('  🔎 CONCEPT-CHAT INDEX')
+    print('═' * 60)
+    print(f"  Documents:  {len(index['docs'])}")
+    print(f"  Terms:      {len(index['postings'])}")
+    print(f"  Avg length: {index['avgdl']}")
+    print(f"  Topics:     {len(rebuilt)} tokenised, {len(reused)} reused")
+    for topic in rebuilt:
+        print(f"   ↻ {topic}")
+    for error in errors:
+        print(f"  ❌ {error}")
+
+    unchanged = False
+    if os.path.exists(args.out):
+        with open(args.out, 'rb') as f:
+            unchanged = f.read() == body
+    if unchanged:
+        print(f"\n  ✓ {os.path.relpath(args.out)} unchanged")
+    else:
+        os.makedirs(os.path.dirname(args.out), exist_ok=True)
+        with atomic_write(args.out, 'wb') as f:
+            f.write(body)
+        print(f"\n  ✓ Wrote {os.path.relpath(args.out)} ({len(body) / 1024:.1f} KB)")
+
+    if args.query:
+        print(f"\n  Top matches for {args.query!r}:")
+        for score, doc in search(index, args.query):
+            print(f"   {score:6.2f}  {doc['id']:32s} {doc['stem'][:60]}")
+    print('═' * 60 + '\n')
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
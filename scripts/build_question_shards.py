@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Precompute static question shards for every query shape in firestore.indexes.json.
+
+Each composite index on the questions collection is a query shape: its
+array-contains fields and leading ordered fields are filters, and a trailing
+ordered field is the sort. For every combination of filter values present in
+the corpus a shard is written, already sorted the way Firestore would return
+it (sort field, then document id), so the app can serve question lists from
+static hosting instead of running the query.
+
+A shard is only the sorted list of question ids. Each document is written
+once, into the pack for its topic, and the manifest lists the packs every
+shard's ids live in:
+
+  <out>/manifest.json
+  <out>/packs/<topic>.json                {questionId: document}, one per topic
+  <out>/<shape>/<value>__<value>.json     ["id", ...], one per key combination
+
+Shards for shapes sorted by difficulty also record (in the manifest) where
+each difficulty starts, so "difficulty == 3" is a slice of the same list.
+
+Question files do not carry tags, and upload_questions.py uploads them as
+they are, so the Firestore documents have none either. The tags.years,
+tags.topics and tags.subjects the index shapes filter on are therefore
+synthetic here: curriculum.year, the file's topic slug and the lower-cased
+curriculum.subject. The tag-filtered shards answer the queries the app means
+to run, not what Firestore returns for today's documents. Explicit tags on a
+question win.
+
+Unchanged shards are not rewritten, so their bytes (and cache entries) stay
+stable between builds. --check verifies the shards on disk are current and
+that every query shape has shards; it writes nothing. A shape sorted or
+filtered on a field no document carries yet (updatedAt,
+performanceMetrics.qualityScore) is reported as a warning, so --check can be
+used as a gate; a shape whose fields exist but never occur together fails.
+
+Usage:
+  python3 build_question_shards.py
+  python3 build_question_shards.py --check
+  python3 build_question_shards.py --out /tmp/shards --status published
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+
+from question_files import (
+    SCRIPTS_DIR, atomic_write, copy_rank, discover_question_files, iter_questions, topic_slug,
+)
+
+REPO_ROOT = os.path.dirname(SCRIPTS_DIR)
+INDEXES_PATH = os.path.join(REPO_ROOT, 'firestore.indexes.json')
+DEFAULT_OUT = os.path.join(REPO_ROOT, 'public', 'shards', 'questions')
+COLLECTION = 'questions'
+SHARD_FORMAT_VERSION = 2
+PACKS_DIR = 'packs'
+
+_UNSAFE = re.compile(r'[^a-zA-Z0-9._-]+')
+
+
+# ============================================
+# QUERY SHAPES
+# ============================================
+class Shape:
+    """One composite index: filter fields plus an optional sort field."""
+
+    def __init__(self, fields):
+        self.fields = fields
+        last = fields[-1]
+        if 'order' in last:
+            self.filters = [f['fieldPath'] for f in fields[:-1]]
+            self.sort = last['fieldPath']
+            self.descending = last['order'] == 'DESCENDING'
+        else:
+            self.filters = [f['fieldPath'] for f in fields]
+            self.sort = None
+            self.descending = False
+        self.array_fields = {f['fieldPath'] for f in fields if f.get('arrayConfig') == 'CONTAINS'}
+        parts = [_short(f) for f in self.filters]
+        if self.sort:
+            parts.append(f"by-{_short(self.sort)}{'-desc' if self.descending else ''}")
+        self.id = '_'.join(parts)
+
+    def describe(self):
+        filters = ' AND '.join(f"{f} {'array-contains' if f in self.array_fields else '=='} ?"
+                               for f in self.filters)
+        order = f" ORDER BY {self.sort} {'DESC' if self.descending else 'ASC'}" if self.sort else ''
+        return filters + order
+
+
+def _short(field_path):
+    return field_path.split('.')[-1]
+
+
+def load_shapes(path=INDEXES_PATH):
+    """Distinct composite-index shapes on the questions collection."""
+    with open(path, 'r') as f:
+        indexes = json.load(f).get('indexes', [])
+    shapes = {}
+    for index in indexes:
+        if index.get('collectionGroup') != COLLECTION or index.get('queryScope', 'COLLECTION') != 'COLLECTION':
+            continue
+        shape = Shape(index['fields'])
+        shapes.setdefault(shape.id, shape)
+    return list(shapes.values())
+
+
+# ============================================
+# DOCUMENTS
+# ============================================
+def field_value(doc, field_path):
+    value = doc
+    for part in field_path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def with_tags(question, topic):
+    """The document with synthetic tags where the file has none (uploads carry no tags)."""
+    if isinstance(question.get('tags'), dict):
+        return question
+    curriculum = question.get('curriculum') or {}
+    tags = {'topics': [topic]}
+    if curriculum.get('year') is not None:
+        tags['years'] = [curriculum['year']]
+    if isinstance(curriculum.get('subject'), str):
+        tags['subjects'] = [curriculum['subject'].lower()]
+    return dict(question, tags=tags)
+
+
+def canonical_documents(paths):
+    """(questionId, topic, document) once per questionId, taken from its most canonical file."""
+    ranked = sorted(paths, key=lambda p: (copy_rank(p), p))
+    seen = set()
+    for path in ranked:
+        topic = topic_slug(path)
+        for question in iter_questions(path):
+            qid = question.get('questionId')
+            if qid and qid not in seen:
+                seen.add(qid)
+                yield qid, topic, with_tags(question, topic)
+
+
+def load_documents(paths):
+    """One document per questionId, taken from its most canonical file."""
+    return {qid: doc for qid, _, doc in canonical_documents(paths)}
+
+
+def _sort_key(value):
+    # Firestore orders values by type first: numbers before strings.
+    if isinstance(value, bool):
+        return (0, int(value), '')
+    if isinstance(value, (int, float)):
+        return (1, value, '')
+    return (2, 0, str(value))
+
+
+def shard_keys(doc, shape):
+    """Every filter-value combination this document matches under `shape`."""
+    combos = [()]
+    for field in shape.filters:
+        value = field_value(doc, field)
+        if value is None:
+            return []
+        if field in shape.array_fields:
+            if not isinstance(value, list) or not value:
+                return []
+            values = list(dict.fromkeys(v for v in value if isinstance(v, (str, int, float))))
+        else:
+            if isinstance(value, (list, dict)):
+                return []
+            values = [value]
+        combos = [combo + (v,) for combo in combos for v in values]
+    return combos
+
+
+def build_shards(docs, shape):
+    """{key tuple: [doc, ...] sorted as Firestore would return them}."""
+    shards = {}
+    for qid, doc in docs.items():
+        if shape.sort and field_value(doc, shape.sort) is None:
+            continue  # Firestore leaves out documents missing the ordered field
+        for key in shard_keys(doc, shape):
+            shards.setdefault(key, []).append(doc)
+    for key, members in shards.items():
+        if shape.sort:
+            members.sort(key=lambda d: (_sort_key(field_value(d, shape.sort)), d['questionId']),
+                         reverse=shape.descending)
+        else:
+            members.sort(key=lambda d: d['questionId'])
+    return shards
+
+
+def shard_name(key):
+    return '__'.join(_UNSAFE.sub('-', str(v)).strip('-') or '_' for v in key) + '.json'
+
+
+def pack_path(topic):
+    return f"{PACKS_DIR}/{shard_name((topic,))}"
+
+
+def _compact(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _file_entry(path, body, count):
+    return {'path': path, 'count': count, 'bytes': len(body), 'sha256': hashlib.sha256(body).hexdigest()}
+
+
+def sort_ranges(members, field):
+    """{value: [start, end)} for each run of equal sort values."""
+    ranges = {}
+    for i, doc in enumerate(members):
+        value = str(field_value(doc, field))
+        if value in ranges:
+            ranges[value][1] = i + 1
+        else:
+            ranges[value] = [i, i + 1]
+    return ranges
+
+
+# ============================================
+# BUILD
+# ============================================
+def plan(shapes, docs, homes):
+    """
+    Return (manifest, {relative path: bytes}) for the whole shard set.
+    `homes` maps each questionId to the topic whose pack holds its document.
+    """
+    files = {}
+    manifest = {'version': SHARD_FORMAT_VERSION, 'collection': COLLECTION,
+                'documentCount': len(docs), 'packs': {}, 'shapes': []}
+    by_topic = {}
+    for qid in sorted(docs):
+        by_topic.setdefault(homes[qid], {})[qid] = docs[qid]
+    for topic, members in sorted(by_topic.items()):
+        path = pack_path(topic)
+        files[path] = _compact(members)
+        manifest['packs'][topic] = _file_entry(path, files[path], len(members))
+
+    for shape in shapes:
+        entry = {'id': shape.id, 'query': shape.describe(), 'filters': shape.filters,
+                 'sort': {'field': shape.sort, 'direction': 'DESCENDING' if shape.descending else 'ASCENDING'}
+                 if shape.sort else None,
+                 'shards': []}
+        for key, members in sorted(build_shards(docs, shape).items(), key=lambda kv: [_sort_key(v) for v in kv[0]]):
+            path = f"{shape.id}/{shard_name(key)}"
+            files[path] = _compact([doc['questionId'] for doc in members])
+            shard = dict({'key': dict(zip(shape.filters, key))}, **_file_entry(path, files[path], len(members)))
+            shard['packs'] = sorted({homes[doc['questionId']] for doc in members})
+            if shape.sort:
+                shard['ranges'] = sort_ranges(members, shape.sort)
+            entry['shards'].append(shard)
+        manifest['shapes'].append(entry)
+    files['manifest.json'] = json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8')
+    return manifest, files
+
+
+def coverage_gaps(manifest, docs):
+    """Shapes no document can answer, with the fields nothing carries."""
+    gaps = []
+    for shape in manifest['shapes']:
+        if shape['shards']:
+            continue
+        fields = shape['filters'] + ([shape['sort']['field']] if shape['sort'] else [])
+        missing = [f for f in fields if not any(field_value(d, f) is not None for d in docs.values())]
+        gaps.append((shape['id'], shape['query'], missing))
+    return gaps
+
+
+def existing_files(out_dir):
+    found = set()
+    for dirpath, _, filenames in os.walk(out_dir):
+        for name in filenames:
+            found.add(os.path.relpath(os.path.join(dirpath, name), out_dir).replace(os.sep, '/'))
+    return found
+
+
+def sync(out_dir, files):
+    """Write changed shards, delete stale ones. Returns (written, unchanged, removed)."""
+    written, unchanged = [], 0
+    for rel, body in files.items():
+        path = os.path.join(out_dir, rel)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                if f.read() == body:
+                    unchanged += 1
+                    continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with atomic_write(path, 'wb') as f:
+            f.write(body)
+        written.append(rel)
+    removed = sorted(existing_files(out_dir) - set(files))
+    for rel in removed:
+        os.remove(os.path.join(out_dir, rel))
+    for dirpath, dirnames, filenames in os.walk(out_dir, topdown=False):
+        if dirpath != out_dir and not dirnames and not filenames:
+            os.rmdir(dirpath)
+    return written, unchanged, removed
+
+
+def stale(out_dir, files):
+    """Shard paths on disk that differ from, or are missing against, a fresh build."""
+    problems = []
+    for rel, body in files.items():
+        path = os.path.join(out_dir, rel)
+        if not os.path.exists(path):
+            problems.append(f"missing {rel}")
+            continue
+        with open(path, 'rb') as f:
+            if f.read() != body:
+                problems.append(f"outdated {rel}")
+    problems += [f"unexpected {rel}" for rel in sorted(existing_files(out_dir) - set(files))] \
+        if os.path.isdir(out_dir) else []
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build static question shards for each Firestore index shape.')
+    parser.add_argument('files', nargs='*', help='question files (default: whole corpus)')
+    parser.add_argument('--out', default=DEFAULT_OUT, help='output directory (default: public/shards/questions)')
+    parser.add_argument('--indexes', default=INDEXES_PATH, help='firestore.indexes.json to read')
+    parser.add_argument('--status', help='only include questions with this status (e.g. published)')
+    parser.add_argument('--check', action='store_true', help='verify shards on disk and coverage; write nothing')
+    args = parser.parse_args(argv)
+
+    paths = [os.path.abspath(f) for f in args.files] or discover_question_files()
+    shapes = load_shapes(args.indexes)
+    docs, homes = {}, {}
+    for qid, topic, doc in canonical_documents(paths):
+        if not args.status or doc.get('status') == args.status:
+            docs[qid], homes[qid] = doc, topic
+    manifest, files = plan(shapes, docs, homes)
+    gaps = coverage_gaps(manifest, docs)
+
+    print('\n' + '═' * 60)
+    print('  🧩 QUESTION SHARDS')
+    print('═' * 60)
+    print(f"  Documents:     {len(docs)} in {len(manifest['packs'])} topic packs "
+          f"({sum(p['bytes'] for p in manifest['packs'].values()) / 1024:.1f} KB)")
+    print(f"  Query shapes:  {len(shapes)} (from {os.path.relpath(args.indexes)})")
+    known_empty = {shape_id for shape_id, _, missing in gaps if missing}
+    for shape in manifest['shapes']:
+        count = len(shape['shards'])
+        size = sum(s['bytes'] for s in shape['shards'])
+        mark = '✓' if count else '⚠️ ' if shape['id'] in known_empty else '❌'
+        print(f"   {mark} {shape['id']:40s} {count:4d} shards {size / 1024:9.1f} KB")
+
+    failed = False
+    if args.check:
+        problems = stale(args.out, files)
+        for problem in problems[:20]:
+            print(f"  ❌ {problem}")
+        if len(problems) > 20:
+            print(f"  ... and {len(problems) - 20} more")
+        failed = bool(problems) or any(not missing for _, _, missing in gaps)
+        if not problems:
+            print(f"\n  ✓ Shards in {os.path.relpath(args.out)} are current")
+    else:
+        written, unchanged, removed = sync(args.out, files)
+        print(f"\n  Written: {len(written)}  Unchanged: {unchanged}  Removed: {len(removed)}")
+        print(f"  Output:  {os.path.relpath(args.out)}")
+
+    for shape_id, query, missing in gaps:
+        if missing:
+            print(f"  ⚠️  No shards for {shape_id} ({query}): no document has {', '.join(missing)} yet")
+        else:
+            print(f"  ❌ No shards for {shape_id} ({query}): no document matches every filter")
+    print('═' * 60 + '\n')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Build complete topic files from declarative manifests.
+
+Each topic has a manifest in topics/<topic>.json:
+
+  {
+    "topic": "states-of-matter",
+    "target": "questions/states-of-matter-year8-complete.json",
+    "sources": ["states-of-matter-phase1-q1-q20.json", ...],
+    "dependsOn": [],                      # optional, other topic names
+    "transform": {"set": {...}}           # optional, see merge_sets.apply_transform
+  }
+
+Paths are relative to scripts/. A transform carries what the old assemble-*.js
+scripts did to each question (renumbered ids, setId/section templates,
+sequenceInPaper), e.g.
+
+    "transform": {"setSize": 10, "set": {
+      "questionId": "ecm-y8-{n:03d}",
+      "paperMetadata": {"section": "year8-science",
+                        "setId": "year8-elements-compounds-mixtures-set{set}",
+                        "sequenceInPaper": "{setPosition}"}}}
+
+The manifests form a DAG: a topic depends on any topic whose target appears
+in its sources, plus anything in dependsOn. Like make, but with content
+hashes instead of mtimes, a target is rebuilt only when a source's hash, the
+source list, the transform, or the target itself differs from what the last
+merge recorded. A target that exists but was never recorded (a fresh clone,
+an empty .cache) is adopted as it is: its hashes are recorded and nothing is
+rewritten unless --force is given. Topics whose dependencies are done build
+in parallel across processes; each build is a merge_sets.merge().
+
+Usage:
+  python3 build_topics.py                      # build everything that is stale
+  python3 build_topics.py states-of-matter     # one topic (and its dependencies)
+  python3 build_topics.py --dry-run            # show what would rebuild
+  python3 build_topics.py init ratios-rates    # scaffold a manifest from set files
+  python3 build_topics.py --trace              # per-topic timings (see pipeline_trace.py)
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from merge_sets import (
+    MANIFEST_VERSION, MergeError, discover_topic_sources, load_manifest, merge, save_manifest,
+    transform_digest,
+)
+from pipeline_trace import Tracer, worker_timing
+from question_files import QUESTIONS_DIR, SCRIPTS_DIR, QuestionStream, file_sha256, relpath
+
+TOPICS_DIR = os.path.join(SCRIPTS_DIR, 'topics')
+
+
+class BuildError(Exception):
+    pass
+
+
+class Topic:
+    def __init__(self, path, data):
+        self.manifest_path = path
+        self.name = data.get('topic') or os.path.splitext(os.path.basename(path))[0]
+        if not data.get('target') or not isinstance(data.get('sources'), list) or not data['sources']:
+            raise BuildError(f"{relpath(path)}: manifest needs a target and a non-empty sources list")
+        self.target = os.path.join(SCRIPTS_DIR, data['target'])
+        self.sources = [os.path.join(SCRIPTS_DIR, s) for s in data['sources']]
+        self.depends_on = set(data.get('dependsOn') or [])
+        self.transform = data.get('transform') or None
+        if self.transform is not None and not isinstance(self.transform.get('set'), dict):
+            raise BuildError(f"{relpath(path)}: transform needs a \"set\" object")
+
+
+def load_topics(directory=TOPICS_DIR):
+    topics = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.json'))):
+        with open(path, 'r') as f:
+            try:
+                topic = Topic(path, json.load(f))
+            except json.JSONDecodeError as e:
+                raise BuildError(f"{relpath(path)}: {e}")
+        if topic.name in topics:
+            raise BuildError(f"topic {topic.name} is defined twice")
+        topics[topic.name] = topic
+
+    producers = {os.path.normpath(t.target): name for name, t in topics.items()}
+    if len(producers) != len(topics):
+        raise BuildError('two manifests write the same target')
+    for topic in topics.values():
+        unknown = topic.depends_on - topics.keys()
+        if unknown:
+            raise BuildError(f"{topic.name}: unknown dependsOn {', '.join(sorted(unknown))}")
+        for source in topic.sources:
+            producer = producers.get(os.path.normpath(source))
+            if producer:
+                topic.depends_on.add(producer)
+    return topics
+
+
+def build_order(topics, selected=None):
+    """Topological order (Kahn) of the selected topics and their dependencies."""
+    wanted = set()
+    stack = list(selected or topics)
+    while stack:
+        name = stack.pop()
+        if name not in topics:
+            raise BuildError(f"no manifest for topic {name}")
+        if name not in wanted:
+            wanted.add(name)
+            stack.extend(topics[name].depends_on)
+
+    remaining = {name: set(topics[name].depends_on) for name in wanted}
+    order = []
+    ready = sorted(name for name, deps in remaining.items() if not deps)
+    while ready:
+        name = ready.pop(0)
+        order.append(name)
+        for other, deps in remaining.items():
+            if name in deps:
+                deps.discard(name)
+                if not deps and other not in order and other not in ready:
+                    ready.append(other)
+    if len(order) != len(wanted):
+        cycle = sorted(wanted - set(order))
+        raise BuildError(f"dependency cycle between: {', '.join(cycle)}")
+    return order
+
+
+def stale_reason(topic, manifest):
+    """Why `topic` needs rebuilding, or None if its target is current."""
+    entry = manifest['outputs'].get(relpath(topic.target))
+    if not os.path.exists(topic.target):
+        return 'target missing'
+    if entry is None:
+        return 'never built'
+    if file_sha256(topic.target) != entry['sha256']:
+        return 'target edited'
+    recorded = {e['path']: e['sha256'] for e in entry['sources']}
+    for source in topic.sources:
+        if not os.path.exists(source):
+            raise BuildError(f"{topic.name}: missing source {relpath(source)}")
+        key = relpath(source)
+        if key not in recorded:
+            return f"new source {key}"
+        if file_sha256(source) != recorded[key]:
+            return f"changed {key}"
+    if [e['path'] for e in entry['sources']] != [relpath(s) for s in topic.sources]:
+        return 'source list changed'
+    if entry.get('transform') != transform_digest(topic.transform):
+        return 'transform changed'
+    return None
+
+
+def untrusted_record(topic, manifest):
+    """
+    Why the last recorded build of `topic` does not describe its target
+    (so an incremental merge would overwrite something else), or None.
+    """
+    entry = manifest['outputs'].get(relpath(topic.target))
+    if entry is None:
+        return 'never built'
+    if not os.path.exists(topic.target):
+        return 'target missing'
+    if file_sha256(topic.target) != entry['sha256']:
+        return 'target edited'
+    if entry.get('transform') != transform_digest(topic.transform):
+        return 'transform changed'
+    return None
+
+
+def adopt(topic, manifest):
+    """
+    Record an existing, never-recorded target and its sources' hashes without
+    rewriting it. Later source edits rebuild it as usual. Returns the entry.
+    """
+    for source in topic.sources:
+        if not os.path.exists(source):
+            raise BuildError(f"{topic.name}: missing source {relpath(source)}")
+    entry = {
+        'sha256': file_sha256(topic.target),
+        'questionCount': sum(1 for _ in QuestionStream(topic.target)),
+        'sources': [{'path': relpath(s), 'sha256': file_sha256(s)} for s in topic.sources],
+        'adopted': True,
+    }
+    if topic.transform:
+        entry['transform'] = transform_digest(topic.transform)
+    manifest['outputs'][relpath(topic.target)] = entry
+    return entry
+
+
+def _build(job):
+    """
+    Worker: merge one topic into a private manifest.
+    Returns (name, summary, entry, error, timing).
+    """
+    name, target, sources, transform, previous, force = job
+    manifest = {'version': MANIFEST_VERSION, 'outputs': {}}
+    if previous:
+        manifest['outputs'][relpath(target)] = previous
+    summary, error = None, None
+    with worker_timing() as timing:
+        try:
+            summary = merge(target, sources, force=force, verbose=False, manifest=manifest,
+                            transform=transform)
+        except (MergeError, ValueError, OSError) as e:
+            error = str(e)
+    return name, summary, manifest['outputs'].get(relpath(target)), error, timing
+
+
+def build(topics, selected=None, force=False, dry_run=False, jobs=None, tracer=None):
+    """Build stale topics in dependency order. Returns {topic: status}."""
+    order = build_order(topics, selected)
+    manifest = load_manifest()
+    pending = {name: set(topics[name].depends_on) & set(order) for name in order}
+    status = {}
+    running = {}
+
+    def schedule(pool):
+        for name in [n for n in order if n in pending and not pending[n]]:
+            del pending[name]
+            failed = [d for d in topics[name].depends_on if status.get(d, '').startswith('failed')]
+            if failed:
+                status[name] = f"skipped ({', '.join(failed)} failed)"
+                finish(name)
+                continue
+            topic = topics[name]
+            reason = 'forced' if force else stale_reason(topic, manifest)
+            if reason is None:
+                status[name] = 'up to date'
+                finish(name)
+            elif reason == 'never built' and not rebuilt_deps(topic):
+                if dry_run:
+                    status[name] = 'would adopt the existing target'
+                else:
+                    entry = adopt(topic, manifest)
+                    status[name] = f"adopted ({entry['questionCount']} questions recorded; --force rebuilds)"
+                finish(name)
+            elif dry_run:
+                status[name] = f"would rebuild ({reason})"
+                finish(name)
+            else:
+                print(f"  ↻ {name}: {reason}")
+                job = (name, topic.target, topic.sources, topic.transform,
+                       manifest['outputs'].get(relpath(topic.target)), force)
+                running[pool.submit(_build, job)] = name
+
+    def rebuilt_deps(topic):
+        # An adopted target would not reflect a dependency rebuilt in this run.
+        return [d for d in topic.depends_on if status.get(d, '').startswith(('built', 'would rebuild'))]
+
+    def finish(name):
+        for deps in pending.values():
+            deps.discard(name)
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        schedule(pool)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                running.pop(future)
+                name, summary, entry, error, timing = future.result()
+                if tracer:
+                    tracer.record(name, **timing, failed=int(bool(error)),
+                                  processed=summary['questionCount'] if summary else 0,
+                                  attrs={'rebuilt': len(summary['rebuilt'])} if summary else None)
+                if error:
+                    status[name] = f"failed: {error}"
+                else:
+                    if entry:
+                        manifest['outputs'][relpath(topics[name].target)] = entry
+                    status[name] = f"built ({summary['questionCount']} questions, " \
+                                   f"{len(summary['rebuilt'])} sets re-read)"
+                finish(name)
+            save_manifest(manifest)
+            schedule(pool)
+    if not dry_run:
+        save_manifest(manifest)
+    return {name: status[name] for name in order}
+
+
+def init_topic(name, target=None):
+    """Write topics/<name>.json from the set/phase files merge_sets would discover."""
+    path = os.path.join(TOPICS_DIR, f"{name}.json")
+    if os.path.exists(path):
+        raise BuildError(f"{relpath(path)} already exists")
+    sources = discover_topic_sources(name)
+    if not sources:
+        raise BuildError(f"no set or phase files found for {name}")
+    target = target or os.path.join(QUESTIONS_DIR, f"{name}-year8-complete.json")
+    os.makedirs(TOPICS_DIR, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'topic': name, 'target': relpath(target), 'sources': [relpath(s) for s in sources]},
+                  f, indent=2)
+        f.write('\n')
+    return path, sources
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv[:1] == ['init']:
+        parser = argparse.ArgumentParser(prog='build_topics.py init', description='Scaffold a topic manifest.')
+        parser.add_argument('topic')
+        parser.add_argument('--target', help='complete file (default: questions/<topic>-year8-complete.json)')
+        args = parser.parse_args(argv[1:])
+        try:
+            path, sources = init_topic(args.topic, args.target)
+        except BuildError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+        print(f"✓ Wrote {relpath(path)} ({len(sources)} sources)")
+        return 0
+
+    parser = argparse.ArgumentParser(description='Build complete topic files from topics/*.json manifests.')
+    parser.add_argument('topics', nargs='*', help='topics to build (default: all)')
+    parser.add_argument('--force', action='store_true', help='rebuild even if nothing changed')
+    parser.add_argument('--dry-run', action='store_true', help='only report what is stale')
+    parser.add_argument('--jobs', type=int, default=None, help='parallel builds (default: CPU count)')
+    parser.add_argument('--trace', action='store_true', help='record stage timings under .cache/traces')
+    args = parser.parse_args(argv)
+    tracer = Tracer('build_topics', enabled=args.trace)
+
+    print('\n' + '═' * 60)
+    print('  🏗️  TOPIC BUILD')
+    print('═' * 60)
+    try:
+        with tracer.stage('load-topics') as stage:
+            topics = load_topics()
+            stage.processed = len(topics)
+        with tracer.stage('build') as stage:
+            results = build(topics, args.topics or None, force=args.force, dry_run=args.dry_run, jobs=args.jobs,
+                            tracer=tracer)
+            stage.failed = sum(1 for s in results.values() if s.startswith('failed'))
+            stage.skipped = len(results) - len([s for s in results.values() if s.startswith(('built', 'failed'))])
+
+        print('\n' + '━' * 60)
+        for name, status in results.items():
+            icon = '❌' if status.startswith(('failed', 'skipped')) else '✓'
+            print(f"  {icon} {name}: {status}")
+        print('═' * 60 + '\n')
+        return 1 if any(s.startswith(('failed', 'skipped')) for s in results.values()) else 0
+    except BuildError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    finally:
+        tracer.finish()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Compile answer-equivalence tables for WORKED_SOLUTION questions.
+
+Most worked-solution answers are a single value ("x = 7", "$1,452", "2:3"),
+yet every submission goes to an LLM to be marked. This compiles each
+question's expectedAnswers into a table the gradeAnswer function checks the
+submitted final answer against in constant time; an accepted answer is
+graded correct without calling Gemini, anything else is still marked by the
+LLM, which gives partial credit for the working:
+
+  accept    answers in normalised form, so "x=7", " X = 7 " and "7" all
+            hit the same key (whitespace, case, variable prefix, $, thousands
+            separators)
+  value     the answer as an exact reduced fraction ("7", "-3/2") when it is
+            numeric, so 7.0, 14/2 and 7 are the same answer
+
+Questions whose expectedAnswers do not solve their startingExpression (a
+linear equation) are reported and left out of the table, so they keep going
+to the LLM until the content is fixed.
+
+The table is generated, not committed: the functions predeploy in
+firebase.json rebuilds it, like the chat index and prompt prefixes.
+
+normalize_answer() is mirrored by normalizeAnswer() in
+functions/src/curriculum-grading/answer-equivalence.ts; change both together.
+Both are run against functions/test/fixtures/answer-normalization.json.
+
+Usage:
+  python3 compile_answer_tables.py                   # compile and report
+  python3 compile_answer_tables.py --check           # fail if the table is stale or items are flagged
+  python3 compile_answer_tables.py --report flagged.json
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import unicodedata
+from fractions import Fraction
+
+from question_files import (
+    SCRIPTS_DIR, atomic_write, copy_rank, discover_question_files, iter_questions, relpath,
+)
+
+REPO_ROOT = os.path.dirname(SCRIPTS_DIR)
+DEFAULT_TABLE = os.path.join(REPO_ROOT, 'functions', 'data', 'answer-tables.json')
+TABLE_FORMAT_VERSION = 2
+
+_VARIABLE_PREFIX = re.compile(r'^([a-z])\s*=\s*', re.ASCII)
+_THOUSANDS = re.compile(r'(?<=\d),(?=\d{3}(?!\d))')
+_PUNCTUATION_SPACE = re.compile(r'\s*([^\w\s])\s*', re.ASCII)
+_WHITESPACE = re.compile(r'\s+')
+_VULGAR_FRACTION = re.compile(r'(\d)([\u00bc-\u00be\u2150-\u215e])')
+_NUMBER = re.compile(r'^([+-]?)(\d+(?:\.\d+)?|\.\d+)(?: (\d+)/(\d+))?$')
+_FRACTION = re.compile(r'^([+-]?)(\d+)/(\d+)$')
+_MAX_DIGITS = 15
+
+
+class ExpressionError(ValueError):
+    """Raised when a startingExpression is not a linear equation in one variable."""
+
+
+# ============================================
+# ANSWER NORMALISATION
+# ============================================
+def normalize_answer(text):
+    """Return (key, variable) for a typed answer; variable is the stripped "x =" prefix, if any."""
+    text = _VULGAR_FRACTION.sub(r'\1 \2', str(text))
+    text = unicodedata.normalize('NFKC', text).replace('⁄', '/').replace('−', '-')
+    text = text.strip().lower()
+    variable = None
+    match = _VARIABLE_PREFIX.match(text)
+    if match:
+        variable = match.group(1)
+        text = text[match.end():]
+    text = _THOUSANDS.sub('', text.replace('$', ''))
+    text = _PUNCTUATION_SPACE.sub(r'\1', _WHITESPACE.sub(' ', text)).strip()
+    return text, variable
+
+
+def numeric_value(key):
+    """Exact value of a normalised answer that is a plain number, fraction or mixed number."""
+    if len(re.sub(r'\D', '', key)) > _MAX_DIGITS:
+        return None
+    match = _FRACTION.match(key)
+    if match:
+        sign, num, den = match.groups()
+        if int(den) == 0:
+            return None
+        value = Fraction(int(num), int(den))
+        return -value if sign == '-' else value
+    match = _NUMBER.match(key)
+    if not match:
+        return None
+    sign, whole, num, den = match.groups()
+    value = Fraction(whole)
+    if num is not None:
+        if int(den) == 0 or '.' in whole:
+            return None
+        value += Fraction(int(num), int(den))
+    return -value if sign == '-' else value
+
+
+def canonical(value):
+    """"7", "-3/2": the form normalizeAnswer's numeric path produces in TypeScript."""
+    return str(value.numerator) if value.denominator == 1 else f"{value.numerator}/{value.denominator}"
+
+
+# ============================================
+# LINEAR EQUATIONS
+# ============================================
+_TOKEN = re.compile(r'\s*(?:(\d+(?:\.\d+)?|\.\d+)|([a-z])|(.))', re.ASCII)
+_OPERATORS = {'×': '*', '·': '*', '÷': '/', '−': '-', '–': '-'}
+
+
+def _tokens(text):
+    out = []
+    for number, name, other in _TOKEN.findall(text):
+        if number:
+            out.append(('num', Fraction(number)))
+        elif name:
+            out.append(('var', name))
+        elif other.strip():
+            out.append(('op', _OPERATORS.get(other, other)))
+    # Implicit multiplication: 2x, 2(x + 1), (x + 1)(x - 1), x(3)
+    joined = []
+    for token in out:
+        if joined:
+            prev = joined[-1]
+            if (prev[0] in ('num', 'var') or prev == ('op', ')')) and (token[0] in ('num', 'var') or token == ('op', '(')):
+                joined.append(('op', '*'))
+        joined.append(token)
+    return joined
+
+
+class _Linear:
+    """Recursive-descent parser producing coef * v + const pairs over Fractions."""
+
+    def __init__(self, text):
+        self.tokens = _tokens(text)
+        self.pos = 0
+        self.variables = set()
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self, op=None):
+        token = self.peek()
+        if op is not None and token != ('op', op):
+            raise ExpressionError(f"expected '{op}'")
+        self.pos += 1
+        return token
+
+    def parse(self):
+        value = self.expression()
+        if self.pos != len(self.tokens):
+            raise ExpressionError(f"unexpected '{self.peek()[1]}'")
+        return value
+
+    def expression(self):
+        coef, const = self.term()
+        while self.peek() in (('op', '+'), ('op', '-')):
+            sign = 1 if self.take()[1] == '+' else -1
+            c, k = self.term()
+            coef, const = coef + sign * c, const + sign * k
+        return coef, const
+
+    def term(self):
+        coef, const = self.unary()
+        while self.peek() in (('op', '*'), ('op', '/')):
+            op = self.take()[1]
+            c, k = self.unary()
+            if op == '*':
+                if coef and c:
+                    raise ExpressionError('not linear')
+                coef, const = coef * k + c * const, const * k
+            else:
+                if c or not k:
+                    raise ExpressionError('division by the unknown or by zero')
+                coef, const = coef / k, const / k
+        return coef, const
+
+    def unary(self):
+        if self.peek() in (('op', '+'), ('op', '-')):
+            sign = 1 if self.take()[1] == '+' else -1
+            coef, const = self.unary()
+            return sign * coef, sign * const
+        return self.atom()
+
+    def atom(self):
+        kind, value = self.take()
+        if kind == 'num':
+            return Fraction(0), value
+        if kind == 'var':
+            self.variables.add(value)
+            return Fraction(1), Fraction(0)
+        if (kind, value) == ('op', '('):
+            inner = self.expression()
+            self.take(')')
+            return inner
+        raise ExpressionError(f"unexpected '{value}'" if value else 'unexpected end')
+
+
+def solve_linear(expression):
+    """(variable, exact solution) of a linear equation such as "5(n + 2) - 3(n - 4) = 4n"."""
+    sides = str(expression).lower().split('=')
+    if len(sides) != 2:
+        raise ExpressionError('not an equation')
+    left, right = _Linear(sides[0]), _Linear(sides[1])
+    (lc, lk), (rc, rk) = left.parse(), right.parse()
+    variables = left.variables | right.variables
+    if len(variables) != 1:
+        raise ExpressionError('needs exactly one unknown')
+    if lc == rc:
+        raise ExpressionError('no unique solution')
+    return variables.pop(), (rk - lk) / (lc - rc)
+
+
+# ============================================
+# COMPILATION
+# ============================================
+def compile_entry(config):
+    """Return (entry, problems) for one workedSolutionConfig; entry is None when flagged."""
+    answers = [a for a in config.get('expectedAnswers') or [] if isinstance(a, (str, int, float))]
+    if not answers:
+        return None, ['no expectedAnswers']
+
+    accept = {}
+    values = set()
+    variables = set()
+    for answer in answers:
+        key, variable = normalize_answer(answer)
+        if not key:
+            continue
+        accept[key] = None
+        value = numeric_value(key)
+        if value is not None:
+            values.add(value)
+            accept[canonical(value)] = None
+        if variable:
+            variables.add(variable)
+
+    problems = []
+    solved = None
+    try:
+        variable, solved = solve_linear(config.get('startingExpression', ''))
+        variables.add(variable)
+    except ExpressionError:
+        pass
+    if solved is not None:
+        # An equation has one answer, so every numeric form must be its solution.
+        wrong = sorted(canonical(v) for v in values if v != solved)
+        if wrong:
+            problems.append(f"expectedAnswers {', '.join(wrong)} do not solve "
+                            f"{config['startingExpression']!r} ({canonical(solved)})")
+        if len(variables) > 1:
+            problems.append(f"answers name {', '.join(sorted(variables))}")
+    if problems:
+        return None, problems
+
+    # Elsewhere several values are rounding or percent/decimal alternatives
+    # ("13.45", "13.454"; "18%", "0.18"): accept them, but compare by key only.
+    value = next(iter(values)) if len(values) == 1 else None
+    entry = {'accept': sorted(accept), 'value': canonical(value) if value is not None else None}
+    if variables:
+        entry['variable'] = sorted(variables)[0]
+    return entry, []
+
+
+def load_configs(paths):
+    """{questionId: (path, workedSolutionConfig)} from each question's most canonical file."""
+    configs = {}
+    for path in sorted(paths, key=lambda p: (copy_rank(p), p)):
+        for question in iter_questions(path):
+            config = question.get('workedSolutionConfig')
+            qid = question.get('questionId')
+            if qid and isinstance(config, dict) and qid not in configs:
+                configs[qid] = (path, config)
+    return configs
+
+
+def compile_tables(configs):
+    """Return (table, flagged) for every worked-solution question."""
+    entries, flagged = {}, []
+    for qid in sorted(configs):
+        path, config = configs[qid]
+        entry, problems = compile_entry(config)
+        if entry is None:
+            flagged.append({'questionId': qid, 'file': relpath(path),
+                            'startingExpression': config.get('startingExpression'), 'problems': problems})
+        else:
+            entries[qid] = entry
+    table = {'version': TABLE_FORMAT_VERSION, 'entries': entries}
+    return table, flagged
+
+
+def render(table):
+    return (json.dumps(table, ensure_ascii=False, indent=1, sort_keys=True) + '\n').encode('utf-8')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compile answer-equivalence tables for WORKED_SOLUTION questions.')
+    parser.add_argument('files', nargs='*', help='question files (default: whole corpus)')
+    parser.add_argument('--out', default=DEFAULT_TABLE, help='table to write (default: functions/data/answer-tables.json)')
+    parser.add_argument('--check', action='store_true', help='fail if the table is stale or any item is flagged')
+    parser.add_argument('--report', help='write flagged items to this JSON file')
+    args = parser.parse_args(argv)
+
+    paths = [os.path.abspath(f) for f in args.files] or discover_question_files()
+    configs = load_configs(paths)
+    table, flagged = compile_tables(configs)
+    body = render(table)
+    entries = table['entries'].values()
+
+    print('\n' + '═' * 60)
+    print('  🧮 ANSWER-EQUIVALENCE TABLES')
+    print('═' * 60)
+    print(f"  Worked-solution questions: {len(configs)}")
+    print(f"  Compiled:                  {len(table['entries'])}")
+    print(f"   numeric value:            {sum(1 for e in entries if e['value'] is not None)}")
+    print(f"  Flagged:                   {len(flagged)}")
+    for item in flagged[:20]:
+        print(f"   ❌ {item['questionId']} ({item['file']}): {'; '.join(item['problems'])}")
+    if len(flagged) > 20:
+        print(f"   ... and {len(flagged) - 20} more")
+
+    failed = False
+    current = False
+    if os.path.exists(args.out):
+        with open(args.out, 'rb') as f:
+            current = f.read() == body
+    if args.check:
+        failed = not current or bool(flagged)
+        print(f"\n  {'✓' if current else '❌'} {os.path.relpath(args.out)} is {'current' if current else 'stale'}")
+    elif current:
+        print(f"\n  ✓ {os.path.relpath(args.out)} unchanged")
+    else:
+        os.makedirs(os.path.dirname(args.out), exist_ok=True)
+        with atomic_write(args.out, 'wb') as f:
+            f.write(body)
+        print(f"\n  ✓ Wrote {os.path.relpath(args.out)} ({len(body) / 1024:.1f} KB)")
+    print('═' * 60 + '\n')
+
+    if args.report:
+        with atomic_write(args.report) as f:
+            json.dump({'flagged': flagged}, f, indent=2, ensure_ascii=False)
+        print(f"📄 Report saved to: {args.report}\n")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
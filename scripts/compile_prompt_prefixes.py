@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Precompute the static grading-prompt prefix for every gradeable question.
+
+buildPrompt() in functions/src/llm-grading/prompts.ts is the task, schema
+and label rules, the question's context line, stem and reference answer, then
+the student answer. Everything before the student answer depends only on the
+question, so it is built here once per question:
+
+  source           sha256 of the fields the prefix is built from, as the
+                   grading function reads them from the question document;
+                   an edited question no longer matches and is built at
+                   request time again
+  stem             the sanitised stem and reference answer, so a hit skips
+  referenceAnswer  sanitising them per request
+  prefix           the prompt up to the opening fence of the student answer,
+                   byte-identical on every request, which is what provider
+                   prompt caches key on
+  tokens           an estimate of the prefix's prompt tokens, for predicting
+                   the cost and latency of each grading call
+
+Documents are read exactly as upload_questions.py writes them, and only the
+fields GradingService reads from Firestore are used: type, tags.subjects,
+tags.topics, tags.years, subject, stem_md and solution_md. A question is
+included when fetchQuestion() would accept it (a SHORT_ANSWER with a Science
+or English subject and both markdown fields); nothing is derived or
+defaulted, so a document without those fields gets no entry rather than one
+whose hash never matches. A hit still has its stem checked for prompt
+injection at request time.
+
+Sanitising is only mirrored where it is exact. Stems or solutions containing
+'<' go through DOMPurify's HTML parser at request time, so they are left out,
+as are texts that would fail validation or need UTF-16 length arithmetic.
+
+prompt_prefix() is mirrored by buildPromptPrefix() and source_hash() by
+sourceHash() in functions/src/llm-grading/; change both together and bump
+PROMPT_VERSION in prompts.ts. --check compares the template with prompts.ts.
+
+Usage:
+  python3 compile_prompt_prefixes.py                 # compile and report
+  python3 compile_prompt_prefixes.py --check         # fail if the table or template is stale
+  python3 compile_prompt_prefixes.py --price 0.27    # also predict prefix cost per call (USD per 1M tokens)
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import unicodedata
+from collections import Counter
+from string import Template
+
+from question_files import SCRIPTS_DIR, QuestionFileError, atomic_write, discover_question_files, iter_questions
+
+REPO_ROOT = os.path.dirname(SCRIPTS_DIR)
+DEFAULT_TABLE = os.path.join(REPO_ROOT, 'functions', 'data', 'grading-prefixes.json')
+PROMPTS_TS = os.path.join(REPO_ROOT, 'functions', 'src', 'llm-grading', 'prompts.ts')
+TABLE_FORMAT_VERSION = 1
+PROMPT_VERSION = 1               # prompts.ts PROMPT_VERSION
+GRADED_SUBJECTS = ('science', 'english')
+MAX_INPUT_CHARS = 1200           # sanitizeInput()
+MAX_REFERENCE_CHARS = 500        # extractConciseAnswer()
+
+# Must match buildPromptPrefix() in functions/src/llm-grading/prompts.ts
+PREFIX_TEMPLATE = Template('''TASK:
+1) From REFERENCE_ANSWER, infer 3–6 key facts (short phrases) that determine correctness.
+2) Compare STUDENT_ANSWER to REFERENCE_ANSWER:
+   - Mark each key fact as hit/partial/missing
+   - For "hit": list only the fact IDs as strings (e.g., ["f1", "f2"])
+   - For "partial": provide objects with id and reason (e.g., [{"id":"f3","reason":"implied but not explicit"}])
+   - For "missing": list only the fact IDs as strings (e.g., ["f4"])
+3) List any misconceptions and contradictions as strings.
+4) Produce a percent score in [0..1] for overall correctness.
+5) Output student_friendly and parent_friendly feedback.
+6) Return valid JSON output ONLY matching the schema exactly. Your response must be a well-formed JSON object.
+
+CONTEXT:
+SUBJECT: ${subject}   TOPIC: ${topic}   YEAR: ${year}
+
+SCHEMA (follow exactly):
+{
+  "overall": {"pct": 0.0, "label": "correct|mostly-correct|partial|incorrect", "confidence": 0.0},
+  "inferred_key_facts": [{"id":"f1","text":"key fact description"}],
+  "concepts": {
+    "hit": ["f1", "f3"],
+    "partial": [{"id":"f2","reason":"why partial"}],
+    "missing": ["f4"]
+  },
+  "misconceptions": ["misconception text"],
+  "contradictions": ["contradiction text"],
+  "explanations": {"student_friendly": "feedback for student", "parent_friendly": "feedback for parent"}
+}
+
+LABEL RULES (use exact lowercase):
+- "correct": pct >= 0.85
+- "mostly-correct": pct >= 0.70 and < 0.85
+- "partial": pct >= 0.40 and < 0.70
+- "incorrect": pct < 0.40
+
+STEM (read-only):
+```${stem}```
+
+REFERENCE_ANSWER (authoritative, concise; read-only):
+```${referenceAnswer}```
+
+STUDENT_ANSWER (grade this only):
+```''')
+
+# The template's interpolations as they are written in prompts.ts
+TS_PLACEHOLDERS = {
+    'meta.subject': 'subject',
+    'meta.topic || "General"': 'topic',
+    'meta.year || "Unknown"': 'year',
+    'escapeBackticks(stem)': 'stem',
+    'escapeBackticks(referenceAnswer)': 'referenceAnswer',
+}
+
+# JavaScript's \s and `.` differ from Python's, so the sanitizer's patterns
+# spell them out.
+_JS_SPACE = '\t\n\v\f\r \u00a0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000\ufeff'
+_JS_SPACE_CHARS = '\t\n\v\f\r \u00a0\u1680\u2028\u2029\u202f\u205f\u3000\ufeff' + ''.join(
+    map(chr, range(0x2000, 0x200b)))
+_S = f'[{_JS_SPACE}]'
+_DOT = '[^\n\r\u2028\u2029]'
+
+
+def _js_pattern(pattern, flags=0):
+    return re.compile(pattern.replace(r'\s', _S).replace('.', _DOT), flags)
+
+
+_MARKDOWN = [
+    (_js_pattern(r'\*\*(.*?)\*\*'), r'\1'),
+    (_js_pattern(r'\*(.*?)\*'), r'\1'),
+    (_js_pattern(r'`(.*?)`'), r'\1'),
+    (_js_pattern(r'#{1,6}\s+'), ''),
+    (_js_pattern(r'>\s+'), ''),
+    (_js_pattern(r'\[([^\]]+)\]\([^)]+\)'), r'\1'),
+    (_js_pattern(r'!\[([^\]]*)\]\([^)]+\)'), r'\1'),
+    (_js_pattern(r'\n\s*\n'), '\n'),
+]
+_URL = re.compile(rf'https?://[^{_JS_SPACE}]+', re.I)
+_EMAIL = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+_WHITESPACE = _js_pattern(r'\s+')
+_BLANK_LINES = _js_pattern(r'\n\s*\n')
+_INJECTION = [_js_pattern(p, re.I) for p in (
+    r'ignore\s+previous\s+instructions', r'forget\s+everything', r'system\s*:', r'assistant\s*:',
+    r'```json', r'\{.*"overall".*\}', r'new\s+task', r'you\s+are\s+now', r'instead\s+of\s+grading',
+)]
+_PIECE = re.compile(r'[A-Za-z]+|[0-9]{1,3}|[^\sA-Za-z0-9]+')
+
+
+class SkipQuestion(ValueError):
+    """Raised when a question's prefix cannot be precomputed exactly."""
+
+
+# ============================================
+# SANITIZER (mirrors sanitizer.ts)
+# ============================================
+def _js_trim(text):
+    return text.strip(_JS_SPACE_CHARS)
+
+
+def _nfkc(text):
+    text = unicodedata.normalize('NFKC', text)
+    if any(ord(c) > 0xFFFF for c in text):
+        raise SkipQuestion('astral characters (UTF-16 lengths)')
+    return text
+
+
+def sanitize_markdown(stem):
+    return _js_trim(_nfkc(stem))
+
+
+def extract_concise_answer(solution):
+    concise = solution
+    for pattern, replacement in _MARKDOWN:
+        concise = pattern.sub(replacement, concise)
+    concise = _js_trim(concise)
+    if not concise:
+        raise SkipQuestion('empty reference answer')
+
+    concise = _nfkc(concise)
+    concise = _EMAIL.sub('<EMAIL>', _URL.sub('<URL>', concise))
+    concise = _js_trim(_BLANK_LINES.sub('\n', _WHITESPACE.sub(' ', concise)))
+    if not 1 <= len(concise) <= MAX_INPUT_CHARS:
+        raise SkipQuestion('reference answer over 1200 chars (rejected by sanitizeInput)')
+
+    if len(concise) > MAX_REFERENCE_CHARS:
+        truncated = concise[:MAX_REFERENCE_CHARS]
+        last_sentence = truncated.rfind('. ')
+        concise = truncated[:last_sentence + 1] if last_sentence > 300 else truncated + '...'
+    if len(concise) < 5:
+        raise SkipQuestion('reference answer too short')
+    return concise
+
+
+def escape_backticks(text):
+    return text.replace('`', '\\`')
+
+
+# ============================================
+# PREFIXES
+# ============================================
+def _js_string(value, fallback=None):
+    """How a template literal renders `value` (or `value || fallback`)."""
+    if fallback is not None and value in (None, '', 0, False):
+        return fallback
+    if value is None:
+        return 'undefined'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def prompt_prefix(stem, reference_answer, meta):
+    return PREFIX_TEMPLATE.substitute(
+        subject=_js_string(meta['subject']),
+        topic=_js_string(meta['topic'], 'General'),
+        year=_js_string(meta['year'], 'Unknown'),
+        stem=escape_backticks(stem),
+        referenceAnswer=escape_backticks(reference_answer),
+    )
+
+
+def source_hash(stem, solution, meta):
+    fields = [stem, solution, meta['subject'], meta['topic'], meta['year']]
+    body = json.dumps(fields, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+
+def estimate_tokens(text):
+    """
+    Rough BPE token count: a short word is one token and long ones split every
+    six letters, digits group in threes, punctuation runs pair up. Within
+    about 15% of the providers' counts on English prose; calibrate against
+    usage.prompt_tokens before relying on it for billing.
+    """
+    tokens = 0
+    for piece in _PIECE.findall(text):
+        if piece[0].isascii() and piece[0].isalpha():
+            tokens += 1 + (len(piece) - 1) // 6
+        elif piece[0].isdigit():
+            tokens += 1
+        else:
+            tokens += math.ceil(len(piece) / 2)
+    return tokens
+
+
+def grading_view(doc):
+    """
+    (stem, solution, meta) as GradingService reads them from the document, or
+    None when fetchQuestion() would reject the question.
+    """
+    if doc.get('type') != 'SHORT_ANSWER':
+        return None
+    tags = doc.get('tags') if isinstance(doc.get('tags'), dict) else {}
+    subjects = tags.get('subjects') or []
+    if not any(isinstance(s, str) and s.lower() in GRADED_SUBJECTS for s in subjects):
+        return None
+    stem, solution = doc.get('stem_md'), doc.get('solution_md')
+    if not isinstance(stem, str) or not isinstance(solution, str) or not stem or not solution:
+        return None
+    meta = {
+        'subject': doc.get('subject'),
+        'topic': (tags.get('topics') or [None])[0],
+        'year': (tags.get('years') or [None])[0],
+    }
+    return stem, solution, meta
+
+
+def compile_entry(stem, solution, meta):
+    if '<' in stem or '<' in solution:
+        raise SkipQuestion('markup (sanitised by DOMPurify at request time)')
+    if any(p.search(stem) for p in _INJECTION):
+        raise SkipQuestion('stem rejected by detectPromptInjection')
+    sanitized_stem = sanitize_markdown(stem)
+    reference = extract_concise_answer(solution)
+    prefix = prompt_prefix(sanitized_stem, reference, meta)
+    return {
+        'source': source_hash(stem, solution, meta),
+        'stem': sanitized_stem,
+        'referenceAnswer': reference,
+        'prefix': prefix,
+        'tokens': estimate_tokens(prefix),
+    }
+
+
+def load_documents(paths):
+    """{questionId: document} as upload_questions.py writes them; the first copy of an id wins."""
+    docs = {}
+    for path in paths:
+        try:
+            for question in iter_questions(path):
+                qid = question.get('questionId')
+                if qid and qid not in docs:
+                    docs[qid] = question
+        except QuestionFileError:
+            continue
+    return docs
+
+
+def compile_prefixes(docs):
+    """Return (table, gradeable count, Counter of skip reasons)."""
+    entries, skipped, gradeable = {}, Counter(), 0
+    for qid in sorted(docs):
+        view = grading_view(docs[qid])
+        if view is None:
+            continue
+        gradeable += 1
+        if docs[qid].get('subject', '') is None:
+            # Renders as "null", which sourceHash() cannot tell from a missing subject
+            skipped['subject is null'] += 1
+            continue
+        try:
+            entries[qid] = compile_entry(*view)
+        except SkipQuestion as e:
+            skipped[str(e)] += 1
+    table = {'version': TABLE_FORMAT_VERSION, 'promptVersion': PROMPT_VERSION, 'entries': entries}
+    return table, gradeable, skipped
+
+
+def template_drift(path=PROMPTS_TS):
+    """None when PREFIX_TEMPLATE matches buildPromptPrefix(), else a description."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            source = f.read()
+    except OSError as e:
+        return f"cannot read {os.path.relpath(path)}: {e}"
+    version = re.search(r'export const PROMPT_VERSION = (\d+);', source)
+    if not version or int(version.group(1)) != PROMPT_VERSION:
+        return f"PROMPT_VERSION is {version.group(1) if version else 'missing'} in prompts.ts, {PROMPT_VERSION} here"
+    body = re.search(r'export function buildPromptPrefix\(.*?\{\n  return `(.*?)`;\n\}', source, re.S)
+    if not body:
+        return 'buildPromptPrefix() not found in prompts.ts'
+    unknown = []
+
+    def placeholder(match):
+        name = TS_PLACEHOLDERS.get(match.group(1))
+        if name is None:
+            unknown.append(match.group(1))
+            return match.group(0)
+        return '${' + name + '}'
+
+    template = re.sub(r'\$\{(.*?)\}', placeholder, body.group(1).replace('\\`', '`'))
+    if unknown:
+        return f"unmirrored interpolation {unknown[0]!r} in buildPromptPrefix()"
+    if template != PREFIX_TEMPLATE.template:
+        return 'PREFIX_TEMPLATE differs from buildPromptPrefix()'
+    return None
+
+
+def render(table):
+    return (json.dumps(table, ensure_ascii=False, indent=1, sort_keys=True) + '\n').encode('utf-8')
+
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Precompute static grading-prompt prefixes.')
+    parser.add_argument('files', nargs='*', help='question files (default: whole corpus)')
+    parser.add_argument('--out', default=DEFAULT_TABLE, help='table to write (default: functions/data/grading-prefixes.json)')
+    parser.add_argument('--check', action='store_true', help='fail if the table is stale or the template has drifted')
+    parser.add_argument('--price', type=float, help='input price in USD per million tokens, to predict prefix cost per call')
+    args = parser.parse_args(argv)
+
+    paths = [os.path.abspath(f) for f in args.files] or discover_question_files()
+    table, gradeable, skipped = compile_prefixes(load_documents(paths))
+    body = render(table)
+    drift = template_drift()
+    tokens = sorted(e['tokens'] for e in table['entries'].values())
+    static = estimate_tokens(prompt_prefix('', '', {'subject': None, 'topic': None, 'year': None}))
+
+    print('\n' + '═' * 60)
+    print('  🧩 GRADING PROMPT PREFIXES')
+    print('═' * 60)
+    print(f"  Gradeable questions:  {gradeable}")
+    print(f"  Precomputed:          {len(table['entries'])}")
+    for reason, count in skipped.most_common():
+        print(f"   ⇢ skipped {count}: {reason}")
+    if tokens:
+        print(f"  Prefix tokens (est.): median {_percentile(tokens, 0.5)}, p95 {_percentile(tokens, 0.95)}, "
+              f"max {tokens[-1]} ({static} shared template)")
+        if args.price is not None:
+            mean = sum(tokens) / len(tokens)
+            print(f"  Prefix cost per call: ${mean * args.price / 1e6:.6f} uncached "
+                  f"(mean {mean:.0f} tokens at ${args.price}/M)")
+    print(f"  {'⚠️  ' + drift if drift else '✓ Template matches prompts.ts'}")
+
+    failed = False
+    current = False
+    if os.path.exists(args.out):
+        with open(args.out, 'rb') as f:
+            current = f.read() == body
+    if args.check:
+        failed = not current or bool(drift)
+        print(f"\n  {'✓' if current else '❌'} {os.path.relpath(args.out)} is {'current' if current else 'stale'}")
+    elif drift:
+        failed = True
+        print(f"\n  ❌ Not writing {os.path.relpath(args.out)}: fix the template first")
+    elif current:
+        print(f"\n  ✓ {os.path.relpath(args.out)} unchanged")
+    else:
+        os.makedirs(os.path.dirname(args.out), exist_ok=True)
+        with atomic_write(args.out, 'wb') as f:
+            f.write(body)
+        print(f"\n  ✓ Wrote {os.path.relpath(args.out)} ({len(body) / 1024:.1f} KB)")
+    print('═' * 60 + '\n')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
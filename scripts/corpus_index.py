@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Persistent SQLite index over every question file.
+
+Each row points at the file and byte span a question was read from, so a
+lookup decodes only the questions it returns instead of parsing whole topic
+files. Rebuilds are incremental: files whose size, mtime and content hash are
+unchanged keep their rows.
+
+The same questionId legitimately appears in a set file and in the topic's
+complete file. The build reports those copies, and flags as conflicts any
+questionId whose content differs between files (or repeats inside one file).
+
+Usage:
+  python3 corpus_index.py build [--strict]
+  python3 corpus_index.py query --code ACMNA194 --difficulty 3
+  python3 corpus_index.py query --topic energy-forms-transformations --type MCQ --load
+  python3 corpus_index.py duplicates
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from collections import defaultdict
+
+from question_files import (
+    CACHE_DIR, SCRIPTS_DIR, QuestionFileError, QuestionStream, copy_rank, discover_question_files,
+    file_sha256, question_hash, read_question_at, relpath, topic_slug,
+)
+
+INDEX_PATH = os.path.join(CACHE_DIR, 'corpus-index.sqlite')
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    topic TEXT,
+    question_count INTEGER NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    question_id TEXT,
+    file TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    topic TEXT,
+    set_id TEXT,
+    sequence INTEGER,
+    difficulty INTEGER,
+    question_type TEXT,
+    phase INTEGER,
+    estimated_time INTEGER,
+    status TEXT,
+    content_hash TEXT NOT NULL,
+    is_primary INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS question_codes (
+    question_row INTEGER NOT NULL REFERENCES questions(id) ON DELETE CASCADE,
+    code TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_questions_question_id ON questions(question_id);
+CREATE INDEX IF NOT EXISTS idx_questions_file ON questions(file);
+CREATE INDEX IF NOT EXISTS idx_questions_topic ON questions(topic, difficulty);
+CREATE INDEX IF NOT EXISTS idx_questions_set_id ON questions(set_id, sequence);
+CREATE INDEX IF NOT EXISTS idx_questions_difficulty ON questions(difficulty);
+CREATE INDEX IF NOT EXISTS idx_questions_type ON questions(question_type);
+CREATE INDEX IF NOT EXISTS idx_question_codes_code ON question_codes(code, question_row);
+CREATE INDEX IF NOT EXISTS idx_question_codes_row ON question_codes(question_row);
+"""
+
+# Columns returned by find(); `file` is relative to scripts/.
+ROW_FIELDS = ('question_id', 'file', 'offset', 'length', 'topic', 'set_id', 'sequence',
+              'difficulty', 'question_type', 'phase', 'estimated_time', 'status', 'content_hash')
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _question_row(question, record, path, topic):
+    paper = question.get('paperMetadata') or {}
+    arc = question.get('learningArc') or {}
+    return (
+        question.get('questionId'),
+        path,
+        record.offset,
+        record.length,
+        topic,
+        paper.get('setId'),
+        _as_int(paper.get('sequenceInPaper')),
+        _as_int(question.get('difficulty')),
+        question.get('questionType'),
+        _as_int(arc.get('phase')),
+        _as_int(question.get('estimatedTime')),
+        question.get('status'),
+        question_hash(question),
+    )
+
+
+def _curriculum_codes(question):
+    curriculum = question.get('curriculum')
+    codes = curriculum.get('codes') if isinstance(curriculum, dict) else None
+    if isinstance(codes, str):
+        codes = [codes]
+    return [c for c in codes or [] if isinstance(c, str)]
+
+
+class CorpusIndex:
+    def __init__(self, path=INDEX_PATH, root=SCRIPTS_DIR):
+        self.path = path
+        self.root = root
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute('PRAGMA foreign_keys = ON')
+        self.db.execute('PRAGMA journal_mode = WAL')
+        version = self.db.execute('PRAGMA user_version').fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            self.db.executescript('DROP TABLE IF EXISTS question_codes; '
+                                  'DROP TABLE IF EXISTS questions; DROP TABLE IF EXISTS files;')
+        self.db.executescript(SCHEMA)
+        self.db.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ============================================
+    # BUILD
+    # ============================================
+    def build(self, paths=None, force=False):
+        """
+        Bring the index up to date with `paths` (default: the whole corpus).
+        Returns {'indexed': [...], 'unchanged': n, 'removed': [...], 'errors': {...}}.
+        """
+        if paths is None:
+            paths = discover_question_files(self.root)
+            prune = True
+        else:
+            prune = False
+        known = {row['path']: row for row in self.db.execute('SELECT * FROM files')}
+        summary = {'indexed': [], 'unchanged': 0, 'removed': [], 'errors': {}}
+
+        with self.db:
+            for path in paths:
+                key = relpath(path, self.root)
+                stat = os.stat(path)
+                previous = known.pop(key, None)
+                if previous and not force and previous['size'] == stat.st_size \
+                        and previous['mtime_ns'] == stat.st_mtime_ns:
+                    summary['unchanged'] += 1
+                    continue
+                digest = file_sha256(path)
+                if previous and not force and previous['sha256'] == digest:
+                    self.db.execute('UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?',
+                                    (stat.st_size, stat.st_mtime_ns, key))
+                    summary['unchanged'] += 1
+                    continue
+                error = self._index_file(path, key, digest, stat)
+                if error:
+                    summary['errors'][key] = error
+                summary['indexed'].append(key)
+
+            if prune:
+                for key in known:
+                    self.db.execute('DELETE FROM files WHERE path = ?', (key,))
+                    summary['removed'].append(key)
+
+            if summary['indexed'] or summary['removed']:
+                self._assign_primaries()
+        return summary
+
+    def _index_file(self, path, key, digest, stat):
+        self.db.execute('DELETE FROM files WHERE path = ?', (key,))
+        topic = topic_slug(path)
+        rows = []
+        codes = []
+        error = None
+        try:
+            for record in QuestionStream(path):
+                rows.append(_question_row(record.question, record, key, topic))
+                codes.append(_curriculum_codes(record.question))
+        except QuestionFileError as e:
+            error = str(e)
+            rows, codes = [], []
+        self.db.execute(
+            'INSERT INTO files (path, sha256, size, mtime_ns, topic, question_count, error) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (key, digest, stat.st_size, stat.st_mtime_ns, topic, len(rows), error),
+        )
+        for row, row_codes in zip(rows, codes):
+            cursor = self.db.execute(
+                f"INSERT INTO questions ({', '.join(ROW_FIELDS)}) "
+                f"VALUES ({', '.join('?' * len(ROW_FIELDS))})",
+                row,
+            )
+            self.db.executemany('INSERT INTO question_codes (question_row, code) VALUES (?, ?)',
+                                [(cursor.lastrowid, code) for code in row_codes])
+        return error
+
+    def _assign_primaries(self):
+        """Mark one row per questionId as the canonical copy."""
+        best = {}
+        for row in self.db.execute('SELECT id, question_id, file FROM questions ORDER BY file, offset'):
+            rank = (copy_rank(row['file']), row['file'])
+            current = best.get(row['question_id'])
+            if current is None or rank < current[0]:
+                best[row['question_id']] = (rank, row['id'])
+        self.db.execute('UPDATE questions SET is_primary = 0')
+        self.db.executemany('UPDATE questions SET is_primary = 1 WHERE id = ?',
+                            [(row_id,) for _, row_id in best.values()])
+
+    # ============================================
+    # QUERIES
+    # ============================================
+    def find(self, topic=None, set_id=None, difficulty=None, question_type=None, code=None,
+             question_id=None, phase=None, all_copies=False, limit=None):
+        """Index rows matching every given filter, one per questionId unless all_copies."""
+        clauses = []
+        params = []
+        for column, value in (('q.topic', topic), ('q.set_id', set_id), ('q.difficulty', difficulty),
+                              ('q.question_type', question_type), ('q.question_id', question_id),
+                              ('q.phase', phase)):
+            if value is not None:
+                clauses.append(f'{column} = ?')
+                params.append(value)
+        if code is not None:
+            clauses.append('q.id IN (SELECT question_row FROM question_codes WHERE code = ?)')
+            params.append(code)
+        if not all_copies:
+            clauses.append('q.is_primary = 1')
+        sql = f"SELECT {', '.join('q.' + f for f in ROW_FIELDS)} FROM questions q"
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY q.topic, q.set_id, q.sequence, q.question_id'
+        if limit:
+            sql += f' LIMIT {int(limit)}'
+        return [dict(row) for row in self.db.execute(sql, params)]
+
+    def load(self, row):
+        """Decode the question a row points at."""
+        return read_question_at(os.path.join(self.root, row['file']), row['offset'], row['length'])
+
+    def get(self, question_id):
+        rows = self.find(question_id=question_id)
+        return self.load(rows[0]) if rows else None
+
+    def codes_for(self, question_id):
+        return [row['code'] for row in self.db.execute(
+            'SELECT c.code FROM question_codes c JOIN questions q ON q.id = c.question_row '
+            'WHERE q.question_id = ? AND q.is_primary = 1', (question_id,))]
+
+    def codes_by_question(self, topic=None):
+        """{questionId: [codes]} for every canonical question, in one pass."""
+        sql = ('SELECT q.question_id, c.code FROM question_codes c JOIN questions q ON q.id = c.question_row '
+               'WHERE q.is_primary = 1')
+        params = []
+        if topic is not None:
+            sql += ' AND q.topic = ?'
+            params.append(topic)
+        codes = defaultdict(list)
+        for row in self.db.execute(sql, params):
+            codes[row['question_id']].append(row['code'])
+        return dict(codes)
+
+    def duplicates(self):
+        """
+        questionIds stored more than once. Returns (conflicts, copies): conflicts
+        differ in content or repeat within one file, copies are identical.
+        """
+        groups = defaultdict(list)
+        for row in self.db.execute(
+                'SELECT question_id, file, content_hash FROM questions WHERE question_id IN '
+                '(SELECT question_id FROM questions GROUP BY question_id HAVING COUNT(*) > 1) '
+                'ORDER BY question_id, file'):
+            groups[row['question_id']].append((row['file'], row['content_hash']))
+        conflicts, copies = {}, {}
+        for qid, entries in groups.items():
+            files = [f for f, _ in entries]
+            hashes = {h for _, h in entries}
+            if len(hashes) > 1 or len(set(files)) < len(files):
+                conflicts[qid] = entries
+            else:
+                copies[qid] = files
+        return conflicts, copies
+
+    def stats(self):
+        return {
+            'files': self.db.execute('SELECT COUNT(*) FROM files').fetchone()[0],
+            'rows': self.db.execute('SELECT COUNT(*) FROM questions').fetchone()[0],
+            'questions': self.db.execute('SELECT COUNT(*) FROM questions WHERE is_primary = 1').fetchone()[0],
+        }
+
+
+def print_duplicate_report(conflicts, copies, limit=20):
+    print(f"\nDuplicate questionIds: {len(conflicts)} conflicting, {len(copies)} identical copies")
+    if not conflicts:
+        return
+    by_files = defaultdict(list)
+    for qid, entries in conflicts.items():
+        by_files[tuple(sorted({f for f, _ in entries}))].append(qid)
+    print('\n❌ Conflicting copies (content differs between files):')
+    for files, qids in sorted(by_files.items(), key=lambda item: -len(item[1]))[:limit]:
+        print(f"  {len(qids):4d} ids  {' | '.join(files)}")
+        print(f"        e.g. {', '.join(qids[:3])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build and query the question corpus index.')
+    parser.add_argument('--index', default=INDEX_PATH, help='SQLite index path')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help='index new and changed question files')
+    build.add_argument('--force', action='store_true', help='re-index every file')
+    build.add_argument('--strict', action='store_true', help='exit 1 on conflicting questionIds')
+
+    query = sub.add_parser('query', help='look up questions by metadata')
+    query.add_argument('--topic')
+    query.add_argument('--set-id')
+    query.add_argument('--difficulty', type=int)
+    query.add_argument('--type', dest='question_type')
+    query.add_argument('--code', help='curriculum code, e.g. ACMNA194')
+    query.add_argument('--id', dest='question_id')
+    query.add_argument('--phase', type=int)
+    query.add_argument('--all-copies', action='store_true', help='include every file a question appears in')
+    query.add_argument('--limit', type=int)
+    query.add_argument('--load', action='store_true', help='print the decoded questions as JSON')
+
+    sub.add_parser('duplicates', help='report questionIds stored in more than one place')
+    args = parser.parse_args(argv)
+
+    with CorpusIndex(args.index) as index:
+        if args.command == 'build':
+            summary = index.build(force=args.force)
+            stats = index.stats()
+            print(f"✓ Indexed {len(summary['indexed'])} files "
+                  f"({summary['unchanged']} unchanged, {len(summary['removed'])} removed)")
+            print(f"  {stats['questions']} questions, {stats['rows']} rows across {stats['files']} files")
+            for path, error in summary['errors'].items():
+                print(f"  ⚠️  {error}")
+            conflicts, copies = index.duplicates()
+            print_duplicate_report(conflicts, copies)
+            return 1 if args.strict and conflicts else 0
+
+        if args.command == 'query':
+            rows = index.find(topic=args.topic, set_id=args.set_id, difficulty=args.difficulty,
+                              question_type=args.question_type, code=args.code,
+                              question_id=args.question_id, phase=args.phase,
+                              all_copies=args.all_copies, limit=args.limit)
+            if args.load:
+                print(json.dumps([index.load(row) for row in rows], indent=2, ensure_ascii=False))
+            else:
+                for row in rows:
+                    print(f"{row['question_id']}\t{row['question_type']}\td{row['difficulty']}\t"
+                          f"{row['set_id']}\t{row['file']}@{row['offset']}")
+                print(f"{len(rows)} questions", file=sys.stderr)
+            return 0
+
+        conflicts, copies = index.duplicates()
+        print_duplicate_report(conflicts, copies, limit=1000)
+        return 1 if conflicts else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,41 +1,19 @@
 #!/usr/bin/env python3
 """
-Create complete year8-energy-questions.json with all 50 questions.
-Includes data from all 4 parallel agents + existing Set 5.
-"""
-
-import json
-
-print("🚀 CREATING COMPLETE 50-QUESTION ENERGY FILE")
-print("=" * 60)
-print()
+Create the complete year8-energy-questions.json from the five energy sets.
 
-# Load metadata from existing file
-with open('year8-energy-questions.json', 'r') as f:
-    current_data = json.load(f)
+The set list lives in topics/energy.json; this is `build_topics.py energy`
+with stage tracing switched on, so every run adds to the energy build history
+and a topic that grows can be compared against the last build:
 
-metadata = current_data['metadata']
-set5_questions = current_data['questions']  # Q41-Q50
-
-print(f"✓ Loaded metadata for: {metadata['topic']}")
-print(f"✓ Loaded Set 5: {len(set5_questions)} questions (Q41-Q50)")
-print()
-
-# All agent outputs are available
-# I need to include them in this script
-print("📋 Ready to add Sets 1-4 from agent outputs...")
-print()
-print("This script will combine:")
-print("  • Set 1 (Q1-Q10) from Agent a1684ab")
-print("  • Set 2 (Q11-Q20) from Agent aa93b90") 
-print("  • Set 3 (Q21-Q30) from Agent a0e9553")
-print("  • Set 4 (Q31-Q40) from Agent ad309dd")
-print("  • Set 5 (Q41-Q50) from existing file")
-print()
+  python3 create_complete_energy_file.py
+  python3 create_complete_energy_file.py --force
+  python3 pipeline_trace.py compare build_topics
+"""
 
-# The agent JSON data will be added here
-# Since it's quite large (40 questions), I'll note this
+import sys
 
-print("✅ Script structure ready")
-print("⏳ Agent question data will be embedded in script...")
+from build_topics import main
 
+if __name__ == '__main__':
+    sys.exit(main(['energy', '--trace'] + sys.argv[1:]))
@@ -1,41 +1,106 @@
 #!/usr/bin/env python3
 """
-Final step: Create Sets 2, 3, 4 and upload all remaining questions.
-This completes the Energy topic (50/50 questions).
+Energy upload status, measured rather than hand-written.
+
+Every question in the energy sets (topics/energy.json) is hashed and checked
+against the upload snapshot that upload_questions.py keeps, so the report
+says what Firestore actually holds as of the last upload - not what
+ENERGY_UPLOAD_STATUS.md was last edited to say. Nothing is uploaded; the
+command that would finish the job is printed instead.
+
+Usage:
+  python3 finalize_energy_upload.py
+  python3 finalize_energy_upload.py --trace       # stage timings (see pipeline_trace.py)
 """
-import subprocess
+
+import argparse
+import os
 import sys
 
-print("🚀 FINAL ENERGY UPLOAD - Sets 2, 3, 4")
-print("=" * 60)
-print()
-
-# Current status
-print("✅ Already uploaded: 20/50 questions")
-print("   • Set 1 (Q1-Q10): Energy Forms")
-print("   • Set 5 (Q41-Q50): Energy Resources")
-print()
-
-print("⏳ Creating and uploading: 30/50 questions")
-print("   • Set 2 (Q11-Q20): Heat & Temperature")
-print("   • Set 3 (Q21-Q30): Energy Transfer")
-print("   • Set 4 (Q31-Q40): Conservation of Energy")
-print()
-
-# Agent data is available in the task results
-# I need to create the JSON files and upload them
-
-print("📋 Agent outputs ready:")
-print("   • Agent aa93b90: Set 2 JSON complete")
-print("   • Agent a0e9553: Set 3 JSON complete")
-print("   • Agent ad309dd: Set 4 JSON complete")
-print()
-
-print("✅ All data verified and ready")
-print()
-print("To complete the upload, I need to:")
-print("1. Write the 3 JSON files from agent outputs")
-print("2. Upload each file to Firestore")
-print("3. Verify all 50 questions are in Firestore")
-print()
+from build_topics import BuildError, load_topics
+from pipeline_trace import Tracer
+from question_files import QuestionFileError, QuestionStream, question_hash, relpath
+from upload_questions import DEFAULT_COLLECTION, UPLOADS_DIR, Snapshot
+
+TOPIC = 'energy'
+
+
+def set_status(path, snapshot):
+    """(questions, uploaded, pending ids) for one set file."""
+    total, uploaded, pending = 0, 0, []
+    for record in QuestionStream(path):
+        question = record.question
+        doc_id = question.get('questionId')
+        if not doc_id:
+            continue
+        total += 1
+        if snapshot.needs_upload(doc_id, question_hash(question)):
+            pending.append(doc_id)
+        else:
+            uploaded += 1
+    return total, uploaded, pending
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Report how much of the energy topic is uploaded.')
+    parser.add_argument('--collection', default=DEFAULT_COLLECTION)
+    parser.add_argument('--snapshot', help='snapshot path (default: uploads/<collection>-snapshot.json)')
+    parser.add_argument('--trace', action='store_true', help='record stage timings under .cache/traces')
+    args = parser.parse_args(argv)
+    tracer = Tracer('finalize_energy_upload', enabled=args.trace)
+
+    try:
+        topic = load_topics()[TOPIC]
+    except (BuildError, KeyError) as e:
+        print(f"❌ No {TOPIC} topic manifest: {e}", file=sys.stderr)
+        return 1
+
+    snapshot_path = args.snapshot or os.path.join(UPLOADS_DIR, f"{args.collection}-snapshot.json")
+    with tracer.stage('load-snapshot') as stage:
+        snapshot = Snapshot(snapshot_path)
+        stage.processed = len(snapshot.hashes)
+
+    print('\n' + '═' * 60)
+    print("  🚀 ENERGY UPLOAD STATUS")
+    print('═' * 60)
+    print(f"  Snapshot: {relpath(snapshot_path)} ({len(snapshot.hashes)} documents)")
+    if not snapshot.hashes:
+        print('  ⚠️  Snapshot is empty - run upload_questions.py --refresh-snapshot to read it from Firestore')
+    print()
+
+    total = uploaded = 0
+    errors = []
+    with tracer.stage('check-sets', sets=len(topic.sources)) as stage:
+        for source in topic.sources:
+            try:
+                count, done, pending = set_status(source, snapshot)
+            except (OSError, QuestionFileError) as e:
+                errors.append(f"{relpath(source)}: {e}")
+                stage.failed += 1
+                continue
+            total += count
+            uploaded += done
+            stage.processed += count
+            stage.skipped += done
+            icon = '✅' if not pending else '⏳'
+            print(f"  {icon} {relpath(source)}: {done}/{count} uploaded")
+            for doc_id in pending[:3]:
+                print(f"       • {doc_id}")
+            if len(pending) > 3:
+                print(f"       • ... {len(pending) - 3} more")
+
+    for error in errors:
+        print(f"  ❌ {error}")
+    print('\n' + '━' * 60)
+    print(f"  Uploaded: {uploaded}/{total} questions")
+    if uploaded < total:
+        print("\n  To finish, build the topic file and upload what is missing:")
+        print("    python3 create_complete_energy_file.py")
+        print(f"    python3 upload_questions.py {relpath(topic.target)}")
+    print('═' * 60 + '\n')
+    tracer.finish()
+    return 1 if errors or uploaded < total else 0
+
 
+if __name__ == '__main__':
+    sys.exit(main())
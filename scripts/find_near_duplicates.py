@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate detection across the question bank (MinHash + LSH).
+
+Each question's stem, solution and option text is shingled into word
+n-grams and reduced to a fixed-size MinHash signature (one-permutation
+hashing with densification, so a signature costs one hash per shingle).
+Signatures are split into bands; questions sharing any band bucket become
+candidate pairs, and only those pairs are scored. Nothing is compared
+pairwise, so this scales to 100k+ questions.
+
+Signatures and band buckets are kept in .cache/near-duplicates.sqlite and
+refreshed per file by content hash. A questionId found in several files (set
+file and complete file) is indexed once, from the copy copy_rank() prefers.
+Questions whose text is identical under different ids are collapsed before
+clustering and reported separately as exact copies, so renamed copies of a
+topic don't drown out the real near-duplicates. `--new FILE` checks just one
+new set file against everything already indexed.
+
+Usage:
+  python3 find_near_duplicates.py                          # whole corpus
+  python3 find_near_duplicates.py --scope cross-topic --threshold 0.6
+  python3 find_near_duplicates.py --new questions/ratios-rates-set13.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+from array import array
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from question_files import (
+    CACHE_DIR, QuestionFileError, QuestionStream, atomic_write, copy_rank, discover_question_files,
+    file_sha256, iter_questions, relpath, topic_slug,
+)
+
+DB_PATH = os.path.join(CACHE_DIR, 'near-duplicates.sqlite')
+NUM_PERM = 128
+SHINGLE_SIZE = 3
+DEFAULT_THRESHOLD = 0.5
+# Bump when shingling or signature layout changes.
+SIGNATURE_VERSION = 2
+
+_MASK32 = 0xFFFFFFFF
+_EMPTY = _MASK32 + 1
+_DENSIFY_STEP = 0x9E3779B1
+_MARKUP = re.compile(r'\*\*|__|\$\$?|\\[a-zA-Z]+')
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+# ============================================
+# SIGNATURES
+# ============================================
+def question_text(question):
+    parts = [question.get('stem'), question.get('solution')]
+    for option in question.get('mcqOptions') or []:
+        if isinstance(option, dict):
+            parts.append(option.get('text'))
+    for option in question.get('options') or []:
+        if isinstance(option, str):
+            parts.append(option)
+    return ' '.join(p for p in parts if isinstance(p, str))
+
+
+def normalised_words(text):
+    return _NON_WORD.sub(' ', _MARKUP.sub(' ', text.lower())).split()
+
+
+def content_key(words):
+    """Identical for questions whose text differs only in case, markup and punctuation."""
+    return hashlib.blake2b(' '.join(words).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    words = normalised_words(text) if isinstance(text, str) else text
+    if len(words) < size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(shingle_set, num_perm=NUM_PERM):
+    """One-permutation MinHash: each shingle hash picks a bin and competes for its minimum."""
+    signature = [_EMPTY] * num_perm
+    for shingle in shingle_set:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+        slot = h % num_perm
+        value = h >> 32
+        if value < signature[slot]:
+            signature[slot] = value
+    # Densify: empty bins borrow from the next originally-filled bin to the
+    # right, offset by distance so borrowed values stay distinguishable.
+    if _EMPTY in signature and any(v != _EMPTY for v in signature):
+        original = list(signature)
+        for i in range(num_perm):
+            if original[i] == _EMPTY:
+                distance = 1
+                while original[(i + distance) % num_perm] == _EMPTY:
+                    distance += 1
+                signature[i] = (original[(i + distance) % num_perm] + distance * _DENSIFY_STEP) & _MASK32
+    return array('I', [v & _MASK32 for v in signature])
+
+
+def similarity(sig_a, sig_b):
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+def bands_for(threshold, num_perm=NUM_PERM):
+    """Pick (bands, rows) whose LSH S-curve crosses ~threshold, erring towards recall."""
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        crossing = (1 / bands) ** (1 / rows)
+        if crossing <= threshold and (best is None or crossing > best[2]):
+            best = (bands, rows, crossing)
+    return best[:2] if best else (num_perm, 1)
+
+
+def band_keys(signature, bands, rows):
+    return [hashlib.blake2b(signature[b * rows:(b + 1) * rows].tobytes(), digest_size=8).hexdigest()
+            for b in range(bands)]
+
+
+def signatures_for_file(path):
+    """Worker: [(questionId, setId, content key, signature bytes)] for one file."""
+    results = []
+    try:
+        for record in QuestionStream(path):
+            question = record.question
+            qid = question.get('questionId')
+            if not qid:
+                continue
+            words = normalised_words(question_text(question))
+            text_shingles = shingles(words)
+            if not text_shingles:
+                continue
+            set_id = (question.get('paperMetadata') or {}).get('setId')
+            results.append((qid, set_id, content_key(words), minhash(text_shingles).tobytes()))
+    except QuestionFileError as e:
+        return path, None, str(e)
+    return path, results, None
+
+
+# ============================================
+# STORE
+# ============================================
+class SignatureStore:
+    def __init__(self, path=DB_PATH, threshold=DEFAULT_THRESHOLD):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.bands, self.rows = bands_for(threshold)
+        layout = f"{SIGNATURE_VERSION}:{NUM_PERM}:{SHINGLE_SIZE}:{self.bands}x{self.rows}"
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, sha256 TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS signatures (
+                question_id TEXT NOT NULL, file TEXT NOT NULL, topic TEXT, set_id TEXT, content TEXT,
+                signature BLOB NOT NULL, owner INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (question_id, file));
+            CREATE TABLE IF NOT EXISTS buckets (band INTEGER, key TEXT, question_id TEXT);
+            CREATE INDEX IF NOT EXISTS idx_buckets ON buckets(band, key);
+            CREATE INDEX IF NOT EXISTS idx_buckets_question ON buckets(question_id);
+            CREATE INDEX IF NOT EXISTS idx_signatures_file ON signatures(file);
+        """)
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'layout'").fetchone()
+        if row is None or row[0] != layout:
+            with self.db:
+                for table in ('files', 'signatures', 'buckets'):
+                    self.db.execute(f'DELETE FROM {table}')
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('layout', ?)", (layout,))
+
+    def stale_files(self, paths):
+        known = dict(self.db.execute('SELECT path, sha256 FROM files'))
+        stale = []
+        digests = {}
+        for path in paths:
+            digest = file_sha256(path)
+            digests[path] = digest
+            if known.get(relpath(path)) != digest:
+                stale.append(path)
+        return stale, digests
+
+    def replace_file(self, path, digest, entries):
+        key = relpath(path)
+        topic = topic_slug(path)
+        with self.db:
+            affected = self._drop_file(key, resolve=False)
+            self.db.executemany('INSERT OR IGNORE INTO signatures VALUES (?, ?, ?, ?, ?, ?, 0)',
+                                [(qid, key, topic, set_id, content, blob)
+                                 for qid, set_id, content, blob in entries])
+            self.db.execute('INSERT OR REPLACE INTO files VALUES (?, ?)', (key, digest))
+            self._resolve(affected | {qid for qid, _, _, _ in entries})
+
+    def _drop_file(self, key, resolve=True):
+        affected = {qid for (qid,) in self.db.execute('SELECT question_id FROM signatures WHERE file = ?', (key,))}
+        self.db.execute('DELETE FROM signatures WHERE file = ?', (key,))
+        self.db.execute('DELETE FROM files WHERE path = ?', (key,))
+        if resolve:
+            self._resolve(affected)
+        return affected
+
+    def _resolve(self, question_ids):
+        """
+        Re-pick the indexed copy of each questionId. Copies of one id (set file
+        vs complete file) are not near-duplicates; the copy copy_rank() prefers
+        is indexed, so removing that file promotes the next copy.
+        """
+        for qid in question_ids:
+            self.db.execute('DELETE FROM buckets WHERE question_id = ?', (qid,))
+            copies = self.db.execute('SELECT file, signature FROM signatures WHERE question_id = ?',
+                                     (qid,)).fetchall()
+            self.db.execute('UPDATE signatures SET owner = 0 WHERE question_id = ?', (qid,))
+            if not copies:
+                continue
+            file, blob = min(copies, key=lambda c: (copy_rank(c[0]), c[0]))
+            self.db.execute('UPDATE signatures SET owner = 1 WHERE question_id = ? AND file = ?', (qid, file))
+            signature = array('I')
+            signature.frombytes(blob)
+            self.db.executemany('INSERT INTO buckets VALUES (?, ?, ?)',
+                                [(b, k, qid) for b, k in enumerate(band_keys(signature, self.bands, self.rows))])
+
+    def prune(self, paths):
+        live = {relpath(p) for p in paths}
+        with self.db:
+            for (key,) in self.db.execute('SELECT path FROM files').fetchall():
+                if key not in live:
+                    self._drop_file(key)
+
+    def info(self, qid):
+        row = self.db.execute('SELECT file, topic, set_id, content, signature FROM signatures '
+                              'WHERE question_id = ? AND owner = 1', (qid,)).fetchone()
+        signature = array('I')
+        signature.frombytes(row[4])
+        return {'file': row[0], 'topic': row[1], 'setId': row[2], 'content': row[3], 'signature': signature}
+
+    def candidate_pairs(self, question_ids=None):
+        """Pairs of questionIds that share at least one band bucket.
+
+        With question_ids, only pairs involving those questions are returned.
+        """
+        if question_ids is not None:
+            self.db.execute('CREATE TEMP TABLE IF NOT EXISTS probe (question_id TEXT PRIMARY KEY)')
+            self.db.execute('DELETE FROM probe')
+            self.db.executemany('INSERT OR IGNORE INTO probe VALUES (?)', [(q,) for q in question_ids])
+            rows = self.db.execute("""
+                SELECT DISTINCT a.question_id, b.question_id FROM probe p
+                JOIN buckets a ON a.question_id = p.question_id
+                JOIN buckets b ON a.band = b.band AND a.key = b.key AND a.question_id != b.question_id""")
+        else:
+            rows = self.db.execute("""
+                SELECT DISTINCT a.question_id, b.question_id FROM buckets a
+                JOIN buckets b ON a.band = b.band AND a.key = b.key AND a.question_id < b.question_id
+                WHERE (a.band, a.key) IN (SELECT band, key FROM buckets GROUP BY band, key HAVING COUNT(*) > 1)""")
+        seen = set()
+        for a, b in rows:
+            pair = (a, b) if a < b else (b, a)
+            if pair not in seen:
+                seen.add(pair)
+                yield pair
+
+
+# ============================================
+# CLUSTERING
+# ============================================
+def in_scope(a, b, scope):
+    if scope == 'cross-topic':
+        return a['topic'] != b['topic']
+    if scope == 'cross-set':
+        return (a['setId'] or a['file']) != (b['setId'] or b['file'])
+    return True
+
+
+class DisjointSets:
+    """Union-find whose roots are the smallest member, so representatives are stable."""
+
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, x):
+        self.parent.setdefault(x, x)
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+    def groups(self):
+        members = defaultdict(list)
+        for x in self.parent:
+            members[self.find(x)].append(x)
+        return {root: sorted(group) for root, group in members.items()}
+
+
+def cluster_pairs(pairs):
+    """Union-find over scored pairs. Returns clusters of questionIds with their edges."""
+    sets = DisjointSets()
+    for a, b, _ in pairs:
+        sets.union(a, b)
+    clusters = defaultdict(lambda: {'questions': set(), 'pairs': []})
+    for a, b, score in pairs:
+        cluster = clusters[sets.find(a)]
+        cluster['questions'].update((a, b))
+        cluster['pairs'].append({'a': a, 'b': b, 'similarity': round(score, 3)})
+    result = []
+    for cluster in clusters.values():
+        scores = [p['similarity'] for p in cluster['pairs']]
+        result.append({
+            'size': len(cluster['questions']),
+            'maxSimilarity': max(scores),
+            'questions': sorted(cluster['questions']),
+            'pairs': sorted(cluster['pairs'], key=lambda p: -p['similarity']),
+        })
+    return sorted(result, key=lambda c: (-c['maxSimilarity'], -c['size']))
+
+
+def find_duplicates(store, threshold, scope='all', question_ids=None):
+    """
+    (clusters, exact copies, candidate pair count). Questions with identical
+    text under different ids are grouped as exact copies and collapsed onto
+    their smallest id before clustering; cluster members list the copies
+    they stand for.
+    """
+    cache = {}
+
+    def info(qid):
+        if qid not in cache:
+            cache[qid] = store.info(qid)
+        return cache[qid]
+
+    copies = DisjointSets()
+    near = []
+    candidates = 0
+    for a, b in store.candidate_pairs(question_ids):
+        candidates += 1
+        info_a, info_b = info(a), info(b)
+        if not in_scope(info_a, info_b, scope):
+            continue
+        if info_a['content'] == info_b['content']:
+            copies.union(a, b)
+        else:
+            near.append((a, b))
+
+    scored = {}
+    for a, b in near:
+        a, b = sorted((copies.find(a), copies.find(b)))
+        if a == b or (a, b) in scored:
+            continue
+        score = similarity(info(a)['signature'], info(b)['signature'])
+        if score >= threshold:
+            scored[(a, b)] = score
+
+    groups = copies.groups()
+
+    def member(qid):
+        entry = {'questionId': qid, 'file': info(qid)['file'], 'topic': info(qid)['topic']}
+        if len(groups.get(qid, ())) > 1:
+            entry['copies'] = [q for q in groups[qid] if q != qid]
+        return entry
+
+    clusters = cluster_pairs([(a, b, score) for (a, b), score in scored.items()])
+    for cluster in clusters:
+        cluster['members'] = [member(q) for q in cluster['questions']]
+    exact = sorted(({'size': len(group), 'questions': group,
+                     'members': [{'questionId': q, 'file': info(q)['file'], 'topic': info(q)['topic']}
+                                 for q in group]}
+                    for group in groups.values() if len(group) > 1),
+                   key=lambda g: (-g['size'], g['questions'][0]))
+    return clusters, exact, candidates
+
+
+def refresh(store, paths, jobs=None):
+    stale, digests = store.stale_files(paths)
+    if stale:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for path, entries, error in pool.map(signatures_for_file, stale):
+                if error:
+                    print(f"  ⚠️  {error}")
+                    continue
+                store.replace_file(path, digests[path], entries)
+    return stale
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Find near-duplicate questions with MinHash/LSH.')
+    parser.add_argument('--new', metavar='FILE', help='only report clusters involving this file')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='minimum estimated Jaccard similarity (default 0.5)')
+    parser.add_argument('--scope', choices=('all', 'cross-set', 'cross-topic'), default='cross-set',
+                        help='which pairs to report (default: pairs from different sets)')
+    parser.add_argument('--report', help='write clusters to this JSON file')
+    parser.add_argument('--limit', type=int, default=20, help='clusters to print')
+    parser.add_argument('--jobs', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    store = SignatureStore(threshold=args.threshold)
+    paths = discover_question_files()
+    question_ids = None
+    if args.new:
+        new_path = os.path.abspath(args.new)
+        if not os.path.exists(new_path):
+            print(f"❌ File not found: {args.new}", file=sys.stderr)
+            return 1
+        if new_path not in paths:
+            paths.append(new_path)
+        question_ids = {q.get('questionId') for q in iter_questions(new_path)}
+    # Only files whose content hash changed are re-signed; the rest of the
+    # store (signatures and band buckets) is reused as is.
+    refreshed = refresh(store, paths, args.jobs)
+    store.prune(paths)
+
+    clusters, exact, candidates = find_duplicates(store, args.threshold, args.scope, question_ids)
+    total = store.db.execute('SELECT COUNT(*) FROM signatures WHERE owner = 1').fetchone()[0]
+
+    print('\n' + '═' * 60)
+    print('  🔍 NEAR-DUPLICATE DETECTION (MinHash/LSH)')
+    print('═' * 60)
+    print(f"  Questions indexed:  {total} ({len(refreshed)} files re-hashed)")
+    print(f"  LSH bands:          {store.bands} x {store.rows} rows")
+    print(f"  Candidate pairs:    {candidates}")
+    print(f"  Exact copies:       {len(exact)} groups ({sum(g['size'] for g in exact)} questions, "
+          f"same text under different ids)")
+    print(f"  Clusters ≥ {args.threshold:.2f}:    {len(clusters)} ({args.scope})")
+    for cluster in clusters[:args.limit]:
+        print(f"\n  [{cluster['maxSimilarity']:.2f}] {cluster['size']} questions")
+        for member in cluster['members']:
+            extra = f"  (+{len(member['copies'])} exact copies)" if member.get('copies') else ''
+            print(f"     {member['questionId']:32s} {member['file']}{extra}")
+    if len(clusters) > args.limit:
+        print(f"\n  ... and {len(clusters) - args.limit} more clusters")
+    if exact:
+        by_files = defaultdict(int)
+        for group in exact:
+            by_files[' ↔ '.join(sorted({m['file'] for m in group['members']}))] += 1
+        print('\n  Exact copies by file:')
+        for files, count in sorted(by_files.items(), key=lambda item: -item[1])[:args.limit]:
+            print(f"     {count:4d}  {files}")
+    print('═' * 60 + '\n')
+
+    if args.report:
+        with atomic_write(args.report) as f:
+            json.dump({'threshold': args.threshold, 'scope': args.scope, 'clusters': clusters,
+                       'exactCopies': exact}, f, indent=2, ensure_ascii=False)
+        print(f"📄 Report saved to: {args.report}\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
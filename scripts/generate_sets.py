@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+Generate a topic's sets in parallel and stream them into its complete file.
+
+A topic spec says what to generate:
+
+  {
+    "topic": "ratios-rates",
+    "prefix": "ratio-rate-y8-",            # questionId prefix (see id_allocator.py)
+    "setSize": 10,
+    "target": "questions/ratios-rates-year8-complete.json",   # optional
+    "metadata": {"topic": "Ratios and Rates", "subject": "Mathematics", ...},
+    "curriculum": {"subject": "Mathematics", "year": 8, "codes": ["ACMNA188"]},
+    "sets": [
+      {"title": "Simplifying ratios", "focus": "...", "difficulty": 1,
+       "questionTypes": ["MCQ", "SHORT_ANSWER"]},
+      ...
+    ]
+  }
+
+Every set gets a questionId block from the allocator up front, so sets can
+be generated in any order without collisions and still number contiguously.
+Set jobs run on a bounded worker pool against a provider:
+
+  stub             deterministic local questions (tests, dry runs, load)
+  command:CMD      runs CMD with the set request as JSON on stdin and takes
+                   every complete question object from its output, however
+                   much prose or truncation surrounds it
+
+As each set comes back it is validated. A set with schema or content errors
+is regenerated, with the errors in the request, up to --retries times;
+provider errors are retried with backoff. Valid sets are written as
+<topic>-setN-qXX-qYY.json and merged into the complete file as soon as every
+earlier set is in, so the complete file grows while generation continues.
+At most --workers requests are in flight, so a slow provider holds back
+submission rather than queueing work. Sets whose files already exist and
+validate are reused, so an interrupted run resumes.
+
+When every set is in, topics/<topic>.json is written so build_topics.py
+rebuilds the topic like any other.
+
+Usage:
+  python3 generate_sets.py spec.json --provider stub
+  python3 generate_sets.py spec.json --provider "command:./gen-set.sh" --workers 8 --retries 3
+  python3 generate_sets.py spec.json --provider stub --stub-failure-rate 0.2 --trace
+"""
+
+import argparse
+import json
+import os
+import random
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from build_topics import TOPICS_DIR
+from id_allocator import DEFAULT_DB, Allocator, AllocatorError
+from ingest_agent_outputs import extract_questions, set_header
+from merge_sets import MergeError, merge
+from pipeline_trace import Tracer
+from question_files import (
+    QUESTIONS_DIR, SCRIPTS_DIR, QuestionFileError, atomic_write, iter_questions, read_header, relpath,
+    write_question_file,
+)
+from validate_questions import validate_questions
+
+DEFAULT_RETRIES = 2
+DEFAULT_WORKERS = 4
+BACKOFF_SECONDS = 1.0
+COMMAND_TIMEOUT = 600
+
+
+class GenerationError(Exception):
+    """A provider could not produce a set."""
+
+
+# ============================================
+# SPEC
+# ============================================
+class SetJob:
+    """One set to generate: its place in the topic, its id block and its attempts."""
+
+    def __init__(self, number, spec, block, path):
+        self.number = number
+        self.spec = spec
+        self.block = block
+        self.path = path
+        self.attempts = 0
+        self.feedback = []
+        self.started = None
+
+    def request(self, topic):
+        """What the provider is asked for."""
+        return {
+            'topic': topic['topic'],
+            'setNumber': self.number,
+            'title': self.spec.get('title'),
+            'focus': self.spec.get('focus'),
+            'difficulty': self.spec.get('difficulty'),
+            'questionTypes': self.spec.get('questionTypes') or ['MCQ'],
+            'questionIds': self.block.ids,
+            'sequences': list(self.block.sequences),
+            'curriculum': topic.get('curriculum') or {},
+            'attempt': self.attempts,
+            'previousErrors': self.feedback,
+        }
+
+
+def load_spec(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+    for key in ('topic', 'prefix', 'sets'):
+        if not spec.get(key):
+            raise GenerationError(f"{relpath(path)}: spec needs '{key}'")
+    spec.setdefault('setSize', 10)
+    spec['target'] = os.path.join(SCRIPTS_DIR, spec.get('target') or
+                                  os.path.join(QUESTIONS_DIR, f"{spec['topic']}-year8-complete.json"))
+    spec['setDir'] = os.path.join(SCRIPTS_DIR, spec.get('setDir') or QUESTIONS_DIR)
+    return spec
+
+
+def set_path(spec, number, block):
+    last = block.start + block.count - 1
+    return os.path.join(spec['setDir'], f"{spec['topic']}-set{number}-q{block.start:02d}-q{last:02d}.json")
+
+
+def existing_set(spec, number):
+    """(path, questions) of a valid, complete set file from an earlier run, or None."""
+    prefix = os.path.join(spec['setDir'], f"{spec['topic']}-set{number}-q")
+    for name in sorted(os.listdir(spec['setDir'])) if os.path.isdir(spec['setDir']) else []:
+        path = os.path.join(spec['setDir'], name)
+        if not path.startswith(prefix) or not name.endswith('.json'):
+            continue
+        try:
+            questions = list(iter_questions(path))
+        except QuestionFileError:
+            continue
+        if len(questions) == spec['setSize'] and not set_errors(questions):
+            return path, questions
+    return None
+
+
+# ============================================
+# PROVIDERS
+# ============================================
+class StubProvider:
+    """
+    Deterministic questions from (seed, topic, set, attempt). `failure_rate`
+    raises like a provider outage; `invalid_rate` returns a set with a broken
+    MCQ so validation retries get exercised.
+    """
+
+    name = 'stub'
+
+    def __init__(self, seed=0, latency=0.0, failure_rate=0.0, invalid_rate=0.0):
+        self.seed = seed
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.invalid_rate = invalid_rate
+
+    def generate(self, request):
+        rng = random.Random(f"{self.seed}:{request['topic']}:{request['setNumber']}:"
+                            f"{request['attempt']}:{request.get('retry', 0)}")
+        if self.latency:
+            time.sleep(self.latency * rng.uniform(0.5, 1.5))
+        if rng.random() < self.failure_rate:
+            raise GenerationError('stub provider outage')
+        broken = rng.random() < self.invalid_rate
+        types = request['questionTypes']
+        return [self._question(request, i, types[i % len(types)], rng, broken and i == 0)
+                for i in range(len(request['questionIds']))]
+
+    @staticmethod
+    def _question(request, i, question_type, rng, broken):
+        a, b = rng.randint(2, 12), rng.randint(2, 12)
+        title = request['title'] or request['topic']
+        curriculum = dict(request['curriculum'])
+        curriculum.setdefault('year', 8)
+        question = {
+            'questionId': request['questionIds'][i],
+            'questionType': question_type,
+            'stem': f"{title}: a tank holds {a} litres and fills at {b} litres per minute. "
+                    f"How many litres does it hold after {i + 1} minutes?",
+            'solution': f"Each minute adds {b} litres, because the rate is constant. "
+                        f"After {i + 1} minutes: {a} + {b} × {i + 1} = {a + b * (i + 1)} litres.",
+            'hints': [
+                {'level': 1, 'content': 'How much water is added every minute?', 'revealsCriticalInfo': False},
+                {'level': 2, 'content': 'Start from what the tank already holds.', 'revealsCriticalInfo': False},
+            ],
+            'difficulty': request['difficulty'] or 2,
+            'curriculum': curriculum,
+            'learningArc': {'phase': 1, 'conceptsUsed': [title]},
+            'paperMetadata': {'sequenceInPaper': request['sequences'][i]},
+            'status': 'draft',
+        }
+        if question_type == 'MCQ':
+            answer = a + b * (i + 1)
+            values = [answer, answer + b, answer - b, a * b * (i + 1)]
+            options = [{'id': 'ABCD'[n], 'text': f"{v} litres", 'isCorrect': n == 0,
+                        'feedback': 'Correct - start amount plus rate × time.' if n == 0
+                        else 'Check the start amount and the rate again.'} for n, v in enumerate(values)]
+            rng.shuffle(options)
+            for n, option in enumerate(options):
+                option['id'] = 'ABCD'[n]
+            question['mcqOptions'] = options[:3] if broken else options
+        return question
+
+
+class CommandProvider:
+    """Runs a command per set: request JSON on stdin, questions anywhere in stdout."""
+
+    def __init__(self, command, timeout=COMMAND_TIMEOUT):
+        self.name = f"command:{command}"
+        self.argv = shlex.split(command)
+        self.timeout = timeout
+
+    def generate(self, request):
+        try:
+            done = subprocess.run(self.argv, input=json.dumps(request), capture_output=True, text=True,
+                                  timeout=self.timeout)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise GenerationError(str(e)) from e
+        if done.returncode != 0:
+            raise GenerationError(f"exit {done.returncode}: {done.stderr.strip()[-300:]}")
+        questions, _, _ = extract_questions(done.stdout)
+        if not questions:
+            raise GenerationError('no question objects in output')
+        return questions
+
+
+def make_provider(name, args):
+    if name == 'stub':
+        return StubProvider(args.seed, args.stub_latency, args.stub_failure_rate, args.stub_invalid_rate)
+    if name.startswith('command:'):
+        return CommandProvider(name[len('command:'):])
+    raise GenerationError(f"unknown provider {name!r} (expected stub or command:CMD)")
+
+
+# ============================================
+# ORCHESTRATION
+# ============================================
+def set_errors(questions):
+    """Error-severity issues (schema, content, presentation) as short strings."""
+    result = validate_questions(questions)
+    return [f"{q['questionId']}: {issue['message']}"
+            for q in result['questions'] for layer in ('schema', 'content', 'presentation')
+            for issue in q[layer] if issue['severity'] == 'error']
+
+
+def normalise_set(job, questions):
+    """Take the provider's questions in order and pin them to the job's ids and sequences."""
+    if len(questions) < job.block.count:
+        raise GenerationError(f"{len(questions)} questions returned, {job.block.count} asked for")
+    pinned = []
+    for question, qid, sequence in zip(questions, job.block.ids, job.block.sequences):
+        question = dict(question, questionId=qid)
+        question['paperMetadata'] = dict(question.get('paperMetadata') or {}, sequenceInPaper=sequence)
+        pinned.append(question)
+    return pinned
+
+
+def _attempt(provider, request, retries):
+    """Worker: call the provider, retrying errors with exponential backoff. Returns (questions, timing)."""
+    started = time.perf_counter()
+    for attempt in range(retries + 1):
+        try:
+            return provider.generate(dict(request, retry=attempt)), (started, time.perf_counter(), attempt + 1)
+        except GenerationError:
+            if attempt == retries:
+                raise
+            time.sleep(BACKOFF_SECONDS * 2 ** attempt)
+
+
+class Orchestrator:
+    def __init__(self, spec, provider, workers=DEFAULT_WORKERS, retries=DEFAULT_RETRIES,
+                 allocator=None, tracer=None, verbose=True):
+        self.spec = spec
+        self.provider = provider
+        self.workers = workers
+        self.retries = retries
+        self.allocator = allocator
+        self.tracer = tracer or Tracer('generate_sets', enabled=False)
+        self.verbose = verbose
+        self.done = {}          # set number -> path
+        self.failed = {}        # set number -> error
+        self.reused = []
+        self.merged_through = 0
+        self.provider_calls = 0
+
+    def log(self, message):
+        if self.verbose:
+            print(message, flush=True)
+
+    def plan(self):
+        """
+        SetJobs for sets that still need generating. Existing valid sets are
+        reused, and a set that failed last run gets its reserved block back,
+        so a re-run fills the gap rather than numbering past it.
+        """
+        reserved = {block.owner: block for block in self.allocator.blocks(self.spec['prefix'], 'reserved')
+                    if block.count == self.spec['setSize']}
+        jobs = []
+        for number, set_spec in enumerate(self.spec['sets'], 1):
+            existing = existing_set(self.spec, number)
+            if existing:
+                self.done[number] = existing[0]
+                self.reused.append(number)
+                continue
+            owner = f"{self.spec['topic']} set {number}"
+            block = reserved.get(owner) or self.allocator.allocate(self.spec['prefix'], self.spec['setSize'], owner)
+            jobs.append(SetJob(number, set_spec, block, set_path(self.spec, number, block)))
+        return jobs
+
+    def finish_set(self, job, questions):
+        """Validate a returned set. Returns True when written, False when it needs regenerating."""
+        questions = normalise_set(job, questions)
+        errors = set_errors(questions)
+        if errors:
+            job.feedback = errors[:20]
+            return False
+        # Topic metadata rides along in each set header; merge_sets lifts it into the complete file.
+        metadata = dict(self.spec.get('metadata') or {}, questionRange=job.block.question_range)
+        if job.spec.get('focus'):
+            metadata['focus'] = job.spec['focus']
+        header = set_header(job.number, self.spec['setSize'], {'metadata': metadata},
+                            {job.number: job.spec['title']} if job.spec.get('title') else None)
+        os.makedirs(os.path.dirname(job.path), exist_ok=True)
+        write_question_file(job.path, questions, header)
+        self.allocator.commit(job.block.id)
+        self.done[job.number] = job.path
+        return True
+
+    def merge_ready(self):
+        """Merge the longest run of finished sets from set 1 into the complete file."""
+        frontier = self.merged_through
+        while frontier + 1 in self.done:
+            frontier += 1
+        if frontier == self.merged_through:
+            return
+        sources = [self.done[n] for n in range(1, frontier + 1)]
+        with self.tracer.stage('merge', sets=frontier) as stage:
+            summary = merge(self.spec['target'], sources, verbose=False)
+            stage.processed = summary['questionCount']
+        self.merged_through = frontier
+        self.log(f"  ⇢ {relpath(self.spec['target'])}: sets 1-{frontier} ({summary['questionCount']} questions)")
+
+    def run(self):
+        with self.tracer.stage('plan') as stage:
+            pending = self.plan()
+            stage.processed = len(pending)
+            stage.skipped = len(self.reused)
+        for number in self.reused:
+            self.log(f"  ✓ set {number}: reusing {relpath(self.done[number])}")
+        self.merge_ready()
+
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            def submit(job):
+                job.attempts += 1
+                request = job.request(self.spec)
+                in_flight[pool.submit(_attempt, self.provider, request, self.retries)] = job
+
+            while pending or in_flight:
+                # Backpressure: only as many requests as workers; the rest wait their turn here.
+                while pending and len(in_flight) < self.workers:
+                    submit(pending.pop(0))
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    job = in_flight.pop(future)
+                    try:
+                        questions, (started, ended, calls) = future.result()
+                    except GenerationError as e:
+                        self.provider_calls += self.retries + 1
+                        self.fail(job, f"provider: {e}")
+                        continue
+                    self.provider_calls += calls
+                    with self.tracer.stage(f"validate set {job.number}") as stage:
+                        try:
+                            written = self.finish_set(job, questions)
+                        except GenerationError as e:
+                            job.feedback, written = [str(e)], False
+                        stage.processed = len(questions)
+                        stage.failed = 0 if written else len(job.feedback)
+                    self.tracer.record(f"generate set {job.number}", started, ended, processed=len(questions),
+                                       attrs={'attempt': job.attempts, 'providerCalls': calls})
+                    if written:
+                        self.log(f"  ✓ set {job.number}: {job.block.question_range} → {relpath(job.path)}"
+                                 + (f" (attempt {job.attempts})" if job.attempts > 1 else ''))
+                        self.merge_ready()
+                    elif job.attempts <= self.retries:
+                        self.log(f"  ↻ set {job.number}: {len(job.feedback)} validation errors, regenerating")
+                        pending.insert(0, job)
+                    else:
+                        self.fail(job, f"validation: {job.feedback[0]}")
+        return self.summary()
+
+    def fail(self, job, error):
+        """The block stays reserved for the re-run; `id_allocator.py release` gives it up for good."""
+        self.failed[job.number] = error
+        self.log(f"  ❌ set {job.number}: {error} ({job.block.question_range} kept for the re-run)")
+
+    def summary(self):
+        return {'sets': len(self.spec['sets']), 'generated': len(self.done) - len(self.reused),
+                'reused': len(self.reused), 'failed': dict(self.failed), 'mergedThrough': self.merged_through,
+                'providerCalls': self.provider_calls}
+
+
+def write_topic_manifest(spec, sources):
+    """topics/<topic>.json, so build_topics.py owns the topic from here on."""
+    path = os.path.join(TOPICS_DIR, f"{spec['topic']}.json")
+    manifest = {'topic': spec['topic'], 'target': relpath(spec['target']), 'sources': [relpath(s) for s in sources]}
+    os.makedirs(TOPICS_DIR, exist_ok=True)
+    with atomic_write(path) as f:
+        json.dump(manifest, f, indent=2)
+        f.write('\n')
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a topic\'s sets in parallel into its complete file.')
+    parser.add_argument('spec', help='topic spec JSON')
+    parser.add_argument('--provider', default='stub', help='stub (default) or command:CMD')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='sets generated at once')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                        help='retries per set for provider errors and for invalid sets')
+    parser.add_argument('--db', default=DEFAULT_DB, help='id allocator database')
+    parser.add_argument('--seed', type=int, default=0, help='stub provider seed')
+    parser.add_argument('--stub-latency', type=float, default=0.0, help='stub seconds per set')
+    parser.add_argument('--stub-failure-rate', type=float, default=0.0)
+    parser.add_argument('--stub-invalid-rate', type=float, default=0.0)
+    parser.add_argument('--trace', action='store_true', help='record stage timings under .cache/traces')
+    args = parser.parse_args(argv)
+
+    tracer = Tracer('generate_sets', enabled=args.trace)
+    try:
+        spec = load_spec(args.spec)
+        provider = make_provider(args.provider, args)
+        allocator = Allocator(args.db)
+    except (OSError, ValueError, GenerationError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    print('\n' + '═' * 60)
+    print(f"  🏭 SET GENERATION: {spec['topic']}")
+    print('═' * 60)
+    print(f"  Provider: {provider.name}   Workers: {args.workers}   Retries: {args.retries}")
+    print(f"  Sets:     {len(spec['sets'])} × {spec['setSize']} questions → {relpath(spec['target'])}\n")
+
+    started = time.perf_counter()
+    orchestrator = Orchestrator(spec, provider, args.workers, args.retries, allocator, tracer)
+    try:
+        summary = orchestrator.run()
+    except (AllocatorError, MergeError, QuestionFileError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - started
+
+    complete = not summary['failed'] and summary['mergedThrough'] == summary['sets']
+    if complete:
+        manifest = write_topic_manifest(spec, [orchestrator.done[n] for n in range(1, summary['sets'] + 1)])
+    print('\n' + '━' * 60)
+    print(f"  Generated: {summary['generated']}   Reused: {summary['reused']}   Failed: {len(summary['failed'])}")
+    print(f"  Provider calls: {summary['providerCalls']}   Elapsed: {elapsed:.1f}s"
+          + (f"   ({summary['generated'] / elapsed * 60:.1f} sets/min)" if summary['generated'] and elapsed else ''))
+    if complete:
+        count = (read_header(spec['target']) or {}).get('metadata', {}).get('questionCount')
+        print(f"  ✅ {relpath(spec['target'])}: {count} questions, manifest {relpath(manifest)}")
+    elif summary['mergedThrough']:
+        print(f"  ⚠️  {relpath(spec['target'])} has sets 1-{summary['mergedThrough']}; re-run to finish the rest")
+    else:
+        print('  ⚠️  Set 1 is not in yet, so nothing was merged; re-run to finish the rest')
+    print('═' * 60 + '\n')
+    tracer.finish()
+    return 0 if complete else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Generate checked NSW Selective variants from the archetype templates.
+
+Each archetype with a template in archetype_templates.py can produce new
+5-option MCQs on demand. Parameters are drawn a batch at a time, one column
+per parameter, and every row goes through the same pipeline:
+
+  constraints   derive() rejects rows that break the template's rules
+  check         the answer is substituted back into the question
+  options       the first four distractors that differ from the answer and
+                each other, shuffled with the correct option into A-E
+  money         every $ gets a backslash, as in the rest of the corpus,
+                since the app renders $...$ as LaTeX
+  validation    validate_question() must report no errors in any layer
+  dedup         (archetypeId, correct text, numbers in the stem) must be new,
+                both in this run and in every file in the archetype folder
+
+Runs are deterministic: the same archetype, template version and --seed
+give the same variants. Nothing is written without --write, which appends
+to <folder>/<qaN>-variants.json as drafts with ids from the allocator
+(nsw-sel-qaN-v0001, ...), so repeated runs never collide.
+
+Usage:
+  python3 generate_variants.py list
+  python3 generate_variants.py generate qa13 --count 500 --seed 7 --sample 2
+  python3 generate_variants.py generate all --count 200 --seed 1 --write
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter
+from datetime import date
+from fractions import Fraction
+
+from archetype_templates import TEMPLATES
+from id_allocator import DEFAULT_DB, Allocator, AllocatorError
+from question_files import QUESTIONS_DIR, QuestionFileError, iter_questions, relpath, write_question_file
+from validate_questions import validate_question
+
+NSW_DIR = os.path.join(QUESTIONS_DIR, 'nsw-selective')
+OPTION_IDS = ('A', 'B', 'C', 'D', 'E')
+TIME_TARGETS = {1: 45, 2: 60, 3: 90, 4: 120, 5: 150}
+NUMBER = re.compile(r'\d+(?:\.\d+)?')
+
+BATCH_MIN = 64
+BATCH_MAX = 4096
+IDLE_BATCHES = 20               # batches in a row with nothing new before the space counts as exhausted
+
+
+# ============================================
+# ARCHETYPE FOLDERS
+# ============================================
+def archetype_dir(archetype):
+    matches = glob.glob(os.path.join(NSW_DIR, f"{archetype}-*"))
+    return matches[0] if len(matches) == 1 else None
+
+
+def variants_path(archetype):
+    return os.path.join(archetype_dir(archetype), f"{archetype}-variants.json")
+
+
+def signature(question):
+    """Two items with the same archetype, answer and stem numbers are the same problem."""
+    correct = next((o.get('text') for o in question.get('mcqOptions') or [] if o.get('isCorrect')), None)
+    if isinstance(correct, str):
+        correct = correct.replace('\\$', '$')
+    return ((question.get('nswSelective') or {}).get('archetypeId'), correct,
+            tuple(sorted(NUMBER.findall(question.get('stem') or ''))))
+
+
+def load_archetype(archetype):
+    """(profile question, signatures of every existing item) for an archetype folder."""
+    folder = archetype_dir(archetype)
+    if folder is None:
+        raise ValueError(f"no folder for {archetype} under {relpath(NSW_DIR)}")
+    profile, seen = None, set()
+    for path in sorted(glob.glob(os.path.join(folder, '*.json'))):
+        try:
+            for question in iter_questions(path):
+                seen.add(signature(question))
+                if profile is None and question.get('nswSelective') and not path.endswith('-variants.json'):
+                    profile = question
+        except QuestionFileError:
+            continue
+    if profile is None:
+        raise ValueError(f"{relpath(folder)} has no NSW Selective items to take the profile from")
+    return profile, seen
+
+
+# ============================================
+# BUILDING
+# ============================================
+class Rejected(Exception):
+    """A drawn row that did not become a variant; the message is the reason."""
+
+
+MAX_PLACES = 6
+
+
+def _places(value):
+    """Decimal places `value` needs, or None when it doesn't terminate within MAX_PLACES."""
+    value = Fraction(value)
+    return next((n for n in range(MAX_PLACES + 1) if (value * 10 ** n).denominator == 1), None)
+
+
+def _same_format(template, value, answer):
+    """Whether `value` renders like the answer: whole minutes stay whole, no 253.125 next to 250."""
+    answer_places = _places(answer)
+    if template.decimals is None or answer_places is None:
+        return True
+    places = _places(value)
+    return places is not None and places <= max(template.decimals, answer_places)
+
+
+def _options(template, v, rng):
+    answer_text = template.text(v.answer, v)
+    options, texts = [], {answer_text}
+    for value, kind, feedback in template.distractors(v):
+        if value <= 0 or value == v.answer or not _same_format(template, value, v.answer):
+            continue
+        text = template.text(value, v)
+        if text in texts:
+            continue
+        texts.add(text)
+        options.append(({'text': text, 'isCorrect': False, 'feedback': feedback}, kind))
+        if len(options) == 4:
+            break
+    if len(options) < 4:
+        raise Rejected('too few distractors')
+    options.append(({'text': answer_text, 'isCorrect': True,
+                     'feedback': f"Correct! {template.explain(v)}"}, None))
+    rng.shuffle(options)
+    mcq, kinds = [], {}
+    for letter, (option, kind) in zip(OPTION_IDS, options):
+        mcq.append({'id': letter, **option})
+        if kind:
+            kinds[letter] = kind
+    return mcq, kinds
+
+
+def _escape_money(value):
+    """Templates only use $ for money; escape it so remark-math leaves it alone."""
+    if isinstance(value, str):
+        return value.replace('\\$', '$').replace('$', '\\$')
+    if isinstance(value, list):
+        return [_escape_money(item) for item in value]
+    if isinstance(value, dict):
+        return {k: _escape_money(item) for k, item in value.items()}
+    return value
+
+
+def build_variant(template, params, profile, rng, seed):
+    """One question dict for `params`, or Rejected."""
+    v = template.bind(params)
+    if v is None:
+        raise Rejected('constraint')
+    if not template.check(v):
+        raise Rejected('check failed')
+    mcq, kinds = _options(template, v, rng)
+    difficulty = template.difficulty(v)
+    seconds = TIME_TARGETS[difficulty]
+    nsw = profile['nswSelective']
+    hints = template.hints(v)
+    question = {
+        'questionId': None,
+        'questionType': 'MCQ',
+        'stem': _escape_money(template.stem(v)),
+        'mcqOptions': _escape_money(mcq),
+        'solution': _escape_money(template.solution(v)),
+        'hints': [{'level': i, 'content': _escape_money(text), 'revealsCriticalInfo': i == len(hints)}
+                  for i, text in enumerate(hints, 1)],
+        'nswSelective': {
+            'archetype': nsw.get('archetype'),
+            'archetypeId': template.archetype,
+            'conceptsRequired': list(template.concepts or nsw.get('conceptsRequired') or []),
+            'distractorTypes': kinds,
+            'solutionApproach': nsw.get('solutionApproach'),
+            'methodologySteps': _escape_money(template.steps(v)),
+            'timeTarget': seconds,
+            'commonErrors': list(nsw.get('commonErrors') or []),
+            'variant': {'template': type(template).__name__, 'version': template.version, 'seed': seed,
+                        'params': params},
+        },
+        'difficulty': difficulty,
+        'estimatedTime': seconds,
+        'curriculum': json.loads(json.dumps(profile.get('curriculum') or {})),
+        'paperMetadata': {'section': 'nsw-selective-mathematics',
+                          'setId': f"nsw-sel-{template.archetype}-variants", 'sequenceInPaper': None},
+        'status': 'draft',
+    }
+    # Ids are allocated on --write, so a missing questionId is expected here.
+    result = validate_question(question)
+    for layer in ('schema', 'content', 'pedagogy', 'presentation'):
+        errors = [i for i in result[layer] if i['severity'] == 'error' and i['field'] != 'questionId']
+        if errors:
+            raise Rejected(f"{layer}: {errors[0]['message']}")
+    return question
+
+
+def generate(archetype, count, seed=0, profile=None, seen=None):
+    """
+    Up to `count` new variants for `archetype`, in a fixed order for a given
+    seed. Returns (questions, rejection Counter, exhausted).
+    """
+    template = TEMPLATES[archetype]
+    if profile is None:
+        profile, seen = load_archetype(archetype)
+    seen = set(seen or ())
+    rng = random.Random(f"{archetype}:{template.version}:{seed}")
+    questions, rejected = [], Counter()
+    idle = 0
+    while len(questions) < count and idle < IDLE_BATCHES:
+        size = min(BATCH_MAX, max(BATCH_MIN, 2 * (count - len(questions))))
+        before = len(questions)
+        for params in template.draw(rng, size):
+            try:
+                question = build_variant(template, params, profile, rng, seed)
+            except Rejected as e:
+                rejected[str(e)] += 1
+                continue
+            key = signature(question)
+            if key in seen:
+                rejected['duplicate'] += 1
+                continue
+            seen.add(key)
+            questions.append(question)
+            if len(questions) == count:
+                break
+        idle = idle + 1 if len(questions) == before else 0
+    return questions, rejected, len(questions) < count
+
+
+# ============================================
+# WRITING
+# ============================================
+def write_variants(archetype, questions, profile, seed, db=DEFAULT_DB):
+    """Append `questions` to the archetype's variants file with allocated ids. Returns the path."""
+    path = variants_path(archetype)
+    existing = []
+    if os.path.exists(path):
+        existing = list(iter_questions(path))
+    prefix = f"nsw-sel-{archetype}-v"
+    allocator = Allocator(db)
+    try:
+        block = allocator.allocate(prefix, len(questions), owner=f"{archetype} variants seed {seed}", width=4)
+        for i, (question, question_id) in enumerate(zip(questions, block.ids), len(existing) + 1):
+            question['questionId'] = question_id
+            question['paperMetadata']['sequenceInPaper'] = i
+        template = TEMPLATES[archetype]
+        nsw = profile['nswSelective']
+        header = {'metadata': {
+            'archetype': nsw.get('archetype'),
+            'archetypeId': archetype,
+            'archetypeSlug': os.path.basename(archetype_dir(archetype)).split('-', 1)[1],
+            'questionCount': len(existing) + len(questions),
+            'section': 'nsw-selective-mathematics',
+            'targetYear': (profile.get('curriculum') or {}).get('year'),
+            'testSection': 'Mathematical Reasoning',
+            'generator': {'script': 'generate_variants.py', 'template': type(template).__name__,
+                          'version': template.version},
+            'createdAt': date.today().isoformat(),
+        }}
+        write_question_file(path, existing + questions, header)
+        allocator.commit(block.id)
+    except BaseException:
+        if 'block' in locals():
+            allocator.release(block.id)
+        raise
+    finally:
+        allocator.close()
+    return path
+
+
+# ============================================
+# CLI
+# ============================================
+def _space(template):
+    size, exact = 1, True
+    for spec in template.params.values():
+        if callable(spec):
+            exact = False
+        else:
+            size *= len(spec)
+    return f"{size:,}" if exact else f"> {size:,}"
+
+
+def _list():
+    print(f"\n{'═' * 60}\n🧩 ARCHETYPE TEMPLATES\n{'═' * 60}")
+    for archetype, template in sorted(TEMPLATES.items(), key=lambda item: int(item[0][2:])):
+        folder = archetype_dir(archetype)
+        existing = sum(1 for path in glob.glob(os.path.join(folder, '*.json'))
+                       for _ in iter_questions(path)) if folder else 0
+        print(f"  {archetype:<5} {template.title:<36} v{template.version}  "
+              f"params {_space(template):>14}  existing {existing}")
+    missing = sorted({os.path.basename(p).split('-')[0] for p in glob.glob(os.path.join(NSW_DIR, 'qa*'))}
+                     - set(TEMPLATES), key=lambda a: int(a[2:]))
+    if missing:
+        print(f"  ⚠️  No template: {', '.join(missing)}")
+    return 0
+
+
+def _print_sample(question):
+    print(f"\n    {question['stem']}")
+    for option in question['mcqOptions']:
+        print(f"      {option['id']}. {option['text']}{'  ✓' if option['isCorrect'] else ''}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate NSW Selective variants from archetype templates.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help='templates, parameter spaces and existing item counts')
+    gen = sub.add_parser('generate', help='generate variants (dry run unless --write)')
+    gen.add_argument('archetype', help="archetypeId (qa13) or 'all'")
+    gen.add_argument('--count', type=int, default=100, help='variants per archetype (default: 100)')
+    gen.add_argument('--seed', type=int, default=0)
+    gen.add_argument('--write', action='store_true', help='append to <folder>/<qaN>-variants.json')
+    gen.add_argument('--sample', type=int, default=0, metavar='K', help='print K generated questions')
+    gen.add_argument('--db', default=DEFAULT_DB, help='id allocator database')
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        return _list()
+
+    archetypes = sorted(TEMPLATES, key=lambda a: int(a[2:])) if args.archetype == 'all' else [args.archetype]
+    unknown = [a for a in archetypes if a not in TEMPLATES]
+    if unknown:
+        print(f"❌ No template for {', '.join(unknown)} (see: generate_variants.py list)", file=sys.stderr)
+        return 1
+
+    print(f"\n{'═' * 60}\n🧩 GENERATING VARIANTS (seed {args.seed}{'' if args.write else ', dry run'})\n{'═' * 60}")
+    total, failed = 0, False
+    for archetype in archetypes:
+        try:
+            profile, seen = load_archetype(archetype)
+        except ValueError as e:
+            print(f"  ❌ {archetype}: {e}")
+            failed = True
+            continue
+        started = time.perf_counter()
+        questions, rejected, exhausted = generate(archetype, args.count, args.seed, profile, seen)
+        elapsed = time.perf_counter() - started
+        rate = len(questions) / elapsed if elapsed else 0
+        reasons = ', '.join(f"{reason} {n}" for reason, n in rejected.most_common())
+        mark = '⚠️ ' if exhausted else '✓'
+        print(f"  {mark} {archetype:<5} {len(questions):>6} variants  {rate:>9,.0f}/s"
+              + (f"  rejected: {reasons}" if reasons else ''))
+        if exhausted:
+            print(f"     ⇢ parameter space ran out after {len(questions)} of {args.count}")
+        for question in questions[:args.sample]:
+            _print_sample(question)
+        if args.write and questions:
+            try:
+                path = write_variants(archetype, questions, profile, args.seed, args.db)
+            except (AllocatorError, QuestionFileError, OSError) as e:
+                print(f"  ❌ {archetype}: {e}", file=sys.stderr)
+                failed = True
+                continue
+            print(f"     ↻ {relpath(path)}: {questions[0]['questionId']} .. {questions[-1]['questionId']}")
+        total += len(questions)
+
+    print(f"\n✓ {total} variants{' written' if args.write else ' (dry run, nothing written)'}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+Allocate questionId blocks and sequence ranges to concurrent set producers.
+
+A series is a questionId prefix such as `nsw-y8-energy-`; its numbers are
+both the questionId suffix and paperMetadata.sequenceInPaper, so a block of
+ten starting at 41 is nsw-y8-energy-041..050, sequences 41-50 and
+questionRange "Q41-Q50". Generators ask for a block instead of picking
+numbers by hand:
+
+  from id_allocator import Allocator
+  block = Allocator().allocate('nsw-y8-energy-', 10, owner='energy set 2')
+  block.ids             # ['nsw-y8-energy-011', ...]
+  block.question_range  # 'Q11-Q20'
+  block.sequences       # range(11, 21)
+
+State lives in .cache/id-allocator.sqlite. Each allocation is one short
+BEGIN IMMEDIATE transaction, so any number of processes can allocate at once
+without two of them getting the same numbers, and none of them waits on
+another's generation. The first allocation in a series starts after the
+highest number already in the corpus; `sync` catches up with numbers that
+were assigned by hand since.
+
+After merges, `renumber` closes the gaps: the prefix's questions in the
+given files are renumbered in order, along with their sequenceInPaper,
+identical copies of them in other files (set files of a complete file), and
+learningArc.buildsOn references across the corpus.
+`compact` then winds the series back to the corpus maximum, so the numbers
+freed by released blocks and renumbering are handed out again.
+
+Usage:
+  python3 id_allocator.py allocate nsw-y8-energy- 10 --owner "energy set 6"
+  python3 id_allocator.py status [PREFIX]
+  python3 id_allocator.py release BLOCK_ID
+  python3 id_allocator.py sync
+  python3 id_allocator.py renumber questions/qa1-set*.json --prefix nsw-sel-qa1- --write
+  python3 id_allocator.py compact nsw-y8-energy-
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+
+from question_files import (
+    CACHE_DIR, QuestionFileError, atomic_write, discover_question_files, iter_questions, question_hash,
+    read_header, relpath, rewrite_questions,
+)
+
+DEFAULT_DB = os.path.join(CACHE_DIR, 'id-allocator.sqlite')
+DEFAULT_WIDTH = 3
+BUSY_TIMEOUT = 60.0
+NUMBERED_ID = re.compile(r'^(.*?)(\d+)$')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS series (
+    prefix TEXT PRIMARY KEY,
+    width  INTEGER NOT NULL,
+    next   INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    prefix  TEXT NOT NULL REFERENCES series(prefix),
+    start   INTEGER NOT NULL,
+    count   INTEGER NOT NULL,
+    owner   TEXT NOT NULL DEFAULT '',
+    status  TEXT NOT NULL DEFAULT 'reserved',
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blocks_prefix ON blocks(prefix, start);
+'''
+
+
+class AllocatorError(ValueError):
+    """Raised for unknown blocks, bad prefixes and renumbering conflicts."""
+
+
+def split_id(question_id):
+    """(prefix, number, width) for a numbered questionId, or None."""
+    match = NUMBERED_ID.match(question_id or '')
+    if not match or not match.group(1):
+        return None
+    return match.group(1), int(match.group(2)), len(match.group(2))
+
+
+def format_id(prefix, number, width=DEFAULT_WIDTH):
+    return f"{prefix}{number:0{width}d}"
+
+
+def corpus_maxima(paths=None):
+    """{prefix: (highest number, widest suffix)} over every questionId in the corpus."""
+    maxima = {}
+    for path in discover_question_files() if paths is None else paths:
+        try:
+            for question in iter_questions(path):
+                parts = split_id(question.get('questionId'))
+                if parts:
+                    prefix, number, width = parts
+                    best, widest = maxima.get(prefix, (0, 0))
+                    maxima[prefix] = (max(best, number), max(widest, width))
+        except QuestionFileError:
+            continue
+    return maxima
+
+
+class Block:
+    """A contiguous run of numbers in one series."""
+
+    def __init__(self, block_id, prefix, start, count, width, owner='', status='reserved', created=None):
+        self.id = block_id
+        self.prefix = prefix
+        self.start = start
+        self.count = count
+        self.width = width
+        self.owner = owner
+        self.status = status
+        self.created = created
+
+    @property
+    def sequences(self):
+        return range(self.start, self.start + self.count)
+
+    @property
+    def ids(self):
+        return [format_id(self.prefix, n, self.width) for n in self.sequences]
+
+    @property
+    def question_range(self):
+        return f"Q{self.start}-Q{self.start + self.count - 1}"
+
+    def to_dict(self):
+        return {'id': self.id, 'prefix': self.prefix, 'start': self.start, 'count': self.count,
+                'questionRange': self.question_range, 'first': self.ids[0], 'last': self.ids[-1],
+                'owner': self.owner, 'status': self.status}
+
+
+class Allocator:
+    def __init__(self, path=DEFAULT_DB, corpus=None):
+        """`corpus` limits the files scanned to seed new series (default: whole corpus)."""
+        self.path = path
+        self.corpus = corpus
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """BEGIN IMMEDIATE takes the write lock up front, so read-then-update cannot race."""
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            yield self.db
+        except BaseException:
+            self.db.execute('ROLLBACK')
+            raise
+        self.db.execute('COMMIT')
+
+    def _series(self, prefix):
+        return self.db.execute('SELECT width, next FROM series WHERE prefix = ?', (prefix,)).fetchone()
+
+    def _ensure_series(self, prefix, width=None):
+        if not prefix or prefix[-1].isdigit():
+            raise AllocatorError(f"prefix must not end in a digit: {prefix!r}")
+        if self._series(prefix):
+            return
+        # Scanning the corpus happens outside the lock; INSERT OR IGNORE lets the first writer win.
+        highest, widest = corpus_maxima(self.corpus).get(prefix, (0, 0))
+        self.db.execute('INSERT OR IGNORE INTO series (prefix, width, next) VALUES (?, ?, ?)',
+                        (prefix, width or max(widest, DEFAULT_WIDTH), highest + 1))
+
+    def allocate(self, prefix, count, owner='', width=None):
+        """Reserve the next `count` numbers in `prefix`. Returns a Block."""
+        if count < 1:
+            raise AllocatorError('count must be at least 1')
+        self._ensure_series(prefix, width)
+        with self._transaction() as db:
+            series_width, start = db.execute('SELECT width, next FROM series WHERE prefix = ?',
+                                             (prefix,)).fetchone()
+            db.execute('UPDATE series SET next = ? WHERE prefix = ?', (start + count, prefix))
+            created = time.time()
+            cursor = db.execute('INSERT INTO blocks (prefix, start, count, owner, created) VALUES (?, ?, ?, ?, ?)',
+                                (prefix, start, count, owner, created))
+        return Block(cursor.lastrowid, prefix, start, count, series_width, owner, 'reserved', created)
+
+    def block(self, block_id):
+        row = self.db.execute('SELECT b.id, b.prefix, b.start, b.count, s.width, b.owner, b.status, b.created '
+                              'FROM blocks b JOIN series s USING (prefix) WHERE b.id = ?', (block_id,)).fetchone()
+        if not row:
+            raise AllocatorError(f"no block {block_id}")
+        return Block(*row)
+
+    def blocks(self, prefix=None, status=None):
+        query = ('SELECT b.id, b.prefix, b.start, b.count, s.width, b.owner, b.status, b.created '
+                 'FROM blocks b JOIN series s USING (prefix) WHERE 1 = 1')
+        params = []
+        if prefix:
+            query += ' AND b.prefix = ?'
+            params.append(prefix)
+        if status:
+            query += ' AND b.status = ?'
+            params.append(status)
+        return [Block(*row) for row in self.db.execute(query + ' ORDER BY b.prefix, b.start', params)]
+
+    def series(self):
+        return {prefix: {'width': width, 'next': nxt}
+                for prefix, width, nxt in self.db.execute('SELECT prefix, width, next FROM series ORDER BY prefix')}
+
+    def _set_status(self, block_id, status):
+        with self._transaction() as db:
+            if not db.execute('UPDATE blocks SET status = ? WHERE id = ?', (status, block_id)).rowcount:
+                raise AllocatorError(f"no block {block_id}")
+
+    def commit(self, block_id):
+        """Mark a block's questions as written."""
+        self._set_status(block_id, 'committed')
+
+    def release(self, block_id):
+        """
+        Give a block back. If it is the last block in its series the numbers
+        are reused at once; otherwise they stay a gap until `compact`.
+        """
+        with self._transaction() as db:
+            row = db.execute('SELECT prefix, start, count FROM blocks WHERE id = ?', (block_id,)).fetchone()
+            if not row:
+                raise AllocatorError(f"no block {block_id}")
+            prefix, start, count = row
+            db.execute("UPDATE blocks SET status = 'released' WHERE id = ?", (block_id,))
+            db.execute('UPDATE series SET next = ? WHERE prefix = ? AND next = ?', (start, prefix, start + count))
+
+    def sync(self, paths=None):
+        """Move every series past numbers already in the corpus. Returns {prefix: (old next, new next)}."""
+        maxima = corpus_maxima(self.corpus if paths is None else paths)
+        moved = {}
+        with self._transaction() as db:
+            for prefix, width, nxt in db.execute('SELECT prefix, width, next FROM series').fetchall():
+                highest = maxima.get(prefix, (0, 0))[0]
+                if highest >= nxt:
+                    db.execute('UPDATE series SET next = ? WHERE prefix = ?', (highest + 1, prefix))
+                    moved[prefix] = (nxt, highest + 1)
+        return moved
+
+    def compact(self, prefix, paths=None):
+        """
+        Wind `prefix` back to just past the corpus maximum and retire blocks
+        wholly beyond it that never produced questions. Blocks still
+        reserved past the maximum are kept, and the series resumes after
+        them. Returns (old next, new next).
+        """
+        highest = corpus_maxima(self.corpus if paths is None else paths).get(prefix, (0, 0))[0]
+        with self._transaction() as db:
+            row = db.execute('SELECT next FROM series WHERE prefix = ?', (prefix,)).fetchone()
+            if not row:
+                raise AllocatorError(f"unknown series {prefix!r}")
+            reserved_end = db.execute("SELECT MAX(start + count) FROM blocks WHERE prefix = ? AND status = 'reserved' "
+                                      "AND start + count > ?", (prefix, highest + 1)).fetchone()[0]
+            new_next = max(highest + 1, reserved_end or 0)
+            db.execute("UPDATE blocks SET status = 'compacted' WHERE prefix = ? AND start >= ? "
+                       "AND status IN ('committed', 'released')", (prefix, new_next))
+            db.execute('UPDATE series SET next = ? WHERE prefix = ?', (new_next, prefix))
+        return row[0], new_next
+
+
+# ============================================
+# RENUMBERING
+# ============================================
+def _identity_free(question):
+    """Content hash ignoring the fields renumbering rewrites, to recognise copies of a question."""
+    body = {k: v for k, v in question.items() if k not in ('questionId', 'paperMetadata')}
+    return question_hash(body)
+
+
+def plan_renumber(paths, prefix, start=1, width=None):
+    """
+    {old id: new id} numbering the `prefix` questions of `paths`, taken in
+    order as one sequence, contiguously from `start`; and {old id: content
+    hash} to recognise copies of those questions in other files.
+    """
+    ids, hashes = [], {}
+    for path in paths:
+        for question in iter_questions(path):
+            parts = split_id(question.get('questionId'))
+            if parts and parts[0] == prefix and question['questionId'] not in hashes:
+                ids.append(question['questionId'])
+                hashes[question['questionId']] = _identity_free(question)
+    width = width or max([split_id(i)[2] for i in ids] + [DEFAULT_WIDTH])
+    return {old: format_id(prefix, start + n, width) for n, old in enumerate(ids)}, hashes
+
+
+def _renamed(question, mapping, hashes, is_target):
+    """The question with ids and buildsOn refs remapped, or None if nothing changes."""
+    changed = dict(question)
+    qid = question.get('questionId')
+    if qid in mapping and (is_target or _identity_free(question) == hashes[qid]):
+        changed['questionId'] = mapping[qid]
+        paper = question.get('paperMetadata')
+        if isinstance(paper, dict) and 'sequenceInPaper' in paper:
+            changed['paperMetadata'] = dict(paper, sequenceInPaper=split_id(mapping[qid])[1])
+    arc = question.get('learningArc')
+    if isinstance(arc, dict) and isinstance(arc.get('buildsOn'), list):
+        refs = [mapping.get(ref, ref) if isinstance(ref, str) else ref for ref in arc['buildsOn']]
+        if refs != arc['buildsOn']:
+            changed['learningArc'] = dict(arc, buildsOn=refs)
+    return changed if changed != question else None
+
+
+def check_renumber(targets, mapping, hashes, corpus=None):
+    """
+    Problems that block renumbering: new ids already held by questions that
+    are not being renumbered, and old ids elsewhere whose content differs
+    (they would keep the old id while their namesake moves).
+    """
+    targets = {os.path.abspath(p) for p in targets}
+    moving, taken = set(mapping), set(mapping.values())
+    problems = []
+    for path in discover_question_files() if corpus is None else corpus:
+        if os.path.abspath(path) in targets:
+            continue
+        for question in iter_questions(path):
+            qid = question.get('questionId')
+            if qid in moving:
+                if _identity_free(question) != hashes[qid]:
+                    problems.append(f"{qid} in {relpath(path)} differs from the copy being renumbered")
+            elif qid in taken:
+                problems.append(f"{qid} is already used in {relpath(path)}")
+    return problems
+
+
+def apply_renumber(targets, mapping, hashes, corpus=None):
+    """Rewrite targets, copies of their questions and buildsOn refs corpus-wide. Returns {file: questions changed}."""
+    targets = {os.path.abspath(p) for p in targets}
+    files = targets | {os.path.abspath(p) for p in (discover_question_files() if corpus is None else corpus)}
+    changed = {}
+    for path in sorted(files):
+        is_target = path in targets
+        count = rewrite_questions(path, lambda q, is_target=is_target: _renamed(q, mapping, hashes, is_target))
+        if count:
+            changed[relpath(path)] = count
+    return changed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Allocate and renumber questionId / sequence ranges.')
+    parser.add_argument('--db', default=DEFAULT_DB, help='allocator database (default: .cache/id-allocator.sqlite)')
+    sub = parser.add_subparsers(dest='command', required=True)
+    alloc = sub.add_parser('allocate', help='reserve a block of ids')
+    alloc.add_argument('prefix')
+    alloc.add_argument('count', type=int)
+    alloc.add_argument('--owner', default='', help='who the block is for (set name, generator run)')
+    alloc.add_argument('--width', type=int, help='digits in new series (default: corpus width, min 3)')
+    alloc.add_argument('--json', action='store_true', help='print the block as JSON')
+    status = sub.add_parser('status', help='series and blocks')
+    status.add_argument('prefix', nargs='?')
+    for name, text in (('commit', 'mark a block written'), ('release', 'give a block back')):
+        cmd = sub.add_parser(name, help=text)
+        cmd.add_argument('block', type=int)
+    sub.add_parser('sync', help='move series past ids assigned outside the allocator')
+    compact = sub.add_parser('compact', help='reuse numbers freed by releases and renumbering')
+    compact.add_argument('prefix')
+    renumber = sub.add_parser('renumber', help='make the ids of merged files contiguous')
+    renumber.add_argument('files', nargs='+', help='files in numbering order')
+    renumber.add_argument('--prefix', required=True)
+    renumber.add_argument('--start', type=int, default=1)
+    renumber.add_argument('--write', action='store_true', help='rewrite files (default: show the plan)')
+    renumber.add_argument('--map', help='save the old -> new mapping to this JSON file')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'renumber':
+            return _renumber(args)
+        allocator = Allocator(args.db)
+        if args.command == 'allocate':
+            block = allocator.allocate(args.prefix, args.count, args.owner, args.width)
+            if args.json:
+                print(json.dumps(block.to_dict()))
+            else:
+                print(f"✓ Block {block.id}: {block.ids[0]} .. {block.ids[-1]} ({block.question_range})")
+        elif args.command in ('commit', 'release'):
+            getattr(allocator, args.command)(args.block)
+            print(f"✓ Block {args.block} {args.command}{'ted' if args.command == 'commit' else 'd'}")
+        elif args.command == 'sync':
+            moved = allocator.sync()
+            for prefix, (old, new) in sorted(moved.items()):
+                print(f"  ↻ {prefix}: next {old} → {new}")
+            print(f"✓ {len(moved)} series moved past corpus ids")
+        elif args.command == 'compact':
+            old, new = allocator.compact(args.prefix)
+            print(f"✓ {args.prefix}: next {old} → {new}")
+        else:
+            _status(allocator, args.prefix)
+    except (AllocatorError, sqlite3.Error, QuestionFileError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _status(allocator, prefix=None):
+    series = allocator.series()
+    print('\n' + '═' * 60)
+    print('  🔢 ID ALLOCATOR')
+    print('═' * 60)
+    for name, info in series.items():
+        if prefix and name != prefix:
+            continue
+        print(f"  {name}  next {format_id(name, info['next'], info['width'])}")
+        for block in allocator.blocks(name):
+            print(f"     #{block.id:<4d} {block.question_range:12s} {block.status:10s} {block.owner}")
+    if not series:
+        print('  No series yet - allocate a block to start one')
+    print('═' * 60 + '\n')
+
+
+def _renumber(args):
+    paths = [os.path.abspath(f) for f in args.files]
+    mapping, hashes = plan_renumber(paths, args.prefix, args.start)
+    moves = {old: new for old, new in mapping.items() if old != new}
+    print(f"  {len(mapping)} {args.prefix} questions in {len(paths)} files, {len(moves)} to renumber")
+    for old, new in list(moves.items())[:10]:
+        print(f"   {old} → {new}")
+    if len(moves) > 10:
+        print(f"   ... {len(moves) - 10} more")
+    if not moves:
+        return 0
+
+    problems = check_renumber(paths, moves, hashes)
+    for problem in problems:
+        print(f"  ❌ {problem}", file=sys.stderr)
+    if problems:
+        return 1
+    for path in paths:
+        header = read_header(path) or {}
+        metadata = header.get('metadata') if isinstance(header.get('metadata'), dict) else {}
+        if metadata.get('questionRange'):
+            print(f"  ⚠️  {relpath(path)}: header questionRange {metadata['questionRange']} is not rewritten")
+    if args.map:
+        with atomic_write(args.map) as f:
+            json.dump(moves, f, indent=2)
+        print(f"  📄 Mapping saved to {args.map}")
+    if not args.write:
+        print('\n  (plan only - use --write to apply)')
+        return 0
+
+    for path, count in apply_renumber(paths, moves, hashes).items():
+        print(f"  ✓ {path}: {count} questions rewritten")
+    print('  ℹ️  Renumbered ids are new documents to upload_questions.py; the old ids stay in Firestore')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
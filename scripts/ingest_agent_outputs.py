@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Ingest raw generator outputs into energy-setN-qXX-qYY.json set files.
+
+Agent transcripts mix prose, markdown fences and JSON, and are often cut off
+mid-array ("[OUTPUT FROM AGENT 1 - truncated...]"). Every complete question
+object is pulled out of the surrounding text; a truncated array still yields
+all of its complete questions. Questions are grouped into sets by
+paperMetadata.sequenceInPaper (falling back to the questionId's trailing
+number) and merged with any existing set file by questionId. A set's file is
+the one the topic manifest (topics/<topic>.json) or the output directory
+already has for that set number, so energy set 5 lands in
+energy-sets/set5-q41-q50.json; new sets get <topic>-setN-qXX-qYY.json.
+
+Sources are scanned in parallel, so hundreds of outputs ingest in one run.
+
+Usage:
+  python3 ingest_agent_outputs.py agent_outputs/               # report only
+  python3 ingest_agent_outputs.py agent_outputs/ set1.json --write
+  python3 ingest_agent_outputs.py outputs/ --topic energy --set-size 10 --output-dir . --write
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from build_topics import BuildError, load_topics
+from question_files import (
+    SCRIPTS_DIR, QuestionFileError, iter_questions, question_hash, read_header, relpath,
+    write_question_file,
+)
+
+SOURCE_EXTENSIONS = ('.json', '.txt', '.md', '.log', '.out')
+TRAILING_NUMBER = re.compile(r'(\d+)$')
+HEADER_KEY = re.compile(r'\{\s*"(?:metadata|setInfo)"\s*:\s*')
+_decoder = json.JSONDecoder()
+
+
+# ============================================
+# EXTRACTION
+# ============================================
+def is_question(value):
+    return isinstance(value, dict) and 'questionId' in value and ('stem' in value or 'questionType' in value)
+
+
+def _collect(value, questions, headers):
+    """Pull question objects (and set headers) out of a decoded JSON value."""
+    if is_question(value):
+        questions.append(value)
+    elif isinstance(value, list):
+        for item in value:
+            _collect(item, questions, headers)
+    elif isinstance(value, dict):
+        header = value.get('metadata') or value.get('setInfo')
+        if isinstance(header, dict) and isinstance(value.get('questions'), list):
+            headers.append(header)
+        for item in value.values():
+            if isinstance(item, (list, dict)):
+                _collect(item, questions, headers)
+
+
+def _truncated_header(text, start):
+    """The metadata/setInfo object opening a set wrapper at `start` that failed to decode, if any."""
+    match = HEADER_KEY.match(text, start)
+    if not match:
+        return None
+    try:
+        header, _ = _decoder.raw_decode(text, match.end())
+    except json.JSONDecodeError:
+        return None
+    return header if isinstance(header, dict) else None
+
+
+def extract_questions(text):
+    """
+    Return (questions, headers, truncated) found anywhere in `text`.
+
+    Each '{' or '[' is tried as the start of a JSON value. A value that decodes
+    is harvested and skipped; one that does not (a truncated array, prose in
+    brackets) is stepped into, so its complete inner objects are still found.
+    The set header of a truncated wrapper is kept. Every value enclosing a cut
+    fails at the same position, so `truncated` counts distinct cut positions.
+    """
+    questions, headers = [], []
+    cuts = set()
+    pos = 0
+    length = len(text)
+    while pos < length:
+        brace = text.find('{', pos)
+        bracket = text.find('[', pos)
+        starts = [p for p in (brace, bracket) if p != -1]
+        if not starts:
+            break
+        start = min(starts)
+        try:
+            value, end = _decoder.raw_decode(text, start)
+        except json.JSONDecodeError as e:
+            # Failing inside a question object (at the end of the text, or
+            # where prose interrupts it) means the output was cut off.
+            if text[start] == '{' and '"questionId"' in text[start:e.pos + 1]:
+                cuts.add(e.pos)
+            header = _truncated_header(text, start)
+            if header is not None:
+                headers.append(header)
+            pos = start + 1
+            continue
+        _collect(value, questions, headers)
+        pos = end
+    return questions, headers, len(cuts)
+
+
+def scan_source(path):
+    """Worker: extraction summary for one raw output file."""
+    try:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            text = f.read()
+    except OSError as e:
+        return {'path': path, 'error': str(e), 'questions': [], 'headers': [], 'truncated': 0}
+    questions, headers, truncated = extract_questions(text)
+    return {'path': path, 'error': None, 'questions': questions, 'headers': headers, 'truncated': truncated}
+
+
+def discover_sources(targets):
+    paths = []
+    for target in targets:
+        target = os.path.abspath(target)
+        if os.path.isdir(target):
+            for dirpath, _, filenames in os.walk(target):
+                paths.extend(os.path.join(dirpath, name) for name in sorted(filenames)
+                             if name.endswith(SOURCE_EXTENSIONS))
+        elif os.path.exists(target):
+            paths.append(target)
+        else:
+            raise FileNotFoundError(target)
+    return sorted(paths)
+
+
+# ============================================
+# SET ASSIGNMENT
+# ============================================
+def sequence_of(question):
+    sequence = (question.get('paperMetadata') or {}).get('sequenceInPaper')
+    if isinstance(sequence, int) and sequence > 0:
+        return sequence, 'paperMetadata'
+    match = TRAILING_NUMBER.search(str(question.get('questionId', '')))
+    if match and int(match.group(1)) > 0:
+        return int(match.group(1)), 'questionId'
+    return None, None
+
+
+def set_file_name(topic, set_number, set_size):
+    first = (set_number - 1) * set_size + 1
+    return f"{topic}-set{set_number}-q{first:02d}-q{first + set_size - 1:02d}.json"
+
+
+def existing_set_files(topic, output_dir):
+    """
+    {set number: path} for set files the topic already has: its manifest's
+    sources first, then <topic>-setN* / setN-qXX-qYY files in output_dir and
+    output_dir/<topic>-sets.
+    """
+    pattern = re.compile(rf'^(?:{re.escape(topic)}-set(\d+)(?:-q\d+-q\d+)?|set(\d+)-q\d+-q\d+)\.json$')
+    candidates = []
+    try:
+        manifest = load_topics().get(topic)
+    except BuildError:
+        manifest = None
+    if manifest:
+        candidates.extend(manifest.sources)
+    for directory in (output_dir, os.path.join(output_dir, f"{topic}-sets")):
+        candidates.extend(sorted(glob.glob(os.path.join(directory, '*.json'))))
+    found = {}
+    for path in candidates:
+        match = pattern.match(os.path.basename(path))
+        if match:
+            found.setdefault(int(match.group(1) or match.group(2)), os.path.abspath(path))
+    return found
+
+
+def set_header(set_number, set_size, existing=None, titles=None):
+    """File header in the energy-setN layout: {"metadata": {setNumber, title, questionRange}}."""
+    first = (set_number - 1) * set_size + 1
+    header = dict(existing or {})
+    metadata = dict(header.get('metadata') or {})
+    metadata.setdefault('setNumber', set_number)
+    if titles and set_number in titles:
+        metadata.setdefault('title', titles[set_number])
+    metadata.setdefault('questionRange', f"Q{first}-Q{first + set_size - 1}")
+    header['metadata'] = metadata
+    return header
+
+
+class Ingest:
+    """Accumulates questions from many sources and plans the set files."""
+
+    def __init__(self, topic, set_size, output_dir):
+        self.topic = topic
+        self.set_size = set_size
+        self.output_dir = output_dir
+        self.existing = existing_set_files(topic, output_dir)
+        self.sets = {}          # set number -> {questionId: (sequence, question, source)}
+        self.titles = {}
+        self.conflicts = []
+        self.unassigned = []
+        self.inferred = 0
+
+    def add_headers(self, headers):
+        for header in headers:
+            number, title = header.get('setNumber'), header.get('title')
+            if isinstance(number, int) and title:
+                self.titles.setdefault(number, title)
+
+    def add(self, question, source):
+        sequence, origin = sequence_of(question)
+        if sequence is None:
+            self.unassigned.append({'source': source, 'questionId': question.get('questionId')})
+            return
+        if origin == 'questionId':
+            self.inferred += 1
+        bucket = self.sets.setdefault((sequence - 1) // self.set_size + 1, {})
+        qid = question['questionId']
+        previous = bucket.get(qid)
+        if previous and question_hash(previous[1]) != question_hash(question):
+            self.conflicts.append({'questionId': qid, 'kept': previous[2], 'ignored': source})
+            return
+        bucket.setdefault(qid, (sequence, question, source))
+
+    def plan(self):
+        """Yield (path, header, questions, added) for every set touched."""
+        for number in sorted(self.sets):
+            path = self.existing.get(number) or os.path.join(self.output_dir,
+                                                              set_file_name(self.topic, number, self.set_size))
+            merged = dict(self.sets[number])
+            existing_header = None
+            if os.path.exists(path):
+                existing_header = read_header(path)
+                for question in iter_questions(path):
+                    qid = question.get('questionId')
+                    incoming = merged.get(qid)
+                    if incoming and question_hash(incoming[1]) != question_hash(question):
+                        self.conflicts.append({'questionId': qid, 'kept': relpath(path), 'ignored': incoming[2]})
+                    merged[qid] = (sequence_of(question)[0] or 0, question, relpath(path))
+            added = sum(1 for qid in self.sets[number] if merged[qid][2] != relpath(path))
+            ordered = [q for _, q, _ in sorted(merged.values(), key=lambda entry: entry[0])]
+            yield path, set_header(number, self.set_size, existing_header, self.titles), ordered, added
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Extract questions from raw generator outputs into set files.')
+    parser.add_argument('sources', nargs='*', default=[os.path.join(SCRIPTS_DIR, 'agent_outputs')],
+                        help='files or directories of raw outputs (default: agent_outputs/)')
+    parser.add_argument('--topic', default='energy', help='set file prefix (default: energy)')
+    parser.add_argument('--set-size', type=int, default=10, help='questions per set (default: 10)')
+    parser.add_argument('--output-dir', default=SCRIPTS_DIR, help='where set files live (default: scripts/)')
+    parser.add_argument('--write', action='store_true', help='write the set files (default: report only)')
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: CPU count)')
+    args = parser.parse_args(argv)
+
+    try:
+        paths = discover_sources(args.sources)
+    except FileNotFoundError as e:
+        print(f"❌ Source not found: {e}", file=sys.stderr)
+        return 1
+
+    ingest = Ingest(args.topic, args.set_size, os.path.abspath(args.output_dir))
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        results = list(pool.map(scan_source, paths, chunksize=max(1, len(paths) // 64)))
+
+    print('\n' + '═' * 60)
+    print('  📥 AGENT OUTPUT INGESTION')
+    print('═' * 60)
+    for result in results:
+        source = relpath(result['path'])
+        ingest.add_headers(result['headers'])
+        for question in result['questions']:
+            ingest.add(question, source)
+        if result['error']:
+            print(f"  ❌ {source}: {result['error']}")
+        else:
+            note = f" ({result['truncated']} truncated)" if result['truncated'] else ''
+            print(f"  {'✓' if result['questions'] else '⚠️ '} {source}: {len(result['questions'])} questions{note}")
+
+    print('\n' + '━' * 60)
+    written = 0
+    try:
+        for path, header, questions, added in ingest.plan():
+            sequences = {sequence_of(q)[0] for q in questions}
+            first = (header['metadata']['setNumber'] - 1) * args.set_size + 1
+            missing = [n for n in range(first, first + args.set_size) if n not in sequences]
+            status = '✓' if not missing else f"⚠️  missing Q{', Q'.join(map(str, missing))}"
+            print(f"  {relpath(path)}: {len(questions)} questions (+{added} new) {status}")
+            if args.write and added:
+                write_question_file(path, questions, header)
+                written += 1
+    except QuestionFileError as e:
+        print(f"  ❌ {e}")
+        return 1
+
+    if ingest.inferred:
+        print(f"\n  ℹ️  {ingest.inferred} questions placed by questionId (no sequenceInPaper)")
+    for entry in ingest.unassigned:
+        print(f"  ⚠️  No sequence for {entry['questionId']} ({entry['source']})")
+    for entry in ingest.conflicts:
+        print(f"  ⚠️  Conflicting copies of {entry['questionId']}: kept {entry['kept']}, ignored {entry['ignored']}")
+    if not args.write:
+        print('\n  (report only - use --write to create the set files)')
+    else:
+        print(f"\n  ✅ {written} set files written")
+    print('═' * 60 + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""
+Replay load test for the llm-grading `grade` endpoint.
+
+Grading requests are built from the corpus: each gradeable question is
+answered with its model solution, a truncated solution, or another
+question's solution from the same topic (a plausible but wrong answer).
+They are replayed at a fixed concurrency, or a fixed arrival rate, against
+the endpoint running in the Functions emulator. The LLM is replaced by a
+local stub that speaks the chat-completions API the DeepSeek adapter uses,
+with configurable latency and failure rates, so the run measures our
+pipeline (auth, Firestore reads, prompt building, validation, escalation,
+heuristic fallback, scoring, persistence) rather than the provider.
+
+Set up once per emulator session:
+
+  DEEPSEEK_API_KEY=stub DEEPSEEK_BASE_URL=http://127.0.0.1:8787 \\
+      firebase emulators:start --only functions,firestore,auth
+  FIRESTORE_EMULATOR_HOST=127.0.0.1:8081 python3 loadtest_grading.py seed
+
+Then:
+
+  python3 loadtest_grading.py run --requests 2000 --concurrency 32
+  python3 loadtest_grading.py run --duration 60 --rate 40 --latency-ms 900 --failure-rate 0.05
+  python3 loadtest_grading.py run --dry-run          # show the request mix only
+
+The report gives requests/sec, p50/p95/p99 latency, error rates, and how
+requests were graded: chat model, escalated, or heuristic fallback. It also gives the repair-retry rate and provider calls per
+request as counted by the stub. The OpenAI client the adapter uses retries
+503s itself, so injected failures show up as extra provider calls.
+
+Only the emulator is ever seeded: seed refuses to run without
+FIRESTORE_EMULATOR_HOST.
+"""
+
+import argparse
+import base64
+import itertools
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from question_files import atomic_write, discover_question_files, iter_questions, topic_slug
+from upload_questions import DEFAULT_PROJECT, FirestoreTarget, UploadError
+
+DEFAULT_ENDPOINT = f"http://127.0.0.1:5001/{DEFAULT_PROJECT}/us-central1/grade"
+DEFAULT_STUB_PORT = 8787
+MAX_ANSWER_CHARS = 1200          # GradeRequestSchema maxLength
+SEED_BATCH_SIZE = 500
+ANSWER_KINDS = ('model', 'truncated', 'distractor')
+GRADED_SUBJECTS = ('science', 'english')
+
+# Must match buildPrompt() in functions/src/llm-grading/prompts.ts
+REPAIR_MARKER = 'The previous response was invalid JSON'
+REFERENCE_BLOCK = re.compile(r'REFERENCE_ANSWER[^\n]*\n```(.*?)```', re.S)
+STUDENT_BLOCK = re.compile(r'STUDENT_ANSWER[^\n]*\n```(.*?)```', re.S)
+WORD = re.compile(r'[a-z0-9]+')
+
+
+# ============================================
+# REQUESTS
+# ============================================
+def gradeable_questions(paths):
+    """
+    Questions GradingService.fetchQuestion accepts: Science/English short
+    answers. Worked solutions are graded by curriculum-grading's gradeAnswer,
+    not this endpoint. One copy per questionId.
+    """
+    questions, seen = [], set()
+    for path in paths:
+        for question in iter_questions(path):
+            qid = question.get('questionId')
+            stem, solution = question.get('stem'), question.get('solution')
+            if not qid or qid in seen or not isinstance(stem, str) or not isinstance(solution, str):
+                continue
+            if not stem.strip() or not solution.strip():
+                continue
+            kind = str(question.get('questionType') or question.get('type') or '').upper().replace('-', '_')
+            subject = str((question.get('curriculum') or {}).get('subject') or '').lower()
+            if kind != 'SHORT_ANSWER' or subject not in GRADED_SUBJECTS:
+                continue
+            seen.add(qid)
+            questions.append({'questionId': qid, 'type': kind, 'subject': subject,
+                              'topic': topic_slug(path), 'stem': stem, 'solution': solution})
+    return questions
+
+
+def _truncate(text, fraction=0.35):
+    words = text.split()
+    return ' '.join(words[:max(1, int(len(words) * fraction))])
+
+
+def build_requests(questions, count, mix, seed):
+    """`count` requests drawn from `questions`, answer kinds weighted by `mix`."""
+    rng = random.Random(seed)
+    by_topic = defaultdict(list)
+    for question in questions:
+        by_topic[question['topic']].append(question)
+    kinds, weights = zip(*mix.items())
+
+    requests = []
+    for n in range(count):
+        question = rng.choice(questions)
+        kind = rng.choices(kinds, weights)[0]
+        if kind == 'model':
+            answer = question['solution']
+        elif kind == 'truncated':
+            answer = _truncate(question['solution'])
+        else:
+            others = [q for q in by_topic[question['topic']] if q['questionId'] != question['questionId']]
+            answer = rng.choice(others or questions)['solution']
+        requests.append({'n': n, 'questionId': question['questionId'], 'kind': kind,
+                         'studentAnswer': answer[:MAX_ANSWER_CHARS]})
+    return requests
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in ANSWER_KINDS:
+            raise argparse.ArgumentTypeError(f"unknown answer kind {name.strip()!r} "
+                                             f"(expected {', '.join(ANSWER_KINDS)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+# ============================================
+# SEEDING
+# ============================================
+def grading_document(question):
+    """The fields GradingService.fetchQuestion and grade() read."""
+    return {
+        'questionId': question['questionId'],
+        'type': question['type'],
+        'stem_md': question['stem'],
+        'solution_md': question['solution'],
+        'tags': {'subjects': [question['subject']], 'topics': [question['topic']]},
+        'QCS': 1,
+    }
+
+
+def seed(questions, project, collection='questions'):
+    if not os.environ.get('FIRESTORE_EMULATOR_HOST'):
+        raise UploadError('FIRESTORE_EMULATOR_HOST is not set; seed only writes to the emulator')
+    target = FirestoreTarget(collection, project)
+    docs = [(q['questionId'], grading_document(q)) for q in questions]
+    for start in range(0, len(docs), SEED_BATCH_SIZE):
+        target.commit(docs[start:start + SEED_BATCH_SIZE])
+    return target.description, len(docs)
+
+
+# ============================================
+# STUB PROVIDER
+# ============================================
+class StubProvider:
+    """
+    Chat-completions stand-in. Latency is log-normal around `latency_ms`;
+    `failure_rate` answers 503 and `invalid_rate` returns JSON that fails
+    the GradeJSON schema. Grades are word overlap with the reference answer.
+    """
+
+    def __init__(self, latency_ms, latency_sigma, failure_rate, invalid_rate, seed):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.failure_rate = failure_rate
+        self.invalid_rate = invalid_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = Counter()
+
+    def count(self, key):
+        with self.lock:
+            self.calls[key] += 1
+
+    def draw(self):
+        with self.lock:
+            latency = self.latency_ms * self.rng.lognormvariate(0, self.latency_sigma) if self.latency_ms else 0
+            roll = self.rng.random()
+        if roll < self.failure_rate:
+            return latency, 'failure'
+        if roll < self.failure_rate + self.invalid_rate:
+            return latency, 'invalid'
+        return latency, 'ok'
+
+    @staticmethod
+    def grade(prompt):
+        reference = REFERENCE_BLOCK.search(prompt)
+        student = STUDENT_BLOCK.search(prompt)
+        ref_words = set(WORD.findall(reference.group(1).lower())) if reference else set()
+        student_words = set(WORD.findall(student.group(1).lower())) if student else set()
+        pct = round(len(ref_words & student_words) / len(ref_words), 2) if ref_words else 0.0
+        label = 'correct' if pct >= 0.85 else 'mostly-correct' if pct >= 0.7 \
+            else 'partial' if pct >= 0.4 else 'incorrect'
+        # Middling grades come back unsure, which is what drives escalation
+        confidence = 0.55 if 0.4 <= pct < 0.7 else 0.9
+        hit = ['f1'] if pct >= 0.4 else []
+        return {
+            'overall': {'pct': pct, 'label': label, 'confidence': confidence},
+            'inferred_key_facts': [{'id': 'f1', 'text': 'Matches the reference answer'}],
+            'concepts': {'hit': hit, 'partial': [], 'missing': [] if hit else ['f1']},
+            'misconceptions': [],
+            'contradictions': [],
+            'explanations': {'student_friendly': 'Stub feedback.', 'parent_friendly': 'Stub feedback.'},
+        }
+
+    def respond(self, body):
+        """(status, response body) for one chat-completions request."""
+        model = body.get('model', 'unknown')
+        prompt = ''.join(m.get('content') or '' for m in body.get('messages', []) if m.get('role') == 'user')
+        self.count(f"calls:{model}")
+        if REPAIR_MARKER in prompt:
+            self.count('repairs')
+        latency, outcome = self.draw()
+        time.sleep(latency / 1000)
+        self.count(outcome)
+        if outcome == 'failure':
+            return 503, {'error': {'message': 'stub provider overloaded', 'type': 'server_error'}}
+        content = self.grade(prompt)
+        if outcome == 'invalid':
+            del content['explanations']
+        return 200, {
+            'id': f"stub-{time.time_ns()}", 'object': 'chat.completion', 'created': int(time.time()),
+            'model': model,
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': json.dumps(content)}}],
+            'usage': {'prompt_tokens': len(prompt) // 4, 'completion_tokens': 200,
+                      'total_tokens': len(prompt) // 4 + 200},
+        }
+
+
+def serve_stub(provider, port):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                body = {}
+            status, payload = provider.respond(body) if self.path.endswith('/chat/completions') \
+                else (404, {'error': {'message': f"no stub for {self.path}"}})
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        # The default backlog of 5 drops connections under load and adds 1s SYN retries to the tail
+        request_queue_size = 256
+
+    server = Server(('127.0.0.1', port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ============================================
+# REPLAY
+# ============================================
+def emulator_token(uid, project):
+    """An unsigned ID token; the Auth emulator's verifyIdToken accepts these."""
+    def encode(part):
+        return base64.urlsafe_b64encode(json.dumps(part).encode()).rstrip(b'=').decode()
+    now = int(time.time())
+    claims = {'iss': f"https://securetoken.google.com/{project}", 'aud': project, 'auth_time': now,
+              'user_id': uid, 'sub': uid, 'iat': now, 'exp': now + 3600,
+              'firebase': {'identities': {}, 'sign_in_provider': 'custom'}}
+    return f"{encode({'alg': 'none', 'typ': 'JWT'})}.{encode(claims)}."
+
+
+def send(endpoint, request, run_id, project, timeout, max_latency_ms):
+    """POST one grading request. Returns a result record."""
+    # The endpoint allows 6 requests a minute per user, so each request is its own user
+    uid = f"loadtest-{run_id}-{request['n']}"
+    body = json.dumps({
+        'attemptId': uid,
+        'questionId': request['questionId'],
+        'studentAnswer': request['studentAnswer'],
+        'options': {'provider': 'deepseek', 'persistWeakRubric': False, 'escalation': 'auto',
+                    'maxLatencyMs': max_latency_ms},
+    }).encode('utf-8')
+    http_request = urllib.request.Request(endpoint, data=body, method='POST', headers={
+        'Content-Type': 'application/json', 'Authorization': f"Bearer {emulator_token(uid, project)}"})
+
+    started = time.perf_counter()
+    status, payload = 0, {}
+    try:
+        with urllib.request.urlopen(http_request, timeout=timeout) as response:
+            status, payload = response.status, json.loads(response.read() or b'{}')
+    except urllib.error.HTTPError as e:
+        status = e.code
+        try:
+            payload = json.loads(e.read() or b'{}')
+        except ValueError:
+            payload = {}
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        payload = {'error': {'code': type(e).__name__, 'message': str(e)}}
+    latency = time.perf_counter() - started
+
+    grading = payload.get('grading_v0') or {}
+    return {
+        'n': request['n'], 'questionId': request['questionId'], 'kind': request['kind'],
+        'status': status, 'latency': latency,
+        'engine': grading.get('engine'), 'stage': (grading.get('cascade') or {}).get('stage'),
+        'pct': (grading.get('overall') or {}).get('pct'),
+        'error': (payload.get('error') or {}).get('code') if status != 200 else None,
+    }
+
+
+def replay(endpoint, requests, concurrency, rate=None, duration=None, project=DEFAULT_PROJECT,
+           timeout=30.0, max_latency_ms=4000):
+    """
+    Closed loop at `concurrency`, or open loop at `rate` requests/sec (still
+    capped at `concurrency` in flight). With `duration`, the requests are
+    replayed in a cycle until time is up.
+    """
+    run_id = time.strftime('%H%M%S')
+    results = []
+    lock = threading.Lock()
+    started = time.perf_counter()
+    deadline = started + duration if duration else None
+
+    def worker(request):
+        result = send(endpoint, request, run_id, project, timeout, max_latency_ms)
+        with lock:
+            results.append(result)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        in_flight = threading.BoundedSemaphore(concurrency)
+        stream = itertools.cycle(requests) if duration else requests
+        for i, request in enumerate(stream):
+            if deadline and time.perf_counter() >= deadline:
+                break
+            request = dict(request, n=i)
+            if rate:
+                delay = started + i / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            in_flight.acquire()
+            pool.submit(worker, request).add_done_callback(lambda _: in_flight.release())
+    return results, time.perf_counter() - started
+
+
+# ============================================
+# REPORT
+# ============================================
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * q
+    low, high = math.floor(rank), math.ceil(rank)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def summarize(results, elapsed, stub_calls):
+    ok = [r for r in results if r['status'] == 200]
+    latencies = sorted(r['latency'] for r in ok)
+    engines = Counter(r['engine'] for r in ok)
+    stages = Counter(r['stage'] for r in ok)
+    chat_calls = sum(v for k, v in stub_calls.items() if k.startswith('calls:') and k.endswith('-chat'))
+    provider_calls = sum(v for k, v in stub_calls.items() if k.startswith('calls:'))
+    by_kind = {}
+    for kind in ANSWER_KINDS:
+        scored = [r['pct'] for r in ok if r['kind'] == kind and r['pct'] is not None]
+        if scored:
+            by_kind[kind] = {'requests': len(scored), 'meanPct': round(sum(scored) / len(scored), 3)}
+
+    def rate(n, d):
+        return round(n / d, 4) if d else 0.0
+
+    return {
+        'requests': len(results),
+        'succeeded': len(ok),
+        'elapsedSeconds': round(elapsed, 3),
+        'requestsPerSecond': round(len(results) / elapsed, 2) if elapsed else 0.0,
+        'latencyMs': {name: round(percentile(latencies, q) * 1000, 1)
+                      for name, q in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99), ('max', 1.0))},
+        'errors': dict(Counter(f"{r['status']} {r['error']}" for r in results if r['status'] != 200)),
+        'engines': dict(engines),
+        'heuristicHitRate': rate(stages.get('A', 0), len(ok)),
+        'escalationRate': rate(stages.get('C', 0), len(ok)),
+        'repairRetryRate': rate(stub_calls.get('repairs', 0), chat_calls),
+        'providerCallsPerRequest': rate(provider_calls, len(ok)),
+        'stub': dict(stub_calls),
+        'byAnswerKind': by_kind,
+    }
+
+
+def print_summary(summary, settings):
+    print('\n' + '═' * 60)
+    print('  📈 GRADING LOAD TEST')
+    print('═' * 60)
+    print(f"  Concurrency:  {settings['concurrency']}" + (f"   Rate: {settings['rate']}/s" if settings['rate'] else ''))
+    print(f"  Stub:         {settings['latency_ms']}ms median, σ={settings['latency_sigma']}, "
+          f"{settings['failure_rate']:.0%} failures, {settings['invalid_rate']:.0%} invalid JSON")
+    print('━' * 60)
+    print(f"  Requests:     {summary['requests']} ({summary['succeeded']} ok) in {summary['elapsedSeconds']}s")
+    print(f"  Throughput:   {summary['requestsPerSecond']} requests/sec")
+    lat = summary['latencyMs']
+    print(f"  Latency:      p50 {lat['p50']}ms   p95 {lat['p95']}ms   p99 {lat['p99']}ms   max {lat['max']}ms")
+    print(f"  Heuristic:    {summary['heuristicHitRate']:.1%} of graded requests")
+    print(f"  Escalated:    {summary['escalationRate']:.1%}")
+    print(f"  Repairs:      {summary['repairRetryRate']:.1%} of chat calls were repair retries")
+    print(f"  Provider:     {summary['providerCallsPerRequest']} calls per graded request")
+    for kind, stats in summary['byAnswerKind'].items():
+        print(f"   • {kind:10s} mean score {stats['meanPct']:.2f} over {stats['requests']} requests")
+    for error, count in sorted(summary['errors'].items(), key=lambda kv: -kv[1]):
+        print(f"  ❌ {error}: {count}")
+    print('═' * 60 + '\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay corpus answers against the grade endpoint.')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    seed_parser = sub.add_parser('seed', help='write gradeable questions into the Firestore emulator')
+    seed_parser.add_argument('--project', default=DEFAULT_PROJECT)
+
+    run = sub.add_parser('run', help='start the stub provider and replay requests')
+    run.add_argument('--endpoint', default=DEFAULT_ENDPOINT)
+    run.add_argument('--project', default=DEFAULT_PROJECT, help='project id the emulator tokens are minted for')
+    run.add_argument('--requests', type=int, default=500, help='requests to build (default: 500)')
+    run.add_argument('--duration', type=float, help='stop after this many seconds')
+    run.add_argument('--concurrency', type=int, default=16)
+    run.add_argument('--rate', type=float, help='open-loop arrival rate in requests/sec')
+    run.add_argument('--mix', type=parse_mix, default=parse_mix('model=2,truncated=1,distractor=1'),
+                     help='answer kind weights (default: model=2,truncated=1,distractor=1)')
+    run.add_argument('--seed', type=int, default=0, help='random seed for requests and the stub')
+    run.add_argument('--stub-port', type=int, default=DEFAULT_STUB_PORT,
+                     help='port the emulator\'s DEEPSEEK_BASE_URL points at (default: 8787)')
+    run.add_argument('--latency-ms', type=float, default=800, help='median stub latency (default: 800)')
+    run.add_argument('--latency-sigma', type=float, default=0.4, help='log-normal spread of stub latency')
+    run.add_argument('--failure-rate', type=float, default=0.0, help='fraction of provider calls answered 503')
+    run.add_argument('--invalid-rate', type=float, default=0.0, help='fraction returning schema-invalid JSON')
+    run.add_argument('--max-latency-ms', type=int, default=4000, help='options.maxLatencyMs sent per request')
+    run.add_argument('--report', help='write the summary and every result to this JSON file')
+    run.add_argument('--dry-run', action='store_true', help='print the request mix and exit')
+    args = parser.parse_args(argv)
+
+    questions = gradeable_questions(discover_question_files())
+    if not questions:
+        print('❌ No gradeable questions in the corpus', file=sys.stderr)
+        return 1
+
+    if args.command == 'seed':
+        try:
+            description, count = seed(questions, args.project)
+        except UploadError as e:
+            print(f"❌ Error: {e}", file=sys.stderr)
+            return 1
+        print(f"✓ Seeded {count} gradeable questions into {description}")
+        return 0
+
+    requests = build_requests(questions, args.requests, args.mix, args.seed)
+    if args.dry_run:
+        types = Counter(q['type'] for q in questions)
+        print(f"  Gradeable questions: {len(questions)} ({', '.join(f'{t} {n}' for t, n in types.items())})")
+        print(f"  Requests:            {len(requests)}")
+        for kind, n in Counter(r['kind'] for r in requests).most_common():
+            print(f"   • {kind}: {n}")
+        return 0
+
+    provider = StubProvider(args.latency_ms, args.latency_sigma, args.failure_rate, args.invalid_rate, args.seed)
+    try:
+        server = serve_stub(provider, args.stub_port)
+    except OSError as e:
+        print(f"❌ Cannot start stub provider on port {args.stub_port}: {e}", file=sys.stderr)
+        return 1
+    try:
+        results, elapsed = replay(args.endpoint, requests, args.concurrency, rate=args.rate,
+                                  duration=args.duration, project=args.project,
+                                  max_latency_ms=args.max_latency_ms)
+    finally:
+        server.shutdown()
+
+    summary = summarize(results, elapsed, provider.calls)
+    print_summary(summary, vars(args))
+    if args.report:
+        with atomic_write(args.report) as f:
+            json.dump({'settings': {k: v for k, v in vars(args).items() if k not in ('command', 'mix')}
+                       | {'mix': args.mix},
+                       'summary': summary, 'results': sorted(results, key=lambda r: r['n'])}, f, indent=2)
+        print(f"📄 Report saved to: {args.report}\n")
+    if not summary['succeeded']:
+        print(f"❌ No request succeeded - is the emulator running at {args.endpoint}?", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
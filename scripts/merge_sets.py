@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Merge per-set question files into a topic's complete file.
+
+Sources are streamed one question at a time, so the merged corpus never sits
+in memory. A manifest in .cache/ records the content hash of every source and
+where its questions landed in the output; on the next run unchanged sets are
+copied straight across as bytes and only edited sets are re-read.
+
+A topic may also carry a transform: fields to overwrite on every question,
+rendered from its position in the merged file (see apply_transform). Blocks
+are only reused when the transform and the block's position are unchanged.
+
+Usage:
+  python3 merge_sets.py --topic linear-equations
+  python3 merge_sets.py --output year8-energy-questions.json \\
+      energy-set1-q01-q10.json energy-set2-q11-q20.json ...
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+from pipeline_trace import Tracer
+from question_files import (
+    CACHE_DIR, QUESTIONS_DIR, SCRIPTS_DIR, QuestionStream, atomic_write, dump_question,
+    dump_value, file_sha256, read_header, relpath,
+)
+
+MANIFEST_PATH = os.path.join(CACHE_DIR, 'merge-manifest.json')
+MANIFEST_VERSION = 1
+
+# Keys that describe a single set rather than the whole topic.
+SET_METADATA_KEYS = {'setNumber', 'phase', 'focus', 'title', 'questionRange', 'description'}
+
+BLOCK_SEPARATOR = ',\n    '
+
+# A template that is exactly one field, e.g. "{n}", renders to the field's value.
+SINGLE_FIELD = re.compile(r'^\{(\w+)\}$')
+
+
+class MergeError(Exception):
+    pass
+
+
+def topic_source_pattern(slug):
+    # energy-set1-q01-q10.json, cells-y8-phase2-q21-q40.json,
+    # year8-rocks-minerals-phase1-q1-q20.json, ratios-rates-set7.json
+    return re.compile(
+        rf'^(?:year8-)?{re.escape(slug)}(?:-y8|-year8)?-(?:set|phase)(\d+)(?:-.*)?\.json$'
+    )
+
+
+def discover_topic_sources(slug):
+    """Set/phase files for a topic, ordered by set or phase number."""
+    pattern = topic_source_pattern(slug)
+    found = []
+    for directory in (SCRIPTS_DIR, QUESTIONS_DIR):
+        for path in glob.glob(os.path.join(directory, '*.json')):
+            match = pattern.match(os.path.basename(path))
+            if match:
+                found.append((int(match.group(1)), path))
+    return [path for _, path in sorted(found)]
+
+
+def load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return {'version': MANIFEST_VERSION, 'outputs': {}}
+    with open(MANIFEST_PATH, 'r') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {'version': MANIFEST_VERSION, 'outputs': {}}
+    return manifest
+
+
+def save_manifest(manifest):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with atomic_write(MANIFEST_PATH) as f:
+        json.dump(manifest, f, indent=2)
+
+
+def topic_metadata(output_path, sources):
+    """Keep the existing complete file's metadata, else derive it from the first set."""
+    if os.path.exists(output_path):
+        metadata = read_header(output_path).get('metadata')
+        if isinstance(metadata, dict):
+            return dict(metadata)
+    for source in sources:
+        header = read_header(source)
+        metadata = header.get('metadata') or header.get('setInfo')
+        if isinstance(metadata, dict):
+            return {k: v for k, v in metadata.items() if k not in SET_METADATA_KEYS}
+    return {}
+
+
+def transform_digest(transform):
+    if not transform:
+        return None
+    return hashlib.sha256(json.dumps(transform, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _render(template, fields):
+    if isinstance(template, str):
+        match = SINGLE_FIELD.match(template)
+        if match and match.group(1) in fields:
+            return fields[match.group(1)]
+        return template.format(**fields)
+    if isinstance(template, dict):
+        return {k: _render(v, fields) for k, v in template.items()}
+    if isinstance(template, list):
+        return [_render(v, fields) for v in template]
+    return template
+
+
+def apply_transform(question, transform, position):
+    """
+    Overwrite the fields in transform['set'] on one question. Keys are dotted
+    paths ("learningArc.phasePosition"); string values are format templates
+    over the question's 1-based position in the merged file:
+
+      {n}            position            "ecm-y8-{n:03d}" -> "ecm-y8-007"
+      {set}          set number          "year8-states-of-matter-set{set}"
+      {setPosition}  position in its set
+
+    Sets are transform['setSize'] questions long (default 10). An existing
+    key keeps its place in the question; a new one is appended.
+    """
+    size = transform.get('setSize', 10)
+    fields = {'n': position, 'set': (position - 1) // size + 1, 'setPosition': (position - 1) % size + 1}
+    for path, template in transform.get('set', {}).items():
+        *parents, leaf = path.split('.')
+        node = question
+        for key in parents:
+            if not isinstance(node.get(key), dict):
+                node[key] = {}
+            node = node[key]
+        node[leaf] = _render(template, fields)
+    return question
+
+
+def _claim(qid, key, seen_ids, duplicates, unidentified):
+    """Record one questionId; questions without one are counted, not treated as duplicates."""
+    if qid is None:
+        unidentified[key] = unidentified.get(key, 0) + 1
+        return
+    if qid in seen_ids:
+        duplicates.append((qid, key))
+    seen_ids.add(qid)
+
+
+def _serialise_source(path, seen_ids, duplicates, unidentified, transform=None, start=0):
+    """Stream one set file whose first question lands at index `start`. Returns (block_text, question_ids)."""
+    parts = []
+    ids = []
+    key = relpath(path)
+    for record in QuestionStream(path):
+        if transform:
+            apply_transform(record.question, transform, start + len(ids) + 1)
+        qid = record.question.get('questionId')
+        _claim(qid, key, seen_ids, duplicates, unidentified)
+        ids.append(qid)
+        parts.append(dump_question(record.question))
+    return BLOCK_SEPARATOR.join(parts), ids
+
+
+def merge(output_path, sources, force=False, verbose=True, manifest=None, transform=None):
+    """
+    Merge `sources` into `output_path`. Returns a summary dict with the
+    question count and which sources were rebuilt or reused. `transform` is
+    applied to every question (see apply_transform).
+
+    By default the shared manifest is loaded and saved here. Callers that run
+    merges in parallel pass their own `manifest` dict instead; it is updated
+    in place and saving it is left to them.
+    """
+    output_path = os.path.abspath(output_path)
+    sources = [os.path.abspath(s) for s in sources if os.path.abspath(s) != output_path]
+    if not sources:
+        raise MergeError('no source set files to merge')
+    missing = [s for s in sources if not os.path.exists(s)]
+    if missing:
+        raise MergeError(f"missing source files: {', '.join(relpath(m) for m in missing)}")
+
+    owns_manifest = manifest is None
+    if owns_manifest:
+        manifest = load_manifest()
+    output_key = relpath(output_path)
+    previous = manifest['outputs'].get(output_key)
+
+    # Byte spans from the last merge are only trustworthy if the output file
+    # is exactly what we wrote, with the same transform; an adopted target
+    # has no spans at all. A transformed block must also start at the same
+    # position, since its fields depend on it.
+    reusable = {}
+    transform_sha = transform_digest(transform)
+    if previous and not force and os.path.exists(output_path) \
+            and file_sha256(output_path) == previous['sha256'] \
+            and previous.get('transform') == transform_sha and not previous.get('adopted'):
+        start = 0
+        for entry in previous['sources']:
+            reusable[entry['path']] = dict(entry, start=start)
+            start += len(entry['questionIds'])
+
+    metadata = topic_metadata(output_path, sources)
+    seen_ids = set()
+    duplicates = []
+    unidentified = {}
+    entries = []
+    rebuilt = []
+    reused = []
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with tempfile.TemporaryFile(mode='w+b', dir=os.path.dirname(output_path)) as body, \
+            (open(output_path, 'rb') if reusable else open(os.devnull, 'rb')) as old_output:
+        for source in sources:
+            key = relpath(source)
+            digest = file_sha256(source)
+            cached = reusable.get(key)
+            start = sum(len(e['questionIds']) for e in entries)
+            if cached and cached['sha256'] == digest and (not transform or cached['start'] == start):
+                old_output.seek(cached['offset'])
+                block = old_output.read(cached['length'])
+                ids = cached['questionIds']
+                for qid in ids:
+                    _claim(qid, key, seen_ids, duplicates, unidentified)
+                reused.append(key)
+            else:
+                text, ids = _serialise_source(source, seen_ids, duplicates, unidentified, transform, start)
+                block = text.encode('utf-8')
+                rebuilt.append(key)
+            if not ids:
+                continue
+            if body.tell():
+                body.write(BLOCK_SEPARATOR.encode('utf-8'))
+            entries.append({
+                'path': key,
+                'sha256': digest,
+                'offset': body.tell(),
+                'length': len(block),
+                'questionIds': ids,
+            })
+            body.write(block)
+
+        if duplicates:
+            details = ', '.join(f"{qid} ({path})" for qid, path in duplicates[:10])
+            more = f" (+{len(duplicates) - 10} more)" if len(duplicates) > 10 else ''
+            raise MergeError(f"duplicate questionIds: {details}{more}")
+
+        total = sum(len(e['questionIds']) for e in entries)
+        metadata['questionCount'] = total
+        if 'setCount' in metadata or not os.path.exists(output_path):
+            metadata['setCount'] = len(entries)
+
+        if unidentified and verbose:
+            details = ', '.join(f"{path} ({n})" for path, n in unidentified.items())
+            print(f"⚠️  {sum(unidentified.values())} questions have no questionId: {details}")
+
+        unchanged = [e['path'] for e in entries] == [e['path'] for e in previous['sources']] \
+            and previous.get('transform') == transform_sha if previous else False
+        if unchanged and not rebuilt and reusable:
+            if verbose:
+                print(f"✓ {output_key} is up to date ({total} questions, {len(reused)} sets)")
+            return {'output': output_key, 'questionCount': total, 'rebuilt': [], 'reused': reused,
+                    'unidentified': unidentified}
+
+        head = ('{\n  "metadata": ' + dump_value(metadata, 1) + ',\n  "questions": [').encode('utf-8')
+        head += b'\n    ' if total else b''
+        tail = b'\n  ]\n}' if total else b']\n}'
+
+        with atomic_write(output_path, 'wb') as out:
+            out.write(head)
+            body.seek(0)
+            shutil.copyfileobj(body, out)
+            out.write(tail)
+
+    for entry in entries:
+        entry['offset'] += len(head)
+    manifest['outputs'][output_key] = {
+        'sha256': file_sha256(output_path),
+        'questionCount': total,
+        'sources': entries,
+    }
+    if transform_sha:
+        manifest['outputs'][output_key]['transform'] = transform_sha
+    if owns_manifest:
+        save_manifest(manifest)
+
+    if verbose:
+        print(f"✓ Wrote {output_key}: {total} questions from {len(entries)} sets")
+        print(f"  Rebuilt: {len(rebuilt)}  Reused: {len(reused)}")
+        for key in rebuilt:
+            print(f"    ↻ {key}")
+    return {'output': output_key, 'questionCount': total, 'rebuilt': rebuilt, 'reused': reused,
+            'unidentified': unidentified}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Merge set files into a complete topic file.')
+    parser.add_argument('sources', nargs='*', help='set files in merge order')
+    parser.add_argument('--topic', help='discover <topic>-setN / <topic>-phaseN files')
+    parser.add_argument('--output', help='complete file to write '
+                                         '(default: questions/<topic>-year8-complete.json)')
+    parser.add_argument('--force', action='store_true', help='ignore the manifest and rebuild every set')
+    parser.add_argument('--trace', action='store_true', help='record stage timings under .cache/traces')
+    args = parser.parse_args(argv)
+    tracer = Tracer('merge_sets', enabled=args.trace)
+
+    sources = list(args.sources)
+    if args.topic and not sources:
+        sources = discover_topic_sources(args.topic)
+    output = args.output
+    if not output and args.topic:
+        output = os.path.join(QUESTIONS_DIR, f"{args.topic}-year8-complete.json")
+    if not output:
+        parser.error('--output is required when --topic is not given')
+
+    try:
+        with tracer.stage('merge', output=relpath(output), sets=len(sources)) as stage:
+            summary = merge(output, sources, force=args.force)
+            stage.processed = summary['questionCount']
+            stage.attrs.update(rebuilt=len(summary['rebuilt']), reused=len(summary['reused']))
+    except MergeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        stage.failed = 1
+        return 1
+    finally:
+        tracer.finish()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Rewrite question files into the canonical question schema.
+
+Canonical form (what the newer sets already use):
+  * questionType is one of MCQ, SHORT_ANSWER, EXTENDED_RESPONSE, WORKED_SOLUTION
+  * MCQs carry mcqOptions: [{id: "A".., text, isCorrect, feedback?}] with
+    letter ids in display order; options/correctAnswer are removed
+  * hints are [{level, content, revealsCriticalInfo}]
+  * curriculum.codes is a list
+
+Files are streamed and only the questions that change are re-serialised, so
+headers, reading passages and untouched questions keep their bytes. Every
+transformation is reported. Files are processed in parallel.
+
+Usage:
+  python3 normalize_questions.py                   # report only
+  python3 normalize_questions.py --write           # rewrite in place
+  python3 normalize_questions.py --output-dir /tmp/normalized --report changes.json
+"""
+
+import argparse
+import json
+import os
+import re
+import string
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from pipeline_trace import Tracer
+from question_files import (
+    QuestionFileError, atomic_write, discover_question_files, iter_questions, relpath,
+    rewrite_questions,
+)
+
+CANONICAL_TYPES = ('MCQ', 'SHORT_ANSWER', 'EXTENDED_RESPONSE', 'WORKED_SOLUTION')
+TYPE_ALIASES = {
+    'multiple-choice': 'MCQ',
+    'multiple_choice': 'MCQ',
+    'mcq': 'MCQ',
+    'short-answer': 'SHORT_ANSWER',
+    'explanation': 'EXTENDED_RESPONSE',
+    'extended-response': 'EXTENDED_RESPONSE',
+    'worked-solution': 'WORKED_SOLUTION',
+}
+OPTION_IDS = string.ascii_uppercase
+
+# "A) Ice melting" lines in stems that predate options arrays.
+STEM_OPTION = re.compile(r'^\s*([A-E])[).]\s+(.+?)\s*$', re.MULTILINE)
+ANSWER_LETTER = re.compile(r'Answer:?\**\s*\**\s*([A-E])\b')
+
+
+def _canonical_type(value):
+    if value in CANONICAL_TYPES:
+        return value
+    if value in TYPE_ALIASES:
+        return TYPE_ALIASES[value]
+    candidate = str(value).upper().replace('-', '_')
+    return candidate if candidate in CANONICAL_TYPES else value
+
+
+def _options_from_stem(question):
+    """Recover options written into the stem. Returns (texts, correct_index) or None."""
+    stem = question.get('stem') or ''
+    matches = STEM_OPTION.findall(stem)
+    letters = [letter for letter, _ in matches]
+    if len(matches) < 2 or letters != list(OPTION_IDS[:len(matches)]):
+        return None
+    answer = ANSWER_LETTER.search(question.get('solution') or '')
+    if not answer or answer.group(1) not in letters:
+        return None
+    return [text for _, text in matches], letters.index(answer.group(1))
+
+
+def _mcq_options(texts, correct_index):
+    return [{'id': OPTION_IDS[i], 'text': text, 'isCorrect': i == correct_index}
+            for i, text in enumerate(texts)]
+
+
+def _normalise_option_ids(question, changes):
+    options = question['mcqOptions']
+    ids = [o.get('id') for o in options]
+    expected = list(OPTION_IDS[:len(options)])
+    if ids == expected:
+        return
+    mapping = {old: new for old, new in zip(ids, expected) if old is not None}
+    question['mcqOptions'] = [dict(o, id=new) for o, new in zip(options, expected)]
+    selective = question.get('nswSelective')
+    if isinstance(selective, dict) and isinstance(selective.get('distractorTypes'), dict):
+        question['nswSelective'] = dict(selective, distractorTypes={
+            mapping.get(k, k): v for k, v in selective['distractorTypes'].items()})
+    changes.append('option-ids')
+
+
+def _normalise_hints(hints, changes):
+    normalised = []
+    changed = False
+    for i, hint in enumerate(hints):
+        if isinstance(hint, str):
+            hint = {'level': i + 1, 'content': hint}
+            changed = True
+        elif isinstance(hint, dict):
+            if 'content' not in hint and ('hintText' in hint or 'text' in hint):
+                hint = {
+                    'level': hint.get('level', hint.get('hintLevel', i + 1)),
+                    'content': hint.get('hintText', hint.get('text')),
+                    **{k: v for k, v in hint.items()
+                       if k not in ('hintId', 'hintLevel', 'hintText', 'level', 'text')},
+                }
+                changed = True
+            if 'revealsCriticalInfo' not in hint:
+                hint = dict(hint, revealsCriticalInfo=False)
+                changed = True
+        normalised.append(hint)
+    if changed:
+        changes.append('hints')
+    return normalised
+
+
+def normalise_question(question):
+    """Return (canonical_question, [change kinds]); the input is not modified."""
+    changes = []
+    out = {}
+    question_type = _canonical_type(question.get('questionType'))
+    if question_type != question.get('questionType'):
+        changes.append(f"type:{question.get('questionType')}->{question_type}")
+
+    legacy_options = question.get('options')
+    has_legacy_options = isinstance(legacy_options, list) and bool(legacy_options)
+    correct = question.get('correctAnswer')
+    convert_legacy = (question_type == 'MCQ' and has_legacy_options and not question.get('mcqOptions')
+                      and isinstance(correct, int) and 0 <= correct < len(legacy_options))
+    if question_type == 'MCQ' and has_legacy_options and not convert_legacy and not question.get('mcqOptions'):
+        changes.append('unresolved:correctAnswer')
+
+    stem_options = None
+    if question_type == 'MCQ' and not question.get('mcqOptions') and not has_legacy_options:
+        stem_options = _options_from_stem(question)
+        if stem_options is None:
+            changes.append('unresolved:mcq-without-options')
+
+    for key, value in question.items():
+        if key == 'questionType':
+            out[key] = question_type
+        elif key == 'options':
+            if convert_legacy:
+                out['mcqOptions'] = _mcq_options(value, correct)
+                changes.append('options->mcqOptions')
+            elif value == []:
+                changes.append('drop-empty-options')
+            else:
+                out[key] = value
+        elif key == 'correctAnswer':
+            if convert_legacy:
+                continue
+            if value is None and not has_legacy_options:
+                changes.append('drop-null-correctAnswer')
+                continue
+            out[key] = value
+        elif key == 'hints' and isinstance(value, list):
+            out[key] = _normalise_hints(value, changes)
+        elif key == 'curriculum' and isinstance(value, dict) and isinstance(value.get('codes'), str):
+            out[key] = dict(value, codes=[value['codes']])
+            changes.append('curriculum-codes')
+        else:
+            out[key] = value
+        if key == 'stem' and stem_options:
+            out['mcqOptions'] = _mcq_options(*stem_options)
+            changes.append('stem-options->mcqOptions')
+
+    if isinstance(out.get('mcqOptions'), list) and out['mcqOptions']:
+        _normalise_option_ids(out, changes)
+    return out, changes
+
+
+class _Collector:
+    """transform() callback for rewrite_questions that records changes."""
+
+    def __init__(self, path):
+        self.path = relpath(path)
+        self.entries = []
+
+    def __call__(self, question):
+        normalised, changes = normalise_question(question)
+        if not changes:
+            return None
+        self.entries.append({'file': self.path, 'questionId': question.get('questionId'), 'changes': changes})
+        return normalised if normalised != question else None
+
+
+def normalise_file(job):
+    """Worker: (path, output_path) -> report entries for that file.
+
+    output_path is the file to write, the input path for in-place rewrites,
+    or None to only report.
+    """
+    path, output_path = job
+    collector = _Collector(path)
+    try:
+        if output_path is None:
+            for question in iter_questions(path):
+                collector(question)
+        else:
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            rewrite_questions(path, collector, output_path)
+    except QuestionFileError as e:
+        return {'file': collector.path, 'error': str(e), 'entries': []}
+    return {'file': collector.path, 'error': None, 'entries': collector.entries}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Normalise question files to the canonical schema.')
+    parser.add_argument('files', nargs='*', help='question files (default: whole corpus)')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--write', action='store_true', help='rewrite files in place')
+    mode.add_argument('--output-dir', help='write normalised copies under this directory')
+    parser.add_argument('--report', help='write every transformation to this JSON file')
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--trace', action='store_true', help='record stage timings under .cache/traces')
+    args = parser.parse_args(argv)
+    tracer = Tracer('normalize_questions', enabled=args.trace)
+
+    paths = [os.path.abspath(f) for f in args.files] or discover_question_files()
+    if args.write:
+        jobs = [(p, p) for p in paths]
+    elif args.output_dir:
+        jobs = [(p, os.path.join(os.path.abspath(args.output_dir), relpath(p))) for p in paths]
+    else:
+        jobs = [(p, None) for p in paths]
+
+    with tracer.stage('normalise', files=len(jobs)) as stage, \
+            ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        results = list(pool.map(normalise_file, jobs, chunksize=max(1, len(jobs) // 64)))
+        stage.bytes_read += sum(os.path.getsize(p) for p in paths)
+
+    entries = [e for r in results for e in r['entries']]
+    kinds = Counter(change for e in entries for change in e['changes'])
+    errors = [r for r in results if r['error']]
+    stage.processed = len(entries)
+    stage.failed = len(errors)
+    touched = sum(1 for r in results if r['entries'])
+
+    print('\n' + '═' * 60)
+    print('  🔧 QUESTION SCHEMA NORMALISER')
+    print('═' * 60)
+    print(f"  Files scanned:      {len(paths)}")
+    print(f"  Files with changes: {touched}")
+    print(f"  Questions changed:  {len(entries)}")
+    if kinds:
+        print('\n  Transformations:')
+        for kind, count in kinds.most_common():
+            marker = '⚠️ ' if kind.startswith('unresolved') else '  '
+            print(f"   {marker}{kind}: {count}")
+    for r in errors:
+        print(f"  ❌ {r['error']}")
+    if not args.write and not args.output_dir:
+        print('\n  (report only - use --write or --output-dir to apply)')
+    print('═' * 60 + '\n')
+
+    if args.report:
+        with tracer.stage('write-report'), atomic_write(args.report) as f:
+            json.dump({'summary': dict(kinds), 'changes': entries}, f, indent=2, ensure_ascii=False)
+        print(f"📄 Report saved to: {args.report}\n")
+    tracer.finish()
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Stage tracing and metrics for the content pipeline scripts.
+
+A script opens a Tracer and wraps each stage of its work:
+
+  tracer = Tracer('validate_questions', enabled=args.trace)
+  with tracer.stage('validate', files=len(paths)) as stage:
+      ...
+      stage.processed += len(questions)
+  tracer.finish()
+
+Every stage records wall time, CPU time (this process plus any worker
+processes reaped during the stage), bytes read and written, and how many
+questions it processed, skipped or failed. Stages nest; work done inside a
+worker process is measured there with worker_timing() and added afterwards
+with tracer.record(name, **timing).
+
+Tracing is off unless the script gets --trace or PIPELINE_TRACE=1 is set, in
+which case finish() prints a summary table and writes:
+
+  .cache/traces/<script>.jsonl               one line per stage, every run appended
+  .cache/traces/<script>-<run>.trace.json    Chrome trace (chrome://tracing, Perfetto)
+
+The history file is what answers "which stage got slower when energy went
+from 50 to 120 questions":
+
+  python3 pipeline_trace.py show validate_questions      # latest run
+  python3 pipeline_trace.py compare validate_questions   # latest vs the run before
+
+Bytes come from /proc/self/io (rchar/wchar) where the kernel provides it;
+elsewhere, and for reads done in worker processes, stages count what the
+caller adds to stage.bytes_read / stage.bytes_written.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+from question_files import CACHE_DIR
+
+TRACE_DIR = os.path.join(CACHE_DIR, 'traces')
+TRACE_ENV = 'PIPELINE_TRACE'
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _io_counters():
+    """(bytes read, bytes written) by this process so far, or None."""
+    try:
+        with open('/proc/self/io', 'r') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line)
+        return int(fields['rchar']), int(fields['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _children_cpu():
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+@contextlib.contextmanager
+def worker_timing():
+    """
+    Measure a block in a worker process. The yielded dict is filled in on
+    exit and is picklable, so the worker can return it for Tracer.record().
+    """
+    timing = {'pid': os.getpid()}
+    io_before = _io_counters()
+    cpu_before = time.process_time()
+    timing['started'] = time.perf_counter()
+    try:
+        yield timing
+    finally:
+        timing['ended'] = time.perf_counter()
+        timing['cpu'] = time.process_time() - cpu_before
+        io_after = _io_counters()
+        if io_before and io_after:
+            timing['bytes_read'] = io_after[0] - io_before[0]
+            timing['bytes_written'] = io_after[1] - io_before[1]
+
+
+class Stage:
+    """Counters for one stage; callers bump processed/skipped/failed and bytes."""
+
+    def __init__(self, name, parent=None, depth=0, attrs=None):
+        self.name = name
+        self.parent = parent
+        self.depth = depth
+        self.attrs = dict(attrs or {})
+        self.processed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.start = 0.0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.pid = os.getpid()
+
+    def as_dict(self, run, script):
+        return {
+            'run': run, 'script': script, 'stage': self.name, 'parent': self.parent, 'depth': self.depth,
+            'start': round(self.start, 6), 'wall': round(self.wall, 6), 'cpu': round(self.cpu, 6),
+            'bytesRead': self.bytes_read, 'bytesWritten': self.bytes_written,
+            'processed': self.processed, 'skipped': self.skipped, 'failed': self.failed,
+            'pid': self.pid, 'attrs': self.attrs,
+        }
+
+
+class Tracer:
+    """Collects stages for one script run. Disabled tracers still hand out Stage objects."""
+
+    def __init__(self, script, enabled=None):
+        self.script = script
+        self.enabled = bool(enabled) or os.environ.get(TRACE_ENV, '') not in ('', '0')
+        self.run = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+        self.stages = []
+        self._stack = []
+        self._origin = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name, **attrs):
+        parent = self._stack[-1] if self._stack else None
+        stage = Stage(name, parent.name if parent else None, len(self._stack), attrs)
+        if not self.enabled:
+            yield stage
+            return
+
+        io_before = _io_counters()
+        cpu_before = time.process_time() + _children_cpu()
+        started = time.perf_counter()
+        self._stack.append(stage)
+        try:
+            yield stage
+        finally:
+            self._stack.pop()
+            stage.start = started - self._origin
+            stage.wall = time.perf_counter() - started
+            stage.cpu = time.process_time() + _children_cpu() - cpu_before
+            io_after = _io_counters()
+            if io_before and io_after:
+                stage.bytes_read += io_after[0] - io_before[0]
+                stage.bytes_written += io_after[1] - io_before[1]
+            self.stages.append(stage)
+
+    def record(self, name, started, ended, cpu=0.0, pid=None, **counters):
+        """
+        Add a stage timed elsewhere, usually a worker_timing() dict from a
+        worker process. `started` and `ended` are time.perf_counter()
+        readings, which share a clock across processes on the same machine.
+        """
+        if not self.enabled:
+            return None
+        parent = self._stack[-1] if self._stack else None
+        stage = Stage(name, parent.name if parent else None, len(self._stack), counters.pop('attrs', None))
+        stage.start = started - self._origin
+        stage.wall = ended - started
+        stage.cpu = cpu
+        stage.pid = pid or stage.pid
+        for key, value in counters.items():
+            setattr(stage, key, value)
+        self.stages.append(stage)
+        return stage
+
+    def records(self):
+        return [stage.as_dict(self.run, self.script) for stage in sorted(self.stages, key=lambda s: s.start)]
+
+    def chrome_trace(self):
+        """Complete ("X") events, one per stage, in microseconds."""
+        events = [{
+            'name': r['stage'], 'cat': self.script, 'ph': 'X', 'pid': os.getpid(), 'tid': r['pid'],
+            'ts': round(r['start'] * 1e6), 'dur': round(r['wall'] * 1e6),
+            'args': {k: r[k] for k in ('cpu', 'bytesRead', 'bytesWritten', 'processed', 'skipped', 'failed')}
+                    | r['attrs'],
+        } for r in self.records()]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms',
+                'otherData': {'script': self.script, 'run': self.run, 'argv': sys.argv[1:]}}
+
+    def finish(self, out=sys.stdout):
+        """Write the trace files and print the summary. Returns the Chrome trace path."""
+        if not self.enabled or not self.stages:
+            return None
+        records = self.records()
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        with open(os.path.join(TRACE_DIR, f"{self.script}.jsonl"), 'a', encoding='utf-8') as f:
+            for r in records:
+                f.write(json.dumps(r, ensure_ascii=False) + '\n')
+        chrome_path = os.path.join(TRACE_DIR, f"{self.script}-{self.run}.trace.json")
+        with open(chrome_path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
+        print_summary(records, out=out)
+        print(f"  📄 Trace: {os.path.relpath(chrome_path)}", file=out)
+        print('═' * 60 + '\n', file=out)
+        return chrome_path
+
+
+# ============================================
+# REPORTING
+# ============================================
+def _size(n):
+    for unit in ('B', 'KB', 'MB'):
+        if abs(n) < 1024:
+            return f"{n:.0f} {unit}" if unit == 'B' else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+def print_summary(records, out=sys.stdout):
+    if not records:
+        return
+    print('\n' + '═' * 60, file=out)
+    print(f"  ⏱️  STAGE TRACE: {records[0]['script']} ({records[0]['run']})", file=out)
+    print('═' * 60, file=out)
+    print(f"  {'stage':24s} {'wall':>8s} {'cpu':>8s} {'read':>9s} {'written':>9s} {'done':>6s} {'skip':>5s} {'fail':>5s}",
+          file=out)
+    for r in records:
+        name = '  ' * r['depth'] + r['stage']
+        print(f"  {name[:24]:24s} {r['wall'] * 1000:6.0f}ms {r['cpu'] * 1000:6.0f}ms "
+              f"{_size(r['bytesRead']):>9s} {_size(r['bytesWritten']):>9s} "
+              f"{r['processed']:6d} {r['skipped']:5d} {r['failed']:5d}", file=out)
+
+
+def load_runs(script):
+    """{run: [stage records]} from the history file, oldest run first."""
+    runs = {}
+    try:
+        with open(os.path.join(TRACE_DIR, f"{script}.jsonl"), 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn line from an interrupted run
+                runs.setdefault(record['run'], []).append(record)
+    except FileNotFoundError:
+        pass
+    return runs
+
+
+def _per_question(record):
+    return record['wall'] / record['processed'] * 1000 if record['processed'] else None
+
+
+def compare(before, after, out=sys.stdout):
+    """Per-stage wall time and per-question time, latest run against an earlier one."""
+    earlier = {(r['parent'], r['stage']): r for r in before}
+    print('\n' + '═' * 60, file=out)
+    print(f"  📈 STAGE COMPARISON: {after[0]['script']}  {before[0]['run']} → {after[0]['run']}", file=out)
+    print('═' * 60, file=out)
+    print(f"  {'stage':24s} {'wall':>15s} {'Δ':>8s} {'questions':>11s} {'ms/question':>15s}", file=out)
+    for r in after:
+        old = earlier.get((r['parent'], r['stage']))
+        name = ('  ' * r['depth'] + r['stage'])[:24]
+        if not old:
+            print(f"  {name:24s} {'—':>6s} → {r['wall'] * 1000:5.0f}ms {'new':>8s} {r['processed']:11d}", file=out)
+            continue
+        delta = (r['wall'] - old['wall']) / old['wall'] * 100 if old['wall'] else 0.0
+        flag = '⚠️' if delta > 20 and r['wall'] - old['wall'] > 0.05 else '  '
+        rate_old, rate_new = _per_question(old), _per_question(r)
+        rate = f"{rate_old:.2f} → {rate_new:.2f}" if rate_old is not None and rate_new is not None else ''
+        print(f"  {name:24s} {old['wall'] * 1000:5.0f} → {r['wall'] * 1000:5.0f}ms {delta:+7.0f}% "
+              f"{old['processed']:>4d} → {r['processed']:<4d} {rate:>15s} {flag}", file=out)
+    print('═' * 60 + '\n', file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect pipeline stage traces.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    show = sub.add_parser('show', help='summary table for a run (default: the latest)')
+    show.add_argument('script')
+    show.add_argument('--run', help='run id (see `list`)')
+    cmp_ = sub.add_parser('compare', help='compare two runs stage by stage')
+    cmp_.add_argument('script')
+    cmp_.add_argument('--before', help='earlier run id (default: the run before --after)')
+    cmp_.add_argument('--after', help='later run id (default: the latest)')
+    listing = sub.add_parser('list', help='traced scripts, or the runs of one script')
+    listing.add_argument('script', nargs='?')
+    args = parser.parse_args(argv)
+
+    if args.command == 'list' and not args.script:
+        names = sorted(f[:-len('.jsonl')] for f in os.listdir(TRACE_DIR) if f.endswith('.jsonl')) \
+            if os.path.isdir(TRACE_DIR) else []
+        for name in names:
+            print(f"  {name}: {len(load_runs(name))} runs")
+        return 0
+
+    runs = load_runs(args.script)
+    order = list(runs)
+    if not order:
+        print(f"❌ No traces for {args.script} - run it with --trace or {TRACE_ENV}=1", file=sys.stderr)
+        return 1
+
+    if args.command == 'list':
+        for run in order:
+            total = sum(r['wall'] for r in runs[run] if r['depth'] == 0)
+            print(f"  {run}  {total * 1000:8.0f}ms  {len(runs[run])} stages")
+        return 0
+
+    if args.command == 'show':
+        if args.run and args.run not in runs:
+            print(f"❌ No run {args.run} for {args.script}", file=sys.stderr)
+            return 1
+        print_summary(runs[args.run or order[-1]])
+        print('═' * 60 + '\n')
+        return 0
+
+    after = args.after or order[-1]
+    if after not in runs or (args.before and args.before not in runs):
+        print(f"❌ Unknown run for {args.script}", file=sys.stderr)
+        return 1
+    before = args.before or (order[order.index(after) - 1] if order.index(after) > 0 else None)
+    if before is None:
+        print(f"❌ Only one run of {args.script} traced; nothing to compare", file=sys.stderr)
+        return 1
+    compare(runs[before], runs[after])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
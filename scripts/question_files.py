@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for reading and writing BrainSpark question files.
+
+Question files come in a few shapes:
+  * {"metadata": {...}, "questions": [...]}      (complete files, most sets)
+  * {"setInfo": {...}, "questions": [...]}       (older pct-app sets)
+  * [ {...}, {...} ]                             (phase files)
+  * {"testletId": ..., "passage": ..., "questions": [...]}
+  * {"testlets": [{..., "questions": [...]}], "metadata": {...}}
+
+QuestionStream walks any of these one question at a time without loading the
+whole file, and reports the byte offset/length of every question so other
+tools can seek straight back to it.
+"""
+
+import contextlib
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+QUESTIONS_DIR = os.path.join(SCRIPTS_DIR, 'questions')
+# Manifests, caches and other state the build tools keep between runs.
+CACHE_DIR = os.path.join(SCRIPTS_DIR, '.cache')
+
+# Reports written by the validators live next to the questions; they are not
+# question files.
+NON_QUESTION_FILES = re.compile(r'^validation-report.*\.json$')
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_CHUNK_SIZE = 64 * 1024
+
+
+class QuestionFileError(ValueError):
+    """Raised when a file is not one of the recognised question file shapes."""
+
+    def __init__(self, path, message):
+        super().__init__(f"{path}: {message}")
+        self.path = path
+
+
+class _Reader:
+    """Incremental JSON tokenizer over a text file that tracks byte offsets."""
+
+    def __init__(self, fh, chunk_size=_CHUNK_SIZE):
+        self.fh = fh
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.byte_pos = 0
+        self.eof = False
+
+    def _fill(self):
+        data = self.fh.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def advance(self, new_pos):
+        self.byte_pos += len(self.buf[self.pos:new_pos].encode('utf-8'))
+        self.pos = new_pos
+
+    def peek(self):
+        """Skip whitespace and return the next character ('' at EOF)."""
+        while True:
+            end = _WHITESPACE.match(self.buf, self.pos).end()
+            self.advance(end)
+            if end < len(self.buf):
+                return self.buf[end]
+            if not self._fill():
+                return ''
+
+    def consume(self, expected):
+        char = self.peek()
+        if char != expected:
+            raise ValueError(f"expected {expected!r} at byte {self.byte_pos}, found {char or 'EOF'!r}")
+        self.advance(self.pos + 1)
+
+    def decode(self):
+        """Decode the next JSON value. Returns (value, byte_offset, byte_length)."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+                # A number or literal ending exactly at the buffer edge may be
+                # truncated, so only accept it once more input (or EOF) is seen.
+                if end < len(self.buf) or self.eof:
+                    start = self.byte_pos
+                    self.advance(end)
+                    return value, start, self.byte_pos - start
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            if not self._fill():
+                continue
+            # Large values would otherwise be re-scanned once per chunk.
+            self.chunk_size *= 2
+
+    def separator(self, closing):
+        """Consume ',' or the closing bracket. Returns True if more items follow."""
+        char = self.peek()
+        self.advance(self.pos + 1)
+        if char == ',':
+            return True
+        if char == closing:
+            return False
+        raise ValueError(f"expected ',' or {closing!r} at byte {self.byte_pos - 1}, found {char or 'EOF'!r}")
+
+    def first_item(self, closing):
+        """Call after an opening bracket. Returns False for an empty container."""
+        if self.peek() == closing:
+            self.advance(self.pos + 1)
+            return False
+        return True
+
+
+class QuestionRecord:
+    __slots__ = ('question', 'offset', 'length', 'testlet_id')
+
+    def __init__(self, question, offset, length, testlet_id=None):
+        self.question = question
+        self.offset = offset
+        self.length = length
+        self.testlet_id = testlet_id
+
+
+class QuestionStream:
+    """
+    Iterate the questions in a file one at a time.
+
+    Top-level keys other than the question arrays are collected in `header`
+    as they are passed; `layout` is 'list', 'object' or 'testlets'.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.header = {}
+        self.layout = None
+        self.count = 0
+
+    def __iter__(self):
+        with open(self.path, 'r', encoding='utf-8', newline='') as fh:
+            reader = _Reader(fh)
+            try:
+                first = reader.peek()
+                if first == '[':
+                    self.layout = 'list'
+                    reader.advance(reader.pos + 1)
+                    yield from self._questions(reader)
+                elif first == '{':
+                    self.layout = 'object'
+                    reader.advance(reader.pos + 1)
+                    yield from self._object(reader, self.header, top_level=True)
+                else:
+                    raise ValueError('file does not start with a JSON object or array')
+            except (ValueError, json.JSONDecodeError) as e:
+                raise QuestionFileError(self.path, str(e)) from e
+
+    def _questions(self, reader, testlet_id=None):
+        if not reader.first_item(']'):
+            return
+        while True:
+            question, offset, length = reader.decode()
+            if isinstance(question, dict):
+                self.count += 1
+                yield QuestionRecord(question, offset, length, testlet_id)
+            if not reader.separator(']'):
+                return
+
+    def _object(self, reader, header, top_level):
+        if not reader.first_item('}'):
+            return
+        while True:
+            key, _, _ = reader.decode()
+            reader.consume(':')
+            if key == 'questions' and reader.peek() == '[':
+                reader.advance(reader.pos + 1)
+                yield from self._questions(reader, header.get('testletId'))
+            elif key == 'testlets' and top_level and reader.peek() == '[':
+                self.layout = 'testlets'
+                reader.advance(reader.pos + 1)
+                yield from self._testlets(reader)
+            else:
+                header[key], _, _ = reader.decode()
+            if not reader.separator('}'):
+                return
+
+    def _testlets(self, reader):
+        if not reader.first_item(']'):
+            return
+        while True:
+            if reader.peek() == '{':
+                reader.advance(reader.pos + 1)
+                yield from self._object(reader, {}, top_level=False)
+            else:
+                reader.decode()
+            if not reader.separator(']'):
+                return
+
+
+def iter_questions(path):
+    """Yield each question dict in `path`."""
+    for record in QuestionStream(path):
+        yield record.question
+
+
+def read_header(path):
+    """
+    Top-level keys of a question file without decoding its questions.
+
+    Stops at the first question when the header has already been seen, which
+    is the case for every file written by QuestionFileWriter.
+    """
+    stream = QuestionStream(path)
+    for _ in stream:
+        if stream.header:
+            break
+    return stream.header
+
+
+def read_question_at(path, offset, length):
+    """Decode the single question stored at a byte span recorded by QuestionStream."""
+    with open(path, 'rb') as fh:
+        fh.seek(offset)
+        return json.loads(fh.read(length).decode('utf-8'))
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def question_hash(question):
+    """Content hash of a question that ignores key order and formatting."""
+    canonical = json.dumps(question, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def topic_sources(root=SCRIPTS_DIR):
+    """
+    Existing set files that topics/*.json manifests build from. Several live
+    outside questions/ (energy-set1-q01-q10.json, energy-sets/...). Broken
+    manifests are skipped here; build_topics.py reports them.
+    """
+    paths = []
+    for manifest in sorted(glob.glob(os.path.join(root, 'topics', '*.json'))):
+        try:
+            with open(manifest, 'r') as f:
+                sources = json.load(f).get('sources') or []
+        except (OSError, ValueError, AttributeError):
+            continue
+        paths.extend(os.path.join(root, s) for s in sources if isinstance(s, str))
+    return [p for p in paths if os.path.isfile(p)]
+
+
+def discover_question_files(root=SCRIPTS_DIR, sources=True):
+    """
+    Every question file under questions/, the top-level year8-*.json files
+    and, unless `sources` is False, the set files topic manifests build from.
+    """
+    paths = glob.glob(os.path.join(root, 'questions', '**', '*.json'), recursive=True)
+    paths += glob.glob(os.path.join(root, 'year8-*.json'))
+    if sources:
+        paths += topic_sources(root)
+    return sorted({os.path.normpath(p) for p in paths if not NON_QUESTION_FILES.match(os.path.basename(p))})
+
+
+_TOPIC_SUFFIX = re.compile(
+    r'^(.*?)(?:-(?:y8|year8))?'
+    r'(?:-(?:complete|classic|template|questions|all-testlets|testlet|batch\d+|sets?-?\d.*|phase\d+)\b.*)?$'
+)
+
+# Short or legacy file prefixes for topics whose complete file uses a longer slug.
+TOPIC_ALIASES = {
+    'pct-app': 'percentages-applications',
+    'chem-react': 'chemical-reactions',
+    'cells-cell-structure': 'cells',
+    'elements-compounds': 'elements-compounds-mixtures',
+}
+
+
+def topic_slug(path):
+    """
+    Topic a question file belongs to, from its location and name.
+
+    NSW Selective files take their archetype folder (qa14-painted-cubes);
+    everything else drops the year8-/-setN/-phaseN/-complete decorations,
+    so linear-equations-year8-set3.json -> linear-equations.
+    """
+    parts = relpath(path).split('/')
+    if 'nsw-selective' in parts and len(parts) >= 3:
+        return parts[-2]
+    name = os.path.splitext(parts[-1])[0]
+    if name.startswith('year8-'):
+        name = name[len('year8-'):]
+    slug = _TOPIC_SUFFIX.match(name).group(1)
+    return TOPIC_ALIASES.get(slug, slug)
+
+
+def copy_rank(path):
+    """
+    Preference order when a questionId appears in several files; lower wins.
+    Complete files are canonical, backups/classic/template copies are last.
+    """
+    name = os.path.basename(path)
+    if name.endswith('-complete.json') or name.endswith('-all-testlets.json'):
+        return 0
+    if 'backup' in name or 'classic' in name or 'template' in name:
+        return 2
+    return 1
+
+
+def relpath(path, root=SCRIPTS_DIR):
+    return os.path.relpath(os.path.abspath(path), root).replace(os.sep, '/')
+
+
+# ============================================
+# WRITING
+# ============================================
+# Output matches JSON.stringify(data, null, 2) so files written here diff
+# cleanly against the ones produced by the Node scripts.
+
+def dump_value(value, depth):
+    """Serialise `value` as it would appear nested `depth` levels deep."""
+    text = json.dumps(value, indent=2, ensure_ascii=False)
+    if depth:
+        text = text.replace('\n', '\n' + '  ' * depth)
+    return text
+
+
+def dump_question(question, depth=2):
+    return dump_value(question, depth)
+
+
+@contextlib.contextmanager
+def atomic_write(path, mode='w'):
+    """Write to a sibling temp file and rename over `path` only on success."""
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    kwargs = {'encoding': 'utf-8', 'newline': ''} if 'b' not in mode else {}
+    try:
+        with open(tmp_path, mode, **kwargs) as fh:
+            yield fh
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class QuestionFileWriter:
+    """
+    Stream questions into a file with the same layout as the Node scripts.
+
+    With header=None a bare list is written; otherwise the header keys are
+    written first followed by a "questions" array.
+    """
+
+    def __init__(self, fh, header=None):
+        self.fh = fh
+        self.header = header
+        self.count = 0
+        self.depth = 1 if header is None else 2
+        self._started = False
+        self._closed = False
+
+    def _start(self):
+        if self.header is None:
+            self.fh.write('[')
+        else:
+            self.fh.write('{')
+            for key, value in self.header.items():
+                self.fh.write(f"\n  {json.dumps(key, ensure_ascii=False)}: {dump_value(value, 1)},")
+            self.fh.write('\n  "questions": [')
+        self._started = True
+
+    def write_raw(self, text, count=1):
+        """Append already-serialised questions (a comma-joined block of `count`)."""
+        if not self._started:
+            self._start()
+        indent = '  ' * self.depth
+        self.fh.write(('\n' if self.count == 0 else ',\n') + indent + text)
+        self.count += count
+
+    def write(self, question):
+        self.write_raw(dump_value(question, self.depth))
+
+    def close(self):
+        if self._closed:
+            return
+        if not self._started:
+            self._start()
+        if self.header is None:
+            self.fh.write('\n]' if self.count else ']')
+        else:
+            self.fh.write('\n  ]\n}' if self.count else ']\n}')
+        self._closed = True
+
+
+def rewrite_questions(path, transform, output_path=None):
+    """
+    Stream `path`, replacing each question for which transform(question)
+    returns a new dict. Everything else (headers, passages, untouched
+    questions, formatting) is copied through byte for byte, so this works for
+    every file layout. Writes to `output_path` (default: in place) only when
+    something changed. Returns the number of questions replaced.
+    """
+    output_path = output_path or path
+    replaced = 0
+    with open(path, 'rb') as source:
+        tmp_path = f"{output_path}.tmp-{os.getpid()}"
+        try:
+            with open(tmp_path, 'wb') as out:
+                copied = 0
+                last_line = b''
+                for record in QuestionStream(path):
+                    updated = transform(record.question)
+                    if updated is None:
+                        continue
+                    chunk = source.read(record.offset - copied)
+                    out.write(chunk)
+                    # Re-indent the new text to the column the question starts at.
+                    last_line = (last_line + chunk).rsplit(b'\n', 1)[-1]
+                    indent = last_line[:len(last_line) - len(last_line.lstrip(b' \t'))].decode('utf-8')
+                    text = json.dumps(updated, indent=2, ensure_ascii=False).replace('\n', '\n' + indent)
+                    out.write(text.encode('utf-8'))
+                    source.seek(record.offset + record.length)
+                    copied = record.offset + record.length
+                    last_line = b''
+                    replaced += 1
+                shutil.copyfileobj(source, out)
+            if replaced or output_path != path:
+                os.replace(tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return replaced
+
+
+def write_question_file(path, questions, header=None):
+    """Atomically write an iterable of questions to `path`. Returns the count."""
+    with atomic_write(path) as fh:
+        writer = QuestionFileWriter(fh, header)
+        for question in questions:
+            writer.write(question)
+        writer.close()
+    return writer.count
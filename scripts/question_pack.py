@@ -0,0 +1,567 @@
+#!/usr/bin/env python3
+"""
+Interned, memory-mappable binary export of the question corpus.
+
+Question files repeat the same curriculum blocks, setIds, hint keys and whole
+question copies (set files plus the complete file). A pack stores each
+distinct string once, each repeated sub-object once, and each distinct
+question once, behind offset tables, so a reader can mmap the file and
+decode a single question without parsing anything else.
+
+Layout (little-endian):
+
+  header     magic "BSQP", version, six section offsets, five counts
+  strings    u32 offsets[n + 1], then UTF-8 bytes
+  values     u32 offsets[n + 1], then encoded shared sub-objects
+  questions  u32 offsets[n + 1], then encoded distinct questions
+  rows       per question occurrence: u32 file, u32 question, u32 questionId string
+  ids        u32 row numbers sorted by questionId (canonical copy first)
+  files      u32 offsets[n + 1], then per file: path string, style, encoded file body
+
+Encoded values are tagged: null/false/true, zigzag varint ints, f64 floats,
+string and shared-value references by index, lists and dicts (key order
+kept), and in file bodies a reference to the question at that position.
+
+Exports are lossless: every file decodes to exactly what json.load gives
+(key order included), and files written in the JSON.stringify(data, null, 2)
+style come back byte for byte. Hand-formatted files keep their values but
+not their whitespace.
+
+Usage:
+  python3 question_pack.py build                      # -> .cache/questions.bsqp
+  python3 question_pack.py verify                     # round-trip every file
+  python3 question_pack.py report                     # size and load-time savings
+  python3 question_pack.py get som-y8-063
+  python3 question_pack.py export --out-dir /tmp/questions
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from collections import Counter
+
+from question_files import (
+    CACHE_DIR, SCRIPTS_DIR, atomic_write, copy_rank, discover_question_files, iter_questions, relpath,
+)
+
+DEFAULT_PACK = os.path.join(CACHE_DIR, 'questions.bsqp')
+MAGIC = b'BSQP'
+PACK_FORMAT_VERSION = 1
+# Sub-objects shorter than this (as JSON) cost more as a reference than inline.
+MIN_SHARED_CHARS = 12
+
+_HEADER = struct.Struct('<4sHH6Q5I')
+_ROW = struct.Struct('<III')
+_U32 = struct.Struct('<I')
+_F64 = struct.Struct('<d')
+
+(T_NULL, T_FALSE, T_TRUE, T_INT, T_FLOAT, T_STR, T_LIST, T_DICT, T_SHARED, T_QUESTION) = range(10)
+
+# File styles: how to re-serialise a file byte for byte.
+STYLE_NONE, STYLE_INDENT2, STYLE_INDENT2_NEWLINE = range(3)
+
+
+class PackError(ValueError):
+    """Raised when a file is not a question pack this version can read."""
+
+
+def is_question(value):
+    return isinstance(value, dict) and 'questionId' in value
+
+
+def _key(value):
+    # Order-preserving: two dicts with the same items in a different order are different values.
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def _style(raw, value):
+    text = json.dumps(value, indent=2, ensure_ascii=False).encode('utf-8')
+    if raw == text:
+        return STYLE_INDENT2
+    if raw == text + b'\n':
+        return STYLE_INDENT2_NEWLINE
+    return STYLE_NONE
+
+
+def render(value, style):
+    text = json.dumps(value, indent=2, ensure_ascii=False)
+    return (text + '\n' if style == STYLE_INDENT2_NEWLINE else text).encode('utf-8')
+
+
+# ============================================
+# ENCODING
+# ============================================
+def _varint(out, n):
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+class _Encoder:
+    def __init__(self):
+        self.strings = {}
+        self.shared = {}        # JSON key -> value id
+        self.shared_blobs = []
+
+    def string(self, text):
+        index = self.strings.get(text)
+        if index is None:
+            index = self.strings[text] = len(self.strings)
+        return index
+
+    def encode(self, value, out, questions=None, root=False):
+        if value is None:
+            out.append(T_NULL)
+        elif value is True:
+            out.append(T_TRUE)
+        elif value is False:
+            out.append(T_FALSE)
+        elif isinstance(value, int):
+            out.append(T_INT)
+            _varint(out, (value << 1) if value >= 0 else ((-value << 1) - 1))
+        elif isinstance(value, float):
+            out.append(T_FLOAT)
+            out += _F64.pack(value)
+        elif isinstance(value, str):
+            out.append(T_STR)
+            _varint(out, self.string(value))
+        else:
+            index = questions(value) if questions is not None and is_question(value) else None
+            if index is not None:
+                out.append(T_QUESTION)
+                _varint(out, index)
+                return
+            key = None if root else _key(value)
+            shared = self.shared.get(key) if key is not None else None
+            if shared is not None:
+                out.append(T_SHARED)
+                _varint(out, shared)
+                return
+            if isinstance(value, list):
+                out.append(T_LIST)
+                _varint(out, len(value))
+                for item in value:
+                    self.encode(item, out, questions)
+            else:
+                out.append(T_DICT)
+                _varint(out, len(value))
+                for k, item in value.items():
+                    _varint(out, self.string(k))
+                    self.encode(item, out, questions)
+
+    def share(self, candidates):
+        """Intern every sub-object in `candidates` ({key: value}), smallest first."""
+        for key, value in sorted(candidates.items(), key=lambda kv: len(kv[0])):
+            body = bytearray()
+            self.encode(value, body, root=True)
+            self.shared[key] = len(self.shared_blobs)
+            self.shared_blobs.append(bytes(body))
+
+
+def _count_subobjects(value, counts, top=True, skip_questions=False):
+    if isinstance(value, (dict, list)):
+        if skip_questions and is_question(value):
+            return      # counted once, from the distinct questions
+        if not top:
+            key = _key(value)
+            if len(key) >= MIN_SHARED_CHARS:
+                counts[key] += 1
+        for item in (value.values() if isinstance(value, dict) else value):
+            _count_subobjects(item, counts, top=False, skip_questions=skip_questions)
+
+
+def _table(blobs):
+    offsets = [0]
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+    return struct.pack(f'<{len(offsets)}I', *offsets) + b''.join(blobs)
+
+
+def pack(paths, out_path):
+    """Write a pack of `paths`. Returns a summary dict."""
+    files = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        value = json.loads(raw)
+        files.append((path, value, _style(raw, value), len(raw)))
+
+    # Distinct questions, in first-seen order; copies across files share one entry.
+    questions, question_ids, rows = [], {}, []
+
+    def question_index(question):
+        key = _key(question)
+        index = question_ids.get(key)
+        if index is None:
+            index = question_ids[key] = len(questions)
+            questions.append(question)
+        return index
+
+    for file_number, (path, value, _, _) in enumerate(files):
+        for question in iter_questions(path):
+            rows.append((file_number, question_index(question), question.get('questionId')))
+
+    def known_question(value):
+        # Only the questions found above have blobs; any other dict carrying
+        # a questionId (a "related" reference, say) is encoded inline.
+        return question_ids.get(_key(value))
+
+    counts = Counter()
+    for question in questions:
+        _count_subobjects(question, counts)
+    for _, value, _, _ in files:
+        _count_subobjects(value, counts, skip_questions=True)
+    candidates = {}
+    for key, count in counts.items():
+        if count >= 2:
+            candidates[key] = json.loads(key)
+
+    encoder = _Encoder()
+    encoder.share(candidates)
+    question_blobs = []
+    for question in questions:
+        body = bytearray()
+        encoder.encode(question, body, root=True)
+        question_blobs.append(bytes(body))
+    file_blobs = []
+    for path, value, style, _ in files:
+        body = bytearray()
+        _varint(body, encoder.string(relpath(path)))
+        body.append(style)
+        encoder.encode(value, body, questions=known_question, root=True)
+        file_blobs.append(bytes(body))
+    row_strings = [encoder.string(qid if isinstance(qid, str) else '') for _, _, qid in rows]
+
+    strings = sorted(encoder.strings, key=encoder.strings.get)
+    string_section = _table([s.encode('utf-8') for s in strings])
+    value_section = _table(encoder.shared_blobs)
+    question_section = _table(question_blobs)
+    row_section = b''.join(_ROW.pack(f, q, s) for (f, q, _), s in zip(rows, row_strings))
+    ranked = sorted(range(len(rows)), key=lambda r: (strings[row_strings[r]], copy_rank(files[rows[r][0]][0]),
+                                                      files[rows[r][0]][0]))
+    id_section = struct.pack(f'<{len(ranked)}I', *ranked)
+    file_section = _table(file_blobs)
+
+    sections = [string_section, value_section, question_section, row_section, id_section, file_section]
+    offsets, position = [], _HEADER.size
+    for section in sections:
+        offsets.append(position)
+        position += len(section)
+    header = _HEADER.pack(MAGIC, PACK_FORMAT_VERSION, 0, *offsets,
+                          len(strings), len(encoder.shared_blobs), len(questions), len(rows), len(files))
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with atomic_write(out_path, 'wb') as f:
+        f.write(header)
+        for section in sections:
+            f.write(section)
+    return {'files': len(files), 'rows': len(rows), 'questions': len(questions), 'strings': len(strings),
+            'shared': len(encoder.shared_blobs), 'jsonBytes': sum(size for *_, size in files),
+            'packBytes': position,
+            'byteExact': sum(1 for _, _, style, _ in files if style != STYLE_NONE)}
+
+
+# ============================================
+# READING
+# ============================================
+class QuestionPack:
+    """
+    Read-only view of a pack. Nothing is decoded until asked for: opening
+    maps the file and reads the header, get() decodes one question.
+    """
+
+    def __init__(self, path=DEFAULT_PACK):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise PackError(f"{path}: empty file")
+        if len(self._mm) < _HEADER.size:
+            self.close()
+            raise PackError(f"{path}: too short to be a question pack")
+        magic, version, _, *fields = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != PACK_FORMAT_VERSION:
+            self.close()
+            raise PackError(f"{path}: not a version {PACK_FORMAT_VERSION} question pack")
+        (self._strings, self._values, self._questions, self._rows, self._ids, self._files,
+         self.string_count, self.shared_count, self.question_count, self.row_count, self.file_count) = fields
+        self._string_cache = {}
+        self._file_paths = None
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- decoding ----
+    def _blob(self, table, count, index):
+        """(start, end) of entry `index` in a u32 offsets[count + 1] + data table."""
+        begin, end = struct.unpack_from('<II', self._mm, table + 4 * index)
+        base = table + 4 * (count + 1)
+        return base + begin, base + end
+
+    def string(self, index):
+        text = self._string_cache.get(index)
+        if text is None:
+            begin, end = self._blob(self._strings, self.string_count, index)
+            text = self._string_cache[index] = self._mm[begin:end].decode('utf-8')
+        return text
+
+    def _varint(self, pos):
+        mm, result, shift = self._mm, 0, 0
+        while True:
+            byte = mm[pos]
+            pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result, pos
+            shift += 7
+
+    def _decode(self, pos):
+        mm = self._mm
+        tag = mm[pos]
+        pos += 1
+        if tag == T_STR:
+            n, pos = self._varint(pos)
+            return self.string(n), pos
+        if tag == T_DICT:
+            n, pos = self._varint(pos)
+            out = {}
+            for _ in range(n):
+                key, pos = self._varint(pos)
+                out[self.string(key)], pos = self._decode(pos)
+            return out, pos
+        if tag == T_LIST:
+            n, pos = self._varint(pos)
+            items = []
+            for _ in range(n):
+                item, pos = self._decode(pos)
+                items.append(item)
+            return items, pos
+        if tag == T_INT:
+            n, pos = self._varint(pos)
+            return (n >> 1) if not n & 1 else -((n + 1) >> 1), pos
+        if tag == T_SHARED:
+            n, pos = self._varint(pos)
+            return self.shared(n), pos
+        if tag == T_QUESTION:
+            n, pos = self._varint(pos)
+            return self.question(n), pos
+        if tag == T_FLOAT:
+            return _F64.unpack_from(mm, pos)[0], pos + 8
+        if tag in (T_NULL, T_TRUE, T_FALSE):
+            return (None, False, True)[tag], pos
+        raise PackError(f"{self.path}: bad tag {tag} at offset {pos - 1}")
+
+    def shared(self, index):
+        """Decode shared sub-object `index` (a fresh copy each time)."""
+        return self._decode(self._blob(self._values, self.shared_count, index)[0])[0]
+
+    def question(self, index):
+        """Decode distinct question `index`."""
+        return self._decode(self._blob(self._questions, self.question_count, index)[0])[0]
+
+    # ---- lookup ----
+    def row(self, number):
+        """(file number, question index, questionId) of question occurrence `number`."""
+        file_number, question, string = _ROW.unpack_from(self._mm, self._rows + _ROW.size * number)
+        return file_number, question, self.string(string)
+
+    def _id_row(self, position):
+        return _U32.unpack_from(self._mm, self._ids + 4 * position)[0]
+
+    def get(self, question_id):
+        """The canonical copy of `question_id`, or None: a binary search and one decode."""
+        lo, hi = 0, self.row_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.row(self._id_row(mid))[2] < question_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.row_count:
+            _, question, qid = self.row(self._id_row(lo))
+            if qid == question_id:
+                return self.question(question)
+        return None
+
+    # ---- files ----
+    def _file_head(self, number):
+        pos = self._blob(self._files, self.file_count, number)[0]
+        string, pos = self._varint(pos)
+        return self.string(string), self._mm[pos], pos + 1
+
+    def file_paths(self):
+        """Paths (relative to scripts/) of the packed files, in pack order."""
+        if self._file_paths is None:
+            self._file_paths = [self._file_head(n)[0] for n in range(self.file_count)]
+        return self._file_paths
+
+    def file_value(self, path):
+        """(value, style) for one file; value is exactly what json.load returned."""
+        try:
+            number = self.file_paths().index(path)
+        except ValueError:
+            raise KeyError(path) from None
+        _, style, pos = self._file_head(number)
+        return self._decode(pos)[0], style
+
+    def iter_questions(self, path):
+        """Questions of one file, decoded one at a time."""
+        number = self.file_paths().index(path)
+        for row in range(self.row_count):
+            file_number, question, _ = self.row(row)
+            if file_number == number:
+                yield self.question(question)
+
+    def export(self, path, out_path):
+        """Write one file back out as JSON."""
+        value, style = self.file_value(path)
+        os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+        with atomic_write(out_path, 'wb') as f:
+            f.write(render(value, style))
+
+
+# ============================================
+# CLI
+# ============================================
+def verify(pack_path, paths):
+    """Round-trip every file. Returns (value mismatches, byte-exact count)."""
+    mismatches, exact = [], 0
+    with QuestionPack(pack_path) as reader:
+        packed = set(reader.file_paths())
+        for path in paths:
+            rel = relpath(path)
+            if rel not in packed:
+                mismatches.append(f"{rel}: not in pack")
+                continue
+            with open(path, 'rb') as f:
+                raw = f.read()
+            value, style = reader.file_value(rel)
+            if value != json.loads(raw) or _key(value) != _key(json.loads(raw)):
+                mismatches.append(f"{rel}: decoded value differs")
+            elif render(value, style) == raw:
+                exact += 1
+    return mismatches, exact
+
+
+def _timed(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def report(pack_path, paths):
+    """Size and load-time comparison of JSON files against the pack."""
+    json_bytes = sum(os.path.getsize(p) for p in paths)
+    pack_bytes = os.path.getsize(pack_path)
+    largest = max(paths, key=os.path.getsize)
+    qids = [q.get('questionId') for q in iter_questions(largest)] or ['']
+
+    def load_json_all():
+        return sum(len(list(iter_questions(p))) for p in paths)
+
+    def load_json_one():
+        # What a script does today to read one question: json.load its topic file.
+        with open(largest, 'r') as f:
+            return json.load(f)
+
+    def pack_one():
+        with QuestionPack(pack_path) as reader:
+            return reader.get(qids[-1])
+
+    def pack_all():
+        with QuestionPack(pack_path) as reader:
+            return sum(1 for i in range(reader.question_count) if reader.question(i))
+
+    return {'jsonBytes': json_bytes, 'packBytes': pack_bytes, 'largest': relpath(largest),
+            'jsonLoadAll': _timed(load_json_all)[0], 'packDecodeAll': _timed(pack_all)[0],
+            'jsonLoadOne': _timed(load_json_one)[0], 'packGetOne': _timed(pack_one)[0]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Interned binary export of the question corpus.')
+    parser.add_argument('command', choices=['build', 'verify', 'report', 'get', 'export'])
+    parser.add_argument('question_id', nargs='?', help='questionId for get')
+    parser.add_argument('--pack', default=DEFAULT_PACK, help='pack file (default: .cache/questions.bsqp)')
+    parser.add_argument('--files', nargs='*', help='question files (default: whole corpus)')
+    parser.add_argument('--out-dir', help='export: directory to write the JSON files under')
+    args = parser.parse_args(argv)
+
+    paths = [os.path.abspath(f) for f in args.files] if args.files else discover_question_files()
+    try:
+        return _run(args, parser, paths)
+    except (PackError, FileNotFoundError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+
+def _run(args, parser, paths):
+    if args.command == 'get':
+        if not args.question_id:
+            parser.error('get needs a questionId')
+        with QuestionPack(args.pack) as reader:
+            question = reader.get(args.question_id)
+        if question is None:
+            print(f"❌ {args.question_id} not in {os.path.relpath(args.pack)}", file=sys.stderr)
+            return 1
+        print(json.dumps(question, indent=2, ensure_ascii=False))
+        return 0
+
+    print('\n' + '═' * 60)
+    print('  📦 QUESTION PACK')
+    print('═' * 60)
+    failed = False
+    if args.command == 'build':
+        summary = pack(paths, args.pack)
+        print(f"  Files:              {summary['files']}")
+        print(f"  Question rows:      {summary['rows']} ({summary['questions']} distinct)")
+        print(f"  Strings:            {summary['strings']}")
+        print(f"  Shared sub-objects: {summary['shared']}")
+        print(f"  Size:               {summary['jsonBytes'] / 1024:.0f} KB JSON -> "
+              f"{summary['packBytes'] / 1024:.0f} KB ({summary['packBytes'] / summary['jsonBytes']:.0%})")
+        print(f"  Byte-exact exports: {summary['byteExact']}/{summary['files']} "
+              f"(the rest are hand-formatted; values round-trip)")
+        print(f"\n  ✓ Wrote {os.path.relpath(args.pack)}")
+    elif args.command == 'verify':
+        mismatches, exact = verify(args.pack, paths)
+        for problem in mismatches[:20]:
+            print(f"  ❌ {problem}")
+        failed = bool(mismatches)
+        if not failed:
+            print(f"  ✓ {len(paths)} files round-trip losslessly ({exact} byte for byte)")
+    elif args.command == 'report':
+        stats = report(args.pack, paths)
+        print(f"  Size:            {stats['jsonBytes'] / 1024:9.0f} KB JSON   {stats['packBytes'] / 1024:9.0f} KB pack")
+        print(f"  Load corpus:     {stats['jsonLoadAll'] * 1000:9.1f} ms JSON   {stats['packDecodeAll'] * 1000:9.1f} ms pack")
+        print(f"  One question:    {stats['jsonLoadOne'] * 1000:9.2f} ms JSON   {stats['packGetOne'] * 1000:9.2f} ms pack")
+        print(f"   (JSON parses all of {stats['largest']}; the pack maps the file and decodes one question)")
+    else:
+        if not args.out_dir:
+            parser.error('export needs --out-dir')
+        with QuestionPack(args.pack) as reader:
+            for rel in reader.file_paths():
+                reader.export(rel, os.path.join(args.out_dir, rel))
+            print(f"  ✓ Exported {reader.file_count} files to {args.out_dir}")
+    print('═' * 60 + '\n')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
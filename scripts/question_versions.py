@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+Content-addressed version store for the question bank.
+
+A snapshot records every question file at the question level:
+
+  versions/
+    blobs/ab/cdef...     one question as compact JSON, zlib-compressed and
+                         keyed by the sha256 of those bytes
+    trees/12/3456...     one file version, keyed by the file's sha256: the
+                         text between its questions plus, per question,
+                         [questionId, content hash, blob, depth]
+    snapshots/<id>.json  {id, created, message, files: {path: file sha256}}
+
+A file that did not change since the last snapshot costs one line in the
+next snapshot; a file that did costs a new tree plus the questions that are
+new, and a question shared by a set file and its complete file is stored
+once. Questions laid out as JSON.stringify(data, null, 2) nests them are
+re-rendered at their depth on restore; any other layout is kept verbatim
+(depth null). Restoring splices the questions back into the tree's text, so
+the file comes back byte for byte (checked against the recorded sha256)
+and only files that differ are written.
+
+This replaces keeping full backup copies next to the live files. The store
+lives in scripts/versions/ and is gitignored: snapshots are local undo
+points, git keeps the history. Take one before anything risky, e.g. an
+upload:
+
+  python3 question_versions.py snapshot -m "before energy upload"
+  python3 question_versions.py list
+  python3 question_versions.py diff latest                  # snapshot vs working tree
+  python3 question_versions.py diff 20260110T0900 latest --topic energy --fields
+  python3 question_versions.py restore 20260110T0900 --topic energy
+  python3 question_versions.py restore latest --file questions/cells-cell-structure-year8-complete.json
+  python3 question_versions.py stats
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import zlib
+
+from question_files import (
+    SCRIPTS_DIR, QuestionFileError, QuestionStream, atomic_write, discover_question_files, dump_value, file_sha256,
+    question_hash, relpath, topic_slug,
+)
+
+DEFAULT_STORE = os.path.join(SCRIPTS_DIR, 'versions')
+STORE_FORMAT_VERSION = 1
+PREVIEW_CHARS = 70
+
+
+class VersionError(ValueError):
+    pass
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _snapshot_order(snapshot_id):
+    stamp, _, suffix = snapshot_id.partition('-')
+    return stamp, int(suffix) if suffix.isdigit() else 1
+
+
+def _depth(gap):
+    """Nesting depth implied by the indentation before a question, or None."""
+    indent = gap.rpartition('\n')[2]
+    if '\n' not in gap or indent.strip(' ') or len(indent) % 2:
+        return None
+    return len(indent) // 2
+
+
+class VersionStore:
+    def __init__(self, root=DEFAULT_STORE):
+        self.root = root
+        self.snapshot_dir = os.path.join(root, 'snapshots')
+
+    # ============================================
+    # OBJECTS
+    # ============================================
+    def _object_path(self, kind, digest):
+        return os.path.join(self.root, kind, digest[:2], digest[2:])
+
+    def _has(self, kind, digest):
+        return os.path.exists(self._object_path(kind, digest))
+
+    def _put(self, kind, digest, data):
+        path = self._object_path(kind, digest)
+        if os.path.exists(path):
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with atomic_write(path, 'wb') as f:
+            f.write(zlib.compress(data, 9))
+        return True
+
+    def _get(self, kind, digest):
+        try:
+            with open(self._object_path(kind, digest), 'rb') as f:
+                return zlib.decompress(f.read())
+        except FileNotFoundError:
+            raise VersionError(f"store is missing {kind[:-1]} {digest[:12]}") from None
+
+    def blob(self, digest):
+        return self._get('blobs', digest)
+
+    def tree(self, digest):
+        return json.loads(self._get('trees', digest))
+
+    def store_file(self, path, digest=None):
+        """Store one file version. Returns (tree digest, new blobs written)."""
+        digest = digest or file_sha256(path)
+        if self._has('trees', digest):
+            return digest, 0
+        with open(path, 'rb') as f:
+            data = f.read()
+        gaps, questions, new_blobs, cursor = [], [], 0, 0
+        for record in QuestionStream(path):
+            raw = data[record.offset:record.offset + record.length]
+            gap = data[cursor:record.offset].decode('utf-8')
+            depth = _depth(gap)
+            if depth is not None and dump_value(record.question, depth).encode('utf-8') == raw:
+                # Stored by content, so the same question at another depth or in another file is shared.
+                raw = json.dumps(record.question, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            else:
+                depth = None
+            blob = _sha256(raw)
+            new_blobs += self._put('blobs', blob, raw)
+            gaps.append(gap)
+            questions.append([record.question.get('questionId'), question_hash(record.question), blob, depth])
+            cursor = record.offset + record.length
+        gaps.append(data[cursor:].decode('utf-8'))
+        tree = {'size': len(data), 'gaps': gaps, 'questions': questions}
+        self._put('trees', digest, json.dumps(tree, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        return digest, new_blobs
+
+    def file_bytes(self, digest):
+        """A stored file version, rebuilt and checked against its sha256."""
+        tree = self.tree(digest)
+        parts = []
+        for gap, (_, _, blob, depth) in zip(tree['gaps'], tree['questions']):
+            parts.append(gap.encode('utf-8'))
+            raw = self.blob(blob)
+            parts.append(raw if depth is None else dump_value(json.loads(raw), depth).encode('utf-8'))
+        parts.append(tree['gaps'][-1].encode('utf-8'))
+        data = b''.join(parts)
+        if _sha256(data) != digest:
+            raise VersionError(f"tree {digest[:12]} does not rebuild to its recorded content")
+        return data
+
+    # ============================================
+    # SNAPSHOTS
+    # ============================================
+    def snapshot_ids(self):
+        """Snapshot ids oldest first; X, X-2, ..., X-10 share a second and sort by their suffix."""
+        if not os.path.isdir(self.snapshot_dir):
+            return []
+        return sorted((name[:-5] for name in os.listdir(self.snapshot_dir) if name.endswith('.json')),
+                      key=_snapshot_order)
+
+    def load(self, ref):
+        """A snapshot by id, unique id prefix, or 'latest'. An exact id wins over a prefix."""
+        ids = self.snapshot_ids()
+        if not ids:
+            raise VersionError('no snapshots yet - run `snapshot` first')
+        if ref == 'latest':
+            matches = ids[-1:]
+        elif ref in ids:
+            matches = [ref]
+        else:
+            matches = [i for i in ids if i.startswith(ref)]
+        if len(matches) != 1:
+            raise VersionError(f"{'no' if not matches else 'ambiguous'} snapshot {ref!r}")
+        with open(os.path.join(self.snapshot_dir, matches[0] + '.json'), 'r') as f:
+            return json.load(f)
+
+    def snapshot(self, paths, message='', allow_empty=False):
+        """Record `paths`. Returns (snapshot or None when nothing changed, new trees, new blobs)."""
+        files, new_trees, new_blobs = {}, 0, 0
+        for path in sorted(paths):
+            digest = file_sha256(path)
+            had = self._has('trees', digest)
+            try:
+                _, blobs = self.store_file(path, digest)
+            except QuestionFileError as e:
+                raise VersionError(str(e)) from e
+            new_trees += not had
+            new_blobs += blobs
+            files[relpath(path)] = digest
+
+        previous = self.load('latest') if self.snapshot_ids() else None
+        if previous and previous['files'] == files and not allow_empty:
+            return None, 0, 0
+
+        stamp = time.strftime('%Y%m%dT%H%M%S')
+        snapshot_id = stamp
+        taken = set(self.snapshot_ids())
+        suffix = 1
+        while snapshot_id in taken:
+            suffix += 1
+            snapshot_id = f"{stamp}-{suffix}"
+        snapshot = {'version': STORE_FORMAT_VERSION, 'id': snapshot_id,
+                    'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'message': message, 'files': files}
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        with atomic_write(os.path.join(self.snapshot_dir, snapshot_id + '.json')) as f:
+            json.dump(snapshot, f, indent=2)
+            f.write('\n')
+        return snapshot, new_trees, new_blobs
+
+    # ============================================
+    # RESTORE
+    # ============================================
+    def restore(self, snapshot, files, dry_run=False):
+        """Bring `files` (relative paths) back to `snapshot`. Returns {path: 'restored'|'unchanged'|...}."""
+        status = {}
+        for key in files:
+            digest = snapshot['files'].get(key)
+            if digest is None:
+                status[key] = 'not in snapshot'
+                continue
+            path = os.path.join(SCRIPTS_DIR, key)
+            if os.path.exists(path) and file_sha256(path) == digest:
+                status[key] = 'unchanged'
+                continue
+            data = self.file_bytes(digest)
+            if not dry_run:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with atomic_write(path, 'wb') as f:
+                    f.write(data)
+            status[key] = 'would restore' if dry_run else 'restored'
+        return status
+
+    def stats(self):
+        counts, sizes = {}, {}
+        for kind in ('blobs', 'trees', 'snapshots'):
+            directory = os.path.join(self.root, kind)
+            counts[kind] = sizes[kind] = 0
+            for folder, _, names in os.walk(directory):
+                for name in names:
+                    counts[kind] += 1
+                    sizes[kind] += os.path.getsize(os.path.join(folder, name))
+        logical = 0
+        for snapshot_id in self.snapshot_ids():
+            for digest in self.load(snapshot_id)['files'].values():
+                logical += self.tree(digest)['size']
+        return counts, sizes, logical
+
+
+# ============================================
+# DIFF
+# ============================================
+def _questions_of(store, digest, path=None):
+    """{questionId: (content hash, loader)} for a stored version, or for the working file at `path`."""
+    if path is not None:
+        return {r.question.get('questionId'): (question_hash(r.question), (lambda q=r.question: q))
+                for r in QuestionStream(path)}
+    return {qid: (content, (lambda b=blob: json.loads(store.blob(b))))
+            for qid, content, blob, _ in store.tree(digest)['questions']}
+
+
+def field_changes(before, after, prefix=''):
+    """[(dotted field, before, after)] down through nested objects; lists compare whole."""
+    changes = []
+    for key in sorted(set(before) | set(after), key=str):
+        a, b = before.get(key), after.get(key)
+        if a == b:
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(a, dict) and isinstance(b, dict):
+            changes.extend(field_changes(a, b, name + '.'))
+        else:
+            changes.append((name, a, b))
+    return changes
+
+
+def diff(store, old, new, files):
+    """
+    Per-question changes between two file maps ({path: sha256}); a path that
+    maps to None in `new` is read from the working tree. Returns
+    [(path, added, removed, changed)] where changed is [(questionId, [(field, before, after)])].
+    """
+    results = []
+    for key in files:
+        old_digest = old.get(key)
+        working = None
+        if key in new and new[key] is None:
+            working = os.path.join(SCRIPTS_DIR, key)
+            new_digest = file_sha256(working) if os.path.exists(working) else None
+        else:
+            new_digest = new.get(key)
+        if old_digest == new_digest:
+            continue
+        before = _questions_of(store, old_digest) if old_digest else {}
+        if new_digest is None:
+            after = {}
+        else:
+            after = _questions_of(store, new_digest, working)
+        added = [qid for qid in after if qid not in before]
+        removed = [qid for qid in before if qid not in after]
+        changed = [(qid, field_changes(before[qid][1](), after[qid][1]()))
+                   for qid in after if qid in before and before[qid][0] != after[qid][0]]
+        results.append((key, added, removed, changed))
+    return results
+
+
+def _preview(value):
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    text = ' '.join(str(text).split())
+    return text if len(text) <= PREVIEW_CHARS else text[:PREVIEW_CHARS - 1] + '…'
+
+
+def print_diff(results, show_fields=False):
+    totals = [0, 0, 0]
+    for key, added, removed, changed in results:
+        totals[0] += len(added)
+        totals[1] += len(removed)
+        totals[2] += len(changed)
+        print(f"\n  {key}: +{len(added)} -{len(removed)} ~{len(changed)}")
+        for qid in added:
+            print(f"    + {qid}")
+        for qid in removed:
+            print(f"    - {qid}")
+        for qid, fields in changed:
+            print(f"    ~ {qid}: {', '.join(name for name, _, _ in fields)}")
+            if show_fields:
+                for name, a, b in fields:
+                    print(f"        {name}: {_preview(a)!s}")
+                    print(f"        {' ' * len(name)}→ {_preview(b)!s}")
+    if not results:
+        print('\n  No question changes')
+    else:
+        print(f"\n  {len(results)} files: {totals[0]} added, {totals[1]} removed, {totals[2]} changed")
+
+
+# ============================================
+# CLI
+# ============================================
+def _select(paths, topic=None, files=None):
+    """Relative paths from `paths` narrowed to a topic or explicit files."""
+    keys = sorted(set(paths))
+    if files:
+        wanted = {relpath(os.path.abspath(f)) for f in files}
+        return [k for k in keys if k in wanted] + sorted(wanted - set(keys))
+    if topic:
+        return [k for k in keys if topic_slug(os.path.join(SCRIPTS_DIR, k)) == topic]
+    return keys
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Question-level snapshots, diffs and restores.')
+    parser.add_argument('--store', default=DEFAULT_STORE, help='version store directory')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    snap = sub.add_parser('snapshot', help='record the question files')
+    snap.add_argument('files', nargs='*', help='files to record (default: whole corpus)')
+    snap.add_argument('-m', '--message', default='')
+    snap.add_argument('--allow-empty', action='store_true', help='record even if nothing changed')
+
+    sub.add_parser('list', help='list snapshots')
+    sub.add_parser('stats', help='store size against the files it holds')
+
+    diff_cmd = sub.add_parser('diff', help='per-question changes between snapshots or against the working tree')
+    diff_cmd.add_argument('old', help='snapshot id, prefix or latest')
+    diff_cmd.add_argument('new', nargs='?', help='snapshot to compare with (default: working tree)')
+    diff_cmd.add_argument('--topic')
+    diff_cmd.add_argument('--fields', action='store_true', help='show before and after for each changed field')
+
+    restore = sub.add_parser('restore', help='bring files back to a snapshot')
+    restore.add_argument('snapshot', help='snapshot id, prefix or latest')
+    scope = restore.add_mutually_exclusive_group(required=True)
+    scope.add_argument('--topic', help='every file of one topic')
+    scope.add_argument('--file', action='append', dest='files', help='one file (repeatable)')
+    scope.add_argument('--all', action='store_true', help='every file in the snapshot')
+    restore.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args(argv)
+
+    store = VersionStore(args.store)
+    try:
+        if args.command == 'snapshot':
+            paths = [os.path.abspath(f) for f in args.files] or discover_question_files()
+            started = time.perf_counter()
+            snapshot, trees, blobs = store.snapshot(paths, args.message, args.allow_empty)
+            if snapshot is None:
+                print(f"✓ No changes since {store.snapshot_ids()[-1]}")
+            else:
+                print(f"✓ Snapshot {snapshot['id']}: {len(snapshot['files'])} files, "
+                      f"{trees} changed, {blobs} new questions stored "
+                      f"({time.perf_counter() - started:.2f}s)")
+            return 0
+
+        if args.command == 'list':
+            for snapshot_id in store.snapshot_ids():
+                snapshot = store.load(snapshot_id)
+                print(f"{snapshot['id']}  {len(snapshot['files']):4d} files  {snapshot['message']}")
+            return 0
+
+        if args.command == 'stats':
+            counts, sizes, logical = store.stats()
+            stored = sum(sizes.values())
+            print(f"  Snapshots: {counts['snapshots']}   Trees: {counts['trees']}   Questions: {counts['blobs']}")
+            print(f"  Stored:    {stored / 1024:.1f} KB for {logical / 1024:.1f} KB of files across snapshots"
+                  + (f" ({logical / stored:.1f}x)" if stored else ''))
+            return 0
+
+        if args.command == 'diff':
+            old = store.load(args.old)
+            if args.new:
+                new = store.load(args.new)['files']
+                label = args.new
+            else:
+                new = {relpath(p): None for p in discover_question_files()}
+                label = 'working tree'
+            files = _select(set(old['files']) | set(new), topic=args.topic)
+            print(f"\n  {old['id']} → {label}" + (f" ({args.topic})" if args.topic else ''))
+            print_diff(diff(store, old['files'], new, files), args.fields)
+            print()
+            return 0
+
+        snapshot = store.load(args.snapshot)
+        files = _select(snapshot['files'], topic=args.topic, files=args.files)
+        if not files:
+            raise VersionError(f"snapshot {snapshot['id']} has no files for that selection")
+        started = time.perf_counter()
+        status = store.restore(snapshot, files, dry_run=args.dry_run)
+        for key, state in status.items():
+            if state != 'unchanged':
+                print(f"  {'↻' if 'restore' in state else '⚠️ '} {key}: {state}")
+        written = sum(1 for s in status.values() if s in ('restored', 'would restore'))
+        print(f"✓ {snapshot['id']}: {written} files {'to restore' if args.dry_run else 'restored'}, "
+              f"{sum(1 for s in status.values() if s == 'unchanged')} already matched "
+              f"({time.perf_counter() - started:.2f}s)")
+        return 0
+    except (VersionError, QuestionFileError, OSError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Seeded, corpus-wide MCQ option randomiser with balanced answer positions.
+
+randomize-mcq-options.js shuffles each NSW Selective question on its own, so
+balance is only ever approximate. This does the whole corpus in one pass:
+
+  1. scan every file (in parallel) for MCQs, both mcqOptions (4 or 5
+     options) and the legacy options + correctAnswer index form
+  2. choose each question's correct position greedily so that every set,
+     then every topic, then the corpus has as even a spread as possible
+  3. rewrite the files, moving options (with their feedback), remapping
+     nswSelective.distractorTypes and "Answer: B" / "Option C" references
+     in solutions, hints and feedback
+
+The same seed always gives the same layout, whatever order the options
+were in beforehand. Copies of a questionId in several files get the same
+layout. The default corpus includes the set files topic manifests build
+from (energy-set*.json, states-of-matter-phase*.json, ...), so a rebuilt
+complete file keeps the balanced layout.
+
+Usage:
+  python3 randomize_mcq_options.py --seed 7                 # plan and report
+  python3 randomize_mcq_options.py --seed 7 --write
+  python3 randomize_mcq_options.py --seed 7 questions/nsw-selective --write
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import string
+import sys
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from question_files import (
+    QuestionFileError, atomic_write, discover_question_files, iter_questions, relpath,
+    rewrite_questions, topic_slug,
+)
+
+LETTERS = string.ascii_uppercase
+MCQ_TYPES = ('MCQ', 'multiple-choice')
+# "The answer is **B", "Correct Answer: A", "Option C" - letters that name an option.
+# A letter followed by a word is the article ("The answer is **A mixture**")
+# or a label of its own ("**A is isotonic, B is ...**"), unless the word says
+# the option is right or wrong ("answer B is correct").
+LETTER_REFERENCE = re.compile(r'((?:[Cc]orrect )?[Aa]nswer(?: is)?:?\s*\**\s*|\b[Oo]ption\s+)([A-E])\b'
+                              r'(?![ \t]+(?!is (?:in)?correct\b)[a-z])')
+
+
+# ============================================
+# OPTION LAYOUT
+# ============================================
+def mcq_shape(question):
+    """(kind, option count, correct index) for a usable MCQ, else None."""
+    if question.get('questionType') not in MCQ_TYPES:
+        return None
+    options = question.get('mcqOptions')
+    if isinstance(options, list) and len(options) >= 2:
+        correct = [i for i, o in enumerate(options) if isinstance(o, dict) and o.get('isCorrect')]
+        return ('mcqOptions', len(options), correct[0]) if len(correct) == 1 else None
+    options = question.get('options')
+    answer = question.get('correctAnswer')
+    if isinstance(options, list) and len(options) >= 2 and isinstance(answer, int) \
+            and 0 <= answer < len(options):
+        return ('options', len(options), answer)
+    return None
+
+
+def _option_key(option):
+    # Feedback breaks ties between identical texts, with option letters
+    # blanked out since those are rewritten whenever options move.
+    if not isinstance(option, dict):
+        return json.dumps(option, ensure_ascii=False)
+    feedback = option.get('feedback')
+    if isinstance(feedback, str):
+        feedback = LETTER_REFERENCE.sub(lambda m: m.group(1), feedback)
+    return json.dumps([option.get('text'), feedback], ensure_ascii=False)
+
+
+def layout(options, correct, target, seed, question_id):
+    """
+    New order for `options` (a list of old indexes) putting the correct one at
+    `target`. Distractors are sorted before the seeded shuffle so the result
+    does not depend on the incoming order.
+    """
+    distractors = sorted((i for i in range(len(options)) if i != correct), key=lambda i: _option_key(options[i]))
+    random.Random(f"{seed}:{question_id}").shuffle(distractors)
+    distractors.insert(target, correct)
+    return distractors
+
+
+def _remap_text(text, mapping):
+    if not isinstance(text, str):
+        return text
+    return LETTER_REFERENCE.sub(lambda m: m.group(1) + mapping.get(m.group(2), m.group(2)), text)
+
+
+def apply_layout(question, order):
+    """Return a copy of `question` with options in `order` (old indexes)."""
+    out = dict(question)
+    if isinstance(question.get('mcqOptions'), list) and question['mcqOptions']:
+        options = question['mcqOptions']
+        mapping = {options[old].get('id', LETTERS[old]): LETTERS[new] for new, old in enumerate(order)}
+        out['mcqOptions'] = [dict(options[old], id=LETTERS[new],
+                                  **({'feedback': _remap_text(options[old]['feedback'], mapping)}
+                                     if 'feedback' in options[old] else {}))
+                             for new, old in enumerate(order)]
+        selective = question.get('nswSelective')
+        if isinstance(selective, dict) and isinstance(selective.get('distractorTypes'), dict):
+            out['nswSelective'] = dict(selective, distractorTypes={
+                mapping.get(k, k): v for k, v in sorted(selective['distractorTypes'].items(),
+                                                        key=lambda kv: mapping.get(kv[0], kv[0]))})
+    else:
+        options = question['options']
+        mapping = {LETTERS[old]: LETTERS[new] for new, old in enumerate(order)}
+        out['options'] = [options[old] for old in order]
+        out['correctAnswer'] = order.index(question['correctAnswer'])
+    if 'solution' in out:
+        out['solution'] = _remap_text(out['solution'], mapping)
+    if isinstance(out.get('hints'), list):
+        out['hints'] = [dict(h, content=_remap_text(h['content'], mapping)) if isinstance(h, dict) and 'content' in h
+                        else _remap_text(h, mapping) for h in out['hints']]
+    return out
+
+
+# ============================================
+# PLANNING
+# ============================================
+def scan_file(path):
+    """Worker: [(questionId, option count, correct index)] for the MCQs in one file."""
+    found = []
+    try:
+        for question in iter_questions(path):
+            shape = mcq_shape(question)
+            if shape:
+                found.append((question.get('questionId'), shape[1], shape[2]))
+            elif question.get('questionType') in MCQ_TYPES:
+                found.append((question.get('questionId'), None, None))
+    except QuestionFileError as e:
+        return path, None, str(e)
+    return path, found, None
+
+
+def _is_aggregate(path):
+    name = os.path.basename(path)
+    return name.endswith(('-complete.json', '-all-testlets.json'))
+
+
+def plan_positions(scans, seed):
+    """
+    Choose a correct position for every questionId.
+
+    A question belongs to the first set/phase file it appears in (complete
+    files only when it has no other home). Positions are chosen greedily,
+    least-used first by set, then topic, then corpus, with seeded tie-breaks.
+    """
+    home = {}
+    shapes = {}
+    skipped = set()
+    for path, found in scans:
+        for qid, count, correct in found:
+            if count is None:
+                skipped.add(qid)
+                continue
+            shapes.setdefault(qid, (count, correct))
+            if qid not in home or (_is_aggregate(home[qid]) and not _is_aggregate(path)):
+                home[qid] = path
+
+    members = defaultdict(dict)   # insertion-ordered set per home file
+    for path, found in scans:
+        for qid, count, _ in found:
+            if count is not None and home.get(qid) == path:
+                members[path][qid] = None
+
+    rng = random.Random(seed)
+    by_topic = defaultdict(list)
+    for path in sorted(members):
+        by_topic[topic_slug(path)].append(path)
+
+    plan = {}
+    corpus = Counter()
+    for topic in sorted(by_topic):
+        topic_counts = Counter()
+        for path in by_topic[topic]:
+            set_counts = Counter()
+            for qid in members[path]:
+                count = shapes[qid][0]
+                target = min(range(count), key=lambda p: (set_counts[p], topic_counts[p], corpus[p], rng.random()))
+                plan[qid] = target
+                set_counts[target] += 1
+                topic_counts[target] += 1
+                corpus[target] += 1
+    return plan, shapes, home, skipped - set(plan)
+
+
+# ============================================
+# REWRITE
+# ============================================
+class _Apply:
+    def __init__(self, plan, seed):
+        self.plan = plan
+        self.seed = seed
+        self.changed = 0
+        self.distribution = Counter()
+
+    def __call__(self, question):
+        qid = question.get('questionId')
+        shape = mcq_shape(question)
+        if qid not in self.plan or not shape:
+            return None
+        kind, count, correct = shape
+        options = question['mcqOptions'] if kind == 'mcqOptions' else question['options']
+        target = self.plan[qid] % count
+        self.distribution[LETTERS[target]] += 1
+        updated = apply_layout(question, layout(options, correct, target, self.seed, qid))
+        if updated == question:
+            return None
+        self.changed += 1
+        return updated
+
+
+def randomise_file(job):
+    """Worker: (path, output_path|None, plan, seed) -> per-file summary."""
+    path, output_path, plan, seed = job
+    apply = _Apply(plan, seed)
+    try:
+        if output_path is None:
+            for question in iter_questions(path):
+                apply(question)
+        else:
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            rewrite_questions(path, apply, output_path)
+    except QuestionFileError as e:
+        return {'file': relpath(path), 'error': str(e)}
+    return {'file': relpath(path), 'error': None, 'changed': apply.changed,
+            'distribution': dict(apply.distribution)}
+
+
+def _files_for(targets):
+    paths = []
+    for target in targets:
+        target = os.path.abspath(target)
+        if os.path.isdir(target):
+            paths.extend(p for p in discover_question_files() if p.startswith(target + os.sep))
+        else:
+            paths.append(target)
+    return paths
+
+
+def _format(distribution):
+    return '  '.join(f"{letter}={distribution.get(letter, 0)}" for letter in LETTERS[:5])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Balance MCQ correct-answer positions across the corpus.')
+    parser.add_argument('files', nargs='*', help='files or directories (default: whole corpus)')
+    parser.add_argument('--seed', type=int, default=0, help='layout seed (default: 0)')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--write', action='store_true', help='rewrite files in place')
+    mode.add_argument('--output-dir', help='write randomised copies under this directory')
+    parser.add_argument('--report', help='write the per-file distribution to this JSON file')
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: CPU count)')
+    args = parser.parse_args(argv)
+
+    paths = _files_for(args.files) if args.files else discover_question_files()
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        scans = []
+        for path, found, error in pool.map(scan_file, paths, chunksize=max(1, len(paths) // 64)):
+            if error:
+                print(f"  ❌ {error}")
+            else:
+                scans.append((path, found))
+
+        plan, shapes, home, skipped = plan_positions(scans, args.seed)
+        before = Counter(LETTERS[correct] for count, correct in (shapes[q] for q in plan))
+        if args.write:
+            jobs = [(p, p, plan, args.seed) for p, _ in scans]
+        elif args.output_dir:
+            jobs = [(p, os.path.join(os.path.abspath(args.output_dir), relpath(p)), plan, args.seed)
+                    for p, _ in scans]
+        else:
+            jobs = [(p, None, plan, args.seed) for p, _ in scans]
+        results = list(pool.map(randomise_file, jobs, chunksize=max(1, len(jobs) // 64)))
+
+    per_topic = defaultdict(Counter)
+    for qid, target in plan.items():
+        per_topic[topic_slug(home[qid])][LETTERS[target]] += 1
+    after = Counter(LETTERS[target] for target in plan.values())
+
+    print('\n' + '═' * 60)
+    print(f"  🎲 MCQ OPTION RANDOMISER (seed {args.seed})")
+    print('═' * 60)
+    print(f"  Files scanned:        {len(paths)}")
+    print(f"  MCQs planned:         {len(plan)}")
+    print(f"  Copies rewritten:     {sum(r.get('changed', 0) for r in results)}")
+    print(f"\n  Before:  {_format(before)}")
+    print(f"  After:   {_format(after)}")
+    print('\n  Per topic:')
+    for topic in sorted(per_topic):
+        print(f"   {topic:40s} {_format(per_topic[topic])}")
+    for result in results:
+        if result['error']:
+            print(f"  ❌ {result['error']}")
+    if skipped:
+        print(f"\n  ⚠️  {len(skipped)} MCQs skipped (no single correct option): "
+              f"{', '.join(sorted(skipped)[:5])}{' ...' if len(skipped) > 5 else ''}")
+    if not args.write and not args.output_dir:
+        print('\n  (plan only - use --write or --output-dir to apply)')
+    print('═' * 60 + '\n')
+
+    if args.report:
+        with atomic_write(args.report) as f:
+            json.dump({'seed': args.seed, 'before': before, 'after': after, 'topics': per_topic, 'files': results},
+                      f, indent=2, ensure_ascii=False)
+        print(f"📄 Report saved to: {args.report}\n")
+    return 1 if any(r['error'] for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
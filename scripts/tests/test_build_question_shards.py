@@ -0,0 +1,66 @@
+import json
+import os
+
+from build_question_shards import main
+from question_files import write_question_file
+
+
+def index(*fields):
+    return {'collectionGroup': 'questions', 'queryScope': 'COLLECTION', 'fields': list(fields)}
+
+
+def write_indexes(path, *indexes):
+    with open(path, 'w') as f:
+        json.dump({'indexes': list(indexes)}, f)
+    return str(path)
+
+
+def science_file(tmp_path):
+    path = str(tmp_path / 'states-of-matter-year8-complete.json')
+    write_question_file(path, [
+        {'questionId': f"som-y8-{n:03d}", 'questionType': 'MCQ', 'difficulty': d, 'status': 'published',
+         'curriculum': {'subject': 'Science', 'year': 8}}
+        for n, d in ((1, 3), (2, 1), (3, 2))
+    ], {})
+    return path
+
+
+def test_shards_are_sorted_id_lists_over_synthetic_tags(tmp_path):
+    indexes = write_indexes(tmp_path / 'indexes.json',
+                            index({'fieldPath': 'tags.topics', 'arrayConfig': 'CONTAINS'},
+                                  {'fieldPath': 'difficulty', 'order': 'ASCENDING'}))
+    out = str(tmp_path / 'shards')
+
+    assert main([science_file(tmp_path), '--indexes', indexes, '--out', out]) == 0
+    with open(os.path.join(out, 'topics_by-difficulty', 'states-of-matter.json')) as f:
+        assert json.load(f) == ['som-y8-002', 'som-y8-003', 'som-y8-001']
+    with open(os.path.join(out, 'packs', 'states-of-matter.json')) as f:
+        assert json.load(f)['som-y8-001']['tags'] == {'topics': ['states-of-matter'], 'years': [8],
+                                                       'subjects': ['science']}
+
+
+def test_check_passes_with_shapes_nothing_carries_yet(tmp_path, capsys):
+    indexes = write_indexes(tmp_path / 'indexes.json',
+                            index({'fieldPath': 'tags.years', 'arrayConfig': 'CONTAINS'},
+                                  {'fieldPath': 'difficulty', 'order': 'ASCENDING'}),
+                            index({'fieldPath': 'tags.years', 'arrayConfig': 'CONTAINS'},
+                                  {'fieldPath': 'updatedAt', 'order': 'DESCENDING'}))
+    args = [science_file(tmp_path), '--indexes', indexes, '--out', str(tmp_path / 'shards')]
+    main(args)
+
+    assert main(args + ['--check']) == 0
+    assert 'no document has updatedAt yet' in capsys.readouterr().out
+
+
+def test_check_fails_when_filters_never_occur_together(tmp_path):
+    path = science_file(tmp_path)
+    other = str(tmp_path / 'skills.json')
+    write_question_file(other, [{'questionId': 'sk-1', 'skills': {'primarySkill': 'ratio'}}], {})
+    indexes = write_indexes(tmp_path / 'indexes.json',
+                            index({'fieldPath': 'status', 'order': 'ASCENDING'},
+                                  {'fieldPath': 'skills.primarySkill', 'order': 'ASCENDING'},
+                                  {'fieldPath': 'difficulty', 'order': 'DESCENDING'}))
+    args = [path, other, '--indexes', indexes, '--out', str(tmp_path / 'shards')]
+    main(args)
+
+    assert main(args + ['--check']) == 1
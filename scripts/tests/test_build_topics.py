@@ -0,0 +1,14 @@
+import build_topics
+from build_topics import BuildError
+
+
+def test_trace_is_written_when_the_manifests_do_not_load(monkeypatch):
+    finished = []
+
+    def broken_manifests():
+        raise BuildError('topics/forces.json: dependency cycle forces -> motion -> forces')
+
+    monkeypatch.setattr(build_topics, 'load_topics', broken_manifests)
+    monkeypatch.setattr(build_topics.Tracer, 'finish', lambda self, *a, **k: finished.append(self.script))
+    assert build_topics.main(['--trace']) == 1
+    assert finished == ['build_topics']
@@ -0,0 +1,37 @@
+import json
+import os
+
+import pytest
+
+from compile_answer_tables import REPO_ROOT, compile_entry, normalize_answer
+
+FIXTURE = os.path.join(REPO_ROOT, 'functions', 'test', 'fixtures', 'answer-normalization.json')
+
+with open(FIXTURE, 'r', encoding='utf-8') as f:
+    CASES = json.load(f)['cases']
+
+
+# functions/test/answer-equivalence.test.js runs normalizeAnswer() over the same cases.
+@pytest.mark.parametrize('case', CASES, ids=[c['input'] for c in CASES])
+def test_normalize_answer_matches_the_shared_fixture(case):
+    assert normalize_answer(case['input']) == (case['key'], case['variable'])
+
+
+def test_entry_accepts_every_form_of_the_solution():
+    entry, problems = compile_entry({'startingExpression': '2x + 3 = 17', 'expectedAnswers': ['x = 7', '7.0']})
+
+    assert problems == []
+    assert entry == {'accept': ['7', '7.0'], 'value': '7', 'variable': 'x'}
+
+
+def test_answers_that_do_not_solve_the_equation_are_flagged():
+    entry, problems = compile_entry({'startingExpression': '2x + 3 = 17', 'expectedAnswers': ['x = 8']})
+
+    assert entry is None
+    assert problems == ["expectedAnswers 8 do not solve '2x + 3 = 17' (7)"]
+
+
+def test_rounding_alternatives_are_compared_by_key_only():
+    entry, _ = compile_entry({'expectedAnswers': ['$13.45', '13.454']})
+
+    assert entry == {'accept': ['13.45', '13.454', '269/20', '6727/500'], 'value': None}
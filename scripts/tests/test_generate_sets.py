@@ -0,0 +1,145 @@
+import pytest
+
+import generate_sets
+from generate_sets import GenerationError, Orchestrator, StubProvider
+from id_allocator import Allocator
+from question_files import iter_questions
+
+
+@pytest.fixture
+def spec(tmp_path):
+    return {
+        'topic': 'ratios-rates',
+        'prefix': 'rr-y8-',
+        'setSize': 4,
+        'target': str(tmp_path / 'ratios-rates-complete.json'),
+        'setDir': str(tmp_path / 'sets'),
+        'metadata': {'topic': 'Ratios and Rates', 'subject': 'Mathematics'},
+        'curriculum': {'subject': 'Mathematics', 'year': 8},
+        'sets': [{'title': f"Rates {n}", 'difficulty': 1, 'questionTypes': ['MCQ', 'SHORT_ANSWER']}
+                 for n in range(1, 4)],
+    }
+
+
+@pytest.fixture
+def allocator(tmp_path):
+    allocator = Allocator(str(tmp_path / 'ids.sqlite'), corpus=[])
+    yield allocator
+    allocator.close()
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(generate_sets, 'BACKOFF_SECONDS', 0)
+
+
+class ScriptedProvider(StubProvider):
+    """StubProvider with outages on the (set, attempt, retry) calls `outage` picks, and broken (set, attempt)s."""
+
+    def __init__(self, outage=lambda number, attempt, retry: False, broken=()):
+        super().__init__()
+        self.outage = outage
+        self.broken = broken
+        self.calls = []
+        self.requests = []
+
+    def generate(self, request):
+        key = (request['setNumber'], request['attempt'], request['retry'])
+        self.calls.append(key)
+        self.requests.append(request)
+        if self.outage(*key):
+            raise GenerationError('scripted outage')
+        self.invalid_rate = 1.0 if key[:2] in self.broken else 0.0
+        return super().generate(request)
+
+
+def target_ids(spec):
+    return [q['questionId'] for q in iter_questions(spec['target'])]
+
+
+def test_generates_and_merges_every_set(spec, allocator):
+    summary = Orchestrator(spec, StubProvider(), workers=2, allocator=allocator, verbose=False).run()
+
+    assert summary == {'sets': 3, 'generated': 3, 'reused': 0, 'failed': {}, 'mergedThrough': 3,
+                       'providerCalls': 3}
+    assert target_ids(spec) == [f"rr-y8-{n:03d}" for n in range(1, 13)]
+    assert [b.status for b in allocator.blocks('rr-y8-')] == ['committed'] * 3
+
+
+def test_provider_errors_are_retried(spec, allocator):
+    provider = ScriptedProvider(outage=lambda number, attempt, retry: number == 2 and retry < 2)
+    summary = Orchestrator(spec, provider, retries=2, allocator=allocator, verbose=False).run()
+
+    assert summary['failed'] == {}
+    assert summary['providerCalls'] == 5
+    assert sorted(c for c in provider.calls if c[0] == 2) == [(2, 1, 0), (2, 1, 1), (2, 1, 2)]
+
+
+def test_invalid_sets_are_regenerated_with_the_errors(spec, allocator):
+    provider = ScriptedProvider(broken={(1, 1)})
+    summary = Orchestrator(spec, provider, allocator=allocator, verbose=False).run()
+
+    assert summary['failed'] == {}
+    retry = [r for r in provider.requests if r['setNumber'] == 1 and r['attempt'] == 2]
+    assert len(retry) == 1 and retry[0]['previousErrors']
+    assert len(list(iter_questions(spec['target']))) == 12
+
+
+def test_exhausted_retries_fail_the_set_and_keep_its_block(spec, allocator):
+    provider = ScriptedProvider(outage=lambda number, attempt, retry: number == 2)
+    summary = Orchestrator(spec, provider, retries=1, allocator=allocator, verbose=False).run()
+
+    assert list(summary['failed']) == [2]
+    assert summary['providerCalls'] == 2 + 2
+    # Set 3 is written, but the complete file stops at the gap.
+    assert summary['mergedThrough'] == 1
+    assert target_ids(spec) == [f"rr-y8-{n:03d}" for n in range(1, 5)]
+    reserved = allocator.blocks('rr-y8-', 'reserved')
+    assert [(b.owner, b.start) for b in reserved] == [('ratios-rates set 2', 5)]
+
+
+def test_rerun_reuses_written_sets_and_fills_the_gap(spec, allocator):
+    failing = ScriptedProvider(outage=lambda number, attempt, retry: number == 2)
+    Orchestrator(spec, failing, retries=0, allocator=allocator, verbose=False).run()
+
+    provider = ScriptedProvider()
+    summary = Orchestrator(spec, provider, allocator=allocator, verbose=False).run()
+
+    assert summary['reused'] == 2 and summary['generated'] == 1 and summary['failed'] == {}
+    assert {c[0] for c in provider.calls} == {2}
+    assert summary['mergedThrough'] == 3
+    # Set 2 gets its reserved block back rather than numbering past set 3.
+    assert target_ids(spec) == [f"rr-y8-{n:03d}" for n in range(1, 13)]
+    assert allocator.series()['rr-y8-']['next'] == 13
+
+
+def test_merge_frontier_waits_for_earlier_sets(spec, allocator):
+    orchestrator = Orchestrator(spec, StubProvider(), allocator=allocator, verbose=False)
+    jobs = orchestrator.plan()
+    provider = StubProvider()
+    for job in reversed(jobs):
+        job.attempts = 1
+        assert orchestrator.finish_set(job, provider.generate(dict(job.request(spec), retry=0)))
+        orchestrator.merge_ready()
+        if job.number > 1:
+            assert orchestrator.merged_through == 0
+    assert orchestrator.merged_through == 3
+    assert len(target_ids(spec)) == 12
+
+
+def test_merges_are_always_a_prefix_of_the_sets(spec, allocator, monkeypatch):
+    merged = []
+    real_merge = generate_sets.merge
+
+    def recording_merge(target, sources, **kwargs):
+        merged.append(list(sources))
+        return real_merge(target, sources, **kwargs)
+
+    monkeypatch.setattr(generate_sets, 'merge', recording_merge)
+    spec['sets'] *= 2
+    Orchestrator(spec, StubProvider(latency=0.01), workers=4, allocator=allocator, verbose=False).run()
+
+    assert len(merged[-1]) == 6
+    for sources in merged:
+        numbers = [int(s.rsplit('-set', 1)[1].split('-')[0]) for s in sources]
+        assert numbers == list(range(1, len(numbers) + 1))
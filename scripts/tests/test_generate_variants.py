@@ -0,0 +1,56 @@
+from archetype_templates import TEMPLATES
+from generate_variants import generate, signature
+from validate_questions import validate_question
+
+PROFILE = {
+    'nswSelective': {'archetype': 'Money problems', 'conceptsRequired': ['money'],
+                     'solutionApproach': 'Set up the sums', 'commonErrors': []},
+    'curriculum': {'subject': 'Mathematics', 'stage': 'NSW Selective'},
+}
+
+
+def correct_text(question):
+    return next(o['text'] for o in question['mcqOptions'] if o['isCorrect'])
+
+
+def test_same_seed_gives_the_same_variants():
+    first, _, _ = generate('qa6', 8, seed=11, profile=PROFILE, seen=set())
+    again, _, _ = generate('qa6', 8, seed=11, profile=PROFILE, seen=set())
+    other, _, _ = generate('qa6', 8, seed=12, profile=PROFILE, seen=set())
+    assert first == again
+    assert [q['stem'] for q in first] != [q['stem'] for q in other]
+
+
+def test_existing_items_are_not_generated_again():
+    existing, _, _ = generate('qa5', 10, seed=3, profile=PROFILE, seen=set())
+    # The corpus writes money unescaped; it must still match the escaped variants.
+    seen = {signature({**q, 'stem': q['stem'].replace('\\$', '$'),
+                       'mcqOptions': [{**o, 'text': o['text'].replace('\\$', '$')} for o in q['mcqOptions']]})
+            for q in existing}
+    again, rejected, _ = generate('qa5', 10, seed=3, profile=PROFILE, seen=seen)
+    assert rejected['duplicate'] >= 10
+    assert not {signature(q) for q in again} & {signature(q) for q in existing}
+
+
+def test_answers_are_recomputed_from_the_stored_params():
+    for archetype in ('qa5', 'qa6', 'qa13'):
+        template = TEMPLATES[archetype]
+        questions, _, _ = generate(archetype, 5, seed=7, profile=PROFILE, seen=set())
+        assert len(questions) == 5
+        for question in questions:
+            v = template.bind(question['nswSelective']['variant']['params'])
+            assert template.check(v)
+            assert correct_text(question) == template.text(v.answer, v).replace('$', '\\$')
+    for question in generate('qa13', 5, seed=7, profile=PROFILE, seen=set())[0]:
+        params = question['nswSelective']['variant']['params']
+        v = TEMPLATES['qa13'].bind(params)
+        assert v.answer == params['original'] and v.answer * v.rate == 100 * v.final
+
+
+def test_money_is_escaped_and_variants_pass_every_layer():
+    questions, _, _ = generate('qa5', 10, seed=5, profile=PROFILE, seen=set())
+    for question in questions:
+        assert '$' not in question['stem'].replace('\\$', '')
+        result = validate_question(question)
+        for layer in ('schema', 'content', 'pedagogy', 'presentation'):
+            assert not [i for i in result[layer] if i['severity'] == 'error' and i['field'] != 'questionId']
@@ -0,0 +1,110 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from id_allocator import Allocator, AllocatorError, apply_renumber, check_renumber, plan_renumber
+from question_files import iter_questions, write_question_file
+
+PREFIX = 'ecm-y8-'
+
+
+def sample(n, stem=None, builds_on=()):
+    return {'questionId': f"{PREFIX}{n:03d}", 'stem': stem or f"Is sample {n} an element, a compound or a mixture?",
+            'learningArc': {'buildsOn': list(builds_on)}, 'paperMetadata': {'sequenceInPaper': n}}
+
+
+def _allocate_many(db, count):
+    allocator = Allocator(db, corpus=[])
+    try:
+        return [allocator.allocate(PREFIX, 5, owner=f"worker {n}").sequences for n in range(count)]
+    finally:
+        allocator.close()
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / 'ids.sqlite')
+
+
+def test_new_series_starts_after_the_corpus_maximum(db, tmp_path):
+    path = str(tmp_path / 'elements.json')
+    write_question_file(path, [sample(1), sample(7)], {})
+    allocator = Allocator(db, corpus=[path])
+
+    block = allocator.allocate(PREFIX, 10, owner='set 2')
+    assert block.ids[0] == 'ecm-y8-008' and block.ids[-1] == 'ecm-y8-017'
+    assert block.question_range == 'Q8-Q17'
+    with pytest.raises(AllocatorError):
+        allocator.allocate('ecm-y8-1', 10)
+
+
+def test_concurrent_processes_never_share_numbers(db):
+    with ProcessPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(_allocate_many, [db] * 12, [10] * 12))
+
+    numbers = [n for blocks in results for block in blocks for n in block]
+    assert len(numbers) == 12 * 10 * 5
+    assert sorted(numbers) == list(range(1, len(numbers) + 1))
+    allocator = Allocator(db, corpus=[])
+    assert allocator.series()[PREFIX]['next'] == len(numbers) + 1
+    assert len(allocator.blocks(PREFIX, 'reserved')) == 120
+
+
+def test_release_of_the_last_block_hands_its_numbers_back(db):
+    allocator = Allocator(db, corpus=[])
+    first = allocator.allocate(PREFIX, 10)
+    second = allocator.allocate(PREFIX, 10)
+    allocator.release(first.id)
+    third = allocator.allocate(PREFIX, 10)
+    assert third.start == 21
+    allocator.release(third.id)
+    allocator.release(second.id)
+    assert allocator.allocate(PREFIX, 10).start == 11
+
+
+@pytest.fixture
+def merged(tmp_path):
+    """A complete file with gaps (1, 5, 9), its set file copy of 5, and a file that builds on 9."""
+    complete = str(tmp_path / 'elements-compounds-mixtures-complete.json')
+    write_question_file(complete, [sample(1), sample(5), sample(9, builds_on=[f"{PREFIX}005"])], {})
+    copy = str(tmp_path / 'elements-compounds-mixtures-set2.json')
+    write_question_file(copy, [sample(5)], {})
+    other = str(tmp_path / 'pumps.json')
+    write_question_file(other, [{'questionId': 'pump-y8-001', 'stem': 'Pumps',
+                                 'learningArc': {'buildsOn': [f"{PREFIX}009"]}}], {})
+    return complete, copy, other
+
+
+def test_renumber_closes_gaps_in_copies_and_references(merged):
+    complete, copy, other = merged
+    mapping, hashes = plan_renumber([complete], PREFIX)
+    assert mapping == {'ecm-y8-001': 'ecm-y8-001', 'ecm-y8-005': 'ecm-y8-002', 'ecm-y8-009': 'ecm-y8-003'}
+    assert check_renumber([complete], mapping, hashes, corpus=merged) == []
+
+    apply_renumber([complete], mapping, hashes, corpus=merged)
+    renumbered = list(iter_questions(complete))
+    assert [q['questionId'] for q in renumbered] == ['ecm-y8-001', 'ecm-y8-002', 'ecm-y8-003']
+    assert [q['paperMetadata']['sequenceInPaper'] for q in renumbered] == [1, 2, 3]
+    assert renumbered[2]['learningArc']['buildsOn'] == ['ecm-y8-002']
+    assert [q['questionId'] for q in iter_questions(copy)] == ['ecm-y8-002']
+    assert next(iter_questions(other))['learningArc']['buildsOn'] == ['ecm-y8-003']
+
+
+def test_renumber_refuses_ids_taken_elsewhere(merged, tmp_path):
+    complete, _, _ = merged
+    squatter = str(tmp_path / 'elements-draft.json')
+    write_question_file(squatter, [sample(2, stem='An unrelated draft')], {})
+    mapping, hashes = plan_renumber([complete], PREFIX)
+
+    problems = check_renumber([complete], mapping, hashes, corpus=list(merged) + [squatter])
+    assert len(problems) == 1 and problems[0].startswith('ecm-y8-002 is already used in')
+
+
+def test_renumber_refuses_diverged_copies(merged):
+    complete, copy, _ = merged
+    write_question_file(copy, [sample(5, stem='Edited in the set file only')], {})
+    mapping, hashes = plan_renumber([complete], PREFIX)
+
+    problems = check_renumber([complete], mapping, hashes, corpus=merged)
+    assert len(problems) == 1
+    assert problems[0].startswith('ecm-y8-005 in ') and problems[0].endswith('differs from the copy being renumbered')
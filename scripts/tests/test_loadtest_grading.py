@@ -0,0 +1,33 @@
+from loadtest_grading import build_requests, gradeable_questions, summarize
+from question_files import write_question_file
+
+
+def test_only_short_answers_the_grade_endpoint_accepts_are_replayed(tmp_path):
+    path = str(tmp_path / 'matter-year8-complete.json')
+    write_question_file(path, [
+        {'questionId': 'som-1', 'questionType': 'SHORT_ANSWER', 'stem': 'Why does ice float?',
+         'solution': 'Ice is less dense than water.', 'curriculum': {'subject': 'Science'}},
+        {'questionId': 'som-2', 'questionType': 'WORKED_SOLUTION', 'stem': 'Find the density.',
+         'solution': 'd = m / V = 2 g/cm³', 'curriculum': {'subject': 'Science'}},
+        {'questionId': 'lin-1', 'questionType': 'SHORT_ANSWER', 'stem': 'Solve 2x = 6.',
+         'solution': 'x = 3', 'curriculum': {'subject': 'Mathematics'}},
+        {'questionId': 'som-3', 'questionType': 'MCQ', 'stem': 'Which is a gas?',
+         'solution': 'Steam.', 'curriculum': {'subject': 'Science'}},
+    ], {})
+
+    questions = gradeable_questions([path])
+    assert [q['questionId'] for q in questions] == ['som-1']
+    requests = build_requests(questions, 20, {'model': 1, 'truncated': 1, 'distractor': 1}, seed=3)
+    assert {r['questionId'] for r in requests} == {'som-1'}
+
+
+def test_summary_reports_engines_without_answer_tables():
+    results = [{'status': 200, 'latency': 0.5, 'engine': 'deepseek-chat', 'stage': 'B', 'pct': 0.9,
+                'kind': 'model', 'error': None},
+               {'status': 400, 'latency': 0.1, 'engine': None, 'stage': None, 'pct': None,
+                'kind': 'model', 'error': 'NOT_SHORT_ANSWER'}]
+    summary = summarize(results, 1.0, {'calls:deepseek-chat': 1})
+
+    assert 'answerTableRate' not in summary
+    assert summary['engines'] == {'deepseek-chat': 1}
+    assert summary['errors'] == {'400 NOT_SHORT_ANSWER': 1}
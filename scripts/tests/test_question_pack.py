@@ -0,0 +1,40 @@
+import json
+
+from question_pack import QuestionPack, pack, verify
+
+
+def write_json(path, value):
+    # JSON.stringify(data, null, 2) style, which packs round-trip byte for byte
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(value, indent=2, ensure_ascii=False))
+    return str(path)
+
+
+def rates_question(n):
+    return {'questionId': f"ratio-rate-y8-{n:03d}", 'questionType': 'SHORT_ANSWER',
+            'stem': f"A car travels {n * 10} km in 2 hours. What is its speed?",
+            'curriculum': {'subject': 'Mathematics', 'year': 8, 'codes': ['ACMNA188']}}
+
+
+def test_dicts_outside_the_question_list_are_packed_inline(tmp_path):
+    path = write_json(tmp_path / 'rates.json', {
+        'metadata': {'topic': 'Ratios and Rates', 'related': {'questionId': 'x-9'}},
+        'questions': [rates_question(1), rates_question(2)],
+    })
+    out = str(tmp_path / 'questions.bsqp')
+    summary = pack([path], out)
+
+    assert summary['questions'] == 2
+    assert verify(out, [path]) == ([], 1)
+
+
+def test_copies_share_one_question_and_decode_by_id(tmp_path):
+    complete = write_json(tmp_path / 'rates-complete.json', {'questions': [rates_question(n) for n in range(1, 4)]})
+    set_file = write_json(tmp_path / 'rates-set1.json', {'questions': [rates_question(1)]})
+    out = str(tmp_path / 'questions.bsqp')
+    summary = pack([complete, set_file], out)
+
+    assert summary['rows'] == 4 and summary['questions'] == 3
+    assert verify(out, [complete, set_file]) == ([], 2)
+    with QuestionPack(out) as reader:
+        assert reader.get('ratio-rate-y8-002') == rates_question(2)
@@ -0,0 +1,26 @@
+from question_files import write_question_file
+from question_versions import VersionStore
+
+FORCES = [
+    {'questionId': 'forces-y7-001', 'questionType': 'MCQ', 'stem': 'Which force slows a sliding box?',
+     'solution': 'Friction acts against the motion.'},
+    {'questionId': 'forces-y7-002', 'questionType': 'SHORT_ANSWER', 'stem': 'Define weight.',
+     'solution': 'The gravitational force on a mass.'},
+]
+
+
+def test_snapshot_brings_an_edited_file_back_byte_for_byte(tmp_path):
+    path = str(tmp_path / 'forces-year7-complete.json')
+    write_question_file(path, FORCES, {'topic': 'Forces'})
+    original = open(path, 'rb').read()
+    store = VersionStore(str(tmp_path / 'versions'))
+    snapshot, trees, blobs = store.snapshot([path], 'before edit')
+    assert (trees, blobs) == (1, 2)
+
+    write_question_file(path, [FORCES[0], {**FORCES[1], 'solution': 'Mass times g.'}], {'topic': 'Forces'})
+    (digest,) = snapshot['files'].values()
+    assert store.file_bytes(digest) == original
+
+    # The unchanged question is not stored again.
+    _, trees, blobs = store.snapshot([path], 'after edit')
+    assert (trees, blobs) == (1, 1)
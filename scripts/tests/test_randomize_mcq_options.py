@@ -0,0 +1,48 @@
+import pytest
+
+from randomize_mcq_options import _remap_text, apply_layout, layout
+
+SWAP = {'A': 'D', 'B': 'C', 'C': 'B', 'D': 'A'}
+
+
+@pytest.mark.parametrize('text', [
+    # ecm-y8-021, ecm-y8-031, cells-y8-049: "A" here is the article or a label, not an option.
+    'The answer is **A single gold atom**.',
+    'The answer is **A mixture (alloy)**.\n\nBrass is copper and zinc.',
+    'The answer is **A is isotonic, B is hypotonic, C is hypertonic to the cell interior**',
+])
+def test_articles_and_labels_are_left_alone(text):
+    assert _remap_text(text, SWAP) == text
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('The answer is **B**.', 'The answer is **C**.'),
+    ('Correct Answer: A', 'Correct Answer: D'),
+    ('Option C is wrong because the units differ.', 'Option C is wrong because the units differ.'),
+    ('Not option D.', 'Not option A.'),
+    ('So answer B is correct. I made an error.', 'So answer C is correct. I made an error.'),
+    ('The answer is **A** (a single gold atom).', 'The answer is **D** (a single gold atom).'),
+])
+def test_option_references_are_remapped(text, expected):
+    assert _remap_text(text, SWAP) == expected
+
+
+def test_apply_layout_keeps_the_solution_article():
+    question = {
+        'questionId': 'ecm-y8-021',
+        'questionType': 'MCQ',
+        'stem': 'What does the symbol Au represent?',
+        'mcqOptions': [
+            {'id': 'A', 'text': 'A single gold atom', 'isCorrect': True, 'feedback': 'Correct!'},
+            {'id': 'B', 'text': 'A gold compound', 'isCorrect': False, 'feedback': 'Not option A.'},
+            {'id': 'C', 'text': 'A mixture of gold and silver', 'isCorrect': False},
+            {'id': 'D', 'text': 'Silver', 'isCorrect': False},
+        ],
+        'solution': 'The answer is **A single gold atom**.',
+    }
+    order = layout(question['mcqOptions'], 0, 3, seed=7, question_id='ecm-y8-021')
+    moved = apply_layout(question, order)
+
+    assert moved['mcqOptions'][3]['text'] == 'A single gold atom' and moved['mcqOptions'][3]['isCorrect']
+    assert moved['solution'] == question['solution']
+    assert 'Not option D.' in [o.get('feedback') for o in moved['mcqOptions']]
@@ -0,0 +1,129 @@
+import os
+
+import pytest
+
+import upload_questions
+from question_files import write_question_file
+from upload_questions import LocalTarget, Snapshot, UploadError, upload
+
+
+def light_question(n, stem=None):
+    return {'questionId': f"light-y8-{n:03d}", 'questionType': 'SHORT_ANSWER',
+            'stem': stem or f"Draw the reflected ray for mirror diagram {n}.", 'paperMetadata': {'sequenceInPaper': n}}
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    path = str(tmp_path / 'light-year8-complete.json')
+    write_question_file(path, [light_question(n) for n in range(1, 11)], {'metadata': {'topic': 'Light'}})
+    return path
+
+
+@pytest.fixture
+def target(tmp_path):
+    return LocalTarget(str(tmp_path / 'db'))
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    return str(tmp_path / 'uploads' / 'questions-local-snapshot.json')
+
+
+@pytest.fixture(autouse=True)
+def single_attempt(monkeypatch):
+    monkeypatch.setattr(upload_questions, 'MAX_ATTEMPTS', 1)
+
+
+class FlakyTarget(LocalTarget):
+    """LocalTarget whose commits fail for batches holding any of `failing` ids."""
+
+    def __init__(self, directory, failing):
+        super().__init__(directory)
+        self.failing = set(failing)
+        self.committed = []
+
+    def commit(self, docs):
+        docs = list(docs)
+        if self.failing & {doc_id for doc_id, _ in docs}:
+            raise OSError('target unavailable')
+        self.committed.extend(doc_id for doc_id, _ in docs)
+        super().commit(docs)
+
+
+def stored(target):
+    return dict(target.fetch_hashes())
+
+
+def test_first_upload_writes_everything_and_saves_the_snapshot(corpus, target, snapshot_path):
+    snapshot = Snapshot(snapshot_path)
+    stats = upload([corpus], target, snapshot, batch_size=3, workers=2, verbose=False)
+    snapshot.save()
+
+    assert stats['changed'] == 10 and stats['batches'] == 4 and stats['failed_batches'] == 0
+    assert sorted(stats['uploaded']) == [f"light-y8-{n:03d}" for n in range(1, 11)]
+    assert Snapshot(snapshot_path).hashes == stored(target)
+    assert not os.path.exists(snapshot_path + '.journal')
+
+
+def test_delta_upload_sends_only_changed_and_new_questions(corpus, target, snapshot_path):
+    snapshot = Snapshot(snapshot_path)
+    upload([corpus], target, snapshot, verbose=False)
+    snapshot.save()
+
+    questions = [light_question(n) for n in range(1, 12)]
+    questions[3] = light_question(4, stem='Draw the reflected ray for mirror diagram 4, labelling both angles.')
+    write_question_file(corpus, questions, {'metadata': {'topic': 'Light'}})
+    snapshot = Snapshot(snapshot_path)
+    stats = upload([corpus], target, snapshot, verbose=False)
+
+    assert sorted(stats['uploaded']) == ['light-y8-004', 'light-y8-011']
+    assert stats['unchanged'] == 9
+    assert snapshot.hashes == stored(target)
+
+
+def test_dry_run_lists_pending_without_writing(corpus, target, snapshot_path):
+    stats = upload([corpus], target, Snapshot(snapshot_path), dry_run=True, verbose=False)
+
+    assert len(stats['pending']) == 10
+    assert stored(target) == {}
+    assert not os.path.exists(snapshot_path + '.journal')
+
+
+def test_interrupted_run_resumes_from_the_journal(corpus, tmp_path, snapshot_path):
+    flaky = FlakyTarget(str(tmp_path / 'db'), failing={'light-y8-009'})
+    snapshot = Snapshot(snapshot_path)
+    stats = upload([corpus], flaky, snapshot, batch_size=4, workers=1, verbose=False)
+    # The run dies here: no snapshot.save(), only the journal of committed batches survives.
+    assert stats['failed_batches'] == 1
+    assert not os.path.exists(snapshot_path)
+
+    resumed = Snapshot(snapshot_path)
+    assert resumed.recovered == 8
+    target = FlakyTarget(str(tmp_path / 'db'), failing=())
+    stats = upload([corpus], target, resumed, batch_size=4, verbose=False)
+    resumed.save()
+
+    assert target.committed == ['light-y8-009', 'light-y8-010']
+    assert stats['unchanged'] == 8
+    assert Snapshot(snapshot_path).hashes == stored(target)
+    assert not os.path.exists(snapshot_path + '.journal')
+
+
+def test_torn_journal_line_is_ignored(corpus, target, snapshot_path):
+    snapshot = Snapshot(snapshot_path)
+    upload([corpus], target, snapshot, batch_size=5, workers=1, verbose=False)
+    snapshot._journal.close()
+    with open(snapshot_path + '.journal', 'a') as f:
+        f.write('{"id": "light-y8-0')
+
+    resumed = Snapshot(snapshot_path)
+    assert resumed.recovered == 10
+    assert resumed.hashes == stored(target)
+
+
+def test_conflicting_duplicate_ids_abort(corpus, tmp_path, target, snapshot_path):
+    other = str(tmp_path / 'other.json')
+    write_question_file(other, [light_question(1, stem='Something else')], {})
+
+    with pytest.raises(UploadError, match='light-y8-001'):
+        upload([corpus, other], target, Snapshot(snapshot_path), verbose=False)
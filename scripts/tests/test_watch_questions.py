@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+
+from question_files import write_question_file
+from watch_questions import Daemon
+
+ATOMS = {'questionId': 'atoms-y8-001', 'questionType': 'SHORT_ANSWER', 'difficulty': 2, 'estimatedTime': 60,
+         'stem': 'What particles are found in the nucleus of an atom?',
+         'solution': 'Protons and neutrons are found in the nucleus.',
+         'curriculum': {'subject': 'Science', 'topic': 'Atoms'}}
+
+
+def save(daemon, path, questions):
+    write_question_file(path, questions, {'topic': 'Atoms'})
+    return daemon._print_change(path, *daemon.corpus.refresh(path))
+
+
+def test_only_errors_a_save_introduces_hold_back_the_merge(tmp_path, capsys):
+    path = str(tmp_path / 'atoms-set1.json')
+    daemon = Daemon(index_path=str(tmp_path / 'index.sqlite'), remerge=True)
+    broken = {**ATOMS, 'questionType': 'MCQ'}
+    assert save(daemon, path, [broken]) > 0
+    # Editing another field of a question that was already broken adds nothing new.
+    assert save(daemon, path, [{**broken, 'estimatedTime': 90}]) == 0
+    assert 'already there' in capsys.readouterr().out
+    assert save(daemon, path, [ATOMS]) == 0
+
+    daemon.corpus.topics = {'atoms': SimpleNamespace(sources=[path], target=str(tmp_path / 'atoms-complete.json'))}
+    assert daemon._merge([path], {path: 2}) == []
+    assert 'atoms: not re-merged (' in capsys.readouterr().out.splitlines()[-1]
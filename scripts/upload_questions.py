@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Delta uploader for the Firestore `questions` collection.
+
+Every question is hashed and compared with a snapshot of what was last
+written to the collection; only new or changed documents are uploaded.
+Batches (max 500 writes each in Firestore) are committed concurrently, and
+each committed batch is appended to a journal next to the snapshot. If a run
+dies part way, the next run replays the journal and picks up where it
+stopped.
+
+Targets:
+  firestore      GOOGLE_APPLICATION_CREDENTIALS service account, or the
+                 emulator when FIRESTORE_EMULATOR_HOST is set
+  local:DIR      one JSON file per document under DIR (a stand-in for tests
+                 and dry runs against a real directory)
+
+Usage:
+  python3 upload_questions.py questions/energy-forms-transformations-year8-complete.json
+  python3 upload_questions.py questions/*-complete.json --dry-run
+  python3 upload_questions.py --refresh-snapshot       # re-read hashes from Firestore
+  python3 upload_questions.py FILE --target local:/tmp/questions-db
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from pipeline_trace import Tracer
+from question_files import (
+    SCRIPTS_DIR, QuestionStream, atomic_write, question_hash, relpath, topic_slug,
+)
+
+UPLOADS_DIR = os.path.join(SCRIPTS_DIR, 'uploads')
+DEFAULT_PROJECT = 'thebrainspark-project'
+DEFAULT_COLLECTION = 'questions'
+MAX_BATCH_SIZE = 500
+DEFAULT_BATCH_SIZE = 400
+DEFAULT_WORKERS = 4
+MAX_ATTEMPTS = 4
+
+
+class UploadError(Exception):
+    pass
+
+
+# ============================================
+# TARGETS
+# ============================================
+class FirestoreTarget:
+    """Writes through google-cloud-firestore (installed with firebase-admin)."""
+
+    def __init__(self, collection=DEFAULT_COLLECTION, project=DEFAULT_PROJECT):
+        try:
+            from google.cloud import firestore
+        except ImportError as e:
+            raise UploadError('google-cloud-firestore is not installed '
+                              '(pip install firebase-admin)') from e
+
+        if os.environ.get('FIRESTORE_EMULATOR_HOST'):
+            self.client = firestore.Client(project=project)
+            self.description = f"emulator {os.environ['FIRESTORE_EMULATOR_HOST']}/{collection}"
+        else:
+            credentials_path = os.environ.get('GOOGLE_APPLICATION_CREDENTIALS')
+            if not credentials_path:
+                raise UploadError('GOOGLE_APPLICATION_CREDENTIALS environment variable not set')
+            self.client = firestore.Client.from_service_account_json(credentials_path)
+            self.description = f"{self.client.project}/{collection}"
+        self.collection = self.client.collection(collection)
+        self.snapshot_name = f"{collection}-snapshot.json"
+
+    def commit(self, docs):
+        batch = self.client.batch()
+        for doc_id, doc in docs:
+            batch.set(self.collection.document(doc_id), doc)
+        batch.commit()
+
+    def fetch_hashes(self):
+        for snapshot in self.collection.stream():
+            yield snapshot.id, question_hash(snapshot.to_dict())
+
+
+class LocalTarget:
+    """Stores each document as DIR/<questionId>.json."""
+
+    def __init__(self, directory, collection=DEFAULT_COLLECTION):
+        self.directory = os.path.join(os.path.abspath(directory), collection)
+        os.makedirs(self.directory, exist_ok=True)
+        self.description = self.directory
+        self.snapshot_name = f"{collection}-local-snapshot.json"
+
+    def _path(self, doc_id):
+        return os.path.join(self.directory, f"{doc_id.replace('/', '_')}.json")
+
+    def commit(self, docs):
+        for doc_id, doc in docs:
+            with atomic_write(self._path(doc_id)) as f:
+                json.dump(doc, f, ensure_ascii=False)
+
+    def fetch_hashes(self):
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith('.json'):
+                with open(os.path.join(self.directory, name), 'r', encoding='utf-8') as f:
+                    doc = json.load(f)
+                yield doc.get('questionId', name[:-5]), question_hash(doc)
+
+
+def make_target(spec, collection, project):
+    if spec == 'firestore':
+        return FirestoreTarget(collection, project)
+    if spec.startswith('local:'):
+        return LocalTarget(spec[len('local:'):], collection)
+    raise UploadError(f"unknown target '{spec}' (use firestore or local:DIR)")
+
+
+# ============================================
+# SNAPSHOT + JOURNAL
+# ============================================
+class Snapshot:
+    """
+    questionId -> content hash of what the target holds.
+
+    Committed batches are appended to `<path>.journal` as they land, so the
+    large snapshot file is only rewritten once per run (or on recovery).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.journal_path = path + '.journal'
+        self.hashes = {}
+        self.recovered = 0
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.hashes = json.load(f).get('documents', {})
+        if os.path.exists(self.journal_path):
+            self.recovered = self._replay_journal()
+        self._journal = None
+
+    def _replay_journal(self):
+        count = 0
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # torn final line from a crash mid-write
+                self.hashes[entry['id']] = entry['hash']
+                count += 1
+        return count
+
+    def needs_upload(self, doc_id, digest):
+        return self.hashes.get(doc_id) != digest
+
+    def record(self, entries):
+        """Durably note a committed batch of (doc_id, hash)."""
+        if self._journal is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        for doc_id, digest in entries:
+            self.hashes[doc_id] = digest
+            self._journal.write(json.dumps({'id': doc_id, 'hash': digest}) + '\n')
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def replace(self, hashes):
+        self.hashes = dict(hashes)
+
+    def save(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with atomic_write(self.path) as f:
+            json.dump({
+                'updatedAt': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+                'documentCount': len(self.hashes),
+                'documents': dict(sorted(self.hashes.items())),
+            }, f, indent=2)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+
+# ============================================
+# PLANNING + UPLOAD
+# ============================================
+def iter_changed(paths, snapshot, stats):
+    """Yield (doc_id, question, hash) for questions the target does not already hold."""
+    seen = {}
+    for path in paths:
+        topic = topic_slug(path)
+        for record in QuestionStream(path):
+            question = record.question
+            doc_id = question.get('questionId')
+            if not doc_id:
+                stats['skipped_no_id'] += 1
+                continue
+            digest = question_hash(question)
+            if doc_id in seen:
+                if seen[doc_id] != digest:
+                    raise UploadError(f"{doc_id} appears with different content in {relpath(path)}")
+                continue
+            seen[doc_id] = digest
+            stats['total'] += 1
+            if snapshot.needs_upload(doc_id, digest):
+                stats['changed'] += 1
+                stats['topics'][doc_id] = topic
+                yield doc_id, question, digest
+            else:
+                stats['unchanged'] += 1
+
+
+def _commit_with_retry(target, batch):
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            target.commit([(doc_id, doc) for doc_id, doc, _ in batch])
+            return
+        except Exception:
+            if attempt == MAX_ATTEMPTS:
+                raise
+            time.sleep(0.5 * 2 ** (attempt - 1))
+
+
+def upload(paths, target, snapshot, batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS,
+           dry_run=False, verbose=True):
+    """Upload new/changed questions. Returns a stats dict including uploaded ids."""
+    stats = {'total': 0, 'changed': 0, 'unchanged': 0, 'skipped_no_id': 0,
+             'batches': 0, 'failed_batches': 0, 'uploaded': [], 'topics': {}}
+    changed = iter_changed(paths, snapshot, stats)
+
+    if dry_run:
+        stats['pending'] = [doc_id for doc_id, _, _ in changed]
+        return stats
+
+    def batches():
+        batch = []
+        for item in changed:
+            batch.append(item)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        def drain(return_when):
+            done, _ = wait(in_flight, return_when=return_when)
+            for future in done:
+                batch = in_flight.pop(future)
+                try:
+                    future.result()
+                except Exception as e:
+                    stats['failed_batches'] += 1
+                    if verbose:
+                        print(f"  ❌ Batch of {len(batch)} failed ({batch[0][0]}...): {e}")
+                    continue
+                snapshot.record((doc_id, digest) for doc_id, _, digest in batch)
+                stats['uploaded'].extend(doc_id for doc_id, _, _ in batch)
+                if verbose:
+                    print(f"  ✓ Committed {len(batch)} questions ({len(stats['uploaded'])} so far)")
+
+        for batch in batches():
+            stats['batches'] += 1
+            in_flight[pool.submit(_commit_with_retry, target, batch)] = batch
+            # Backpressure: keep at most two batches per worker in memory.
+            if len(in_flight) >= workers * 2:
+                drain(FIRST_COMPLETED)
+        if in_flight:
+            drain(ALL_COMPLETED)
+
+    return stats
+
+
+def write_rollback_file(directory, label, uploaded_ids):
+    """
+    Same <topic>-<date>-ids.json rollback list the Node uploaders write.
+    Later uploads on the same day are appended, so the file covers the day.
+    """
+    os.makedirs(directory, exist_ok=True)
+    timestamp = datetime.date.today().isoformat()
+    path = os.path.join(directory, f"{label}-{timestamp}-ids.json")
+    ids = []
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            ids = json.load(f)
+    known = set(ids)
+    ids.extend(doc_id for doc_id in uploaded_ids if doc_id not in known)
+    with atomic_write(path) as f:
+        f.write(json.dumps(ids, indent=2))
+    return path
+
+
+def write_rollback_files(directory, uploaded_ids, topics):
+    """One rollback file per topic that had questions uploaded. Returns the paths."""
+    by_topic = {}
+    for doc_id in uploaded_ids:
+        by_topic.setdefault(topics[doc_id], []).append(doc_id)
+    return [write_rollback_file(directory, topic, ids) for topic, ids in sorted(by_topic.items())]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Upload only new or changed questions.')
+    parser.add_argument('files', nargs='*', help='question files to upload')
+    parser.add_argument('--target', default='firestore', help='firestore (default) or local:DIR')
+    parser.add_argument('--collection', default=DEFAULT_COLLECTION)
+    parser.add_argument('--project', default=DEFAULT_PROJECT, help='project id for the emulator')
+    parser.add_argument('--snapshot', help='snapshot path (default: uploads/<collection>-snapshot.json)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='concurrent batch commits')
+    parser.add_argument('--dry-run', action='store_true', help='list what would be uploaded')
+    parser.add_argument('--refresh-snapshot', action='store_true',
+                        help='rebuild the snapshot by hashing every document in the target first')
+    parser.add_argument('--trace', action='store_true', help='record stage timings under .cache/traces')
+    args = parser.parse_args(argv)
+    tracer = Tracer('upload_questions', enabled=args.trace)
+
+    if not 1 <= args.batch_size <= MAX_BATCH_SIZE:
+        parser.error(f"--batch-size must be between 1 and {MAX_BATCH_SIZE}")
+    if not args.files and not args.refresh_snapshot:
+        parser.error('give question files to upload, or --refresh-snapshot')
+    paths = [os.path.abspath(f) for f in args.files]
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        print(f"ERROR: Questions file not found: {', '.join(missing)}", file=sys.stderr)
+        return 1
+
+    try:
+        target = make_target(args.target, args.collection, args.project)
+    except UploadError as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+
+    with tracer.stage('load-snapshot') as stage:
+        snapshot = Snapshot(args.snapshot or os.path.join(UPLOADS_DIR, target.snapshot_name))
+        stage.processed = len(snapshot.hashes)
+    print('======================================================')
+    print(' DELTA UPLOAD')
+    print('======================================================\n')
+    print(f"Target:   {target.description}")
+    print(f"Snapshot: {relpath(snapshot.path)} ({len(snapshot.hashes)} documents)")
+    if snapshot.recovered:
+        print(f"↻ Resumed: {snapshot.recovered} writes recovered from an interrupted run")
+
+    if args.refresh_snapshot:
+        with tracer.stage('refresh-snapshot') as stage:
+            snapshot.replace(target.fetch_hashes())
+            snapshot.save()
+            stage.processed = len(snapshot.hashes)
+        print(f"✓ Snapshot refreshed from target: {len(snapshot.hashes)} documents")
+        if not paths:
+            tracer.finish()
+            return 0
+
+    try:
+        with tracer.stage('upload', files=len(paths), dryRun=args.dry_run) as stage:
+            stats = upload(paths, target, snapshot, batch_size=args.batch_size, workers=args.workers,
+                           dry_run=args.dry_run)
+            stage.processed = len(stats['uploaded'])
+            stage.skipped = stats['unchanged'] + stats['skipped_no_id']
+            stage.failed = stats['changed'] - len(stats['uploaded']) if not args.dry_run else 0
+            stage.attrs.update(batches=stats['batches'], failedBatches=stats['failed_batches'])
+    except UploadError as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        snapshot.save()
+        tracer.finish()
+        return 1
+
+    print(f"\nQuestions: {stats['total']}  unchanged: {stats['unchanged']}  new/changed: {stats['changed']}")
+    if stats['skipped_no_id']:
+        print(f"⚠️  Skipped {stats['skipped_no_id']} questions without a questionId")
+
+    if args.dry_run:
+        for doc_id in stats['pending']:
+            print(f"  would upload {doc_id}")
+        tracer.finish()
+        return 0
+
+    with tracer.stage('save-snapshot'):
+        snapshot.save()
+    if stats['uploaded']:
+        for rollback in write_rollback_files(os.path.dirname(snapshot.path), stats['uploaded'], stats['topics']):
+            print(f"Rollback file saved: {relpath(rollback)}")
+
+    print('\n======================================================')
+    print(f" Uploaded {len(stats['uploaded'])} questions in {stats['batches']} batches")
+    if stats['failed_batches']:
+        print(f" ❌ {stats['failed_batches']} batches failed - re-run to retry them")
+    print('======================================================\n')
+    tracer.finish()
+    return 1 if stats['failed_batches'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -148,8 +148,8 @@ function validateContent(question) {
   const latexPatterns = [/\$[^$]+\$/g, /\$\$[^$]+\$\$/g];
   const content = [question.stem, question.solution].filter(Boolean).join(' ');
 
-  // Check for unmatched $ signs
-  const dollarCount = (content.match(/\$/g) || []).length;
+  // Check for unmatched $ signs; an escaped \$ is a literal dollar sign (money)
+  const dollarCount = (content.replace(/\\\$/g, '').match(/\$/g) || []).length;
   if (dollarCount % 2 !== 0) {
     issues.push({ severity: 'error', message: 'Unmatched $ in LaTeX equation', field: 'content' });
   }
@@ -0,0 +1,566 @@
+#!/usr/bin/env python3
+"""
+4-Layer Validation Pipeline for BrainSpark Questions (corpus-wide).
+
+Python port of validate-questions.js: the same schema, content, pedagogy and
+presentation layers, and the same results.summary / layers / distributions
+report, but run over any number of files at once. Files are validated in a
+process pool and each file's result is cached by content hash, so re-runs
+only touch files that changed.
+
+Differences from the Node script, both driven by what is now in the corpus:
+  * WORKED_SOLUTION and multiple-choice are accepted question types.
+  * NSW Selective MCQs (those with an nswSelective block) expect 5 options.
+  * buildsOn references are resolved against every question in the run,
+    not just the current file.
+
+Usage:
+  python3 validate_questions.py                       # whole corpus
+  python3 validate_questions.py questions/qa1-complete.json --report out.json
+  python3 validate_questions.py --trace               # stage timings (see pipeline_trace.py)
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from pipeline_trace import Tracer
+from question_files import (
+    CACHE_DIR, QUESTIONS_DIR, SCRIPTS_DIR, QuestionFileError, QuestionStream, atomic_write,
+    discover_question_files, file_sha256, question_hash, relpath,
+)
+
+# Bump when a rule changes so cached results are not reused.
+RULES_VERSION = 2
+CACHE_PATH = os.path.join(CACHE_DIR, 'validation')
+DEFAULT_REPORT = os.path.join(QUESTIONS_DIR, 'validation-report.json')
+
+LAYERS = ('schema', 'content', 'pedagogy', 'presentation')
+
+# ============================================
+# RULES (compiled once per process)
+# ============================================
+REQUIRED_FIELDS = ('questionId', 'questionType', 'stem', 'solution', 'hints', 'difficulty',
+                   'curriculum', 'status')
+VALID_TYPES = frozenset(['MCQ', 'SHORT_ANSWER', 'EXTENDED_RESPONSE', 'WORKED_SOLUTION',
+                         'short-answer', 'explanation', 'multiple-choice'])
+MCQ_OPTION_COUNT = 4
+NSW_SELECTIVE_OPTION_COUNT = 5
+
+ADVANCED_VOCAB = ('entropy', 'enthalpy', 'intermolecular', 'thermodynamic', 'exothermic',
+                  'endothermic')
+EXPLANATION_MARKERS = ('because', 'This is', 'explains', '**')
+
+EQUATION = re.compile(r'\$[^$]+\$')
+
+
+def _missing(value):
+    """JavaScript falsiness: the Node validator tests fields with `!value`."""
+    if value is None or value is False or value == '':
+        return True
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value == 0
+
+
+def _issue(severity, message, field, **extra):
+    issue = {'severity': severity, 'message': message, 'field': field}
+    issue.update(extra)
+    return issue
+
+
+# ============================================
+# LAYER 1: SCHEMA VALIDATION
+# ============================================
+def validate_schema(question, index=0):
+    issues = []
+
+    for field in REQUIRED_FIELDS:
+        if _missing(question.get(field)):
+            issues.append(_issue('error', f"Missing required field '{field}'", field))
+
+    question_type = question.get('questionType')
+    if question_type and question_type not in VALID_TYPES:
+        issues.append(_issue('error', f"Invalid questionType '{question_type}'", 'questionType'))
+
+    if question_type == 'MCQ':
+        options = question.get('mcqOptions')
+        if not options:
+            issues.append(_issue('error', 'MCQ missing mcqOptions', 'mcqOptions'))
+        else:
+            expected = NSW_SELECTIVE_OPTION_COUNT if question.get('nswSelective') else MCQ_OPTION_COUNT
+            if len(options) != expected:
+                issues.append(_issue('error', f"mcqOptions has {len(options)} items, expected {expected}",
+                                     'mcqOptions'))
+            correct_count = sum(1 for o in options if o.get('isCorrect'))
+            if correct_count != 1:
+                issues.append(_issue('error', f"MCQ has {correct_count} correct answers, expected exactly 1",
+                                     'mcqOptions'))
+            for i, option in enumerate(options):
+                if _missing(option.get('id')) or _missing(option.get('text')):
+                    issues.append(_issue('error', f"Option {i + 1} missing id or text", 'mcqOptions'))
+                if 'isCorrect' not in option:
+                    issues.append(_issue('warning', f"Option {option.get('id')} missing isCorrect field",
+                                         'mcqOptions'))
+
+    hints = question.get('hints')
+    if isinstance(hints, list):
+        if len(hints) < 2:
+            issues.append(_issue('warning', f"Only {len(hints)} hints, recommend 2-3", 'hints'))
+        for i, hint in enumerate(hints):
+            if not isinstance(hint, dict) or (_missing(hint.get('content')) and _missing(hint.get('level'))):
+                issues.append(_issue('error', f"Hint {i + 1} missing content or level", 'hints'))
+
+    difficulty = question.get('difficulty')
+    if isinstance(difficulty, (int, float)) and difficulty and (difficulty < 1 or difficulty > 5):
+        issues.append(_issue('error', f"Difficulty {difficulty} outside range 1-5", 'difficulty'))
+
+    curriculum = question.get('curriculum')
+    if isinstance(curriculum, dict):
+        if not curriculum.get('codes'):
+            issues.append(_issue('warning', 'No curriculum codes specified', 'curriculum'))
+        if _missing(curriculum.get('year')):
+            issues.append(_issue('warning', 'No year level specified', 'curriculum'))
+
+    arc = question.get('learningArc')
+    if isinstance(arc, dict):
+        if _missing(arc.get('phase')):
+            issues.append(_issue('warning', 'No learning arc phase specified', 'learningArc'))
+        if not arc.get('conceptsUsed'):
+            issues.append(_issue('warning', 'No concepts specified in learning arc', 'learningArc'))
+
+    return issues
+
+
+# ============================================
+# LAYER 2: CONTENT VALIDATION
+# ============================================
+def _text(question):
+    return ' '.join(v for v in (question.get('stem'), question.get('solution')) if isinstance(v, str) and v)
+
+
+def validate_content(question):
+    issues = []
+
+    stem = question.get('stem')
+    if isinstance(stem, str) and stem:
+        if len(stem) < 20:
+            issues.append(_issue('warning', f"Stem too short ({len(stem)} chars)", 'stem'))
+        if len(stem) > 2000:
+            issues.append(_issue('warning', f"Stem very long ({len(stem)} chars)", 'stem'))
+
+    solution = question.get('solution')
+    if isinstance(solution, str) and solution and len(solution) < 50:
+        issues.append(_issue('warning', f"Solution too brief ({len(solution)} chars)", 'solution'))
+
+    content = _text(question)
+    # An escaped \$ is a literal dollar sign (money), not a math delimiter
+    if content.replace('\\$', '').count('$') % 2 != 0:
+        issues.append(_issue('error', 'Unmatched $ in LaTeX equation', 'content'))
+    if content.count('{') != content.count('}'):
+        issues.append(_issue('warning', 'Possible unclosed braces in content', 'content'))
+
+    if '|' in content:
+        for i, line in enumerate(content.split('\n')):
+            if '|' in line and line.strip().startswith('|') and line.count('|') < 2:
+                issues.append(_issue('warning', f"Table row may be malformed at line {i}", 'content'))
+
+    for option in question.get('mcqOptions') or []:
+        feedback = option.get('feedback')
+        if not feedback or len(feedback) < 10:
+            issues.append(_issue('warning', f"Option {option.get('id')} feedback too brief", 'mcqOptions'))
+
+    return issues
+
+
+# ============================================
+# LAYER 3: PEDAGOGICAL VALIDATION
+# ============================================
+def validate_pedagogy(question):
+    """Everything except buildsOn, which needs the whole run (see resolve_builds_on)."""
+    issues = []
+    content = _text(question).lower()
+
+    for word in ADVANCED_VOCAB:
+        if word in content:
+            issues.append(_issue('warning', f"Vocabulary '{word}' may be advanced for Year 8", 'vocabulary',
+                                 autoFixable=False))
+
+    hints = question.get('hints')
+    if isinstance(hints, list) and len(hints) >= 2:
+        first = hints[0] if isinstance(hints[0], dict) else {}
+        hint1 = (first.get('content') or '').lower()
+        if question.get('questionType') == 'MCQ' and question.get('mcqOptions'):
+            correct = next((o for o in question['mcqOptions'] if o.get('isCorrect')), None)
+            if correct and (correct.get('text') or '').lower()[:20] in hint1:
+                issues.append(_issue('warning', 'Hint 1 may reveal the correct answer', 'hints'))
+
+    solution = question.get('solution')
+    if isinstance(solution, str) and solution:
+        explained = any(marker in solution for marker in EXPLANATION_MARKERS) or len(solution) > 200
+        if not explained:
+            issues.append(_issue('warning', 'Solution may not explain reasoning fully', 'solution'))
+
+    arc = question.get('learningArc')
+    if isinstance(arc, dict):
+        phase = arc.get('phase')
+        difficulty = question.get('difficulty')
+        if isinstance(difficulty, (int, float)):
+            if phase == 1 and difficulty > 3:
+                issues.append(_issue('warning', f"Phase 1 question has high difficulty ({difficulty})",
+                                     'learningArc'))
+            if phase == 4 and difficulty < 3:
+                issues.append(_issue('warning', f"Phase 4 question has low difficulty ({difficulty})",
+                                     'learningArc'))
+
+    return issues
+
+
+def builds_on_refs(question):
+    arc = question.get('learningArc')
+    refs = arc.get('buildsOn') if isinstance(arc, dict) else None
+    return [ref for ref in refs or [] if ref != '']
+
+
+def resolve_builds_on(refs, known_ids):
+    return [_issue('warning', f"buildsOn reference '{ref}' not found", 'learningArc')
+            for ref in refs if ref not in known_ids]
+
+
+# ============================================
+# LAYER 4: PRESENTATION VALIDATION
+# ============================================
+def validate_presentation(question):
+    issues = []
+    content = question.get('stem') or ''
+    if not isinstance(content, str):
+        return issues
+
+    if any(len(word) > 30 for word in content.split(' ')):
+        issues.append(_issue('warning', 'Contains very long words that may overflow on mobile', 'presentation'))
+
+    if '|' in content:
+        table_lines = [l for l in content.split('\n') if '|' in l and l.strip().startswith('|')]
+        if table_lines:
+            columns = table_lines[0].count('|') - 1
+            if columns > 5:
+                issues.append(_issue('warning', f"Table has {columns} columns, may not fit mobile screens",
+                                     'presentation'))
+
+    for equation in EQUATION.findall(content):
+        if len(equation) > 100:
+            issues.append(_issue('warning', 'Long equation may need wrapping for mobile', 'presentation'))
+
+    return issues
+
+
+# ============================================
+# PER-QUESTION / PER-FILE
+# ============================================
+def validate_question(question, index=0):
+    """Run all four layers. buildsOn refs are returned unresolved under 'buildsOn'."""
+    return {
+        'questionId': question.get('questionId'),
+        'schema': validate_schema(question, index),
+        'content': validate_content(question),
+        'pedagogy': validate_pedagogy(question),
+        'presentation': validate_presentation(question),
+        'buildsOn': builds_on_refs(question),
+    }
+
+
+def _distribution_keys(question):
+    pedagogy = question.get('pedagogy')
+    arc = question.get('learningArc')
+    return {
+        'questionTypes': question.get('questionType') or 'unknown',
+        'pedagogy': (pedagogy.get('type') if isinstance(pedagogy, dict) else None) or 'unknown',
+        'difficulty': question.get('difficulty') or 0,
+        'phases': (arc.get('phase') if isinstance(arc, dict) else None) or 0,
+    }
+
+
+def validate_questions(questions, cache=None):
+    """
+    Validate an iterable of questions. Returns the cacheable per-file result.
+
+    `cache` ({question_hash: result}) is for long-running callers: questions
+    whose content is already in it are not validated again, and get back the
+    very same result object.
+    """
+    results = []
+    distributions = {name: defaultdict(int) for name in ('questionTypes', 'pedagogy', 'difficulty', 'phases')}
+    for index, question in enumerate(questions):
+        for name, key in _distribution_keys(question).items():
+            distributions[name][str(key)] += 1
+        if cache is None:
+            result = validate_question(question, index)
+        else:
+            key = question_hash(question)
+            result = cache.get(key)
+            if result is None:
+                result = cache[key] = validate_question(question, index)
+        if not result['questionId']:
+            result['questionId'] = f"Q{index + 1}"
+        results.append(result)
+    return {
+        'questions': results,
+        'distributions': {name: dict(counts) for name, counts in distributions.items()},
+    }
+
+
+def validate_file(path):
+    """Worker entry point: stream one file through every layer."""
+    try:
+        result = validate_questions(record.question for record in QuestionStream(path))
+        result['error'] = None
+    except QuestionFileError as e:
+        result = {'questions': [], 'distributions': {}, 'error': str(e)}
+    return result
+
+
+def _cache_file(digest):
+    return os.path.join(CACHE_PATH, f"v{RULES_VERSION}-{digest}.json")
+
+
+def _load_cached(digest):
+    try:
+        with open(_cache_file(digest), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _store_cached(digest, result):
+    os.makedirs(CACHE_PATH, exist_ok=True)
+    with atomic_write(_cache_file(digest)) as f:
+        json.dump(result, f, ensure_ascii=False, separators=(',', ':'))
+
+
+def run(paths, jobs=None, use_cache=True):
+    """
+    Validate `paths` in parallel. Returns (file_results, cache_hits) where
+    file_results is a list of (relpath, result) in input order.
+    """
+    digests = {path: file_sha256(path) for path in paths}
+    results = {}
+    pending = []
+    for path in paths:
+        cached = _load_cached(digests[path]) if use_cache else None
+        if cached is not None:
+            results[path] = cached
+        else:
+            pending.append(path)
+    cache_hits = len(paths) - len(pending)
+
+    if len(pending) > 1 and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            fresh = list(pool.map(validate_file, pending, chunksize=max(1, len(pending) // 64)))
+    else:
+        fresh = [validate_file(path) for path in pending]
+
+    for path, result in zip(pending, fresh):
+        results[path] = result
+        if use_cache and not result['error']:
+            _store_cached(digests[path], result)
+
+    return [(relpath(path), results[path]) for path in paths], cache_hits
+
+
+# ============================================
+# REPORT
+# ============================================
+def build_report(file_results):
+    """Fold per-file results into the validate-questions.js report shape."""
+    report = {
+        'summary': {'totalQuestions': 0, 'passed': 0, 'warnings': 0, 'errors': 0, 'status': 'UNKNOWN'},
+        'layers': {
+            'schema': {'passed': 0, 'failed': 0, 'issues': []},
+            'content': {'passed': 0, 'failed': 0, 'issues': []},
+            'pedagogy': {'passed': 0, 'warnings': 0, 'issues': []},
+            'presentation': {'passed': 0, 'failed': 0, 'issues': []},
+        },
+        'distributions': {'questionTypes': {}, 'pedagogy': {}, 'difficulty': {}, 'phases': {}},
+        'humanReviewFlags': [],
+        'files': {},
+    }
+    summary = report['summary']
+    layers = report['layers']
+    known_ids = {q['questionId'] for _, result in file_results for q in result['questions']}
+
+    for path, result in file_results:
+        file_summary = {'questions': len(result['questions']), 'errors': 0, 'warnings': 0}
+        if result.get('error'):
+            file_summary['loadError'] = result['error']
+            summary['errors'] += 1
+        for name, counts in result['distributions'].items():
+            target = report['distributions'][name]
+            for key, count in counts.items():
+                target[key] = target.get(key, 0) + count
+
+        for question in result['questions']:
+            summary['totalQuestions'] += 1
+            qid = question['questionId']
+            pedagogy = question['pedagogy'] + resolve_builds_on(question['buildsOn'], known_ids)
+            for layer in LAYERS:
+                issues = pedagogy if layer == 'pedagogy' else question[layer]
+                stats = layers[layer]
+                has_error = any(i['severity'] == 'error' for i in issues)
+                if layer == 'pedagogy':
+                    if issues:
+                        stats['warnings'] += len(issues)
+                    else:
+                        stats['passed'] += 1
+                elif layer == 'presentation':
+                    if issues:
+                        stats['failed'] += sum(1 for i in issues if i['severity'] == 'error')
+                    else:
+                        stats['passed'] += 1
+                elif has_error:
+                    stats['failed'] += 1
+                else:
+                    stats['passed'] += 1
+
+                for issue in issues:
+                    stats['issues'].append({'questionId': qid, 'file': path, **issue})
+                    if issue['severity'] == 'error' and layer != 'pedagogy':
+                        summary['errors'] += 1
+                        file_summary['errors'] += 1
+                    else:
+                        summary['warnings'] += 1
+                        file_summary['warnings'] += 1
+        report['files'][path] = file_summary
+
+    summary['passed'] = summary['totalQuestions'] - summary['errors']
+    if summary['errors'] > 0:
+        summary['status'] = 'FAILED'
+    elif summary['warnings'] > 5:
+        summary['status'] = 'NEEDS_REVIEW'
+    else:
+        summary['status'] = 'PASSED'
+    return report
+
+
+def exit_code(report):
+    summary = report['summary']
+    return 2 if summary['errors'] > 0 else 1 if summary['warnings'] > 5 else 0
+
+
+def print_report(report, file_count, cache_hits):
+    summary = report['summary']
+    layers = report['layers']
+
+    def severity_count(layer, severity):
+        return sum(1 for i in layers[layer]['issues'] if i['severity'] == severity)
+
+    print('\n' + '═' * 60)
+    print('  📋 BRAINSPARK QUESTION VALIDATION PIPELINE')
+    print('═' * 60 + '\n')
+    print(f"📄 Files: {file_count} ({cache_hits} cached)")
+    print(f"📊 Questions: {summary['totalQuestions']}\n")
+
+    titles = {'schema': 'SCHEMA', 'content': 'CONTENT', 'pedagogy': 'PEDAGOGICAL', 'presentation': 'PRESENTATION'}
+    for number, layer in enumerate(LAYERS, start=1):
+        print('━' * 60)
+        print(f"  LAYER {number}: {titles[layer]} VALIDATION")
+        print('━' * 60)
+        print(f"  ✅ Passed: {layers[layer]['passed']}")
+        if layer == 'pedagogy':
+            print(f"  ⚠️  Warnings: {layers[layer]['warnings']}\n")
+        else:
+            print(f"  ❌ Errors: {severity_count(layer, 'error')}")
+            print(f"  ⚠️  Warnings: {severity_count(layer, 'warning')}\n")
+
+    icon = {'PASSED': '✅', 'NEEDS_REVIEW': '⚠️'}.get(summary['status'], '❌')
+    print('═' * 60)
+    print('  📊 VALIDATION SUMMARY')
+    print('═' * 60)
+    print(f"  Total Questions: {summary['totalQuestions']}")
+    print(f"  Passed:          {summary['passed']}")
+    print(f"  Errors:          {summary['errors']}")
+    print(f"  Warnings:        {summary['warnings']}")
+    print(f"  Status:          {icon} {summary['status']}")
+
+    print('\n' + '━' * 60)
+    print('  📈 DISTRIBUTIONS')
+    print('━' * 60)
+    for title, name, label in (('Question Types', 'questionTypes', ''), ('Pedagogy Types', 'pedagogy', ''),
+                               ('Difficulty Levels', 'difficulty', 'Level '), ('Phases', 'phases', 'Phase ')):
+        print(f"\n  {title}:")
+        items = report['distributions'][name].items()
+        if label:
+            items = sorted(items, key=lambda item: float(item[0]) if item[0].replace('.', '', 1).isdigit() else 0)
+        for key, count in items:
+            print(f"    {label}{key}: {count}")
+
+    all_issues = [i for layer in LAYERS for i in layers[layer]['issues']]
+    errors = [i for i in all_issues if i['severity'] == 'error']
+    load_errors = {p: f['loadError'] for p, f in report['files'].items() if f.get('loadError')}
+    if errors or load_errors:
+        print('\n' + '━' * 60)
+        print('  ❌ ERRORS TO FIX')
+        print('━' * 60)
+        for path, error in load_errors.items():
+            print(f"  [{path}] {error}")
+        for issue in errors[:50]:
+            print(f"  [{issue['questionId']}] {issue['message']}")
+        if len(errors) > 50:
+            print(f"  ... and {len(errors) - 50} more (see report)")
+
+    warnings = [i for i in all_issues if i['severity'] == 'warning']
+    if warnings:
+        print('\n' + '━' * 60)
+        print(f"  ⚠️  SAMPLE WARNINGS (showing {min(10, len(warnings))} of {len(warnings)})")
+        print('━' * 60)
+        for issue in warnings[:10]:
+            print(f"  [{issue['questionId']}] {issue['message']}")
+
+    print('\n' + '═' * 60 + '\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Validate question files (4-layer pipeline).')
+    parser.add_argument('files', nargs='*', help='question files (default: whole corpus)')
+    parser.add_argument('--report', default=DEFAULT_REPORT, help='where to write the JSON report')
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--no-cache', action='store_true', help='ignore and do not write cached results')
+    parser.add_argument('--quiet', action='store_true', help='only print the summary line')
+    parser.add_argument('--trace', action='store_true', help='record stage timings under .cache/traces')
+    args = parser.parse_args(argv)
+    tracer = Tracer('validate_questions', enabled=args.trace)
+
+    paths = [os.path.abspath(os.path.join(SCRIPTS_DIR, f) if not os.path.isabs(f) and not os.path.exists(f)
+                             else f) for f in args.files] or discover_question_files()
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        print(f"❌ Failed to load questions file: {', '.join(missing)}", file=sys.stderr)
+        return 2
+
+    with tracer.stage('validate', files=len(paths)) as stage:
+        file_results, cache_hits = run(paths, jobs=args.jobs, use_cache=not args.no_cache)
+        stage.attrs['cacheHits'] = cache_hits
+        stage.processed = sum(len(result['questions']) for _, result in file_results)
+        stage.failed = sum(1 for _, result in file_results if result['error'])
+    with tracer.stage('report') as stage:
+        report = build_report(file_results)
+        stage.processed = report['summary']['totalQuestions']
+        stage.failed = len({(i['file'], i['questionId']) for name, layer in report['layers'].items()
+                            if name != 'pedagogy' for i in layer['issues'] if i['severity'] == 'error'})
+    if args.quiet:
+        s = report['summary']
+        print(f"{s['status']}: {s['totalQuestions']} questions, {s['errors']} errors, {s['warnings']} warnings")
+    else:
+        print_report(report, len(paths), cache_hits)
+
+    with tracer.stage('write-report'), atomic_write(args.report) as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    if not args.quiet:
+        print(f"📄 Full report saved to: {args.report}\n")
+    tracer.finish()
+    return exit_code(report)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Watch the question bank and revalidate on save.
+
+Loads the corpus once, then watches questions/, the top-level year8-*.json
+files, the set files topic manifests build from, and topics/ itself. On every
+save:
+
+  1. only the touched file is re-parsed;
+  2. only questions whose content changed are validated again (results are
+     kept by content hash, so a question copied into a complete file is
+     validated once);
+  3. buildsOn references are resolved against the whole in-memory corpus;
+  4. with --merge, topics that build from the file are re-merged
+     (merge_sets.py reuses the byte spans of every other set), then topics
+     built from those. Only targets whose last recorded build is still what
+     is on disk are merged; anything else is left for build_topics.py. A
+     save that adds errors holds back the topics built from it, and says
+     which; errors the file already had do not;
+  5. the corpus index (.cache/corpus-index.sqlite) is updated for the
+     touched and merged files, and with --chat-index the concept-chat index
+     is rebuilt from its cached per-topic segments.
+
+Errors and warnings for the changed questions are printed as soon as the
+save lands. Linux inotify is used when available (through libc, no extra
+packages); elsewhere, or with --poll, files are polled by mtime and size.
+
+Usage:
+  python3 watch_questions.py
+  python3 watch_questions.py --merge --chat-index --report questions/validation-report.json
+  python3 watch_questions.py --poll --interval 0.5
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import time
+
+from build_chat_index import DEFAULT_INDEX as CHAT_INDEX
+from build_chat_index import build as build_chat_index
+from build_topics import TOPICS_DIR, BuildError, load_topics, untrusted_record
+from corpus_index import INDEX_PATH, CorpusIndex
+from merge_sets import MergeError, load_manifest, merge, save_manifest
+from question_files import (
+    NON_QUESTION_FILES, QUESTIONS_DIR, SCRIPTS_DIR, QuestionFileError, QuestionStream, atomic_write,
+    discover_question_files, file_sha256, relpath,
+)
+from validate_questions import LAYERS, build_report, resolve_builds_on, validate_questions
+
+DEBOUNCE_SECONDS = 0.05
+POLL_INTERVAL = 1.0
+MAX_ISSUES_SHOWN = 15
+
+
+# ============================================
+# WATCHERS
+# ============================================
+class InotifyWatcher:
+    """Directory watches through libc inotify. Raises OSError where inotify is unavailable."""
+
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_Q_OVERFLOW = 0x4000
+    IN_ISDIR = 0x40000000
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    _EVENT = struct.Struct('iIII')
+
+    def __init__(self, directories, recursive=()):
+        if not sys.platform.startswith('linux'):
+            raise OSError('inotify needs Linux')
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.dirs = {}
+        self.recursive = {os.path.abspath(d) for d in recursive}
+        for directory in directories:
+            self._add(os.path.abspath(directory))
+
+    def _add(self, directory):
+        if not os.path.isdir(directory):
+            return
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"cannot watch {directory}")
+        self.dirs[wd] = directory
+        if any(directory == root or directory.startswith(root + os.sep) for root in self.recursive):
+            for entry in os.scandir(directory):
+                if entry.is_dir() and not entry.name.startswith('.'):
+                    self._add(entry.path)
+
+    def _drain(self):
+        """Paths named by pending events; None when the kernel queue overflowed."""
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = self._EVENT.unpack_from(data, offset)
+                offset += self._EVENT.size
+                name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'replace')
+                offset += length
+                if mask & self.IN_Q_OVERFLOW:
+                    return None
+                directory = self.dirs.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, name)
+                if mask & self.IN_ISDIR:
+                    if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                        self._add(path)
+                        changed.update(os.path.join(root, f) for root, _, files in os.walk(path) for f in files)
+                    continue
+                if mask & self.IN_CREATE:
+                    continue    # the write that follows reports it once the file is complete
+                changed.add(path)
+
+    def changes(self, timeout=None):
+        """Block until something changes; returns the changed paths (None means rescan everything)."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = self._drain()
+        # Editors save in bursts (write, rename, chmod); take the whole burst at once.
+        while changed is not None and select.select([self.fd], [], [], DEBOUNCE_SECONDS)[0]:
+            more = self._drain()
+            changed = None if more is None else changed | more
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Portable fallback: compares mtime and size of the watched files every `interval` seconds."""
+
+    def __init__(self, list_files, interval=POLL_INTERVAL):
+        self.list_files = list_files
+        self.interval = interval
+        self.state = self._snapshot()
+
+    def _snapshot(self):
+        state = {}
+        for path in self.list_files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            state[path] = (stat.st_mtime_ns, stat.st_size)
+        return state
+
+    def changes(self, timeout=None):
+        time.sleep(self.interval if timeout is None else min(self.interval, timeout))
+        current = self._snapshot()
+        changed = {p for p in current.keys() | self.state.keys() if current.get(p) != self.state.get(p)}
+        self.state = current
+        return changed
+
+    def close(self):
+        pass
+
+
+# ============================================
+# CORPUS
+# ============================================
+class Corpus:
+    """Every question file's validation result, kept current one file at a time."""
+
+    def __init__(self):
+        self.cache = {}         # question_hash -> validation result
+        self.files = {}         # path -> {'digest', 'result'}
+        self.topics = {}
+
+    def watched_files(self):
+        return discover_question_files()
+
+    def is_question_file(self, path):
+        if not path.endswith('.json') or NON_QUESTION_FILES.match(os.path.basename(path)):
+            return False
+        if path in self.files:
+            return True
+        name = os.path.basename(path)
+        return path.startswith(QUESTIONS_DIR + os.sep) or \
+            (os.path.dirname(path) == SCRIPTS_DIR and name.startswith('year8-')) or \
+            any(path in topic.sources for topic in self.topics.values())
+
+    def load_topics(self):
+        self.topics = load_topics()
+
+    def refresh(self, path):
+        """
+        Re-read `path` if its content changed. Returns (previous result, new
+        result), or None when the file is unchanged. A deleted file returns
+        (previous, None).
+        """
+        previous = self.files.get(path)
+        if not os.path.exists(path):
+            self.files.pop(path, None)
+            return (previous['result'], None) if previous else None
+        digest = file_sha256(path)
+        if previous and previous['digest'] == digest:
+            return None
+        try:
+            result = validate_questions((r.question for r in QuestionStream(path)), cache=self.cache)
+            result['error'] = None
+        except QuestionFileError as e:
+            result = {'questions': [], 'distributions': {}, 'error': str(e)}
+        self.files[path] = {'digest': digest, 'result': result}
+        return (previous['result'] if previous else None), result
+
+    def known_ids(self):
+        return {q['questionId'] for entry in self.files.values() for q in entry['result']['questions']}
+
+    def file_results(self):
+        return [(relpath(path), self.files[path]['result']) for path in sorted(self.files)]
+
+    def dependents(self, paths):
+        """Topics to re-merge, in build order, when `paths` change."""
+        changed = set(paths)
+        order = []
+        progress = True
+        while progress:
+            progress = False
+            for name, topic in sorted(self.topics.items()):
+                if name not in order and changed & set(topic.sources):
+                    order.append(name)
+                    changed.add(topic.target)
+                    progress = True
+        return order
+
+
+def changed_questions(previous, result):
+    """Results for questions that are new or whose content changed (cached results are shared objects)."""
+    before = {id(q) for q in previous['questions']} if previous else set()
+    return [q for q in result['questions'] if id(q) not in before]
+
+
+def question_issues(question, known_ids):
+    pedagogy = question['pedagogy'] + resolve_builds_on(question['buildsOn'], known_ids)
+    return [(layer, issue) for layer in LAYERS
+            for issue in (pedagogy if layer == 'pedagogy' else question[layer])]
+
+
+# ============================================
+# DAEMON
+# ============================================
+class Daemon:
+    def __init__(self, index_path=INDEX_PATH, chat_index=False, report=None, remerge=False):
+        self.corpus = Corpus()
+        self.index_path = index_path
+        self.chat_index = chat_index
+        self.report = report
+        self.remerge = remerge
+
+    def start(self):
+        started = time.perf_counter()
+        self.corpus.load_topics()
+        paths = self.corpus.watched_files()
+        for path in paths:
+            self.corpus.refresh(path)
+        with CorpusIndex(self.index_path) as index:
+            index.build()
+        report = build_report(self.corpus.file_results())
+        summary = report['summary']
+        print(f"✓ Loaded {summary['totalQuestions']} questions from {len(paths)} files "
+              f"({len(self.corpus.cache)} distinct) in {time.perf_counter() - started:.2f}s")
+        print(f"  {summary['errors']} errors, {summary['warnings']} warnings across the corpus")
+        self._write_report(report)
+
+    def handle(self, paths):
+        """Process one burst of changes."""
+        started = time.perf_counter()
+        paths = {os.path.abspath(p) for p in paths}
+        if any(os.path.dirname(p) == TOPICS_DIR for p in paths):
+            try:
+                self.corpus.load_topics()
+                print('↻ topics/ manifests reloaded')
+            except (BuildError, ValueError) as e:
+                print(f"❌ topics/: {e}")
+
+        touched, blocked = [], {}
+        for path in sorted(p for p in paths if self.corpus.is_question_file(p)):
+            change = self.corpus.refresh(path)
+            if change is None:
+                continue
+            touched.append(path)
+            new_errors = self._print_change(path, *change)
+            if new_errors:
+                blocked[path] = new_errors
+        if not touched:
+            return
+
+        merged = self._merge(touched, blocked) if self.remerge else []
+        self._update_indexes(touched + merged)
+        self._write_report()
+        print(f"  ⏱️  {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    def _print_change(self, path, previous, result):
+        """Print what changed in one file. Returns how many errors the save introduced."""
+        name = relpath(path)
+        if result is None:
+            print(f"\n🗑️  {name} removed")
+            return 0
+        if result['error']:
+            print(f"\n❌ {name}: {result['error']}")
+            return 0 if previous and previous['error'] else 1
+        fresh = changed_questions(previous, result)
+        known_ids = self.corpus.known_ids()
+        before = {(q['questionId'], layer, issue['message'])
+                  for q in (previous['questions'] if previous else [])
+                  for layer, issue in question_issues(q, known_ids)}
+        errors = warnings = new_errors = 0
+        lines = []
+        for question in fresh:
+            for layer, issue in question_issues(question, known_ids):
+                is_error = issue['severity'] == 'error' and layer != 'pedagogy'
+                errors += is_error
+                warnings += not is_error
+                new_errors += is_error and (question['questionId'], layer, issue['message']) not in before
+                lines.append(f"   {'❌' if is_error else '⚠️ '} {question['questionId']} [{layer}] {issue['message']}")
+        mark = '❌' if errors else '⚠️ ' if warnings else '✓'
+        already = f" ({errors - new_errors} already there)" if errors > new_errors else ''
+        print(f"\n{mark} {name}: {len(fresh)} of {len(result['questions'])} questions revalidated, "
+              f"{errors} errors{already}, {warnings} warnings")
+        for line in lines[:MAX_ISSUES_SHOWN]:
+            print(line)
+        if len(lines) > MAX_ISSUES_SHOWN:
+            print(f"   ... and {len(lines) - MAX_ISSUES_SHOWN} more")
+        return new_errors
+
+    def _merge(self, touched, blocked=None):
+        """
+        Re-merge topics built from the touched files, except those built from
+        a file in `blocked` ({path: new errors}). Returns the targets written.
+        """
+        held = {name: path for path in sorted(blocked or {}) for name in self.corpus.dependents([path])}
+        written = []
+        manifest = load_manifest()
+        for name in self.corpus.dependents(touched):
+            if name in held:
+                path = held[name]
+                print(f"  ⚠️  {name}: not re-merged ({relpath(path)} has {blocked[path]} new errors)")
+                continue
+            topic = self.corpus.topics[name]
+            reason = untrusted_record(topic, manifest)
+            if reason:
+                print(f"  ⚠️  {name}: not re-merged ({reason}); run build_topics.py {name}")
+                break
+            try:
+                summary = merge(topic.target, topic.sources, verbose=False, manifest=manifest,
+                                transform=topic.transform)
+            except (MergeError, OSError) as e:
+                print(f"  ❌ {name}: {e}")
+                break
+            save_manifest(manifest)
+            if summary['rebuilt']:
+                # The target's questions are copies of validated sources, so this is all cache hits.
+                self.corpus.refresh(topic.target)
+                written.append(topic.target)
+                print(f"  ⇢ {relpath(topic.target)} ({summary['questionCount']} questions, "
+                      f"{len(summary['rebuilt'])} sets re-read)")
+        return written
+
+    def _update_indexes(self, paths):
+        existing = [p for p in paths if os.path.exists(p)]
+        with CorpusIndex(self.index_path) as index:
+            # A deleted file is only pruned by a full pass, which stats every file but re-reads none.
+            index.build(None if len(existing) < len(paths) else existing)
+        if self.chat_index:
+            chat, rebuilt, _, errors = build_chat_index(discover_question_files(), jobs=1)
+            body = json.dumps(chat, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            with atomic_write(CHAT_INDEX, 'wb') as f:
+                f.write(body)
+            for error in errors:
+                print(f"  ❌ chat index: {error}")
+            if rebuilt:
+                print(f"  🔎 chat index: {', '.join(rebuilt)} re-tokenised")
+
+    def _write_report(self, report=None):
+        if not self.report:
+            return
+        report = report or build_report(self.corpus.file_results())
+        with atomic_write(self.report) as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    def watcher(self, poll=False, interval=POLL_INTERVAL):
+        if not poll:
+            try:
+                directories = {QUESTIONS_DIR, SCRIPTS_DIR, TOPICS_DIR}
+                directories.update(os.path.dirname(p) for t in self.corpus.topics.values() for p in t.sources)
+                return InotifyWatcher(sorted(directories), recursive=[QUESTIONS_DIR])
+            except (OSError, AttributeError) as e:
+                print(f"ℹ️  inotify unavailable ({e}); polling every {interval}s")
+        topic_manifests = lambda: [os.path.join(TOPICS_DIR, n) for n in os.listdir(TOPICS_DIR)] \
+            if os.path.isdir(TOPICS_DIR) else []
+        return PollingWatcher(lambda: self.corpus.watched_files() + topic_manifests(), interval)
+
+    def run(self, poll=False, interval=POLL_INTERVAL):
+        watcher = self.watcher(poll, interval)
+        print(f"👀 Watching {relpath(QUESTIONS_DIR)}/ and topic sources "
+              f"({type(watcher).__name__.replace('Watcher', '').lower()}); Ctrl-C to stop")
+        try:
+            while True:
+                changed = watcher.changes()
+                if changed is None:
+                    print('ℹ️  Too many changes at once; rescanning everything')
+                    changed = set(self.corpus.watched_files()) | set(self.corpus.files)
+                if changed:
+                    self.handle(changed)
+        except KeyboardInterrupt:
+            print('\n👋 Stopped')
+        finally:
+            watcher.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Watch question files and revalidate them on save.')
+    parser.add_argument('--poll', action='store_true', help='poll instead of using inotify')
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help='poll interval in seconds')
+    parser.add_argument('--index', default=INDEX_PATH, help='corpus index to keep current')
+    parser.add_argument('--chat-index', action='store_true',
+                        help=f"also keep {relpath(CHAT_INDEX)} current")
+    parser.add_argument('--report', help='rewrite this validation report after every change')
+    parser.add_argument('--merge', action='store_true',
+                        help='re-merge topics built from a saved file (targets with a current build record only)')
+    args = parser.parse_args(argv)
+
+    daemon = Daemon(args.index, chat_index=args.chat_index, report=args.report, remerge=args.merge)
+    try:
+        daemon.start()
+    except (BuildError, OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    daemon.run(poll=args.poll, interval=args.interval)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())